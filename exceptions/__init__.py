@@ -1,3 +1,3 @@
-from .vpn_exceptions import VPNError, NoVPNFilesFoundError, VPNConnectionError
-from .tool_exceptions import ToolError, ConfigFileNotFoundError, InvalidPresetError, ToolExecutionError
-from .scenario_exceptions import ScenarioError, ScenarioFileNotFoundError, InvalidScenarioStructureError, ScenarioExecutionError
+from .vpn_exceptions import VPNError, NoVPNFilesFoundError, VPNConnectionError, VPNTimeoutError
+from .tool_exceptions import ToolError, ConfigFileNotFoundError, InvalidPresetError, ToolExecutionError, InvalidConfigError
+from .scenario_exceptions import ScenarioError, ScenarioFileNotFoundError, InvalidScenarioStructureError, ScenarioExecutionError, ScenarioDependencyError
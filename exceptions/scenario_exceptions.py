@@ -16,3 +16,8 @@ class ScenarioExecutionError(ScenarioError):
     """Raised when a scenario task fails."""
     def __init__(self, task_name, error_message):
         super().__init__(f"Error executing task '{task_name}': {error_message}")
+
+class ScenarioDependencyError(ScenarioError):
+    """Raised when scenario task dependencies are invalid."""
+    def __init__(self, task_name, message):
+        super().__init__(f"Invalid dependencies for task '{task_name}': {message}")
@@ -15,4 +15,15 @@ class InvalidPresetError(ToolError):
 class ToolExecutionError(ToolError):
     """Raised when a tool execution fails."""
     def __init__(self, tool_name, message):
+        self.tool_name = tool_name
+        self.message = message
         super().__init__(f"Error executing tool '{tool_name}': {message}")
+
+    def __reduce__(self):
+        # Rebuilt from its arguments when sent back from a scheduler worker process
+        return self.__class__, (self.tool_name, self.message)
+
+class InvalidConfigError(ToolError):
+    """Raised when a tool's configuration file does not match the expected schema."""
+    def __init__(self, tool_name, message):
+        super().__init__(f"Configuration for tool '{tool_name}' is invalid: {message}")
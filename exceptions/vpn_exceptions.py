@@ -11,3 +11,8 @@ class VPNConnectionError(VPNError):
     """Raised when the VPN connection fails."""
     def __init__(self, message):
         super().__init__(f"VPN connection error: {message}")
+
+class VPNTimeoutError(VPNError):
+    """Raised when the VPN tunnel does not become ready in time."""
+    def __init__(self, timeout):
+        super().__init__(f"VPN connection was not ready after {timeout:.0f} seconds.")
@@ -1,15 +1,15 @@
-from scripts.setup import create_challenge
-from scripts.connect_vpn import connect_vpn
-from scripts.scenarios import list_scenarios, run_scenario, validate_scenarios
-from scripts.run_tool import run_tools_menu
-from scripts.utils import load_config
 import os
 import sys
+import argparse
 import subprocess
 
 # Add the project root to PYTHONPATH
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+# The scripts.* subsystems (and their dependencies such as jinja2, pdfkit and
+# asyncio) are imported where they are used so the menu and subcommands start
+# quickly; tests/test_startup.py enforces the startup budget.
+
 def check_and_install_requirements():
     """
     Checks if required dependencies are installed and installs them if not.
@@ -48,6 +48,14 @@ def check_and_install_requirements():
 
     print("System requirement check complete!")
 
+    # Compile the report templates now so the first report does not pay for it
+    try:
+        from scripts.report_engine import precompile_templates_command
+    except ImportError as e:
+        print(f"Skipping report template precompilation: {e}")
+    else:
+        precompile_templates_command()
+
 def main_menu():
     """
     Displays the main menu for the Ethical Hacking Tool.
@@ -84,14 +92,14 @@ def main_menu():
                 connect_vpn( challenge_path=challenge[1] )
                 
         elif choice == "3":
-            from scripts.scenarios import list_scenarios
-            list_scenarios()
+            from scripts.scenarios import run_scenario_menu
+            run_scenario_menu()
         elif choice == "4":
-            from scripts.run_tool import run_tool
-            run_tool()
+            from scripts.run_tool import run_tools_menu
+            run_tools_menu()
         elif choice == "5":
-            from scripts.report import generate_report
-            generate_report()
+            from scripts.report import generate_htb_report
+            generate_htb_report()
         elif choice == "6":
             from scripts.scenarios import validate_scenarios
             validate_scenarios()
@@ -101,5 +109,112 @@ def main_menu():
         else:
             print("Invalid choice. Please try again.")
 
+def parse_arguments(argv=None):
+    """
+    Parses the command-line options.
+
+    Args:
+        argv (list, optional): The arguments to parse. Defaults to sys.argv.
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description="Ethical Hacking Tool")
+    parser.add_argument("--no-cache", action="store_true", help="Re-run every tool instead of serving cached results.")
+    subcommands = parser.add_subparsers(dest="command")
+
+    batch = subcommands.add_parser("batch", help="Run a scenario against many targets.")
+    batch.add_argument("--targets", required=True, help="A target file, or comma-separated addresses and CIDR ranges.")
+    batch.add_argument("--scenario", required=True, help="The scenario name (e.g., recon).")
+    batch.add_argument("--prefix", default="batch", help="The prefix of the created challenge directories.")
+    batch.add_argument("--max-workers", type=int, default=None, help="The number of tasks running at once across all targets.")
+    batch.add_argument("--per-target", type=int, default=1, help="The number of tasks running at once against one target.")
+
+    search = subcommands.add_parser("search", help="Search every challenge's tool outputs, logs and metadata.")
+    search.add_argument("query", nargs="+", help="The words to find, e.g. 'apache 2.4.41 OR /backup'.")
+    search.add_argument("--challenge", help="Only search this challenge.")
+    search.add_argument("--limit", type=int, default=50, help="The maximum number of results.")
+    search.add_argument("--no-update", action="store_true", help="Search the index without indexing changed files first.")
+
+    exploits = subcommands.add_parser("exploits", help="Search the local exploit-db index, or import exploit-db's CSV into it.")
+    exploits.add_argument("terms", nargs="*", help="The service and version to look up, e.g. 'vsftpd 2.3.4'.")
+    exploits.add_argument("--import", dest="import_csv", nargs="?", const="", metavar="CSV",
+                          help="Import files_exploits.csv (defaults to exploit_db.csv in config/base.json).")
+
+    logs = subcommands.add_parser("logs", help="Query or follow a challenge's log.")
+    logs.add_argument("challenge", help="The challenge name or directory.")
+    logs.add_argument("--since", help="The earliest time: an ISO date/time or a relative time such as 15m, 2h or 1d.")
+    logs.add_argument("--until", help="The latest time, in the same formats as --since.")
+    logs.add_argument("--level", choices=("debug", "info", "warning", "error"), help="Only events at this level.")
+    logs.add_argument("--grep", help="Only events whose message contains this text.")
+    logs.add_argument("-f", "--follow", action="store_true", help="Keep printing new events as they are logged.")
+
+    payloads = subcommands.add_parser("payloads", help="Print encoded and mutated payload variants, e.g. as a fuzzer wordlist.")
+    payloads.add_argument("--category", help="Only payloads of this category (e.g., xss or sql-injection/auth_bypass).")
+    payloads.add_argument("--tag", action="append", default=[], help="Only payloads with this context tag (repeatable).")
+    payloads.add_argument("--encode", action="append", default=[], help="An encoding (repeatable). Defaults to raw.")
+    payloads.add_argument("--mutate", action="append", default=[], help="A mutation (repeatable). Defaults to none.")
+    payloads.add_argument("--limit", type=int, default=None, help="The maximum number of variants.")
+    payloads.add_argument("--output", help="The file to write. Defaults to stdout.")
+    payloads.add_argument("--list", action="store_true", help="List the categories, tags, encodings and mutations.")
+
+    fuzz = subcommands.add_parser("fuzz", help="Send payloads from the corpus into a request's FUZZ injection points.")
+    fuzz.add_argument("url", help="The URL, e.g. 'http://10.10.10.5/search?q=FUZZ'.")
+    fuzz.add_argument("-X", "--method", default="GET", help="The request method.")
+    fuzz.add_argument("-d", "--data", help="The request body, e.g. 'user=admin&pass=FUZZ'.")
+    fuzz.add_argument("-H", "--header", action="append", default=[], help="A 'Name: value' header (repeatable).")
+    fuzz.add_argument("--category", help="Only payloads of this category.")
+    fuzz.add_argument("--tag", action="append", default=[], help="Only payloads with this context tag (repeatable).")
+    fuzz.add_argument("--encode", action="append", default=[], help="A payload encoding (repeatable). Defaults to raw.")
+    fuzz.add_argument("--mutate", action="append", default=[], help="A payload mutation (repeatable). Defaults to none.")
+    fuzz.add_argument("--limit", type=int, default=None, help="The maximum number of payloads.")
+    fuzz.add_argument("--concurrency", type=int, default=None, help="The number of requests in flight at once.")
+    fuzz.add_argument("--output", help="A JSON lines file the printed results are appended to.")
+    fuzz.add_argument("--all", action="store_true", help="Print every response, not only those that stand out.")
+    fuzz.add_argument("--no-rate-limit", action="store_true", help="Send as fast as the target answers.")
+
+    subcommands.add_parser("precompile-templates", help="Compile the report templates into the bytecode cache.")
+
+    reports = subcommands.add_parser("reports", help="Generate the reports of many challenges, rendering PDFs in parallel.")
+    reports.add_argument("challenges", nargs="*", help="The challenge names. Defaults to every challenge.")
+    reports.add_argument("--audited-by", required=True, help="The auditor's name.")
+    reports.add_argument("--workers", type=int, default=None, help="The number of PDFs rendered at once.")
+    reports.add_argument("--renderer", choices=("pdfkit", "stub"), default=None, help="The PDF renderer.")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    main_menu()
+    args = parse_arguments()
+    if args.no_cache:
+        from scripts.result_cache import disable_cache
+        disable_cache()
+
+    if args.command == "batch":
+        from scripts.batch import run_batch
+        run_batch(args.scenario, args.targets, args.prefix, args.max_workers, args.per_target)
+    elif args.command == "search":
+        from scripts.search_index import run_search
+        run_search(" ".join(args.query), args.challenge, args.limit, update=not args.no_update)
+    elif args.command == "exploits":
+        from scripts.exploit_db import import_exploit_db_command, run_exploit_search
+        if args.import_csv is not None:
+            import_exploit_db_command(args.import_csv or None)
+        if args.terms:
+            run_exploit_search(" ".join(args.terms))
+    elif args.command == "logs":
+        from scripts.log_reader import run_log_query
+        run_log_query(args.challenge, args.since, args.until, args.level, args.grep, args.follow)
+    elif args.command == "payloads":
+        from scripts.payload_corpus import run_payloads
+        run_payloads(args.category, args.tag, args.encode or ["raw"], args.mutate or ["none"], args.limit, args.output, args.list)
+    elif args.command == "fuzz":
+        from scripts.http_fuzzer import run_fuzz
+        run_fuzz(args.url, args.method, args.data, args.header, args.category, args.tag, args.encode or ["raw"],
+                 args.mutate or ["none"], args.limit, args.concurrency, args.output, args.all, not args.no_rate_limit)
+    elif args.command == "precompile-templates":
+        from scripts.report_engine import precompile_templates_command
+        sys.exit(0 if precompile_templates_command() else 1)
+    elif args.command == "reports":
+        from scripts.report import generate_reports
+        generate_reports(args.challenges or None, args.audited_by, renderer=args.renderer, workers=args.workers)
+    else:
+        main_menu()
@@ -0,0 +1,173 @@
+import asyncio
+import time
+from collections import deque
+
+CHUNK_SIZE = 64 * 1024
+MAX_LINE_LENGTH = 64 * 1024
+TAIL_LINES = 200
+
+class StreamResult:
+    """
+    The outcome of a streamed tool run.
+
+    Only counters and a bounded tail of the output are kept in memory; the
+    full output lives in the output file.
+    """
+    def __init__(self, argv, tail_lines=TAIL_LINES):
+        self.argv = argv
+        self.returncode = None
+        self.lines = {"stdout": 0, "stderr": 0}
+        self.bytes = 0
+        self.tail = deque(maxlen=tail_lines)
+        self.duration = 0.0
+
+    @property
+    def succeeded(self):
+        return self.returncode == 0
+
+    def __repr__(self):
+        return f"StreamResult(argv={self.argv!r}, returncode={self.returncode}, lines={self.lines})"
+
+async def _pump(stream, name, output, handlers, result, max_line_length):
+    """
+    Reads a process stream chunk by chunk and dispatches complete lines.
+
+    Lines longer than `max_line_length` are truncated so a single runaway
+    line cannot grow the buffer without bound.
+    """
+    pending = b""
+    discarding = False
+    while True:
+        chunk = await stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        *lines, pending = (pending + chunk).split(b"\n")
+        if discarding and lines:
+            # The first line is the remainder of a line already emitted truncated
+            lines.pop(0)
+            discarding = False
+        if discarding:
+            pending = b""
+        elif len(pending) > max_line_length:
+            lines.append(pending[:max_line_length])
+            pending = b""
+            discarding = True
+        for raw in lines:
+            _dispatch(raw, name, output, handlers, result)
+        if output:
+            output.flush()
+    if pending and not discarding:
+        _dispatch(pending, name, output, handlers, result)
+        if output:
+            output.flush()
+
+def _dispatch(raw, name, output, handlers, result):
+    line = raw.rstrip(b"\r").decode("utf-8", errors="replace")
+    result.lines[name] += 1
+    result.bytes += len(raw) + 1
+    result.tail.append(line)
+    if output:
+        output.write(raw + b"\n")
+    for handler in handlers:
+        handler(name, line)
+
+async def stream_process(argv, output_path=None, handlers=None, stdin_feeder=None, cwd=None,
+                         tail_lines=TAIL_LINES, max_line_length=MAX_LINE_LENGTH):
+    """
+    Runs a command and streams its stdout and stderr line by line.
+
+    Every line is appended to the output file as soon as it is read and passed
+    to each handler, so results are usable while the tool is still running.
+
+    Args:
+        argv (list): The command and its arguments.
+        output_path (str, optional): The file the output is appended to.
+        handlers (list, optional): Callables invoked with the stream name
+            ('stdout' or 'stderr') and the decoded line.
+        stdin_feeder (callable, optional): A coroutine function called with the
+            process's stdin writer; stdin is closed when it returns.
+        cwd (str, optional): The working directory of the process.
+        tail_lines (int, optional): The number of trailing lines kept in memory.
+        max_line_length (int, optional): The length at which lines are truncated.
+
+    Returns:
+        StreamResult: The exit code, line counters and output tail.
+
+    Raises:
+        FileNotFoundError: If the executable does not exist.
+    """
+    handlers = handlers or []
+    result = StreamResult(argv, tail_lines)
+    started = time.perf_counter()
+
+    process = await asyncio.create_subprocess_exec(
+        *argv,
+        stdin=asyncio.subprocess.PIPE if stdin_feeder else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd
+    )
+
+    output = open(output_path, "ab") if output_path else None
+    try:
+        pumps = [
+            _pump(process.stdout, "stdout", output, handlers, result, max_line_length),
+            _pump(process.stderr, "stderr", output, handlers, result, max_line_length)
+        ]
+        if stdin_feeder:
+            pumps.append(_feed(process.stdin, stdin_feeder))
+        await asyncio.gather(*pumps)
+        result.returncode = await process.wait()
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    finally:
+        if output:
+            output.close()
+
+    result.duration = time.perf_counter() - started
+    return result
+
+async def _feed(stdin, stdin_feeder):
+    try:
+        await stdin_feeder(stdin)
+    except (BrokenPipeError, ConnectionResetError):
+        # The tool exited before consuming all of its input
+        pass
+    finally:
+        stdin.close()
+
+async def supervise(jobs, limit=32):
+    """
+    Runs many streamed commands concurrently from a single process.
+
+    Args:
+        jobs (list): Keyword argument dicts for `stream_process`.
+        limit (int, optional): The maximum number of processes running at once.
+
+    Returns:
+        list: The StreamResult (or raised exception) of each job, in order.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(job):
+        async with semaphore:
+            return await stream_process(**job)
+
+    return await asyncio.gather(*(run(job) for job in jobs), return_exceptions=True)
+
+def run_streaming(argv, output_path=None, handlers=None, **kwargs):
+    """
+    Synchronous wrapper around `stream_process` for callers outside an event loop.
+
+    Args:
+        argv (list): The command and its arguments.
+        output_path (str, optional): The file the output is appended to.
+        handlers (list, optional): Line handlers, see `stream_process`.
+
+    Returns:
+        StreamResult: The exit code, line counters and output tail.
+    """
+    return asyncio.run(stream_process(argv, output_path, handlers, **kwargs))
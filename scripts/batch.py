@@ -0,0 +1,218 @@
+import os
+import json
+import ipaddress
+from datetime import datetime
+from scripts.log_manager import log_action, buffered_logging
+from scripts.run_tool import run_tool
+from scripts.scenarios import load_scenario
+from scripts.scheduler import run_task_graph
+from scripts.setup import create_challenge_directory
+from scripts.utils import load_config
+
+def expand_targets(spec):
+    """
+    Expands a target specification into individual hosts.
+
+    The specification is either a file with one target per line or a
+    comma-separated list. Each target may be an address, a hostname or a
+    CIDR range; '#' starts a comment.
+
+    Args:
+        spec (str): The target file path or target list.
+
+    Returns:
+        list: The unique targets, in order.
+    """
+    if os.path.isfile(os.path.expanduser(spec)):
+        with open(os.path.expanduser(spec), "r") as f:
+            entries = [line.split("#", 1)[0].strip() for line in f]
+    else:
+        entries = [entry.strip() for entry in spec.split(",")]
+
+    targets = []
+    seen = set()
+    for entry in entries:
+        if not entry:
+            continue
+        try:
+            network = ipaddress.ip_network(entry, strict=False)
+            hosts = [str(host) for host in network.hosts()] if network.num_addresses > 1 else [str(network.network_address)]
+        except ValueError:
+            hosts = [entry]
+        for host in hosts:
+            if host not in seen:
+                seen.add(host)
+                targets.append(host)
+    return targets
+
+def challenge_name_for(prefix, target):
+    """
+    Returns the challenge directory name used for a batch target.
+
+    Args:
+        prefix (str): The batch name prefix.
+        target (str): The target address or hostname.
+
+    Returns:
+        str: The challenge name (e.g., 'sweep-10-0-0-5').
+    """
+    return f"{prefix}-{target.replace('.', '-').replace(':', '-')}"
+
+def create_batch_challenges(targets, prefix, base_path):
+    """
+    Creates a challenge directory with metadata for every target.
+
+    Existing challenge directories are reused.
+
+    Args:
+        targets (list): The targets.
+        prefix (str): The batch name prefix.
+        base_path (str): The directory challenges are stored in.
+
+    Returns:
+        dict: A mapping of target to its challenge path.
+    """
+    challenges = {}
+    for target in targets:
+        challenge_name = challenge_name_for(prefix, target)
+        challenge_path = os.path.join(base_path, challenge_name)
+        if os.path.exists(os.path.join(challenge_path, "metadata.json")):
+            challenges[target] = challenge_path
+        else:
+            challenges[target] = create_challenge_directory(base_path, challenge_name, target)
+    return challenges
+
+def build_batch_tasks(scenario, challenges):
+    """
+    Expands a scenario into one task graph covering every target.
+
+    Task names are prefixed with the target so dependencies stay within the
+    target they belong to.
+
+    Args:
+        scenario (dict): The scenario.
+        challenges (dict): A mapping of target to its challenge path.
+
+    Returns:
+        list: The batch tasks, each with 'target' and 'challenge_path' keys.
+    """
+    tasks = []
+    for target, challenge_path in challenges.items():
+        for task in scenario["tasks"]:
+            depends_on = task.get("depends_on", [])
+            if isinstance(depends_on, str):
+                depends_on = [depends_on]
+            tasks.append({
+                **task,
+                "name": f"{target} :: {task['name']}",
+                "task": task["name"],
+                "depends_on": [f"{target} :: {dependency}" for dependency in depends_on],
+                "target": target,
+                "challenge_path": challenge_path
+            })
+    return tasks
+
+def summarise_batch(scenario_name, tasks, summary):
+    """
+    Builds the throughput summary of a finished batch.
+
+    Args:
+        scenario_name (str): The scenario that was run.
+        tasks (list): The batch tasks.
+        summary (dict): The result of `run_task_graph`.
+
+    Returns:
+        dict: Counts, wall-clock time, throughput and per-target durations.
+    """
+    results = summary["results"]
+    statuses = {}
+    per_target = {}
+    for task in tasks:
+        result = results[task["name"]]
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+        target = per_target.setdefault(task["target"], {"completed": 0, "failed": 0, "skipped": 0, "task_time": 0.0})
+        target[result["status"]] += 1
+        target["task_time"] += result["duration"]
+
+    wall_time = summary["wall_time"]
+    busy_time = sum(result["duration"] for result in results.values())
+    targets_done = sum(1 for target in per_target.values() if target["failed"] == 0 and target["skipped"] == 0)
+    return {
+        "scenario": scenario_name,
+        "finished": datetime.now().isoformat(timespec="seconds"),
+        "targets": len(per_target),
+        "tasks": len(tasks),
+        "statuses": statuses,
+        "wall_time": round(wall_time, 3),
+        "task_time": round(busy_time, 3),
+        "parallelism": round(busy_time / wall_time, 2) if wall_time else 0.0,
+        "tasks_per_minute": round(statuses.get("completed", 0) / wall_time * 60, 2) if wall_time else 0.0,
+        "targets_per_hour": round(targets_done / wall_time * 3600, 2) if wall_time else 0.0,
+        "critical_path": summary["critical_path"],
+        "critical_path_time": round(summary["critical_path_time"], 3),
+        "per_target": per_target
+    }
+
+def run_batch(scenario_name, target_spec, prefix="batch", max_workers=None, per_target_limit=1,
+              base_path=None, runner=run_tool, executor_factory=None):
+    """
+    Runs a scenario against many targets with one global scheduler.
+
+    Args:
+        scenario_name (str): The scenario file name (without extension).
+        target_spec (str): A target file, or a comma-separated list of
+            addresses, hostnames and CIDR ranges.
+        prefix (str, optional): The prefix of the created challenge names.
+        max_workers (int, optional): The global number of concurrent tasks.
+        per_target_limit (int, optional): The number of concurrent tasks per target.
+        base_path (str, optional): The challenge directory. Defaults to the
+            configured base directory.
+        runner (callable, optional): The picklable function that runs a task.
+        executor_factory (callable, optional): Creates the executor used to run tasks.
+
+    Returns:
+        dict: The throughput summary, also written to the base directory.
+
+    Raises:
+        ValueError: If the specification contains no targets.
+    """
+    scenario = load_scenario(scenario_name)
+    targets = expand_targets(target_spec)
+    if not targets:
+        raise ValueError(f"No targets found in '{target_spec}'.")
+
+    base_path = os.path.expanduser(base_path or load_config("base")["base_directory"])
+    os.makedirs(base_path, exist_ok=True)
+    challenges = create_batch_challenges(targets, prefix, base_path)
+    tasks = build_batch_tasks(scenario, challenges)
+    print(f"Running scenario '{scenario['name']}' against {len(targets)} targets ({len(tasks)} tasks)...")
+
+    def on_complete(task, result):
+        status = "executed successfully" if result["status"] == "completed" else f"{result['status']}: {result['error']}"
+        log_action(task["challenge_path"], f"Task '{task['task']}' {status}.")
+        if result["status"] != "completed":
+            print(f"[{result['status'].upper()}] {task['name']}: {result['error']}")
+
+    options = {"executor_factory": executor_factory} if executor_factory else {}
+    with buffered_logging():
+        summary = run_task_graph(
+            tasks,
+            runner,
+            lambda task: (*task["command"].split(), task["challenge_path"]),
+            max_workers=max_workers or os.cpu_count(),
+            tool_limits=scenario.get("concurrency"),
+            on_complete=on_complete,
+            target_limit=per_target_limit,
+            **options
+        )
+
+    report = summarise_batch(scenario["name"], tasks, summary)
+    summary_path = os.path.join(base_path, f"{prefix}-summary-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(summary_path, "w") as f:
+        json.dump(report, f, indent=4)
+
+    print(f"\nBatch finished in {report['wall_time']:.1f}s: {report['statuses']}")
+    print(f"Throughput: {report['tasks_per_minute']} tasks/min, {report['targets_per_hour']} targets/hour "
+          f"(parallelism {report['parallelism']}x)")
+    print(f"Summary saved to: {summary_path}")
+    return report
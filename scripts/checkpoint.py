@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import hashlib
+
+JOURNAL_FILE = "checkpoint.jsonl"
+PROGRESS_INTERVAL = 4 * 1024 * 1024
+
+def file_digest(path):
+    """
+    Returns the SHA-256 of a file, or None if it does not exist.
+
+    Args:
+        path (str): The file to hash.
+
+    Returns:
+        str: The hex digest.
+    """
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class CheckpointJournal:
+    """
+    An append-only journal of scenario progress for one challenge.
+
+    Each record is a single JSON line written with one append, so the parent
+    scheduler and tool workers can record events concurrently.
+    """
+    def __init__(self, challenge_path):
+        self.path = os.path.join(challenge_path, JOURNAL_FILE)
+        os.makedirs(challenge_path, exist_ok=True)
+        self._last_progress = {}
+
+    def record(self, event, **fields):
+        """
+        Appends an event to the journal.
+
+        Args:
+            event (str): The event type (e.g., 'task_start', 'task_complete').
+            **fields: Additional event fields.
+        """
+        line = json.dumps({"time": time.time(), "event": event, **fields}) + "\n"
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, line.encode())
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def record_progress(self, tool_name, preset, shard, byte_range, offset, force=False):
+        """
+        Records how far a wordlist shard has been fed, at most once per
+        `PROGRESS_INTERVAL` bytes.
+
+        Args:
+            tool_name (str): The name of the tool.
+            preset (str): The name of the preset.
+            shard (int): The shard index.
+            byte_range (tuple): The shard's (start, end) byte range.
+            offset (int): The byte offset fed so far.
+            force (bool, optional): Record even if the interval has not passed.
+        """
+        key = (tool_name, preset, shard)
+        if not force and offset - self._last_progress.get(key, byte_range[0]) < PROGRESS_INTERVAL:
+            return
+        self._last_progress[key] = offset
+        self.record("progress", tool=tool_name, preset=preset, shard=shard, range=list(byte_range), offset=offset)
+
+    def events(self):
+        """
+        Yields the journal's events, skipping a torn final line.
+
+        Yields:
+            dict: The recorded events, oldest first.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def state(self, scenario_name):
+        """
+        Replays the journal for the latest run of a scenario.
+
+        Args:
+            scenario_name (str): The scenario name.
+
+        Returns:
+            dict: 'completed' (task name -> duration) and 'interrupted' (task
+                names started but never finished).
+        """
+        started, completed = {}, {}
+        for event in self.events():
+            kind = event.get("event")
+            if kind == "scenario_start" and event.get("scenario") == scenario_name:
+                started, completed = {}, {}
+            elif event.get("scenario", scenario_name) != scenario_name:
+                continue
+            elif kind == "task_start":
+                started[event["task"]] = event["time"]
+            elif kind == "task_complete":
+                completed[event["task"]] = event.get("duration", 0.0)
+            elif kind == "task_failed":
+                started.pop(event["task"], None)
+
+        return {
+            "completed": completed,
+            "interrupted": [task for task in started if task not in completed]
+        }
+
+    def wordlist_offsets(self, tool_name, preset):
+        """
+        Returns the last recorded feed offsets of a preset's wordlist shards.
+
+        Args:
+            tool_name (str): The name of the tool.
+            preset (str): The name of the preset.
+
+        Returns:
+            dict: Shard index -> ((start, end), offset).
+        """
+        offsets = {}
+        for event in self.events():
+            if event.get("event") == "progress" and event.get("tool") == tool_name and event.get("preset") == preset:
+                offsets[event["shard"]] = (tuple(event["range"]), event["offset"])
+            elif event.get("event") == "tool_complete" and event.get("tool") == tool_name and event.get("preset") == preset:
+                offsets = {}
+        return offsets
+
+    def has_run(self):
+        """
+        Returns whether the journal has any events.
+        """
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
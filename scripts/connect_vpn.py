@@ -2,17 +2,26 @@ import os
 import subprocess
 from scripts.utils import prompt_user_input, load_config, load_challenge_metadata
 from scripts.log_manager import log_action
-from exceptions import NoVPNFilesFoundError, VPNConnectionError
+from scripts.vpn_session import start_session, vpn_settings
+from exceptions import NoVPNFilesFoundError, VPNConnectionError, VPNError
 
-def connect_vpn( challenge_path ):
+def connect_vpn( challenge_path, wait=True ):
     """
     Connect to the VPN using the specified .ovpn file in a separate process.
 
+    openvpn writes its output to `openvpn.log` in the challenge directory
+    and the connection is only reported once openvpn has brought the tunnel up.
+
     Args:
         challenge_path (str): Path to the challenge directory.
+        wait (bool, optional): Wait until the tunnel is ready.
+
+    Returns:
+        VPNSession: The running VPN session.
 
     Raises:
         VPNConnectionError: If the VPN connection fails.
+        VPNTimeoutError: If the tunnel is not ready in time.
     """
     try:        
         # Load base directory from config and challenge metadata
@@ -33,19 +42,21 @@ def connect_vpn( challenge_path ):
 
         # Connect to the VPN in a separate process
         print(f"Connecting to VPN using {ovpn_file} ...")
-        process = subprocess.Popen(
-            ["sudo", "openvpn", "--config", ovpn_file],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        log_action(challenge_path, "[CONNECTED] VPN connection successful.")
-        print("VPN connection started successfully. Make sure you can ping the virtual machine.")
+        command, timeout = vpn_settings()
+        session = start_session(ovpn_file, challenge_path, command)
+        if wait:
+            time_to_ready = session.wait_ready(timeout)
+            log_action(challenge_path, f"[CONNECTED] VPN tunnel ready after {time_to_ready:.1f}s.")
+            print(f"VPN connected in {time_to_ready:.1f}s.")
+        return session
 
     except FileNotFoundError:
         raise NoVPNFilesFoundError(challenge_path)
     except subprocess.CalledProcessError as e:
         raise VPNConnectionError(f"[ERROR] Failed to connect to VPN: {e}")
+    except VPNError as e:
+        log_action(challenge_path, f"[ERROR] {e}")
+        raise
     except Exception as e:
         log_action(challenge_path, f"[ERROR] Unexpected error while connecting to VPN: {e}")
         raise VPNConnectionError(f"[ERROR] Unexpected error: {e}")
@@ -0,0 +1,211 @@
+import re
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from scripts.exploit_db import get_exploit_db
+from scripts.utils import load_config
+
+VERSION = re.compile(r"\d+(?:\.\d+)+(?:p\d+|[a-z](?![a-z]))?", re.IGNORECASE)
+GENERIC_WORDS = {"httpd", "smbd", "ftpd", "sshd", "daemon", "server", "service"}
+CORRELATED_STATES = ("open",)
+EXPLOIT_SOURCE = "exploit-db"
+DEFAULT_WORKERS = 4
+
+def correlation_settings():
+    """
+    Returns whether scanned services are looked up in the exploit database,
+    and with how many workers, from config/base.json.
+
+    Returns:
+        tuple: True if correlation is enabled, and the number of lookup workers.
+    """
+    settings = load_config("base").get("exploit_db", {})
+    return bool(settings.get("correlate", True)), int(settings.get("correlation_workers", DEFAULT_WORKERS))
+
+def normalise_service(record):
+    """
+    Turns the product and version nmap reported for a port into the terms
+    exploit titles use.
+
+    Generic daemon words are dropped from the product ('Apache httpd' becomes
+    'Apache', 'Samba smbd' becomes 'Samba') and the version is cut down to
+    its version number ('7.2p2 Ubuntu 4ubuntu2.10' becomes '7.2p2').
+
+    Args:
+        record (dict): A port record.
+
+    Returns:
+        tuple: The product and version, or None if the port has no product
+            or no version number.
+    """
+    product = (record.get("product") or "").split()
+    match = VERSION.search(record.get("version") or "")
+    if not product or not match:
+        return None
+    words = [word for word in product if word.lower() not in GENERIC_WORDS] or product
+    return " ".join(words), match.group(0)
+
+def searchsploit_lookup(product, version):
+    """
+    Looks up a service with searchsploit, for when exploit-db's CSV has not been imported.
+
+    Args:
+        product (str): The product.
+        version (str): The version.
+
+    Returns:
+        list: Dicts with the 'title' and 'path' of each exploit.
+    """
+    try:
+        result = subprocess.run(
+            ["searchsploit", "--json", product, version], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+    except FileNotFoundError:
+        return []
+    if result.returncode != 0:
+        return []
+    try:
+        data = json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return []
+    return [{"title": exploit.get("Title", ""), "path": exploit.get("Path", "")} for exploit in data.get("RESULTS_EXPLOIT", [])]
+
+def lookup_exploits(services, workers=DEFAULT_WORKERS):
+    """
+    Looks up the exploits of many services in a single query of the local
+    exploit database, or with searchsploit if it has not been imported.
+
+    Args:
+        services (list): (product, version) tuples.
+        workers (int, optional): The number of searchsploit processes run at once.
+
+    Returns:
+        dict: Dicts with the 'title' and 'path' of each exploit, by (product, version).
+    """
+    database = get_exploit_db()
+    if database is None:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(services)))) as pool:
+            return dict(zip(services, pool.map(lambda service: searchsploit_lookup(*service), services)))
+    return {
+        service: [{"title": exploit["description"], "path": exploit["file"]} for exploit in exploits]
+        for service, exploits in database.search_many(services).items()
+    }
+
+class ExploitCorrelator:
+    """
+    Matches scanned services against the exploit database while a scan runs.
+
+    Port records are submitted as the scanner reports them. Each distinct
+    (product, version) is looked up once, however many hosts and ports run
+    it. Lookups run in batches on a background thread so the scan is never
+    waiting on them: the services found while a batch runs are resolved
+    together by the next one, in a single query of the exploit database.
+    Matched exploits are written into the challenge's findings, linked to
+    every port running the service, on the thread that submits records, as
+    batches complete. `close` looks up the services still queued and waits
+    for them, so the shortlist is complete when the scan's tool run ends.
+    """
+    def __init__(self, store, lookup=lookup_exploits, workers=DEFAULT_WORKERS):
+        self.store = store
+        self.lookup = lookup
+        self.workers = workers
+        self._pool = None
+        self._batch = None
+        self._queued = []
+        self._services = {}
+        self._pending = {}
+        self._found = {}
+        self.stats = {"services": 0, "lookups": 0, "batches": 0, "exploits": 0, "errors": 0}
+
+    def submit(self, record, host=None):
+        """
+        Correlates a parsed record; records other than open ports with a
+        product and version are ignored.
+
+        Args:
+            record (dict): A parsed record.
+            host (str, optional): The target address, for records without a 'host' field.
+        """
+        if record.get("type") != "port" or record.get("state") not in CORRELATED_STATES:
+            return
+        service = normalise_service(record)
+        if service is None:
+            return
+        key = (service[0].lower(), service[1].lower())
+        target = (record.get("host") or host, record["port"], record.get("protocol") or "tcp")
+        targets = self._services.setdefault(key, set())
+        if target in targets:
+            return
+        targets.add(target)
+        self._pending.setdefault(key, []).append(target)
+        self.stats["services"] += 1
+
+        if len(targets) == 1:
+            self._queued.append((key, service))
+            self.stats["lookups"] += 1
+        self._write_completed()
+
+    def _collect(self, wait=False):
+        """Stores the exploits of the running batch once it is done, then starts the next batch."""
+        if self._batch is not None:
+            future, batch = self._batch
+            if not wait and not future.done():
+                return
+            try:
+                found = future.result()
+            except Exception:
+                found = {}
+                self.stats["errors"] += len(batch)
+            for key, service in batch:
+                self._found[key] = found.get(service, [])
+            self._batch = None
+        if self._queued:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exploit-lookup")
+            batch, self._queued = self._queued, []
+            self._batch = (self._pool.submit(self.lookup, [service for key, service in batch], self.workers), batch)
+            self.stats["batches"] += 1
+
+    def _write_completed(self, wait=False):
+        self._collect()
+        while wait and self._batch is not None:
+            self._collect(wait=True)
+        for key in [key for key in self._pending if key in self._found]:
+            exploits = self._found[key]
+            for host, port, protocol in self._pending.pop(key):
+                for exploit in exploits:
+                    self.store.add(
+                        {"type": "exploit", "title": exploit["title"], "path": exploit["path"], "port": port, "protocol": protocol},
+                        EXPLOIT_SOURCE, host
+                    )
+                    self.stats["exploits"] += 1
+
+    def close(self):
+        """
+        Looks up the queued services, waits for the running batches and
+        writes their exploits.
+
+        Returns:
+            dict: The number of 'services' (ports) correlated, distinct
+                'lookups' run, lookup 'batches', 'exploits' written and
+                failed lookups ('errors').
+        """
+        self._write_completed(wait=True)
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        return self.stats
+
+def open_correlator(store):
+    """
+    Returns an exploit correlator for a findings store, or None if
+    correlation is disabled in config/base.json.
+
+    Args:
+        store (FindingsStore): The challenge's findings store.
+
+    Returns:
+        ExploitCorrelator: The correlator.
+    """
+    enabled, workers = correlation_settings()
+    return ExploitCorrelator(store, workers=workers) if enabled else None
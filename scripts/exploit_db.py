@@ -0,0 +1,280 @@
+import os
+import csv
+import sqlite3
+import threading
+from scripts.search_index import build_match_query
+from scripts.utils import load_config
+
+DEFAULT_CSV_PATH = "/usr/share/exploitdb/files_exploits.csv"
+DEFAULT_DATABASE_PATH = "~/.cache/ethical-hacking-scripts/exploits.db"
+DEFAULT_LIMIT = 20
+EXPLOIT_URL = "https://www.exploit-db.com/exploits/{id}"
+COLUMNS = ("id", "file", "description", "date_published", "author", "type", "platform", "port", "codes")
+
+_database = None
+_database_lock = threading.Lock()
+
+def exploit_db_settings():
+    """
+    Returns the exploit-db CSV and database paths from config/base.json.
+
+    Returns:
+        tuple: The CSV path and the database path, with '~' expanded.
+    """
+    settings = load_config("base").get("exploit_db", {})
+    return (
+        os.path.expanduser(settings.get("csv", DEFAULT_CSV_PATH)),
+        os.path.expanduser(settings.get("database", DEFAULT_DATABASE_PATH))
+    )
+
+def service_query(service, version=None):
+    """
+    Builds the search terms of a service, as searchsploit would be called with them.
+
+    Args:
+        service (str): The service or product (e.g., 'Apache').
+        version (str, optional): The version (e.g., '2.4.41').
+
+    Returns:
+        str: The FTS5 MATCH expression (see `build_match_query`).
+    """
+    return build_match_query(" ".join(part for part in (service, version) if part))
+
+class ExploitDatabase:
+    """
+    A local SQLite FTS5 index of exploit-db's `files_exploits.csv`.
+
+    The CSV is imported once and imported again only when it changes, so a
+    lookup is an index query rather than a scan of the whole CSV. Lookups
+    are memoized, and `search_many` resolves any number of services in a
+    single query.
+    """
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Shared by every thread of the process (see get_exploit_db); lookups hold self._lock
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS exploits (
+                id INTEGER PRIMARY KEY,
+                file TEXT NOT NULL,
+                description TEXT NOT NULL,
+                date_published TEXT,
+                author TEXT,
+                type TEXT,
+                platform TEXT,
+                port TEXT,
+                codes TEXT
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS exploits_fts USING fts5 (
+                description, content='exploits', content_rowid='id'
+            );
+            CREATE TABLE IF NOT EXISTS source (
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                exploits INTEGER NOT NULL
+            );
+        """)
+        self.db.commit()
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def count(self):
+        """Returns the number of imported exploits."""
+        return self.db.execute("SELECT COUNT(*) FROM exploits").fetchone()[0]
+
+    def source(self):
+        """Returns the 'path', 'size', 'mtime_ns' and number of 'exploits' of the last import, or None."""
+        row = self.db.execute("SELECT path, size, mtime_ns, exploits FROM source").fetchone()
+        return dict(row) if row else None
+
+    def import_csv(self, csv_path, force=False):
+        """
+        Imports exploit-db's `files_exploits.csv`, replacing the previous import.
+
+        Args:
+            csv_path (str): The CSV file.
+            force (bool, optional): Import even if the CSV is unchanged since the last import.
+
+        Returns:
+            int: The number of exploits imported, or None if the CSV was unchanged.
+
+        Raises:
+            FileNotFoundError: If the CSV does not exist.
+        """
+        stat = os.stat(csv_path)
+        source = self.source()
+        if not force and source and (source["path"], source["size"], source["mtime_ns"]) == (
+            os.path.abspath(csv_path), stat.st_size, stat.st_mtime_ns
+        ):
+            return None
+
+        def rows(f):
+            for record in csv.DictReader(f):
+                try:
+                    exploit_id = int(record["id"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                yield (exploit_id, *(record.get(column) or "" for column in COLUMNS[1:]))
+
+        with self.db:
+            self.db.execute("DELETE FROM exploits")
+            self.db.execute("DELETE FROM source")
+            with open(csv_path, "r", newline="", encoding="utf-8", errors="replace") as f:
+                self.db.executemany(
+                    f"INSERT OR REPLACE INTO exploits ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows(f)
+                )
+            self.db.execute("INSERT INTO exploits_fts (exploits_fts) VALUES ('rebuild')")
+            imported = self.count()
+            self.db.execute(
+                "INSERT INTO source (path, size, mtime_ns, exploits) VALUES (?, ?, ?, ?)",
+                (os.path.abspath(csv_path), stat.st_size, stat.st_mtime_ns, imported)
+            )
+        self._cache.clear()
+        return imported
+
+    def search(self, service, version=None, limit=DEFAULT_LIMIT):
+        """
+        Finds the exploits whose title contains every search term.
+
+        Args:
+            service (str): The service or product.
+            version (str, optional): The version.
+            limit (int, optional): The maximum number of exploits.
+
+        Returns:
+            list: The exploits (dicts with the CSV columns and a 'link'), best matches first.
+        """
+        return self.search_many([(service, version)], limit)[(service, version)]
+
+    def search_many(self, services, limit=DEFAULT_LIMIT):
+        """
+        Finds the exploits of many services in a single query.
+
+        Args:
+            services (list): (service, version) tuples.
+            limit (int, optional): The maximum number of exploits per service.
+
+        Returns:
+            dict: The exploits of each (service, version) tuple (see `search`).
+        """
+        queries = {service: service_query(*service) for service in services}
+        with self._lock:
+            return self._search_many(queries, limit)
+
+    def _search_many(self, queries, limit):
+        missing = sorted({query for query in queries.values() if query and (query, limit) not in self._cache})
+        if missing:
+            found = {query: [] for query in missing}
+            values = ", ".join("(?, ?)" for _ in missing)
+            rows = self.db.execute(
+                f"""
+                WITH queries (number, expression) AS (VALUES {values})
+                SELECT queries.number, exploits.*
+                FROM queries
+                JOIN exploits_fts ON exploits_fts MATCH queries.expression
+                JOIN exploits ON exploits.id = exploits_fts.rowid
+                ORDER BY queries.number, exploits_fts.rank
+                """,
+                [value for number, query in enumerate(missing) for value in (number, query)]
+            )
+            for row in rows:
+                matches = found[missing[row["number"]]]
+                if len(matches) < limit:
+                    matches.append({column: row[column] for column in COLUMNS} | {"link": EXPLOIT_URL.format(id=row["id"])})
+            for query, matches in found.items():
+                self._cache[(query, limit)] = matches
+        return {service: list(self._cache.get((query, limit), [])) for service, query in queries.items()}
+
+def open_exploit_db(update=True):
+    """
+    Opens the exploit database configured in config/base.json, importing the
+    configured CSV first if it is new or has changed. A database imported from
+    another CSV with `exploits --import` is left as it is.
+
+    Args:
+        update (bool, optional): Import the CSV if it changed.
+
+    Returns:
+        ExploitDatabase: The database, or None if nothing has been imported
+            and the CSV does not exist.
+    """
+    csv_path, database_path = exploit_db_settings()
+    if not os.path.exists(database_path) and not os.path.exists(csv_path):
+        return None
+    database = ExploitDatabase(database_path)
+    source = database.source()
+    if update and os.path.exists(csv_path) and (source is None or source["path"] == os.path.abspath(csv_path)):
+        database.import_csv(csv_path)
+    if not database.count():
+        database.close()
+        return None
+    return database
+
+def get_exploit_db():
+    """
+    Returns the process-wide exploit database, so its memoized lookups are
+    shared by every caller.
+
+    Returns:
+        ExploitDatabase: The database, or None if no exploit-db CSV has been imported.
+    """
+    global _database
+    with _database_lock:
+        if _database is None:
+            _database = open_exploit_db()
+        return _database
+
+def import_exploit_db_command(csv_path=None):
+    """
+    Imports exploit-db's CSV into the local database and prints the result.
+
+    Args:
+        csv_path (str, optional): The CSV. Defaults to `exploit_db.csv` in config/base.json.
+
+    Returns:
+        int: The number of exploits in the database.
+    """
+    configured_csv, database_path = exploit_db_settings()
+    csv_path = os.path.expanduser(csv_path or configured_csv)
+    try:
+        with ExploitDatabase(database_path) as database:
+            imported = database.import_csv(csv_path, force=True)
+    except FileNotFoundError:
+        print(f"[ERROR] Exploit-db CSV not found: {csv_path}")
+        return 0
+    print(f"Imported {imported} exploits from {csv_path} into {database_path}.")
+    return imported
+
+def run_exploit_search(terms, limit=DEFAULT_LIMIT):
+    """
+    Prints the exploits matching a service and version (the `exploits` subcommand).
+
+    Args:
+        terms (str): The search terms, e.g. 'vsftpd 2.3.4'.
+        limit (int, optional): The maximum number of exploits.
+
+    Returns:
+        list: The exploits (see `ExploitDatabase.search`).
+    """
+    database = get_exploit_db()
+    if database is None:
+        print("[ERROR] No exploit database. Import exploit-db's CSV with 'python3 main.py exploits --import'.")
+        return []
+    exploits = database.search(terms, limit=limit)
+    for exploit in exploits:
+        print(f"{exploit['id']:>6}  {exploit['description']}  ({exploit['file']})")
+    print(f"{len(exploits)} exploits found.")
+    return exploits
@@ -0,0 +1,463 @@
+import os
+import re
+import time
+import sqlite3
+from contextvars import ContextVar
+from itertools import islice
+from contextlib import contextmanager
+from scripts.nmap_xml import iter_nmap_records
+from scripts.output_parsers import parse_nmap_host_line
+
+DATABASE_FILE = "findings.db"
+BATCH_SIZE = 200
+MULTI_HOST_TARGET = re.compile(r"[\s,/*]|^[\d.]*\d-\d")
+
+# The host whose nmap report a stream is in, as (tracker, address). Each
+# asyncio task has its own copy, so concurrent shards do not share it.
+_report_host = ContextVar("report_host", default=(None, None))
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS hosts (
+        id INTEGER PRIMARY KEY,
+        address TEXT NOT NULL UNIQUE,
+        hostname TEXT,
+        first_seen REAL NOT NULL,
+        last_seen REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS ports (
+        id INTEGER PRIMARY KEY,
+        host_id INTEGER NOT NULL REFERENCES hosts (id),
+        port INTEGER NOT NULL,
+        protocol TEXT NOT NULL,
+        state TEXT,
+        source TEXT,
+        updated REAL NOT NULL,
+        UNIQUE (host_id, port, protocol)
+    );
+    CREATE INDEX IF NOT EXISTS ports_state ON ports (state);
+    CREATE TABLE IF NOT EXISTS services (
+        port_id INTEGER PRIMARY KEY REFERENCES ports (id),
+        name TEXT,
+        product TEXT,
+        version TEXT,
+        extrainfo TEXT
+    );
+    CREATE INDEX IF NOT EXISTS services_name ON services (name);
+    CREATE TABLE IF NOT EXISTS web_paths (
+        id INTEGER PRIMARY KEY,
+        host_id INTEGER REFERENCES hosts (id),
+        path TEXT NOT NULL,
+        status INTEGER,
+        size INTEGER,
+        source TEXT,
+        updated REAL NOT NULL,
+        UNIQUE (host_id, path)
+    );
+    CREATE INDEX IF NOT EXISTS web_paths_status ON web_paths (status);
+    CREATE TABLE IF NOT EXISTS credentials (
+        id INTEGER PRIMARY KEY,
+        host_id INTEGER REFERENCES hosts (id),
+        port INTEGER,
+        service TEXT,
+        login TEXT NOT NULL,
+        password TEXT NOT NULL,
+        source TEXT,
+        found REAL NOT NULL,
+        UNIQUE (host_id, port, service, login, password)
+    );
+    CREATE INDEX IF NOT EXISTS credentials_service ON credentials (service);
+    CREATE TABLE IF NOT EXISTS exploits (
+        id INTEGER PRIMARY KEY,
+        host_id INTEGER REFERENCES hosts (id),
+        port_id INTEGER REFERENCES ports (id),
+        title TEXT NOT NULL,
+        path TEXT NOT NULL,
+        source TEXT,
+        found REAL NOT NULL
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS exploits_unique ON exploits (ifnull(host_id, 0), ifnull(port_id, 0), path);
+    CREATE INDEX IF NOT EXISTS exploits_port ON exploits (port_id);
+"""
+
+class FindingsStore:
+    """
+    The structured results of a challenge, kept in `findings.db` in the
+    challenge directory.
+
+    Tool parsers add their records (ports, services, web paths, credentials
+    and exploits) as they are found, so reports and scenarios query only the
+    rows they need instead of re-reading and re-parsing every output file.
+    Parallel tool runs open their own store on the same database, so no
+    write transaction is held while waiting for a tool's output: a streamed
+    record is committed as soon as it is added, and `add_many` commits a
+    finished output in batches of `batch_size` records.
+    """
+    def __init__(self, challenge_path, batch_size=BATCH_SIZE):
+        self.path = os.path.join(challenge_path, DATABASE_FILE)
+        self.batch_size = batch_size
+        self._host_ids = {}
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Closes the database."""
+        self.db.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Runs a block in a write transaction, or in the one already open."""
+        if self.db.in_transaction:
+            yield
+            return
+        # Take the write lock up front so a busy database is waited on here
+        # instead of failing when a read transaction tries to upgrade
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.db.rollback()
+            raise
+        self.db.commit()
+
+    def add(self, record, source=None, host=None):
+        """
+        Adds a parsed record and commits it.
+
+        Records already in the store are updated: a port takes the state of
+        the latest scan and keeps the service details it had unless the new
+        record has them.
+
+        Args:
+            record (dict): A record from a tool parser, with a 'type' of
+                'port', 'web_path', 'credential' or 'exploit'.
+            source (str, optional): The tool that produced the record.
+            host (str, optional): The target address, for records without a
+                'host' field (e.g., web paths).
+
+        Returns:
+            bool: True if the record type is stored.
+        """
+        adder = getattr(self, f"_add_{record.get('type')}", None)
+        if adder is None:
+            return False
+        with self._transaction():
+            adder(record, source, record.get("host") or host, time.time())
+        return True
+
+    def add_many(self, records, source=None, host=None):
+        """
+        Adds parsed records, committing them in batches.
+
+        Args:
+            records (iterable): Records from a tool parser.
+            source (str, optional): The tool that produced the records.
+            host (str, optional): The target address of records without one.
+
+        Returns:
+            int: The number of records stored.
+        """
+        records = iter(records)
+        count = 0
+        while batch := list(islice(records, self.batch_size)):
+            with self._transaction():
+                count += sum(1 for record in batch if self.add(record, source, host))
+        return count
+
+    def _host_id(self, address, now, hostname=None):
+        if address is None:
+            return None
+        cached = self._host_ids.get(address)
+        if cached and (not hostname or cached[1] == hostname):
+            return cached[0]
+        host_id = self.db.execute(
+            """
+            INSERT INTO hosts (address, hostname, first_seen, last_seen) VALUES (?, ?, ?, ?)
+            ON CONFLICT (address) DO UPDATE SET
+                hostname = coalesce(excluded.hostname, hostname), last_seen = excluded.last_seen
+            RETURNING id
+            """,
+            (address, hostname, now, now)
+        ).fetchone()[0]
+        self._host_ids[address] = (host_id, hostname)
+        return host_id
+
+    def _port_id(self, host_id, port, protocol, state, source, now):
+        return self.db.execute(
+            """
+            INSERT INTO ports (host_id, port, protocol, state, source, updated) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (host_id, port, protocol) DO UPDATE SET
+                state = coalesce(excluded.state, state), source = coalesce(excluded.source, source), updated = excluded.updated
+            RETURNING id
+            """,
+            (host_id, port, protocol, state, source, now)
+        ).fetchone()[0]
+
+    def _add_port(self, record, source, host, now):
+        host_id = self._host_id(host, now, record.get("hostname"))
+        port_id = self._port_id(host_id, record["port"], record.get("protocol") or "tcp", record.get("state"), source, now)
+        if any(record.get(field) for field in ("service", "product", "version", "extrainfo")):
+            self.db.execute(
+                """
+                INSERT INTO services (port_id, name, product, version, extrainfo) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (port_id) DO UPDATE SET
+                    name = coalesce(excluded.name, name), product = coalesce(excluded.product, product),
+                    version = coalesce(excluded.version, version), extrainfo = coalesce(excluded.extrainfo, extrainfo)
+                """,
+                (port_id, record.get("service"), record.get("product"), record.get("version"), record.get("extrainfo"))
+            )
+
+    def _add_web_path(self, record, source, host, now):
+        self.db.execute(
+            """
+            INSERT INTO web_paths (host_id, path, status, size, source, updated) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (host_id, path) DO UPDATE SET
+                status = excluded.status, size = excluded.size, source = excluded.source, updated = excluded.updated
+            """,
+            (self._host_id(host, now), record["path"], record.get("status"), record.get("size"), source, now)
+        )
+
+    def _add_credential(self, record, source, host, now):
+        self.db.execute(
+            """
+            INSERT OR IGNORE INTO credentials (host_id, port, service, login, password, source, found)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (self._host_id(host, now), record.get("port"), record.get("service"), record["login"],
+             record["password"], source, now)
+        )
+
+    def _add_exploit(self, record, source, host, now):
+        host_id = self._host_id(host, now)
+        port_id = None
+        if host_id is not None and record.get("port"):
+            port_id = self._port_id(host_id, record["port"], record.get("protocol") or "tcp", None, None, now)
+        self.db.execute(
+            "INSERT OR IGNORE INTO exploits (host_id, port_id, title, path, source, found) VALUES (?, ?, ?, ?, ?, ?)",
+            (host_id, port_id, record["title"], record["path"], source, now)
+        )
+
+    def _query(self, sql, parameters=()):
+        return [dict(row) for row in self.db.execute(sql, parameters)]
+
+    def hosts(self):
+        """
+        Returns the hosts found so far.
+
+        Returns:
+            list: Dicts with the 'address' and 'hostname' of every host.
+        """
+        return self._query("SELECT address, hostname FROM hosts ORDER BY id")
+
+    def ports(self, state=None, service=None, host=None, limit=None):
+        """
+        Returns ports with their service details.
+
+        Args:
+            state (str, optional): Only ports in this state (e.g., 'open').
+            service (str, optional): Only ports running this service (e.g., 'http').
+            host (str, optional): Only ports of this host.
+            limit (int, optional): The maximum number of ports.
+
+        Returns:
+            list: Dicts with the 'host', 'hostname', 'port', 'protocol',
+                'state', 'service', 'product', 'version' and 'extrainfo'
+                fields, ordered by host and port.
+        """
+        conditions, parameters = [], []
+        for column, value in (("ports.state", state), ("services.name", service), ("hosts.address", host)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        return self._query(
+            f"""
+            SELECT hosts.address AS host, hosts.hostname, ports.port, ports.protocol, ports.state,
+                   services.name AS service, services.product, services.version, services.extrainfo
+            FROM ports JOIN hosts ON hosts.id = ports.host_id
+            LEFT JOIN services ON services.port_id = ports.id
+            {"WHERE " + " AND ".join(conditions) if conditions else ""}
+            ORDER BY hosts.id, ports.protocol, ports.port
+            LIMIT ?
+            """,
+            [*parameters, -1 if limit is None else limit]
+        )
+
+    def web_paths(self, status=None, host=None, limit=None):
+        """
+        Returns discovered web paths.
+
+        Args:
+            status (int, optional): Only paths with this HTTP status.
+            host (str, optional): Only paths of this host.
+            limit (int, optional): The maximum number of paths.
+
+        Returns:
+            list: Dicts with the 'host', 'path', 'status', 'size' and 'source' fields.
+        """
+        conditions, parameters = [], []
+        for column, value in (("web_paths.status", status), ("hosts.address", host)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        return self._query(
+            f"""
+            SELECT hosts.address AS host, web_paths.path, web_paths.status, web_paths.size, web_paths.source
+            FROM web_paths LEFT JOIN hosts ON hosts.id = web_paths.host_id
+            {"WHERE " + " AND ".join(conditions) if conditions else ""}
+            ORDER BY web_paths.path
+            LIMIT ?
+            """,
+            [*parameters, -1 if limit is None else limit]
+        )
+
+    def credentials(self, service=None):
+        """
+        Returns valid credentials.
+
+        Args:
+            service (str, optional): Only credentials for this service (e.g., 'ssh').
+
+        Returns:
+            list: Dicts with the 'host', 'port', 'service', 'login', 'password' and 'source' fields.
+        """
+        return self._query(
+            f"""
+            SELECT hosts.address AS host, credentials.port, credentials.service, credentials.login,
+                   credentials.password, credentials.source
+            FROM credentials LEFT JOIN hosts ON hosts.id = credentials.host_id
+            {"WHERE credentials.service = ?" if service is not None else ""}
+            ORDER BY credentials.id
+            """,
+            () if service is None else (service,)
+        )
+
+    def exploits(self):
+        """
+        Returns the exploits found for the challenge.
+
+        Returns:
+            list: Dicts with the 'host', 'port', 'title', 'path' and 'source' fields.
+        """
+        return self._query(
+            """
+            SELECT hosts.address AS host, ports.port, exploits.title, exploits.path, exploits.source
+            FROM exploits LEFT JOIN hosts ON hosts.id = exploits.host_id
+            LEFT JOIN ports ON ports.id = exploits.port_id
+            ORDER BY exploits.id
+            """
+        )
+
+    def counts(self):
+        """
+        Returns the number of rows of each kind of finding.
+
+        Returns:
+            dict: The number of hosts, open ports, web paths, credentials and exploits.
+        """
+        return {
+            "hosts": self.db.execute("SELECT count(*) FROM hosts").fetchone()[0],
+            "open_ports": self.db.execute("SELECT count(*) FROM ports WHERE state = 'open'").fetchone()[0],
+            "web_paths": self.db.execute("SELECT count(*) FROM web_paths").fetchone()[0],
+            "credentials": self.db.execute("SELECT count(*) FROM credentials").fetchone()[0],
+            "exploits": self.db.execute("SELECT count(*) FROM exploits").fetchone()[0]
+        }
+
+class HostTracker:
+    """
+    Attributes the records in a tool's output to the host they were found on.
+
+    A scan of several hosts or a CIDR range prints a 'Nmap scan report for'
+    line before each host's results, and the records after it belong to that
+    host. Records of single-host runs belong to the run's target.
+
+    The current host is kept per asyncio task, so the interleaved lines of
+    shards streamed concurrently are each attributed to their own host.
+    """
+    def __init__(self, target=None):
+        self.target = target
+        self.single = bool(target) and not MULTI_HOST_TARGET.search(str(target).strip())
+
+    def host(self, line):
+        """
+        Returns the host of the record on a line of output.
+
+        Args:
+            line (str): The output line; a host's report line makes it the current host.
+
+        Returns:
+            str: The host, or None if a multi-host run has not named one yet.
+        """
+        if self.single:
+            return self.target
+        started = parse_nmap_host_line(line)
+        if started:
+            _report_host.set((self, started[0]))
+            return started[0]
+        tracker, address = _report_host.get()
+        return address if tracker is self else None
+
+def ingest_output(store, source, output_path=None, parser=None, xml_path=None, host=None, on_record=None):
+    """
+    Adds the records of a finished tool's output files (e.g., a result
+    served from the cache, or an nmap XML report).
+
+    Args:
+        store (FindingsStore): The challenge's findings store.
+        source (str): The tool that produced the output.
+        output_path (str, optional): A text output file to read with `parser`.
+        parser (callable, optional): The tool's line parser.
+        xml_path (str, optional): An nmap XML report.
+        host (str, optional): The target of the run, for records without a
+            host. For several hosts or a range, text output records take the
+            host of the nmap report they appear in (see `HostTracker`).
+        on_record (callable, optional): Called with each record and its host
+            as it is stored (e.g., `ExploitCorrelator.submit`).
+
+    Returns:
+        int: The number of records stored.
+    """
+    def observed(records):
+        for record, record_host in records:
+            if on_record:
+                on_record(record, record_host)
+            yield {**record, "host": record.get("host") or record_host}
+
+    def parsed(lines):
+        hosts = HostTracker(host)
+        for line in lines:
+            record_host = hosts.host(line)
+            record = parser(line)
+            if record:
+                yield record, record_host
+
+    count = 0
+    if output_path and parser and os.path.exists(output_path):
+        with open(output_path, "r", errors="replace") as f:
+            count += store.add_many(observed(parsed(f)), source)
+    if xml_path and os.path.exists(xml_path):
+        count += store.add_many(observed((record, host) for record in iter_nmap_records(xml_path)), source, host)
+    return count
+
+def open_findings(challenge_path, create=True):
+    """
+    Opens a challenge's findings store.
+
+    Args:
+        challenge_path (str): The path to the challenge directory.
+        create (bool, optional): Create the store if the challenge has none yet.
+
+    Returns:
+        FindingsStore: The store, or None if it does not exist and `create` is False.
+    """
+    if not create and not os.path.exists(os.path.join(challenge_path, DATABASE_FILE)):
+        return None
+    return FindingsStore(challenge_path)
@@ -0,0 +1,310 @@
+import os
+import re
+import json
+from html import escape
+
+DEFINITIONS_PATH = os.path.join("reports", "templates", "definitions.json")
+TERMINAL = "$"
+MIN_SCORE = 0.45
+FUZZY_CANDIDATES = 25
+SKIPPED_ELEMENTS = ("a", "abbr", "script", "style", "title", "head", "h1", "h2", "h3", "h4", "h5", "h6", "code", "pre")
+PARENTHESISED = re.compile(r"^(?P<base>.*?)\s*\((?P<alias>[^)]+)\)$")
+WORD_START = re.compile(r"(?<![a-z0-9])[a-z0-9]")
+HTML_TAG = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)[^>]*?(/?)>|<!--.*?-->", re.DOTALL)
+
+_glossaries = {}
+
+def normalise(text):
+    """Lowercases a term and collapses its whitespace."""
+    return " ".join(text.lower().split())
+
+def trigrams(text):
+    """Returns the character trigrams of a normalised term, padded at word edges."""
+    padded = f"  {text} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+def edit_distance(a, b, limit):
+    """
+    Returns the Damerau-Levenshtein distance of two strings (adjacent
+    transpositions count as one edit), or `limit + 1` once it is certain
+    to exceed `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return current[-1]
+
+class Glossary:
+    """
+    The report glossary (`definitions.json`) indexed for lookups.
+
+    Every term and tool name is stored in a prefix trie, once as a whole and
+    once from the start of each later word, and in a trigram index. Lookups
+    rank exact matches first, then prefix matches, then fuzzy matches whose
+    trigram overlap and edit distance tolerate typos. The trie also drives
+    `link_terms`, which links every term in a document in one pass.
+    """
+    def __init__(self, data):
+        self.data = {"terms": data.get("terms", {}), "tools": data.get("tools", {})}
+        self.entries = []
+        self.exact = {}
+        self.trie = {}
+        self.trigram_index = {}
+        for kind in ("terms", "tools"):
+            for key, definition in self.data[kind].items():
+                # Names are linked in documents; parenthesised aliases (e.g.,
+                # 'XSS') are only looked up, as short acronyms clash with words
+                names, aliases = {normalise(key)}, set()
+                if kind == "tools" and definition.get("name"):
+                    names.add(normalise(definition["name"]))
+                for name in list(names):
+                    match = PARENTHESISED.match(name)
+                    if match:
+                        names.add(match["base"])
+                        aliases.add(match["alias"])
+                entry = {
+                    "id": len(self.entries),
+                    "kind": kind,
+                    "key": key,
+                    "name": definition.get("name", key),
+                    "names": sorted(names | aliases),
+                    "summary": definition.get("summary") or definition.get("purpose", ""),
+                    "definition": definition
+                }
+                self.entries.append(entry)
+                for name in sorted(names | aliases):
+                    self.exact.setdefault(name, entry["id"])
+                    self._index(entry["id"], name, linked=name in names)
+
+    def _index(self, entry_id, name, linked=True):
+        for start in WORD_START.finditer(name):
+            node = self.trie
+            for character in name[start.start():]:
+                node = node.setdefault(character, {})
+            # (entry, linkable) pairs; only whole names are linked in documents
+            node.setdefault(TERMINAL, set()).add((entry_id, linked and start.start() == 0))
+        for gram in trigrams(name):
+            self.trigram_index.setdefault(gram, set()).add(entry_id)
+
+    def __getitem__(self, kind):
+        return self.data[kind]
+
+    def get(self, kind, default=None):
+        return self.data.get(kind, default)
+
+    def _prefix_matches(self, prefix):
+        node = self.trie
+        for character in prefix:
+            node = node.get(character)
+            if node is None:
+                return {}
+        matches = {}
+        stack = [(node, 0)]
+        while stack:
+            node, depth = stack.pop()
+            for key, child in node.items():
+                if key == TERMINAL:
+                    for entry_id, whole in child:
+                        # Prefer shorter completions and matches at the start of a name
+                        score = 0.9 - 0.001 * depth - (0 if whole else 0.05)
+                        matches[entry_id] = max(matches.get(entry_id, 0), score)
+                else:
+                    stack.append((child, depth + 1))
+        return matches
+
+    def _fuzzy_matches(self, query):
+        grams = trigrams(query)
+        overlap = {}
+        for gram in grams:
+            for entry_id in self.trigram_index.get(gram, ()):
+                overlap[entry_id] = overlap.get(entry_id, 0) + 1
+        candidates = sorted(overlap, key=overlap.get, reverse=True)[:FUZZY_CANDIDATES]
+
+        matches = {}
+        limit = max(1, len(query) // 3)
+        for entry_id in candidates:
+            best = 0
+            for name in self.entries[entry_id]["names"]:
+                dice = 2 * len(grams & trigrams(name)) / (len(grams) + len(trigrams(name)))
+                words = [name, *name.split()]
+                distance = min(edit_distance(query, word, limit) for word in words)
+                similarity = 1 - distance / max(len(query), 1) if distance <= limit else 0
+                best = max(best, dice, similarity)
+            matches[entry_id] = 0.8 * best
+        return matches
+
+    def lookup(self, query, limit=10, kind=None, min_score=MIN_SCORE):
+        """
+        Finds the glossary entries matching a query, best first.
+
+        Args:
+            query (str): A term or tool name, a prefix of one, or a misspelling.
+            limit (int, optional): The maximum number of entries.
+            kind (str, optional): Only 'terms' or only 'tools'.
+            min_score (float, optional): The lowest fuzzy score returned.
+
+        Returns:
+            list: (entry, score) tuples. Entries have the 'kind', 'key',
+                'name', 'summary' and 'definition' fields; exact matches score
+                1.0 and prefix matches 0.8 to 0.9.
+        """
+        query = normalise(query)
+        if not query:
+            return []
+        scores = self._fuzzy_matches(query)
+        for entry_id, score in self._prefix_matches(query).items():
+            scores[entry_id] = max(scores.get(entry_id, 0), score)
+        if query in self.exact:
+            scores[self.exact[query]] = 1.0
+        ranked = sorted(
+            ((self.entries[entry_id], score) for entry_id, score in scores.items() if score >= min_score),
+            key=lambda item: (-item[1], item[0]["name"])
+        )
+        return [item for item in ranked if kind in (None, item[0]["kind"])][:limit]
+
+    def search(self, keyword, limit=10):
+        """
+        Searches the glossary the way `report.search_glossary` reports it.
+
+        Args:
+            keyword (str): The keyword to search for.
+            limit (int, optional): The maximum number of entries.
+
+        Returns:
+            dict: The matching 'terms' and 'tools', best matches first.
+        """
+        matches = {"terms": {}, "tools": {}}
+        for entry, _ in self.lookup(keyword, limit):
+            matches[entry["kind"]][entry["key"]] = entry["definition"]
+        return matches
+
+    def link_terms(self, html, first_only=True, linked=None):
+        """
+        Links the glossary terms in a rendered document to their entries.
+
+        The document is scanned once: at each word start the trie is walked
+        along the text, and the longest whole term ending at a word boundary
+        is linked. Text inside tags, links, headings, code and the document
+        head is left alone.
+
+        Args:
+            html (str): The rendered document.
+            first_only (bool, optional): Only link the first occurrence of each term.
+            linked (set, optional): Collects the ids of the linked entries, for
+                `linked_entries`.
+
+        Returns:
+            str: The document with terms wrapped in glossary links.
+        """
+        output, skipped, position = [], [], 0
+        linked = set() if linked is None else linked
+        for tag in HTML_TAG.finditer(html):
+            text = html[position:tag.start()]
+            output.append(self._link_text(text, linked, first_only) if not skipped else text)
+            output.append(tag.group(0))
+            position = tag.end()
+
+            closing, name, self_closing = tag.group(1), (tag.group(2) or "").lower(), tag.group(3)
+            if name in SKIPPED_ELEMENTS and not self_closing:
+                if closing:
+                    if name in skipped:
+                        del skipped[len(skipped) - 1 - skipped[::-1].index(name):]
+                else:
+                    skipped.append(name)
+        text = html[position:]
+        output.append(self._link_text(text, linked, first_only) if not skipped else text)
+        return "".join(output)
+
+    def _link_text(self, text, linked, first_only):
+        lowered = text.lower()
+        output, position, index, length = [], 0, 0, len(text)
+        while index < length:
+            if not lowered[index].isalnum() or (index and lowered[index - 1].isalnum()):
+                index += 1
+                continue
+            node, end, match, cursor = self.trie, None, None, index
+            while cursor < length:
+                character = lowered[cursor]
+                if character.isspace():
+                    # Any run of whitespace matches the single space of a normalised name
+                    while cursor + 1 < length and lowered[cursor + 1].isspace():
+                        cursor += 1
+                    character = " "
+                node = node.get(character)
+                if node is None:
+                    break
+                cursor += 1
+                if TERMINAL in node and (cursor == length or not lowered[cursor].isalnum()):
+                    whole = [entry_id for entry_id, is_whole in node[TERMINAL] if is_whole]
+                    if whole:
+                        end, match = cursor, min(whole)
+            if match is None or (first_only and match in linked):
+                index = end or index + 1
+                continue
+            linked.add(match)
+            entry = self.entries[match]
+            output.append(text[position:index])
+            output.append(
+                f'<a class="glossary-term" href="#glossary-{_slug(entry["key"])}" '
+                f'title="{escape(entry["summary"])}">{text[index:end]}</a>'
+            )
+            position = index = end
+        output.append(text[position:])
+        return "".join(output)
+
+    def linked_entries(self, linked):
+        """
+        Returns the entries a document links to, for its glossary appendix.
+
+        Args:
+            linked (iterable): The entry ids collected by `link_terms`.
+
+        Returns:
+            list: Dicts with the 'slug' (the anchor `link_terms` points at),
+                'name', 'summary' and 'description' of each entry, by name.
+        """
+        entries = [self.entries[entry_id] for entry_id in linked]
+        return sorted(
+            (
+                {"slug": _slug(entry["key"]), "name": entry["name"], "summary": entry["summary"],
+                 "description": entry["definition"].get("description", "")}
+                for entry in entries
+            ),
+            key=lambda entry: entry["name"].lower()
+        )
+
+def _slug(key):
+    return re.sub(r"[^a-z0-9]+", "-", key.lower()).strip("-")
+
+def load_glossary(path=DEFINITIONS_PATH):
+    """
+    Returns the indexed glossary of a definitions file, building it only
+    when the file is new or has changed.
+
+    Args:
+        path (str, optional): The definitions file.
+
+    Returns:
+        Glossary: The glossary; empty if the file does not exist.
+    """
+    key = os.path.abspath(path)
+    try:
+        mtime_ns = os.stat(key).st_mtime_ns
+    except FileNotFoundError:
+        return Glossary({})
+    cached = _glossaries.get(key)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    with open(key, "r") as f:
+        glossary = Glossary(json.load(f))
+    _glossaries[key] = (mtime_ns, glossary)
+    return glossary
@@ -0,0 +1,446 @@
+import ssl
+import json
+import time
+import asyncio
+from urllib.parse import urlsplit, unquote_plus
+from scripts.utils import load_config
+
+MARKER = "FUZZ"
+BASELINE_VALUE = "baseline"
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) EthicalHackingScripts"
+DEFAULT_SETTINGS = {
+    "concurrency": 32,
+    "timeout": 10.0,
+    "verify_tls": False,
+    "length_tolerance": 16,
+    "length_ratio": 0.05
+}
+THROTTLED_STATUSES = (429, 503)
+
+def fuzzer_settings():
+    """
+    Returns the fuzzer settings from config/base.json, with defaults for the missing ones.
+
+    Returns:
+        dict: The 'concurrency', 'timeout', 'verify_tls', 'length_tolerance' and 'length_ratio'.
+    """
+    return {**DEFAULT_SETTINGS, **load_config("base").get("fuzzer", {})}
+
+class RequestTemplate:
+    """
+    An HTTP/1.1 request with injection points marked by `marker` in its path,
+    query string, header values or body.
+
+    The request is split at the markers once, so rendering a payload only
+    joins the parts and sets the body's Content-Length.
+    """
+    def __init__(self, url, method="GET", headers=None, body=None, marker=MARKER, keep_alive=True):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported URL '{url}'. Use an http:// or https:// URL.")
+        if marker in parts.netloc:
+            raise ValueError(f"The {marker} marker cannot be placed in the host.")
+        self.url = url
+        self.method = method.upper()
+        self.keep_alive = keep_alive
+        self.host = parts.hostname
+        self.use_ssl = parts.scheme == "https"
+        self.port = parts.port or (443 if self.use_ssl else 80)
+        self.marker = marker
+
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        request_headers = {
+            "Host": parts.netloc,
+            "User-Agent": USER_AGENT,
+            "Accept": "*/*",
+            "Connection": "keep-alive" if keep_alive else "close"
+        }
+        if body is not None:
+            request_headers["Content-Type"] = "application/x-www-form-urlencoded"
+        request_headers.update(headers or {})
+        if body is None and self.method in ("POST", "PUT", "PATCH"):
+            body = ""
+
+        head = f"{self.method} {target} HTTP/1.1\r\n" + "".join(f"{name}: {value}\r\n" for name, value in request_headers.items())
+        self._head = head.split(marker)
+        self._body = body.split(marker) if body is not None else None
+        if len(self._head) + len(self._body or [""]) < 3:
+            raise ValueError(f"No {marker} injection point in the URL, headers or body.")
+
+    def render(self, payload):
+        """
+        Builds the request with every injection point set to a payload.
+
+        Args:
+            payload (str): The payload, inserted as it is.
+
+        Returns:
+            bytes: The request.
+        """
+        head = payload.join(self._head).encode("utf-8", "surrogateescape")
+        if self._body is None:
+            return head + b"\r\n"
+        body = payload.join(self._body).encode("utf-8", "surrogateescape")
+        return head + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+
+class HTTPResponse:
+    """A response read from a pooled connection."""
+    def __init__(self, status, reason, headers, body, keep_alive):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.keep_alive = keep_alive
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        return f"HTTPResponse(status={self.status}, length={len(self.body)})"
+
+async def read_response(reader, method="GET"):
+    """
+    Reads one HTTP/1.x response, with a Content-Length, chunked or
+    read-until-close body.
+
+    Args:
+        reader (asyncio.StreamReader): The connection's reader.
+        method (str, optional): The request method; HEAD responses have no body.
+
+    Returns:
+        HTTPResponse: The response.
+
+    Raises:
+        ConnectionError: If the connection was closed before a response, or
+            the response is malformed.
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("The connection was closed before a response.")
+    try:
+        version, status, *reason = status_line.decode("latin-1").split(None, 2)
+        status = int(status)
+    except ValueError:
+        raise ConnectionError(f"Malformed status line: {status_line[:80]!r}")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+    if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+        body = b""
+    elif "chunked" in headers.get("transfer-encoding", "").lower():
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            try:
+                size = int(size_line.split(b";")[0].strip(), 16)
+            except ValueError:
+                raise ConnectionError(f"Malformed chunk size: {size_line[:80]!r}")
+            if size == 0:
+                while await reader.readline() not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b"".join(chunks)
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    else:
+        body = await reader.read()
+        keep_alive = False
+    return HTTPResponse(status, reason[0].strip() if reason else "", headers, body, keep_alive)
+
+class ConnectionPool:
+    """
+    Persistent HTTP/1.1 connections to one host.
+
+    A request takes an idle connection, or opens one if none is idle, and
+    returns it to the pool once the response has been read, unless either
+    side asked to close it. The pool never holds more connections than there
+    are requests in flight. A request sent on a kept-alive connection the
+    server has closed in the meantime is sent again on another connection.
+    """
+    def __init__(self, host, port, use_ssl=False, verify_tls=False, keep_alive=True):
+        self.host = host
+        self.port = port
+        self.keep_alive = keep_alive
+        self.ssl_context = None
+        if use_ssl:
+            self.ssl_context = ssl.create_default_context()
+            if not verify_tls:
+                # Lab targets mostly use self-signed certificates
+                self.ssl_context.check_hostname = False
+                self.ssl_context.verify_mode = ssl.CERT_NONE
+        self.opened = 0
+        self._idle = []
+
+    async def _open(self):
+        connection = await asyncio.open_connection(self.host, self.port, ssl=self.ssl_context)
+        self.opened += 1
+        return connection
+
+    async def request(self, data, method="GET"):
+        """
+        Sends a request and reads its response.
+
+        Args:
+            data (bytes): The request.
+            method (str, optional): The request method.
+
+        Returns:
+            HTTPResponse: The response.
+
+        Raises:
+            OSError: If the request could not be sent or its response read.
+        """
+        while True:
+            reused = bool(self._idle)
+            reader, writer = self._idle.pop() if reused else await self._open()
+            started = time.perf_counter()
+            try:
+                writer.write(data)
+                await writer.drain()
+                response = await read_response(reader, method)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                writer.close()
+                if reused:
+                    continue
+                raise e if isinstance(e, ConnectionError) else ConnectionResetError(str(e))
+            except BaseException:
+                writer.close()
+                raise
+            response.elapsed = time.perf_counter() - started
+            if response.keep_alive and self.keep_alive:
+                self._idle.append((reader, writer))
+            else:
+                writer.close()
+            return response
+
+    async def close(self):
+        """Closes the idle connections."""
+        for reader, writer in self._idle:
+            writer.close()
+        self._idle = []
+
+def reflections(value):
+    """
+    Returns the forms a value can be reflected in: as sent, and URL-decoded
+    as the target reads it from a query string or form body.
+
+    Args:
+        value (str): The value.
+
+    Returns:
+        list: The forms, as bytes, longest first.
+    """
+    forms = {value.encode("utf-8", "surrogateescape"), unquote_plus(value).encode("utf-8", "surrogateescape")} - {b""}
+    return sorted(forms, key=len, reverse=True)
+
+def content_length(response, value):
+    """Returns the length of a response body with every reflection of `value` removed."""
+    body = response.body
+    for form in reflections(value):
+        body = body.replace(form, b"")
+    return len(body)
+
+def classify(response, payload, baseline, length_tolerance=DEFAULT_SETTINGS["length_tolerance"],
+             length_ratio=DEFAULT_SETTINGS["length_ratio"]):
+    """
+    Compares a payload's response with the baseline response.
+
+    The payload counts as reflected if it appears in the body as sent or
+    URL-decoded. Reflections of the payload (and of the baseline value) are
+    left out of the length comparison, so a page that only echoes its input does not
+    count as a different length.
+
+    Args:
+        response (HTTPResponse): The payload's response.
+        payload (str): The payload.
+        baseline (HTTPResponse): The response to the baseline value.
+        length_tolerance (int, optional): Length differences up to this many bytes are ignored.
+        length_ratio (float, optional): Length differences up to this fraction of
+            the baseline length are ignored.
+
+    Returns:
+        list: The reasons the response stands out: 'status', 'length' and/or 'reflected'.
+    """
+    reasons = []
+    if response.status != baseline.status:
+        reasons.append("status")
+    difference = abs(content_length(response, payload) - content_length(baseline, BASELINE_VALUE))
+    if difference > max(length_tolerance, length_ratio * len(baseline.body)):
+        reasons.append("length")
+    if any(form in response.body for form in reflections(payload)):
+        reasons.append("reflected")
+    return reasons
+
+async def fuzz(template, payloads, concurrency=DEFAULT_SETTINGS["concurrency"], limiter=None, on_result=None,
+               timeout=DEFAULT_SETTINGS["timeout"], verify_tls=False, length_tolerance=DEFAULT_SETTINGS["length_tolerance"],
+               length_ratio=DEFAULT_SETTINGS["length_ratio"]):
+    """
+    Sends every payload into a request's injection points and classifies the responses.
+
+    A baseline request is sent first with a harmless value. Then
+    `concurrency` workers take payloads from the iterator as they become
+    free, so payloads are generated only as fast as they are sent, and
+    share a pool of kept-alive connections.
+
+    Args:
+        template (RequestTemplate): The request.
+        payloads (iterable): The payloads, e.g. `PayloadCorpus.variants(...)`.
+        concurrency (int, optional): The number of requests in flight at once.
+        limiter (HostRateLimiter, optional): Paces the requests and is told
+            about timeouts, dropped connections and 429/503 responses.
+        on_result (callable, optional): Called with each result dict: the
+            'payload', 'status', 'length', 'elapsed', 'reasons' ('status',
+            'length', 'reflected' or 'error') and 'error'.
+        timeout (float, optional): Seconds to wait for each response.
+        verify_tls (bool, optional): Verify the certificate of https targets.
+        length_tolerance (int, optional): See `classify`.
+        length_ratio (float, optional): See `classify`.
+
+    Returns:
+        dict: The 'requests', 'errors', 'interesting' results, 'connections'
+            opened, 'seconds' and requests per second ('rps'), and the 'baseline'
+            status and length.
+
+    Raises:
+        OSError: If the baseline request fails.
+    """
+    pool = ConnectionPool(template.host, template.port, template.use_ssl, verify_tls, template.keep_alive)
+    stats = {"requests": 0, "errors": 0, "interesting": 0}
+    try:
+        baseline = await asyncio.wait_for(pool.request(template.render(BASELINE_VALUE), template.method), timeout)
+        iterator = iter(payloads)
+        started = time.perf_counter()
+
+        async def worker():
+            # Workers share the iterator; next() never yields to the event loop, so each payload is taken once
+            for payload in iterator:
+                if limiter:
+                    await limiter.acquire_async()
+                try:
+                    response = await asyncio.wait_for(pool.request(template.render(payload), template.method), timeout)
+                except (OSError, asyncio.TimeoutError) as e:
+                    result = {"payload": payload, "status": None, "length": None, "elapsed": None,
+                              "reasons": ["error"], "error": str(e) or type(e).__name__}
+                else:
+                    result = {"payload": payload, "status": response.status, "length": len(response.body),
+                              "elapsed": response.elapsed, "reasons": classify(response, payload, baseline, length_tolerance, length_ratio),
+                              "error": None}
+                failed = result["error"] is not None or result["status"] in THROTTLED_STATUSES
+                stats["requests"] += 1
+                stats["errors"] += result["error"] is not None
+                stats["interesting"] += bool(result["reasons"])
+                if limiter:
+                    limiter.observe(requests=1, errors=1 if failed else 0)
+                if on_result:
+                    on_result(result)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        stats["seconds"] = time.perf_counter() - started
+    finally:
+        await pool.close()
+        if limiter:
+            limiter.flush()
+    stats["rps"] = stats["requests"] / stats["seconds"] if stats["seconds"] else 0.0
+    stats["connections"] = pool.opened
+    stats["baseline"] = {"status": baseline.status, "length": len(baseline.body)}
+    return stats
+
+def parse_headers(values):
+    """
+    Parses 'Name: value' header arguments.
+
+    Args:
+        values (list): The headers.
+
+    Returns:
+        dict: The header values by name.
+
+    Raises:
+        ValueError: If a header has no name.
+    """
+    headers = {}
+    for value in values or []:
+        name, separator, content = value.partition(":")
+        if not separator or not name.strip():
+            raise ValueError(f"Invalid header '{value}'. Use 'Name: value'.")
+        headers[name.strip()] = content.strip()
+    return headers
+
+def run_fuzz(url, method="GET", data=None, headers=None, category=None, tags=None, encodings=("raw",),
+             mutations=("none",), limit=None, concurrency=None, output_path=None, show_all=False, rate_limit=True):
+    """
+    Fuzzes a request with payloads from the corpus and prints the responses
+    that stand out (the `fuzz` subcommand).
+
+    Args:
+        url (str): The URL, with FUZZ at the injection points.
+        method (str, optional): The request method.
+        data (str, optional): The request body, with FUZZ at the injection points.
+        headers (list, optional): 'Name: value' headers.
+        category (str, optional): The payload category.
+        tags (iterable, optional): Payload context tags.
+        encodings (iterable, optional): Payload encodings.
+        mutations (iterable, optional): Payload mutations.
+        limit (int, optional): The maximum number of payloads.
+        concurrency (int, optional): The number of requests in flight. Defaults
+            to `fuzzer.concurrency` in config/base.json.
+        output_path (str, optional): A JSON lines file the printed results are appended to.
+        show_all (bool, optional): Print every response, not only those that stand out.
+        rate_limit (bool, optional): Pace the requests with the host's shared rate limiter.
+
+    Returns:
+        dict: The fuzzing statistics (see `fuzz`), or None on error.
+    """
+    from itertools import islice
+    from scripts.payload_corpus import PayloadCorpus
+    from scripts.rate_limiter import open_rate_limiter
+
+    settings = fuzzer_settings()
+    try:
+        template = RequestTemplate(url, method, parse_headers(headers), data)
+        corpus = PayloadCorpus()
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return None
+    output = open(output_path, "a") if output_path else None
+
+    def report(result):
+        if not (show_all or result["reasons"]):
+            return
+        status = result["status"] if result["status"] is not None else "ERR"
+        length = result["length"] if result["length"] is not None else "-"
+        print(f"{status:>3} {length:>8} {','.join(result['reasons']) or '-':<22} {result['error'] or result['payload']}")
+        if output:
+            output.write(json.dumps(result) + "\n")
+
+    try:
+        payloads = islice(corpus.variants(category, tags, encodings, mutations), limit)
+        limiter = open_rate_limiter(template.host) if rate_limit else None
+        stats = asyncio.run(fuzz(
+            template, payloads, concurrency or int(settings["concurrency"]), limiter, report,
+            float(settings["timeout"]), bool(settings["verify_tls"]), settings["length_tolerance"], settings["length_ratio"]
+        ))
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return None
+    except (OSError, asyncio.TimeoutError) as e:
+        print(f"[ERROR] Baseline request to {url} failed: {e or type(e).__name__}")
+        return None
+    except KeyboardInterrupt:
+        return None
+    finally:
+        corpus.close()
+        if output:
+            output.close()
+    print(
+        f"{stats['requests']} requests in {stats['seconds']:.1f}s ({stats['rps']:.0f} req/s) over "
+        f"{stats['connections']} connections; {stats['interesting']} stood out, {stats['errors']} errors."
+    )
+    return stats
@@ -1,27 +1,303 @@
 import os
+import json
+import time
+import gzip
+import queue
+import fcntl
+import atexit
+import shutil
+import threading
+import multiprocessing.util
+from contextlib import contextmanager
 from datetime import datetime
+from scripts.utils import load_config
 
-def log_action(challenge_path, message, context=None):
+LOG_FILE = "challenge.log"
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUPS = 5
+DEFAULT_FLUSH_INTERVAL = 0.5
+DEFAULT_BATCH_SIZE = 500
+ERROR_PREFIXES = ("error", "[error]", "unexpected error", "failed")
+
+_writer = None
+_writer_lock = threading.Lock()
+_buffered_parent = False
+_settings = None
+
+def log_settings():
+    """
+    Returns the log rotation and buffering settings from config/base.json,
+    read once per process.
+
+    Returns:
+        dict: 'max_bytes' and 'backups' for rotation, and the writer's
+            'flush_interval' (seconds) and 'batch_size' (events).
+    """
+    global _settings
+    if _settings is None:
+        settings = load_config("base").get("logging", {})
+        _settings = {
+            "max_bytes": int(settings.get("max_bytes", DEFAULT_MAX_BYTES)),
+            "backups": int(settings.get("backups", DEFAULT_BACKUPS)),
+            "flush_interval": float(settings.get("flush_interval", DEFAULT_FLUSH_INTERVAL)),
+            "batch_size": int(settings.get("batch_size", DEFAULT_BATCH_SIZE))
+        }
+    return _settings
+
+def log_event(message, context=None, level=None):
+    """
+    Builds a structured log event.
+
+    Args:
+        message (str): The message.
+        context (dict, optional): Additional context.
+        level (str, optional): 'info', 'warning' or 'error'. Messages starting
+            with 'Error', '[ERROR]', 'Unexpected error' or 'Failed' default to 'error'.
+
+    Returns:
+        dict: The event.
+    """
+    now = time.time()
+    if level is None:
+        level = "error" if str(message).lower().startswith(ERROR_PREFIXES) else "info"
+    return {
+        "ts": now,
+        "time": datetime.fromtimestamp(now).isoformat(timespec="milliseconds"),
+        "level": level,
+        "message": str(message),
+        "context": context or {},
+        "pid": os.getpid()
+    }
+
+def rotate_log(log_file, backups):
+    """
+    Compresses a log into `<log>.1.gz`, shifting older backups up and
+    dropping the oldest, then empties the log.
+
+    The log is truncated rather than renamed so processes holding it open
+    keep appending to the same file. Callers hold the log's lock.
+
+    Args:
+        log_file (str): The log file.
+        backups (int): The number of compressed backups to keep.
+    """
+    if backups > 0:
+        oldest = f"{log_file}.{backups}.gz"
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for index in range(backups - 1, 0, -1):
+            if os.path.exists(f"{log_file}.{index}.gz"):
+                os.replace(f"{log_file}.{index}.gz", f"{log_file}.{index + 1}.gz")
+        with open(log_file, "rb") as source, gzip.open(f"{log_file}.1.gz.tmp", "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.replace(f"{log_file}.1.gz.tmp", f"{log_file}.1.gz")
+    os.truncate(log_file, 0)
+
+def write_events(log_file, events, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
+    """
+    Appends events to a log as JSON lines in a single write.
+
+    The log is locked while it is written, so lines from concurrent writers
+    and processes never interleave. A log that would grow past `max_bytes`
+    is rotated first.
+
+    Args:
+        log_file (str): The log file.
+        events (list): The events.
+        max_bytes (int, optional): The size at which the log is rotated (0 disables rotation).
+        backups (int, optional): The number of compressed backups to keep.
+    """
+    data = "".join(json.dumps(event, default=str) + "\n" for event in events).encode()
+    descriptor = os.open(log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(descriptor, fcntl.LOCK_EX)
+        size = os.fstat(descriptor).st_size
+        if max_bytes and size and size + len(data) > max_bytes:
+            rotate_log(log_file, backups)
+        os.write(descriptor, data)
+    finally:
+        os.close(descriptor)
+
+class LogWriter:
+    """
+    A background thread that writes queued log events in batches.
+
+    Events are grouped by log file and each group is appended with one
+    locked write, at most every `flush_interval` seconds or as soon as
+    `batch_size` events are waiting.
+    """
+    def __init__(self, flush_interval=DEFAULT_FLUSH_INTERVAL, batch_size=DEFAULT_BATCH_SIZE,
+                 max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.pid = os.getpid()
+        self.queue = queue.Queue()
+        self.errors = 0
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def put(self, log_file, event):
+        """Queues an event for a log file."""
+        self.queue.put((log_file, event))
+
+    def flush(self, timeout=None):
+        """
+        Waits until every event queued so far is written.
+
+        Returns:
+            bool: False if the timeout expired first.
+        """
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        """Writes the remaining events and stops the thread."""
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+    def _run(self):
+        running = True
+        while running:
+            batch, waiters = {}, []
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # Collect events until the batch is full, the interval ends, or a flush or close is requested
+            deadline = time.monotonic() + self.flush_interval
+            count = 0
+            while True:
+                if item is None:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.setdefault(item[0], []).append(item[1])
+                    count += 1
+                if not running or waiters or count >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            for log_file, events in batch.items():
+                try:
+                    write_events(log_file, events, self.max_bytes, self.backups)
+                except OSError:
+                    self.errors += 1
+            for waiter in waiters:
+                waiter.set()
+
+def _start_writer():
+    settings = log_settings()
+    return LogWriter(settings["flush_interval"], settings["batch_size"], settings["max_bytes"], settings["backups"])
+
+def _active_writer():
+    """Returns the running background writer of this process, if any."""
+    writer = _writer
+    if writer is None or writer.pid != os.getpid() or not writer.thread.is_alive():
+        return None
+    return writer
+
+def _worker_writer():
+    """
+    Returns the writer of a worker process forked inside `buffered_logging()`,
+    starting it on the worker's first event. It is closed when the worker exits.
+    """
+    global _writer
+    with _writer_lock:
+        writer = _active_writer()
+        if writer is None:
+            writer = _writer = _start_writer()
+            # multiprocessing workers leave through os._exit, which skips atexit
+            multiprocessing.util.Finalize(writer, writer.close, args=(5,), exitpriority=10)
+        return writer
+
+def _after_fork_in_child():
+    # The parent's writer thread does not exist in the child, and its lock may
+    # have been held by another thread at the time of the fork
+    global _writer, _writer_lock, _buffered_parent
+    _buffered_parent = _writer is not None
+    _writer = None
+    _writer_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+def flush_logs(timeout=None):
+    """
+    Writes all queued log events.
+
+    Args:
+        timeout (float, optional): The longest time to wait in seconds.
+    """
+    writer = _active_writer()
+    if writer:
+        writer.flush(timeout)
+
+@contextmanager
+def buffered_logging():
+    """
+    Queues `log_action` events to a background writer thread for the
+    duration of the block, then writes the rest.
+
+    Nested blocks share the same writer. Worker processes forked inside the
+    block start their own writer when they first log (see `flush_logs`).
+
+    Yields:
+        LogWriter: The writer.
+    """
+    global _writer
+    with _writer_lock:
+        owner = _active_writer() is None
+        if owner:
+            _writer = _start_writer()
+        writer = _writer
+    try:
+        yield writer
+    finally:
+        if owner:
+            with _writer_lock:
+                writer.close()
+                _writer = None
+
+@atexit.register
+def _close_writer():
+    writer = _active_writer()
+    if writer:
+        writer.close(timeout=5)
+
+def log_action(challenge_path, message, context=None, level=None):
     """
     Logs a message to the challenge's log file with optional context.
 
+    Each message is one JSON line with its time, level, message, context and
+    process id. Inside a `buffered_logging()` block, and in worker processes
+    forked inside one, the event is queued to the process's background
+    writer; otherwise it is appended immediately.
+
     Args:
         challenge_path (str): The path to the challenge directory.
         message (str): The message to log.
         context (dict, optional): Additional context to include in the log.
+        level (str, optional): The event level (see `log_event`).
 
     Raises:
         Exception: If logging fails.
     """
-    log_file = os.path.join(challenge_path, "challenge.log")
+    log_file = os.path.join(challenge_path, LOG_FILE)
     os.makedirs(challenge_path, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    context_str = ""
-    if context:
-        context_str = " ".join([f"[{k}: {v}]" for k, v in context.items()])
-    log_message = f"[{timestamp}] {context_str} {message}\n"
-    with open(log_file, "a") as f:
-        f.write(log_message)
+    event = log_event(message, context, level)
+    writer = _active_writer()
+    if writer is None and _buffered_parent:
+        writer = _worker_writer()
+    if writer:
+        writer.put(log_file, event)
+    else:
+        settings = log_settings()
+        write_events(log_file, [event], settings["max_bytes"], settings["backups"])
 
 def read_log(challenge_path):
     """
@@ -36,10 +312,11 @@ def read_log(challenge_path):
     Raises:
         FileNotFoundError: If the log file does not exist.
     """
-    log_file = os.path.join(challenge_path, "challenge.log")
+    log_file = os.path.join(challenge_path, LOG_FILE)
     if not os.path.exists(log_file):
         raise FileNotFoundError(f"Log file not found in challenge directory '{challenge_path}'.")
 
+    flush_logs()
     with open(log_file, "r") as f:
         return f.read()
 
@@ -50,7 +327,7 @@ def clear_log(challenge_path):
     Args:
         challenge_path (str): The path to the challenge directory.
     """
-    log_file = os.path.join(challenge_path, "challenge.log")
+    log_file = os.path.join(challenge_path, LOG_FILE)
     if os.path.exists(log_file):
         with open(log_file, "w") as f:
             f.truncate()
@@ -0,0 +1,311 @@
+import os
+import re
+import json
+import time
+from datetime import datetime, timedelta
+from scripts.log_manager import LOG_FILE
+from scripts.utils import load_config
+
+INDEX_SUFFIX = ".idx"
+BLOCK_BYTES = 64 * 1024
+HEAD_BYTES = 256
+LEGACY_LINE = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\]\s*(.*)$")
+RELATIVE_TIME = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+RELATIVE_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+def parse_line(line):
+    """
+    Parses a line of `challenge.log` into an event.
+
+    Lines written before logs were structured (`[YYYY-MM-DD HH:MM:SS] message`)
+    are read as 'info' events.
+
+    Args:
+        line (bytes or str): The line.
+
+    Returns:
+        dict: The event, or None for blank and unreadable lines.
+    """
+    if isinstance(line, bytes):
+        line = line.decode("utf-8", "replace")
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            return None
+        return event if isinstance(event, dict) and "ts" in event else None
+    match = LEGACY_LINE.match(line)
+    if not match:
+        return None
+    logged_at = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S")
+    return {
+        "ts": logged_at.timestamp(),
+        "time": logged_at.isoformat(),
+        "level": "info",
+        "message": match.group(2),
+        "context": {},
+        "pid": None
+    }
+
+def parse_time(value):
+    """
+    Parses a query time.
+
+    Args:
+        value (str, float or datetime): An epoch timestamp, a datetime, an ISO
+            date/time, or a time relative to now such as '90s', '15m', '2h' or '1d'.
+
+    Returns:
+        float: The epoch timestamp, or None if `value` is None.
+
+    Raises:
+        ValueError: If the value cannot be parsed.
+    """
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        return value.timestamp()
+    match = RELATIVE_TIME.match(value.strip())
+    if match:
+        return time.time() - timedelta(**{RELATIVE_UNITS[match.group(2)]: float(match.group(1))}).total_seconds()
+    return datetime.fromisoformat(value.strip()).timestamp()
+
+class LogIndex:
+    """
+    A sparse index of a challenge log, kept next to it in `challenge.log.idx`.
+
+    The log is divided into blocks of about 64 KB ending at line boundaries.
+    For each block the index records its byte offset, its earliest and
+    latest timestamps and the levels it contains, so a query only reads the
+    blocks that can hold matching events. Events from parallel workers are
+    not strictly in time order, which is why blocks keep both bounds.
+
+    The index is brought up to date on every query by reading only what was
+    appended since, and rebuilt when the log has been rotated.
+    """
+    def __init__(self, log_file, block_bytes=BLOCK_BYTES):
+        self.log_file = log_file
+        self.index_file = log_file + INDEX_SUFFIX
+        self.block_bytes = block_bytes
+        self.head = ""
+        self.size = 0
+        self.blocks = []
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_file, "r") as f:
+                state = json.load(f)
+            if state.get("block_bytes") == self.block_bytes:
+                self.head, self.size, self.blocks = state["head"], state["size"], state["blocks"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+    def _save(self):
+        temporary = self.index_file + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump({"block_bytes": self.block_bytes, "head": self.head, "size": self.size, "blocks": self.blocks}, f)
+        os.replace(temporary, self.index_file)
+
+    def refresh(self):
+        """
+        Indexes the lines appended to the log since the last refresh.
+
+        Returns:
+            int: The number of bytes read.
+        """
+        try:
+            f = open(self.log_file, "rb")
+        except FileNotFoundError:
+            self.head, self.size, self.blocks = "", 0, []
+            return 0
+        with f:
+            head = f.read(HEAD_BYTES).hex()
+            log_size = os.fstat(f.fileno()).st_size
+            if log_size < self.size or not head.startswith(self.head[:len(head)]) or not self.head.startswith(head[:len(self.head)]):
+                # Rotated or rewritten: start over
+                self.size, self.blocks = 0, []
+            self.head = head
+            if log_size == self.size:
+                return 0
+
+            # Re-read the last block, which may have been left partly filled
+            start = self.blocks.pop()[0] if self.blocks else 0
+            f.seek(start)
+            offset, block = start, None
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                if block is None or offset - block[0] >= self.block_bytes:
+                    block = [offset, None, None, []]
+                    self.blocks.append(block)
+                event = parse_line(line)
+                if event:
+                    block[1] = event["ts"] if block[1] is None else min(block[1], event["ts"])
+                    block[2] = event["ts"] if block[2] is None else max(block[2], event["ts"])
+                    if event.get("level") not in block[3]:
+                        block[3].append(event.get("level"))
+                offset += len(line)
+            read, self.size = offset - start, offset
+        self._save()
+        return read
+
+    def ranges(self, start=None, end=None, level=None):
+        """
+        Returns the byte ranges of the log that can hold matching events.
+
+        Args:
+            start (float, optional): The earliest timestamp.
+            end (float, optional): The latest timestamp.
+            level (str, optional): The level.
+
+        Returns:
+            list: (start offset, end offset) tuples, with adjacent blocks merged.
+        """
+        ranges = []
+        for index, (offset, earliest, latest, levels) in enumerate(self.blocks):
+            if earliest is None:
+                continue
+            if (start is not None and latest < start) or (end is not None and earliest > end):
+                continue
+            if level is not None and level not in levels:
+                continue
+            block_end = self.blocks[index + 1][0] if index + 1 < len(self.blocks) else self.size
+            if ranges and ranges[-1][1] == offset:
+                ranges[-1] = (ranges[-1][0], block_end)
+            else:
+                ranges.append((offset, block_end))
+        return ranges
+
+def _matches(event, start, end, level, contains):
+    return (
+        (start is None or event["ts"] >= start)
+        and (end is None or event["ts"] <= end)
+        and (level is None or event.get("level") == level)
+        and (contains is None or contains.lower() in event.get("message", "").lower())
+    )
+
+def query_log(challenge_path, start=None, end=None, level=None, contains=None):
+    """
+    Streams the events of a challenge log in a time range or at a level.
+
+    Only the index blocks that can hold matching events are read, so a query
+    for the last few minutes of a long engagement reads a few kilobytes.
+
+    Args:
+        challenge_path (str): The path to the challenge directory.
+        start (optional): The earliest time (see `parse_time`).
+        end (optional): The latest time (see `parse_time`).
+        level (str, optional): Only events at this level.
+        contains (str, optional): Only events whose message contains this text
+            (case-insensitive).
+
+    Yields:
+        dict: The matching events, in log order.
+
+    Raises:
+        FileNotFoundError: If the log file does not exist.
+    """
+    log_file = os.path.join(challenge_path, LOG_FILE)
+    if not os.path.exists(log_file):
+        raise FileNotFoundError(f"Log file not found in challenge directory '{challenge_path}'.")
+    start, end = parse_time(start), parse_time(end)
+
+    index = LogIndex(log_file)
+    index.refresh()
+    with open(log_file, "rb") as f:
+        for range_start, range_end in index.ranges(start, end, level):
+            f.seek(range_start)
+            position = range_start
+            while position < range_end:
+                line = f.readline()
+                if not line:
+                    break
+                position += len(line)
+                event = parse_line(line)
+                if event and _matches(event, start, end, level, contains):
+                    yield event
+
+def follow_log(challenge_path, level=None, contains=None, offset=None, poll_interval=0.5, stop=None):
+    """
+    Streams the events of a challenge log as they are written, like `tail -f`.
+
+    Partly written lines are held back until they are complete, and a
+    rotated log is followed from its beginning.
+
+    Args:
+        challenge_path (str): The path to the challenge directory.
+        level (str, optional): Only events at this level.
+        contains (str, optional): Only events whose message contains this text.
+        offset (int, optional): The byte offset to follow from; 0 also yields
+            the events already in the log. Defaults to the end of the log.
+        poll_interval (float, optional): Seconds between checks for new lines.
+        stop (threading.Event, optional): Ends the stream once set.
+
+    Yields:
+        dict: The new events.
+    """
+    log_file = os.path.join(challenge_path, LOG_FILE)
+    position, pending = None, b""
+    while stop is None or not stop.is_set():
+        try:
+            size = os.path.getsize(log_file)
+        except FileNotFoundError:
+            size = None
+        if size is not None:
+            if position is None:
+                position = size if offset is None else offset
+            if size < position:
+                # The log was rotated
+                position, pending = 0, b""
+            if size > position:
+                with open(log_file, "rb") as f:
+                    f.seek(position)
+                    data = f.read(size - position)
+                position += len(data)
+                *lines, pending = (pending + data).split(b"\n")
+                for line in lines:
+                    event = parse_line(line)
+                    if event and _matches(event, None, None, level, contains):
+                        yield event
+                continue
+        if stop is not None:
+            stop.wait(poll_interval)
+        else:
+            time.sleep(poll_interval)
+
+def format_event(event):
+    """Returns an event as one line of text."""
+    context = " ".join(f"[{key}: {value}]" for key, value in (event.get("context") or {}).items())
+    return f"{event['time']} {event.get('level', 'info').upper():<7} {context + ' ' if context else ''}{event['message']}"
+
+def run_log_query(challenge, since=None, until=None, level=None, contains=None, follow=False):
+    """
+    Prints the events of a challenge's log (the `logs` subcommand).
+
+    Args:
+        challenge (str): The challenge name or directory.
+        since (str, optional): The earliest time.
+        until (str, optional): The latest time.
+        level (str, optional): Only events at this level.
+        contains (str, optional): Only events whose message contains this text.
+        follow (bool, optional): Keep printing new events until interrupted.
+    """
+    challenge_path = challenge if os.path.isdir(challenge) else os.path.join(
+        os.path.expanduser(load_config("base")["base_directory"]), challenge
+    )
+    try:
+        for event in query_log(challenge_path, since, until, level, contains):
+            print(format_event(event))
+        if follow:
+            # Continue exactly where the indexed query stopped
+            offset = LogIndex(os.path.join(challenge_path, LOG_FILE)).size
+            for event in follow_log(challenge_path, level, contains, offset):
+                print(format_event(event), flush=True)
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}")
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,225 @@
+import os
+import json
+import copy
+import fcntl
+import threading
+from contextlib import contextmanager
+
+METADATA_FILE = "metadata.json"
+JOURNAL_SUFFIX = ".journal"
+LOCK_SUFFIX = ".lock"
+DEFAULT_COMPACT_BYTES = 64 * 1024
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def apply_update(metadata, updates):
+    """
+    Merges an update into metadata: lists are extended, dicts are updated
+    and any other value replaces the existing one.
+
+    Args:
+        metadata (dict): The metadata, changed in place.
+        updates (dict): Key-value pairs to update.
+    """
+    for key, value in updates.items():
+        if isinstance(value, list) and isinstance(metadata.get(key), list):
+            metadata[key].extend(value)
+        elif isinstance(value, dict) and isinstance(metadata.get(key), dict):
+            metadata[key].update(value)
+        else:
+            metadata[key] = value
+
+class MetadataStore:
+    """
+    The metadata of a challenge, safe to update from parallel tasks and processes.
+
+    Updates are appended as one JSON line each to `metadata.json.journal`
+    under an exclusive file lock, so an update costs the same however large
+    the metadata is. Once the journal grows past `compact_bytes` it is folded
+    into `metadata.json`, which is written to a temporary file and renamed
+    into place so it is never left half written.
+
+    The journal's first line records which `metadata.json` (inode, mtime and
+    size) its updates apply to. A journal left over from an interrupted
+    compaction, or written against a `metadata.json` that was since replaced,
+    no longer matches and is ignored, so no update is applied twice.
+
+    Reads are served from an in-memory view that only reads journal lines
+    appended since the previous read.
+    """
+    def __init__(self, challenge_path, compact_bytes=DEFAULT_COMPACT_BYTES):
+        self.challenge_path = challenge_path
+        self.metadata_file = os.path.join(challenge_path, METADATA_FILE)
+        self.journal_file = self.metadata_file + JOURNAL_SUFFIX
+        self.lock_file = self.metadata_file + LOCK_SUFFIX
+        self.compact_bytes = compact_bytes
+        self._thread_lock = threading.Lock()
+        self._view = None
+        self._snapshot = None
+        self._journal_offset = 0
+
+    @contextmanager
+    def _locked(self, exclusive):
+        with self._thread_lock:
+            descriptor = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(descriptor, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                yield
+            finally:
+                os.close(descriptor)
+
+    def _snapshot_identity(self):
+        """Returns the (inode, mtime, size) of metadata.json, or None if it does not exist."""
+        try:
+            stat = os.stat(self.metadata_file)
+        except FileNotFoundError:
+            return None
+        return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+    def _journal_header(self):
+        """Returns the snapshot identity recorded in the journal, or None."""
+        try:
+            with open(self.journal_file, "rb") as f:
+                line = f.readline()
+        except FileNotFoundError:
+            return None
+        try:
+            return json.loads(line)["snapshot"] if line.endswith(b"\n") else None
+        except (json.JSONDecodeError, KeyError, TypeError):
+            return None
+
+    def _reset_journal(self, identity):
+        """Starts an empty journal for the given snapshot."""
+        with open(self.journal_file, "wb") as f:
+            f.write(json.dumps({"snapshot": identity}).encode() + b"\n")
+
+    def _refresh(self):
+        """Brings the in-memory view up to date. Callers hold the lock."""
+        identity = self._snapshot_identity()
+        if identity is None:
+            self._view, self._snapshot = None, None
+            return
+        if identity != self._snapshot or self._view is None:
+            with open(self.metadata_file, "r") as f:
+                self._view = json.load(f)
+            self._snapshot, self._journal_offset = identity, 0
+
+        if self._journal_header() != identity:
+            return
+        try:
+            with open(self.journal_file, "rb") as f:
+                if self._journal_offset == 0:
+                    f.readline()
+                else:
+                    f.seek(self._journal_offset)
+                while True:
+                    position = f.tell()
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        # The end of the journal, or an update still being written
+                        break
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if record.get("op") == "update":
+                        apply_update(self._view, record["updates"])
+                self._journal_offset = position
+        except FileNotFoundError:
+            pass
+
+    def load(self):
+        """
+        Returns the current metadata.
+
+        Returns:
+            dict: A copy of the metadata.
+
+        Raises:
+            FileNotFoundError: If the metadata file does not exist.
+        """
+        if not os.path.exists(self.metadata_file):
+            raise FileNotFoundError("Metadata file not found in challenge directory.")
+        with self._locked(exclusive=False):
+            self._refresh()
+            if self._view is None:
+                raise FileNotFoundError("Metadata file not found in challenge directory.")
+            return copy.deepcopy(self._view)
+
+    def update(self, updates):
+        """
+        Records an update by appending it to the journal.
+
+        Args:
+            updates (dict): Key-value pairs to update (see `apply_update`).
+
+        Raises:
+            FileNotFoundError: If the metadata file does not exist.
+        """
+        if not os.path.exists(self.metadata_file):
+            raise FileNotFoundError("Metadata file not found in challenge directory.")
+        line = json.dumps({"op": "update", "updates": updates}, default=str).encode() + b"\n"
+        with self._locked(exclusive=True):
+            identity = self._snapshot_identity()
+            if identity is None:
+                raise FileNotFoundError("Metadata file not found in challenge directory.")
+            if self._journal_header() != identity:
+                self._reset_journal(identity)
+            descriptor = os.open(self.journal_file, os.O_WRONLY | os.O_APPEND)
+            try:
+                os.write(descriptor, line)
+                journal_size = os.fstat(descriptor).st_size
+            finally:
+                os.close(descriptor)
+            if journal_size > self.compact_bytes:
+                self._compact()
+
+    def replace(self, metadata):
+        """
+        Replaces the whole metadata, discarding the journal.
+
+        Args:
+            metadata (dict): The new metadata.
+        """
+        with self._locked(exclusive=True):
+            self._write_snapshot(metadata)
+
+    def compact(self):
+        """Folds the journal into metadata.json."""
+        with self._locked(exclusive=True):
+            if self._snapshot_identity() is not None:
+                self._compact()
+
+    def _compact(self):
+        self._refresh()
+        self._write_snapshot(self._view)
+
+    def _write_snapshot(self, metadata):
+        """Atomically writes metadata.json and starts an empty journal. Callers hold the exclusive lock."""
+        temporary = self.metadata_file + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(metadata, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.metadata_file)
+        identity = self._snapshot_identity()
+        self._reset_journal(identity)
+        self._view, self._snapshot = copy.deepcopy(metadata), identity
+        self._journal_offset = 0
+
+def get_metadata_store(challenge_path):
+    """
+    Returns the process-wide metadata store of a challenge.
+
+    Args:
+        challenge_path (str): The path to the challenge directory.
+
+    Returns:
+        MetadataStore: The store.
+    """
+    key = os.path.abspath(challenge_path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = MetadataStore(key)
+        return _stores[key]
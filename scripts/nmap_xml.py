@@ -0,0 +1,109 @@
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import quoteattr
+
+def iter_nmap_records(source):
+    """
+    Streams port records from an nmap XML report (`-oX`).
+
+    The report is parsed incrementally and every host element is discarded
+    once its ports have been yielded, so memory use does not grow with the
+    size of the scan. A truncated report (e.g., from an interrupted scan)
+    yields the records of every host that was completely written.
+
+    Args:
+        source (str): The path of the XML report, or a binary file object.
+
+    Yields:
+        dict: A record per port with the 'host', 'hostname', 'port',
+            'protocol', 'state', 'service', 'product', 'version' and
+            'extrainfo' fields.
+    """
+    context = ET.iterparse(source, events=("start", "end"))
+    try:
+        _, root = next(context)
+        for event, element in context:
+            if event != "end" or element.tag != "host":
+                continue
+            yield from _host_records(element)
+            root.clear()
+    except ET.ParseError:
+        return
+
+def _host_records(host):
+    address = None
+    for element in host.iterfind("address"):
+        if address is None or element.get("addrtype") in ("ipv4", "ipv6"):
+            address = element.get("addr")
+    hostname = host.find("hostnames/hostname")
+    hostname = hostname.get("name") if hostname is not None else None
+
+    for port in host.iterfind("ports/port"):
+        state = port.find("state")
+        service = port.find("service")
+        yield {
+            "type": "port",
+            "host": address,
+            "hostname": hostname,
+            "port": int(port.get("portid")),
+            "protocol": port.get("protocol"),
+            "state": state.get("state") if state is not None else None,
+            "service": service.get("name") if service is not None else None,
+            "product": service.get("product") if service is not None else None,
+            "version": service.get("version") if service is not None else None,
+            "extrainfo": service.get("extrainfo") if service is not None else None
+        }
+
+def describe_version(record):
+    """
+    Returns the version column nmap prints for a port record.
+
+    Args:
+        record (dict): A port record.
+
+    Returns:
+        str: The product, version and extra information, space separated.
+    """
+    parts = [record.get("product"), record.get("version")]
+    if record.get("extrainfo"):
+        parts.append(f"({record['extrainfo']})")
+    return " ".join(part for part in parts if part)
+
+def write_nmap_xml(records, output_path, scanner_args=""):
+    """
+    Writes port records as a minimal nmap XML report that `iter_nmap_records`
+    (and other nmap XML readers) can parse.
+
+    Records of the same host must be consecutive.
+
+    Args:
+        records (iterable): Port records.
+        output_path (str): The file to write.
+        scanner_args (str, optional): The value of the report's 'args' attribute.
+    """
+    with open(output_path, "w") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(f'<nmaprun scanner="nmap" args={quoteattr(scanner_args)}>\n')
+        current = None
+        for record in records:
+            if record["host"] != current:
+                if current is not None:
+                    f.write("</ports></host>\n")
+                current = record["host"]
+                addrtype = "ipv6" if ":" in current else "ipv4"
+                f.write(f'<host><status state="up"/><address addr={quoteattr(current)} addrtype="{addrtype}"/>')
+                if record.get("hostname"):
+                    f.write(f'<hostnames><hostname name={quoteattr(record["hostname"])}/></hostnames>')
+                f.write("<ports>")
+            service = "".join(
+                f" {key}={quoteattr(record[field])}"
+                for key, field in (("name", "service"), ("product", "product"), ("version", "version"), ("extrainfo", "extrainfo"))
+                if record.get(field)
+            )
+            f.write(
+                f'<port protocol={quoteattr(record["protocol"])} portid="{record["port"]}">'
+                f'<state state={quoteattr(record["state"] or "unknown")}/>'
+                f'{f"<service{service}/>" if service else ""}</port>'
+            )
+        if current is not None:
+            f.write("</ports></host>\n")
+        f.write("</nmaprun>\n")
@@ -0,0 +1,179 @@
+import re
+
+GOBUSTER_PATH = re.compile(r"^(?P<path>/\S*)\s+\(Status:\s*(?P<status>\d{3})\)(?:\s+\[Size:\s*(?P<size>\d+)\])?")
+FFUF_RESULT = re.compile(r"^(?P<word>\S+)\s+\[Status:\s*(?P<status>\d{3}),\s*Size:\s*(?P<size>\d+)")
+HYDRA_CREDENTIAL = re.compile(
+    r"^\[(?P<port>\d+)\]\[(?P<service>[\w-]+)\]\s+host:\s*(?P<host>\S+)\s+login:\s*(?P<login>\S+)\s+password:\s*(?P<password>.*)$"
+)
+SEARCHSPLOIT_RESULT = re.compile(r"^(?P<title>[^|]*\S)\s*\|\s*(?P<path>\S+\.\w+)\s*$")
+NMAP_HOST_LINE = re.compile(r"^Nmap scan report for (?:(?P<hostname>\S+) \((?P<address>[^)\s]+)\)|(?P<host>\S+))$")
+NMAP_PORT_LINE = re.compile(r"^(?P<port>\d+)/(?P<protocol>tcp|udp|sctp)\s+(?P<state>\S+)\s+(?P<service>\S+)(?:\s+(?P<version>.*))?$")
+VERSION_NUMBER = re.compile(r"^v?\d+(?:[.\-_]\w+)*$")
+EXTRA_INFO = re.compile(r"^(?P<text>.*?)\s*\((?P<extrainfo>\(?[^()]*\)?)\)$")
+
+def split_service_version(text):
+    """
+    Splits the version column of nmap's normal output into the product,
+    version and extra information fields of its XML report.
+
+    Args:
+        text (str): The version column, e.g. 'OpenSSH 7.2p2 Ubuntu 4ubuntu2.10 (Ubuntu Linux; protocol 2.0)'.
+
+    Returns:
+        tuple: The product, version and extra information (each None if absent).
+    """
+    text = (text or "").strip()
+    extrainfo = None
+    match = EXTRA_INFO.match(text)
+    if match:
+        text, extrainfo = match["text"], match["extrainfo"]
+    words = text.split()
+    for index, word in enumerate(words):
+        if index and VERSION_NUMBER.match(word) and any(character.isdigit() for character in word):
+            return " ".join(words[:index]), " ".join(words[index:]), extrainfo
+    return text or None, None, extrainfo
+
+def parse_gobuster_line(line):
+    """
+    Parses a discovered path from a gobuster output line.
+
+    Args:
+        line (str): A line of gobuster output.
+
+    Returns:
+        dict: The path record, or None if the line is not a result.
+    """
+    match = GOBUSTER_PATH.match(line.strip())
+    if not match:
+        return None
+    return {
+        "type": "web_path",
+        "path": match["path"],
+        "status": int(match["status"]),
+        "size": int(match["size"]) if match["size"] else None
+    }
+
+def parse_ffuf_line(line):
+    """
+    Parses a matched word from an ffuf output line.
+
+    Args:
+        line (str): A line of ffuf output.
+
+    Returns:
+        dict: The path record, or None if the line is not a result.
+    """
+    match = FFUF_RESULT.match(line.strip())
+    if not match:
+        return None
+    return {
+        "type": "web_path",
+        "path": "/" + match["word"].lstrip("/"),
+        "status": int(match["status"]),
+        "size": int(match["size"])
+    }
+
+def parse_hydra_line(line):
+    """
+    Parses a valid credential from a hydra output line.
+
+    Args:
+        line (str): A line of hydra output.
+
+    Returns:
+        dict: The credential record, or None if the line is not a result.
+    """
+    match = HYDRA_CREDENTIAL.match(line.strip())
+    if not match:
+        return None
+    return {
+        "type": "credential",
+        "host": match["host"],
+        "port": int(match["port"]),
+        "service": match["service"],
+        "login": match["login"],
+        "password": match["password"].strip()
+    }
+
+def parse_searchsploit_line(line):
+    """
+    Parses an exploit from a searchsploit result table line.
+
+    Args:
+        line (str): A line of searchsploit output.
+
+    Returns:
+        dict: The exploit record, or None if the line is not a result.
+    """
+    match = SEARCHSPLOIT_RESULT.match(line.strip())
+    if not match:
+        return None
+    return {
+        "type": "exploit",
+        "title": match["title"],
+        "path": match["path"]
+    }
+
+def parse_nmap_line(line):
+    """
+    Parses a port from a line of nmap's normal output.
+
+    Args:
+        line (str): A line of nmap output.
+
+    Returns:
+        dict: The port record (see `scripts.nmap_xml.iter_nmap_records`), or None
+            if the line is not a port.
+    """
+    match = NMAP_PORT_LINE.match(line.strip())
+    if not match:
+        return None
+    product, version, extrainfo = split_service_version(match["version"])
+    return {
+        "type": "port",
+        "port": int(match["port"]),
+        "protocol": match["protocol"],
+        "state": match["state"],
+        "service": match["service"],
+        "product": product,
+        "version": version,
+        "extrainfo": extrainfo
+    }
+
+def parse_nmap_host_line(line):
+    """
+    Parses the line nmap's normal output starts each host's results with.
+
+    Args:
+        line (str): A line of nmap output, e.g. 'Nmap scan report for lame.htb (10.10.10.3)'.
+
+    Returns:
+        tuple: The host's address and hostname (or None), or None if the line
+            does not start a host.
+    """
+    match = NMAP_HOST_LINE.match(line.strip())
+    if not match:
+        return None
+    if match["address"]:
+        return match["address"], match["hostname"]
+    return match["host"], None
+
+LINE_PARSERS = {
+    "gobuster": parse_gobuster_line,
+    "ffuf": parse_ffuf_line,
+    "hydra": parse_hydra_line,
+    "searchsploit": parse_searchsploit_line,
+    "nmap": parse_nmap_line
+}
+
+def get_line_parser(tool_name):
+    """
+    Returns the streaming line parser for a tool.
+
+    Args:
+        tool_name (str): The name of the tool.
+
+    Returns:
+        callable: The line parser, or None if the tool has no parser.
+    """
+    return LINE_PARSERS.get(tool_name)
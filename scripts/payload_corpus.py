@@ -0,0 +1,293 @@
+import os
+import re
+import sys
+import mmap
+import hashlib
+from html import escape
+from array import array
+from itertools import islice
+from urllib.parse import quote
+
+PAYLOAD_DIRECTORY = "payloads"
+PAYLOAD_EXTENSIONS = (".txt",)
+
+# Context tags, assigned to every entry whose bytes match the pattern
+CONTEXT_TAGS = {
+    "html": re.compile(rb"<[A-Za-z!/]"),
+    "attribute": re.compile(rb"\bon[a-z]+\s*=|\bstyle\s*=|^\s*[\"'`]\s*/?>", re.IGNORECASE),
+    "script": re.compile(rb"javascript:|alert\s*\(|document\.|;\s*//", re.IGNORECASE),
+    "url": re.compile(rb"https?://|^//", re.IGNORECASE),
+    "sql": re.compile(rb"\b(?:or|and|union|select|sleep|benchmark|waitfor|having|order\s+by)\b|--|[\"']\s*=", re.IGNORECASE),
+    "sql-string": re.compile(rb"^\s*\w*[\"']"),
+    "sql-comment": re.compile(rb"--|#|/\*"),
+}
+
+ENCODERS = {
+    "raw": lambda payload: payload,
+    "url": lambda payload: quote(payload, safe=""),
+    "double-url": lambda payload: quote(quote(payload, safe=""), safe=""),
+    "html": lambda payload: escape(payload, quote=True),
+    "html-decimal": lambda payload: "".join(f"&#{ord(character)};" for character in payload),
+    "html-hex": lambda payload: "".join(f"&#x{ord(character):x};" for character in payload),
+    "unicode": lambda payload: "".join(f"\\u{ord(character):04x}" for character in payload),
+    "url-unicode": lambda payload: "".join(f"%u{ord(character):04x}" for character in payload),
+}
+
+MUTATIONS = {
+    "none": lambda payload: payload,
+    "upper": str.upper,
+    "lower": str.lower,
+    "alternate-case": lambda payload: "".join(
+        character.upper() if index % 2 else character.lower() for index, character in enumerate(payload)
+    ),
+    "comment-spaces": lambda payload: payload.replace(" ", "/**/"),
+    "tab-spaces": lambda payload: payload.replace(" ", "\t"),
+    "plus-spaces": lambda payload: payload.replace(" ", "+"),
+}
+
+def variants(payloads, encodings=("raw",), mutations=("none",)):
+    """
+    Returns a generator of the encoded and mutated variants of payloads.
+
+    Every mutation of a payload is produced in every encoding. Variants that
+    come out the same (e.g., the upper-case mutation of '1=1') are only
+    yielded once per payload. Nothing is generated until the variants are read.
+
+    Args:
+        payloads (iterable): The payloads.
+        encodings (iterable, optional): Names from ENCODERS.
+        mutations (iterable, optional): Names from MUTATIONS.
+
+    Returns:
+        generator: The variants (str).
+
+    Raises:
+        ValueError: If an encoding or mutation is unknown.
+    """
+    return _variants(payloads, _lookup(ENCODERS, encodings, "encoding"), _lookup(MUTATIONS, mutations, "mutation"))
+
+def _variants(payloads, encoders, mutators):
+    for payload in payloads:
+        seen = set()
+        for mutate in mutators:
+            mutated = mutate(payload)
+            for encode in encoders:
+                variant = encode(mutated)
+                if variant not in seen:
+                    seen.add(variant)
+                    yield variant
+
+def _lookup(functions, names, kind):
+    unknown = [name for name in names if name not in functions]
+    if unknown:
+        raise ValueError(f"Unknown {kind} '{unknown[0]}'. Available: {', '.join(functions)}.")
+    return [functions[name] for name in names]
+
+class PayloadCorpus:
+    """
+    A deduplicated, tagged index of the payload files.
+
+    The files are memory-mapped and the index only keeps each unique
+    entry's file, offset and length with a bitmask of its tags, so the
+    payloads themselves are read from the mapped files as they are used.
+    Each entry is tagged with its category (its path under the payload
+    directory without the extension, e.g. 'xss' or 'sql-injection/auth_bypass')
+    and the contexts in CONTEXT_TAGS that it matches. An entry that appears
+    in several files is kept once, with the categories of every file.
+    """
+    def __init__(self, directory=PAYLOAD_DIRECTORY):
+        self.directory = directory
+        self.categories = []
+        self.tags = list(CONTEXT_TAGS)
+        self._files = []
+        self._maps = []
+        self._file_index = array("H")
+        self._offsets = array("Q")
+        self._lengths = array("I")
+        self._masks = array("Q")
+        self._build()
+
+    def close(self):
+        for mapped in self._maps:
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        for f in self._files:
+            f.close()
+        self._maps, self._files = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def _tag_bit(self, name):
+        if name not in self.tags:
+            if len(self.tags) >= 64:
+                raise ValueError("A payload corpus supports at most 64 tags and categories.")
+            self.tags.append(name)
+        return 1 << self.tags.index(name)
+
+    def _build(self):
+        seen = {}
+        for path in _payload_files(self.directory):
+            category = os.path.splitext(os.path.relpath(path, self.directory))[0].replace(os.sep, "/")
+            self.categories.append(category)
+            category_bit = self._tag_bit(category)
+            f = open(path, "rb")
+            size = os.fstat(f.fileno()).st_size
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+            self._files.append(f)
+            self._maps.append(mapped)
+            file_number = len(self._maps) - 1
+
+            start = 0
+            while start < size:
+                newline = mapped.find(b"\n", start)
+                end = size if newline == -1 else newline
+                line_end = end - 1 if end > start and mapped[end - 1:end] == b"\r" else end
+                if line_end > start and mapped[start:line_end].strip():
+                    entry = mapped[start:line_end]
+                    digest = hashlib.blake2b(entry, digest_size=16).digest()
+                    if digest in seen:
+                        self._masks[seen[digest]] |= category_bit
+                    else:
+                        seen[digest] = len(self._offsets)
+                        self._file_index.append(file_number)
+                        self._offsets.append(start)
+                        self._lengths.append(line_end - start)
+                        self._masks.append(category_bit | self._context_mask(entry))
+                start = end + 1
+
+    def _context_mask(self, entry):
+        mask = 0
+        for bit, pattern in enumerate(CONTEXT_TAGS.values()):
+            if pattern.search(entry):
+                mask |= 1 << bit
+        return mask
+
+    def _mask(self, category, tags):
+        names = ([category] if category else []) + list(tags or ())
+        unknown = [name for name in names if name not in self.tags]
+        if unknown:
+            raise ValueError(f"Unknown category or tag '{unknown[0]}'. Available: {', '.join(self.tags)}.")
+        mask = 0
+        for name in names:
+            mask |= 1 << self.tags.index(name)
+        return mask
+
+    def entries(self, category=None, tags=None):
+        """
+        Returns a generator of the unique payloads of a category and/or with
+        all the given tags. Payloads are read from the mapped files as the
+        generator advances.
+
+        Args:
+            category (str, optional): A category, e.g. 'xss'.
+            tags (iterable, optional): Context tags, e.g. ['attribute'].
+
+        Returns:
+            generator: The payloads (str), in file order.
+
+        Raises:
+            ValueError: If the category or a tag is unknown.
+        """
+        return self._entries(self._mask(category, tags))
+
+    def _entries(self, mask):
+        for index in range(len(self._offsets)):
+            if self._masks[index] & mask == mask:
+                start = self._offsets[index]
+                yield self._maps[self._file_index[index]][start:start + self._lengths[index]].decode("utf-8", "replace")
+
+    def entry_tags(self, payload):
+        """
+        Returns the tags of a payload in the corpus.
+
+        Args:
+            payload (str): The payload.
+
+        Returns:
+            list: Its categories and context tags, or None if it is not in the corpus.
+        """
+        for index, entry in enumerate(self.entries()):
+            if entry == payload:
+                return [name for bit, name in enumerate(self.tags) if self._masks[index] >> bit & 1]
+        return None
+
+    def variants(self, category=None, tags=None, encodings=("raw",), mutations=("none",)):
+        """
+        Returns a generator of the encoded and mutated variants of the
+        matching payloads (see `variants`).
+
+        Args:
+            category (str, optional): A category.
+            tags (iterable, optional): Context tags.
+            encodings (iterable, optional): Names from ENCODERS.
+            mutations (iterable, optional): Names from MUTATIONS.
+
+        Returns:
+            generator: The variants (str).
+
+        Raises:
+            ValueError: If the category, a tag, an encoding or a mutation is unknown.
+        """
+        return variants(self.entries(category, tags), encodings, mutations)
+
+def _payload_files(directory):
+    files = []
+    for root, directories, names in os.walk(directory):
+        directories.sort()
+        files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith(PAYLOAD_EXTENSIONS))
+    return files
+
+def run_payloads(category=None, tags=None, encodings=("raw",), mutations=("none",), limit=None,
+                 output_path=None, list_tags=False, directory=PAYLOAD_DIRECTORY):
+    """
+    Writes payload variants to a file or stdout, one per line (the `payloads`
+    subcommand), e.g. to feed a fuzzer's wordlist from stdin.
+
+    Args:
+        category (str, optional): A category.
+        tags (iterable, optional): Context tags.
+        encodings (iterable, optional): Names from ENCODERS.
+        mutations (iterable, optional): Names from MUTATIONS.
+        limit (int, optional): The maximum number of variants.
+        output_path (str, optional): The file to write. Defaults to stdout.
+        list_tags (bool, optional): Print the categories and tags instead.
+        directory (str, optional): The payload directory.
+
+    Returns:
+        int: The number of variants written.
+    """
+    with PayloadCorpus(directory) as corpus:
+        if list_tags:
+            print(f"{len(corpus)} unique payloads.")
+            print(f"Categories: {', '.join(corpus.categories)}")
+            print(f"Context tags: {', '.join(CONTEXT_TAGS)}")
+            print(f"Encodings: {', '.join(ENCODERS)}")
+            print(f"Mutations: {', '.join(MUTATIONS)}")
+            return 0
+        try:
+            generated = islice(corpus.variants(category, tags, encodings, mutations), limit)
+            output = open(output_path, "w") if output_path else sys.stdout
+        except ValueError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            return 0
+        count = 0
+        try:
+            for variant in generated:
+                # Line breaks inside a variant would split it into two wordlist entries
+                output.write(variant.replace("\r", "%0d").replace("\n", "%0a") + "\n")
+                count += 1
+        except BrokenPipeError:
+            pass
+        finally:
+            if output_path:
+                output.close()
+    if output_path:
+        print(f"Wrote {count} payloads to {output_path}.")
+    return count
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from scripts.utils import load_config
+
+DEFAULT_RENDERER = "pdfkit"
+DEFAULT_WORKERS = 4
+RECORD_SUFFIX = ".render.json"
+
+def pdfkit_renderer(html_path, pdf_path):
+    """
+    Renders a PDF with pdfkit (wkhtmltopdf).
+
+    Raises:
+        ImportError: If pdfkit is not installed.
+    """
+    import pdfkit
+    pdfkit.from_file(html_path, pdf_path)
+
+class StubRenderer:
+    """
+    A renderer that writes a placeholder PDF instead of running wkhtmltopdf,
+    so the rendering pipeline can run where wkhtmltopdf is not installed.
+    """
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def __call__(self, html_path, pdf_path):
+        time.sleep(self.delay)
+        with open(html_path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        with open(pdf_path, "w") as f:
+            f.write(f"%PDF-1.4\n% stub rendering of {os.path.basename(html_path)} ({digest})\n%%EOF\n")
+
+RENDERERS = {
+    "pdfkit": pdfkit_renderer,
+    "stub": StubRenderer()
+}
+
+def pdf_settings():
+    """
+    Returns the PDF renderer name and worker count from config/base.json.
+
+    Returns:
+        tuple: The renderer name and the number of workers.
+    """
+    settings = load_config("base").get("pdf", {})
+    return settings.get("renderer", DEFAULT_RENDERER), int(settings.get("workers", DEFAULT_WORKERS))
+
+def get_renderer(name=None):
+    """
+    Returns a PDF renderer.
+
+    Args:
+        name (str, optional): 'pdfkit' or 'stub'. Defaults to `pdf.renderer` in config/base.json.
+
+    Returns:
+        callable: The renderer, called with the HTML and PDF paths, or None
+            if pdfkit is selected but not installed.
+
+    Raises:
+        ValueError: If there is no such renderer.
+    """
+    name = name or pdf_settings()[0]
+    if name not in RENDERERS:
+        raise ValueError(f"Unknown PDF renderer '{name}'. Available: {', '.join(RENDERERS)}.")
+    if name == "pdfkit":
+        try:
+            import pdfkit  # noqa: F401
+        except ImportError:
+            return None
+    return RENDERERS[name]
+
+def html_digest(html_path):
+    """Returns the SHA-256 of an HTML document."""
+    digest = hashlib.sha256()
+    with open(html_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def render_pdf(html_path, pdf_path, renderer):
+    """
+    Renders one PDF unless the HTML is unchanged since the PDF was rendered.
+
+    A record of each rendering (the HTML's hash and the render time) is kept
+    next to the PDF in `<pdf>.render.json`.
+
+    Args:
+        html_path (str): The HTML document.
+        pdf_path (str): The PDF to write.
+        renderer (callable): The renderer.
+
+    Returns:
+        dict: The 'html' and 'pdf' paths, the 'status' ('rendered', 'skipped'
+            or 'failed'), the render time in 'seconds' and any 'error'.
+    """
+    result = {"html": html_path, "pdf": pdf_path, "status": "skipped", "seconds": 0.0, "error": None}
+    record_path = pdf_path + RECORD_SUFFIX
+    try:
+        digest = html_digest(html_path)
+        try:
+            with open(record_path, "r") as f:
+                record = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            record = {}
+        if record.get("html_sha256") == digest and os.path.exists(pdf_path):
+            result["seconds"] = record.get("render_seconds", 0.0)
+            return result
+
+        started = time.perf_counter()
+        renderer(html_path, pdf_path)
+        result.update(status="rendered", seconds=time.perf_counter() - started)
+        with open(record_path, "w") as f:
+            json.dump({"html_sha256": digest, "render_seconds": result["seconds"], "rendered_at": time.time()}, f, indent=4)
+    except Exception as e:
+        result.update(status="failed", error=str(e))
+    return result
+
+def render_pdfs(documents, renderer, workers=DEFAULT_WORKERS):
+    """
+    Renders many PDFs on a bounded pool of workers.
+
+    The workers only wait on the renderer's wkhtmltopdf processes, so a
+    thread pool renders `workers` documents at a time.
+
+    Args:
+        documents (list): (HTML path, PDF path) tuples.
+        renderer (callable): The renderer.
+        workers (int, optional): The number of documents rendered at once.
+
+    Returns:
+        list: The result of each document (see `render_pdf`), in order.
+    """
+    if not documents:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(documents))), thread_name_prefix="pdf") as pool:
+        return list(pool.map(lambda document: render_pdf(*document, renderer), documents))
@@ -0,0 +1,255 @@
+import os
+import re
+import json
+import shlex
+from exceptions import ConfigFileNotFoundError, InvalidPresetError, InvalidConfigError
+
+CONFIG_DIRECTORY = "config"
+NON_TOOL_CONFIGS = ("base",)
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+SHARD_MODES = ("ports", "hosts", "wordlist")
+TOOL_FIELDS = {"output_file": str, "xml_output_file": str, "presets": list, "resume": dict, "rate_control": dict, "cache_ttl": int}
+PRESET_FIELDS = {"name": str, "description": str, "command": str, "cache_ttl": int, "shard": dict}
+
+_registries = {}
+
+class PresetTemplate:
+    """
+    A preset command compiled into an argv template.
+
+    The command is tokenized once with shell quoting rules, and every token
+    is split into its literal text and '{name}' placeholders, so rendering
+    only joins strings.
+    """
+    def __init__(self, config):
+        self.config = config
+        self.name = config["name"]
+        self.description = config.get("description", "")
+        self.tokens = shlex.split(config["command"])
+        self._parts = []
+        placeholders = set()
+        for token in self.tokens:
+            pieces = PLACEHOLDER.split(token)
+            if len(pieces) == 1:
+                self._parts.append(token)
+            else:
+                self._parts.append(tuple(pieces))
+                placeholders.update(pieces[1::2])
+        self.placeholders = frozenset(placeholders)
+
+    def render(self, values):
+        """
+        Fills the template's placeholders.
+
+        Args:
+            values (dict): The placeholder values (e.g., 'ip', 'domain', 'output_file').
+
+        Returns:
+            list: The preset's arguments, without the tool name.
+
+        Raises:
+            ValueError: If a placeholder has no value.
+        """
+        missing = self.placeholders.difference(values)
+        if missing:
+            raise ValueError(f"Preset '{self.name}' needs a value for {', '.join(sorted(missing))}.")
+        return [
+            part if isinstance(part, str) else "".join(
+                str(values[piece]) if index % 2 else piece for index, piece in enumerate(part)
+            )
+            for part in self._parts
+        ]
+
+class ToolConfig:
+    """
+    A validated tool configuration with its presets compiled.
+    """
+    def __init__(self, name, data, mtime_ns=None):
+        self.name = name
+        self.data = data
+        self.mtime_ns = mtime_ns
+        self.output_file = data.get("output_file", f"{name}.txt")
+        self.presets = {preset["name"]: PresetTemplate(preset) for preset in data["presets"]}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def preset(self, name):
+        """
+        Returns a compiled preset.
+
+        Args:
+            name (str): The preset name.
+
+        Returns:
+            PresetTemplate: The preset.
+
+        Raises:
+            InvalidPresetError: If the tool has no such preset.
+        """
+        try:
+            return self.presets[name]
+        except KeyError:
+            raise InvalidPresetError(name, self.name) from None
+
+def validate_tool_config(name, data):
+    """
+    Checks a tool configuration against the expected schema.
+
+    Args:
+        name (str): The tool name.
+        data (dict): The parsed configuration.
+
+    Raises:
+        InvalidConfigError: If the configuration is invalid.
+    """
+    if not isinstance(data, dict):
+        raise InvalidConfigError(name, "the configuration must be a JSON object")
+    _check_fields(name, data, TOOL_FIELDS, "")
+    if "presets" not in data:
+        raise InvalidConfigError(name, "missing 'presets'")
+    if "rate_control" in data and not isinstance(data["rate_control"].get("flag"), str):
+        raise InvalidConfigError(name, "'rate_control' needs a 'flag'")
+    if "resume" in data and not all(isinstance(data["resume"].get(key), str) for key in ("restore_file", "command")):
+        raise InvalidConfigError(name, "'resume' needs a 'restore_file' and a 'command'")
+
+    names = set()
+    for index, preset in enumerate(data["presets"]):
+        if not isinstance(preset, dict):
+            raise InvalidConfigError(name, f"preset #{index + 1} must be an object")
+        where = f"preset '{preset.get('name', f'#{index + 1}')}': "
+        _check_fields(name, preset, PRESET_FIELDS, where)
+        for key in ("name", "command"):
+            if key not in preset:
+                raise InvalidConfigError(name, f"{where}missing '{key}'")
+        if preset["name"] in names:
+            raise InvalidConfigError(name, f"duplicate preset name '{preset['name']}'")
+        names.add(preset["name"])
+        try:
+            shlex.split(preset["command"])
+        except ValueError as e:
+            raise InvalidConfigError(name, f"{where}cannot tokenize command: {e}")
+        if "shard" in preset and preset["shard"].get("by", "ports") not in SHARD_MODES:
+            raise InvalidConfigError(name, f"{where}unknown shard mode '{preset['shard']['by']}'")
+
+def _check_fields(name, data, fields, where):
+    for key, expected in fields.items():
+        if key in data and not isinstance(data[key], expected):
+            raise InvalidConfigError(name, f"{where}'{key}' must be of type {expected.__name__}")
+
+class PresetRegistry:
+    """
+    Tool configurations parsed, validated and compiled once, then kept in
+    memory until their file's modification time changes.
+    """
+    def __init__(self, directory=CONFIG_DIRECTORY):
+        self.directory = directory
+        self._tools = {}
+
+    def tool(self, tool_name):
+        """
+        Returns a tool's compiled configuration.
+
+        Args:
+            tool_name (str): The tool name or executable path (its base name
+                selects the configuration).
+
+        Returns:
+            ToolConfig: The configuration.
+
+        Raises:
+            ConfigFileNotFoundError: If the tool has no configuration file.
+            InvalidConfigError: If the configuration is invalid.
+        """
+        name = os.path.basename(tool_name)
+        path = os.path.join(self.directory, f"{name}.json")
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            self._tools.pop(name, None)
+            raise ConfigFileNotFoundError(name) from None
+
+        cached = self._tools.get(name)
+        if cached and cached.mtime_ns == mtime_ns:
+            return cached
+
+        with open(path, "r") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise InvalidConfigError(name, f"invalid JSON: {e}") from None
+        validate_tool_config(name, data)
+        tool = ToolConfig(name, data, mtime_ns)
+        self._tools[name] = tool
+        return tool
+
+    def preset(self, tool_name, preset):
+        """
+        Returns a compiled preset of a tool.
+
+        Raises:
+            ConfigFileNotFoundError: If the tool has no configuration file.
+            InvalidConfigError: If the configuration is invalid.
+            InvalidPresetError: If the tool has no such preset.
+        """
+        return self.tool(tool_name).preset(preset)
+
+    def tool_names(self):
+        """
+        Returns the names of the configured tools.
+        """
+        return sorted(
+            file[:-5] for file in os.listdir(self.directory)
+            if file.endswith(".json") and file[:-5] not in NON_TOOL_CONFIGS
+        )
+
+    def validate_all(self):
+        """
+        Loads every tool configuration.
+
+        Returns:
+            dict: Tool name -> error message of each invalid configuration.
+        """
+        errors = {}
+        for name in self.tool_names():
+            try:
+                self.tool(name)
+            except InvalidConfigError as e:
+                errors[name] = str(e)
+        return errors
+
+def get_registry(directory=CONFIG_DIRECTORY):
+    """
+    Returns the process-wide registry of a configuration directory.
+
+    Args:
+        directory (str, optional): The configuration directory.
+
+    Returns:
+        PresetRegistry: The registry.
+    """
+    key = os.path.abspath(directory)
+    if key not in _registries:
+        _registries[key] = PresetRegistry(key)
+    return _registries[key]
+
+def placeholder_values(metadata, output_path=None):
+    """
+    Builds the placeholder values of a challenge.
+
+    Every scalar metadata field is available (e.g., '{ip}'); '{domain}'
+    defaults to the IP address.
+
+    Args:
+        metadata (dict): The challenge metadata.
+        output_path (str, optional): The value of '{output_file}'.
+
+    Returns:
+        dict: The placeholder values.
+    """
+    values = {key: value for key, value in metadata.items() if isinstance(value, (str, int, float)) and value != ""}
+    if "ip" in values:
+        values.setdefault("domain", values["ip"])
+    if output_path:
+        values["output_file"] = output_path
+    return values
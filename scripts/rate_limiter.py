@@ -0,0 +1,267 @@
+import os
+import re
+import json
+import time
+import fcntl
+import asyncio
+from scripts.utils import load_config
+
+DEFAULT_STATE_DIRECTORY = "~/.cache/ethical-hacking-scripts/rates"
+DEFAULT_SETTINGS = {
+    "initial_rate": 50.0,
+    "min_rate": 1.0,
+    "max_rate": 500.0,
+    "burst": 20,
+    "window": 5.0,
+    "error_threshold": 0.05,
+    "increase": 5.0,
+    "decrease": 0.5
+}
+FLUSH_INTERVAL = 0.25
+ERROR_LINE = re.compile(
+    r"time(?:d)?\s*out|connection (?:refused|reset|closed)|could not connect|too many (?:requests|connections)"
+    r"|status:\s*(?:429|503)\b|\b(?:429|503) (?:too many requests|service unavailable)",
+    re.IGNORECASE
+)
+
+def is_error_line(line):
+    """
+    Returns whether a tool output line reports a timeout, a dropped connection
+    or throttling by the target.
+
+    Args:
+        line (str): A line of tool output.
+
+    Returns:
+        bool: True if the line reports an error caused by the request rate.
+    """
+    return ERROR_LINE.search(line) is not None
+
+class HostRateLimiter:
+    """
+    A token bucket for the requests sent to one target host.
+
+    The bucket lives in a small state file locked with fcntl, so `run_tool`
+    calls in scheduler workers and the shards they start all draw from the same
+    budget. The rate adapts additively-increase/multiplicatively-decrease: it
+    grows by `increase` after every window with an error ratio below
+    `error_threshold` and is multiplied by `decrease` after a window above it.
+    """
+    def __init__(self, host, directory=DEFAULT_STATE_DIRECTORY, clock=time.time, **settings):
+        self.host = host
+        self.settings = {**DEFAULT_SETTINGS, **settings}
+        self.clock = clock
+        directory = os.path.expanduser(directory)
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, re.sub(r"[^\w.-]", "_", host) + ".json")
+        self._pending = {"requests": 0, "errors": 0, "lines": 0}
+        self._last_flush = 0.0
+
+    def _update(self, change):
+        """
+        Applies `change` to the shared state under an exclusive lock.
+
+        Args:
+            change (callable): Called with the refilled state dict and the
+                current time; its return value is returned.
+        """
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        with os.fdopen(fd, "r+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            now = self.clock()
+            try:
+                state = json.loads(f.read() or "{}")
+            except json.JSONDecodeError:
+                state = {}
+            if "rate" not in state:
+                state = {
+                    "rate": float(self.settings["initial_rate"]),
+                    "tokens": float(self.settings["burst"]),
+                    "updated": now,
+                    "window_start": now,
+                    "requests": 0,
+                    "errors": 0,
+                    "lines": 0
+                }
+
+            elapsed = max(0.0, now - state["updated"])
+            state["tokens"] = min(float(self.settings["burst"]), state["tokens"] + elapsed * state["rate"])
+            state["updated"] = now
+            state["requests"] += self._pending["requests"]
+            state["errors"] += self._pending["errors"]
+            state["lines"] = state.get("lines", 0) + self._pending["lines"]
+            self._pending = {"requests": 0, "errors": 0, "lines": 0}
+            self._adapt(state, now)
+
+            value = change(state, now)
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(state))
+            return value
+
+    def _adapt(self, state, now):
+        """Adjusts the rate once the current observation window has elapsed."""
+        elapsed = now - state["window_start"]
+        if elapsed < self.settings["window"]:
+            return
+        if state["requests"] or state["errors"] or state["lines"]:
+            # Tools paced by their own rate flags do not report requests; assume they ran at the rate
+            requests = state["requests"] or state["rate"] * elapsed
+            if state["errors"] / max(requests, 1) > self.settings["error_threshold"]:
+                state["rate"] = max(self.settings["min_rate"], state["rate"] * self.settings["decrease"])
+                state["tokens"] = min(state["tokens"], 0.0)
+            else:
+                state["rate"] = min(self.settings["max_rate"], state["rate"] + self.settings["increase"])
+        state["window_start"] = now
+        state["requests"] = 0
+        state["errors"] = 0
+        state["lines"] = 0
+
+    @property
+    def rate(self):
+        """The current sustainable request rate in requests per second."""
+        return self._update(lambda state, now: state["rate"])
+
+    def reserve(self, count=1):
+        """
+        Takes `count` tokens from the bucket, going into debt if needed.
+
+        Args:
+            count (int, optional): The number of requests about to be sent.
+
+        Returns:
+            float: The number of seconds to wait before sending them.
+        """
+        def take(state, now):
+            state["tokens"] -= count
+            state["requests"] += count
+            return max(0.0, -state["tokens"] / state["rate"])
+        return self._update(take)
+
+    def acquire(self, count=1):
+        """
+        Blocks until `count` requests may be sent.
+
+        Args:
+            count (int, optional): The number of requests about to be sent.
+        """
+        wait = self.reserve(count)
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, count=1):
+        """
+        Waits, without blocking the event loop, until `count` requests may be sent.
+
+        Args:
+            count (int, optional): The number of requests about to be sent.
+        """
+        wait = self.reserve(count)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def batch_size(self):
+        """
+        Returns how many requests to acquire at once, so a paced feeder takes
+        roughly ten steps per second.
+        """
+        return max(1, min(int(self.settings["burst"]), int(self.rate / 10)))
+
+    def observe(self, requests=0, errors=0, lines=0):
+        """
+        Records observed requests and errors; they are written to the shared
+        state at most every `FLUSH_INTERVAL` seconds.
+
+        Args:
+            requests (int, optional): The number of requests that completed.
+            errors (int, optional): The number of requests that failed.
+            lines (int, optional): The number of output lines of a tool that
+                paces itself, which show it is still sending requests.
+        """
+        self._pending["requests"] += requests
+        self._pending["errors"] += errors
+        self._pending["lines"] += lines
+        if self.clock() - self._last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Writes the recorded observations to the shared state."""
+        self._last_flush = self.clock()
+        self._update(lambda state, now: None)
+
+    def error_handler(self):
+        """
+        Returns a line handler for `stream_process` that reports each output
+        line, and whether it is an error, so windows of a tool paced by its own
+        rate flags count as active even when they are clean.
+
+        Returns:
+            callable: The handler.
+        """
+        def handle(stream, line):
+            self.observe(errors=1 if is_error_line(line) else 0, lines=1)
+        return handle
+
+def open_rate_limiter(host):
+    """
+    Opens the shared rate limiter of a host with the settings in config/base.json.
+
+    Args:
+        host (str): The target host.
+
+    Returns:
+        HostRateLimiter: The limiter, or None if rate limiting is disabled or
+            the host is unknown.
+    """
+    settings = dict(load_config("base").get("rate_limit", {}))
+    if not host or not settings.pop("enabled", True):
+        return None
+    return HostRateLimiter(host, settings.pop("directory", DEFAULT_STATE_DIRECTORY), **settings)
+
+def rate_flag_value(rate_control, rate):
+    """
+    Converts a request rate into the value of a tool's rate flag.
+
+    `rate_control['value']` selects the conversion: 'rate' passes requests per
+    second (ffuf -rate), 'delay' passes the per-thread delay for `threads`
+    threads (gobuster --delay) and 'tasks' passes the number of parallel tasks
+    for `per_task_rate` requests per task (hydra -t).
+
+    Args:
+        rate_control (dict): The tool's rate control settings.
+        rate (float): The request rate in requests per second.
+
+    Returns:
+        str: The flag value.
+
+    Raises:
+        ValueError: If the conversion is unknown.
+    """
+    kind = rate_control.get("value", "rate")
+    if kind == "rate":
+        return str(max(1, int(rate)))
+    if kind == "delay":
+        return f"{max(1, int(1000 * rate_control.get('threads', 10) / rate))}ms"
+    if kind == "tasks":
+        tasks = int(rate / rate_control.get("per_task_rate", 1))
+        return str(min(rate_control.get("max_tasks", 64), max(1, tasks)))
+    raise ValueError(f"Unknown rate control value '{kind}'.")
+
+def apply_rate_control(tokens, rate_control, rate):
+    """
+    Sets a tool's rate flag in its command, replacing any value already given.
+
+    Args:
+        tokens (list): The command tokens.
+        rate_control (dict): The tool's rate control settings ('flag', 'value').
+        rate (float): The request rate the command may use.
+
+    Returns:
+        list: The command tokens with the rate flag set.
+    """
+    flag = rate_control["flag"]
+    tokens = list(tokens)
+    while flag in tokens[:-1]:
+        index = tokens.index(flag)
+        del tokens[index:index + 2]
+    return tokens + [flag, rate_flag_value(rate_control, rate)]
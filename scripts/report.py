@@ -1,8 +1,15 @@
 import os
 import json
-from jinja2 import Environment, FileSystemLoader
+import time
+from itertools import islice
 from datetime import datetime
-import pdfkit
+from scripts.nmap_xml import iter_nmap_records, describe_version
+from scripts.output_parsers import NMAP_PORT_LINE
+from scripts.findings import open_findings
+from scripts.glossary import Glossary, load_glossary as load_definitions
+
+GLOSSARY_TEMPLATE = "glossary-appendix.html"
+GLOSSARY_MARKER = "<!-- Glossary -->"
 
 
 def load_config(config_name):
@@ -37,6 +44,9 @@ def load_tool_data(challenge_dir):
     """
     Load tool output files from the challenge directory.
 
+    The whole of every output is read into memory; reports use
+    `tool_sections`, which keeps memory bounded, instead.
+
     Args:
         challenge_dir (str): The directory containing challenge tool output files.
 
@@ -54,35 +64,35 @@ def load_tool_data(challenge_dir):
 
 def load_glossary():
     """
-    Load the glossary data from the JSON file.
+    Load the indexed glossary from reports/templates/definitions.json.
+
+    The definitions are only re-read when the file changes.
 
     Returns:
-        dict: A dictionary containing terms and tools for glossary reference.
+        Glossary: The terms and tools for glossary reference (`glossary['terms']`,
+            `glossary['tools']`).
     """
-    try:
-        with open('glossary.json', 'r') as f:
-            glossary = json.load(f)
-    except FileNotFoundError:
-        glossary = {"terms": {}, "tools": {}}
-    return glossary
+    return load_definitions()
 
 
-def search_glossary(keyword, glossary):
+def search_glossary(keyword, glossary=None):
     """
     Search the glossary for terms or tools that match a keyword.
 
+    Matches are ranked: exact names first, then prefixes, then misspellings.
+
     Args:
         keyword (str): The keyword to search for.
-        glossary (dict): The glossary dictionary containing terms and tools.
+        glossary (Glossary or dict, optional): The glossary. Defaults to the loaded definitions.
 
     Returns:
         dict: A dictionary containing matching terms and tools.
     """
-    matches = {
-        "terms": {k: v for k, v in glossary.get("terms", {}).items() if keyword.lower() in k.lower()},
-        "tools": {k: v for k, v in glossary.get("tools", {}).items() if keyword.lower() in k.lower()}
-    }
-    return matches
+    if glossary is None:
+        glossary = load_glossary()
+    elif not isinstance(glossary, Glossary):
+        glossary = Glossary(glossary)
+    return glossary.search(keyword)
 
 
 def nmap_to_table(output):
@@ -97,53 +107,340 @@ def nmap_to_table(output):
     """
     rows = []
     for line in output.splitlines():
-        if "open" in line or "closed" in line:
-            parts = line.split()
-            if len(parts) >= 4:  # Ensure we have enough columns
-                port, service, version, status = parts[0], parts[1], " ".join(parts[2:-1]), parts[-1]
-                rows.append([port, service, version, status])
+        match = NMAP_PORT_LINE.match(line.strip())
+        if match:
+            rows.append([f"{match['port']}/{match['protocol']}", match["service"], match["version"] or "", match["state"]])
     return rows
 
 
-def generate_report(challenge_name, audited_by, challenge_dir, report_template):
+def ports_to_table(ports):
     """
-    Generate an HTML and PDF report based on the provided template.
+    Convert port records (e.g., from the findings store) to a list of lists for the table template.
+
+    Args:
+        ports (list): Port records.
+
+    Returns:
+        list: A list of lists containing the port data.
+    """
+    return [
+        [f"{record['port']}/{record['protocol']}", record["service"] or "", describe_version(record), record["state"]]
+        for record in ports
+    ]
+
+
+def load_findings(challenge_dir):
+    """
+    Load the structured findings of a challenge from its findings store.
+
+    Args:
+        challenge_dir (str): The challenge directory.
+
+    Returns:
+        dict: The 'ports', 'web_paths', 'credentials' and 'exploits' rows (port
+            and path rows are capped) and the total 'counts', or None if no
+            tool has stored findings for the challenge.
+    """
+    from scripts.report_sections import MAX_TABLE_ROWS
+    store = open_findings(challenge_dir, create=False)
+    if store is None:
+        return None
+    with store:
+        return {
+            "ports": store.ports(limit=MAX_TABLE_ROWS),
+            "web_paths": store.web_paths(limit=MAX_TABLE_ROWS),
+            "credentials": store.credentials(),
+            "exploits": store.exploits(),
+            "counts": store.counts()
+        }
+
+
+def summarise_findings(findings):
+    """
+    Build the report summary cards from the findings.
+
+    Args:
+        findings (dict): The findings loaded by `load_findings`, or None.
+
+    Returns:
+        list: Dicts with a 'title' and a 'description'.
+    """
+    if not findings:
+        return []
+    open_ports = [record for record in findings["ports"] if record["state"] == "open"]
+    counts = findings.get("counts", {})
+    cards = [
+        ("Open Ports", "open_ports", open_ports, lambda r: f"{r['port']}/{r['protocol']} {r['service'] or ''}".strip()),
+        ("Web Paths", "web_paths", findings["web_paths"], lambda r: f"{r['path']} ({r['status']})"),
+        ("Credentials", "credentials", findings["credentials"], lambda r: f"{r['login']} on {r['service']}"),
+        ("Exploits", "exploits", findings["exploits"], lambda r: r["title"])
+    ]
+    return [
+        {"title": f"{title}: {counts.get(key, len(rows))}", "description": ", ".join(describe(row) for row in rows[:5])}
+        for title, key, rows, describe in cards if rows
+    ]
+
+
+def nmap_file_to_table(output_path, max_rows=None):
+    """
+    Parse an Nmap normal output file to a list of lists for the table template.
+
+    The file is streamed line by line and at most `max_rows` rows are kept,
+    so huge scans do not need to fit in memory.
+
+    Args:
+        output_path (str): The path of the Nmap output file.
+        max_rows (int, optional): The maximum number of rows. Defaults to
+            `scripts.report_sections.MAX_TABLE_ROWS`.
+
+    Returns:
+        list: A list of lists containing parsed Nmap data.
+    """
+    from scripts.report_sections import iter_lines, MAX_TABLE_ROWS
+    rows = []
+    for line in iter_lines(output_path):
+        match = NMAP_PORT_LINE.match(line.strip())
+        if match:
+            rows.append([f"{match['port']}/{match['protocol']}", match["service"], match["version"] or "", match["state"]])
+            if len(rows) >= (max_rows or MAX_TABLE_ROWS):
+                break
+    return rows
+
+
+def nmap_xml_to_table(xml_path, max_rows=None):
+    """
+    Parse an Nmap XML report to a list of lists for the table template.
+
+    The report is streamed, so large scans are not loaded into memory.
+
+    Args:
+        xml_path (str): The path of the Nmap XML report.
+        max_rows (int, optional): The maximum number of rows. Defaults to
+            `scripts.report_sections.MAX_TABLE_ROWS`.
+
+    Returns:
+        list: A list of lists containing parsed Nmap data.
+    """
+    from scripts.report_sections import MAX_TABLE_ROWS
+    return ports_to_table(islice(iter_nmap_records(xml_path), max_rows or MAX_TABLE_ROWS))
+
+
+def tool_sections(challenge_dir, glossary):
+    """
+    Build the report's tool sections from the tool output files.
+
+    Outputs are memory-mapped and only a bounded excerpt is embedded in the
+    report; longer outputs are split into paginated appendix pages that the
+    section links to. Tools with a template under reports/templates/tools/
+    use it; other outputs are shown as preformatted text.
+
+    Args:
+        challenge_dir (str): The directory containing challenge tool output files.
+        glossary (Glossary): The glossary, for the tools' descriptions.
+
+    Returns:
+        list: Dicts with the 'name', 'title', 'description' and 'template' of
+            each tool, and the excerpt fields of `scripts.report_sections.output_section`.
+    """
+    from scripts.report_engine import TEMPLATES_DIRECTORY
+    from scripts.report_sections import output_section
+    sections = []
+    for filename in sorted(os.listdir(challenge_dir)):
+        if not filename.endswith(".txt"):
+            continue
+        name = os.path.splitext(filename)[0]
+        definition = glossary["tools"].get(name, {})
+        template = f"tools/{name}.html"
+        if not os.path.exists(os.path.join(TEMPLATES_DIRECTORY, template)):
+            template = "tools/output.html"
+        title = definition.get("name", name)
+        sections.append({
+            "name": name,
+            "title": title,
+            "description": definition.get("purpose", ""),
+            "template": template,
+            **output_section(name, os.path.join(challenge_dir, filename), challenge_dir, title)
+        })
+    return sections
+
+
+def build_report_context(challenge_name, audited_by, challenge_dir):
+    """
+    Build the template context of a challenge report.
 
     Args:
         challenge_name (str): The name of the challenge.
         audited_by (str): The name of the auditor.
         challenge_dir (str): The directory for the challenge.
-        report_template (Template): The Jinja2 template for rendering the report.
 
     Returns:
-        None
+        dict: The template context.
     """
-    # Load tool data and glossary
-    tool_data = load_tool_data(challenge_dir)
+    # Load findings and glossary; tool outputs are excerpted, not read whole
+    findings = load_findings(challenge_dir)
     glossary = load_glossary()
 
-    # Context for the report
-    context = {
+    return {
+        "title": f"{challenge_name} Report",
         "challenge_name": challenge_name,
         "audited_by": audited_by,
         "date": datetime.now().strftime("%d %B %Y"),
-        "tools": tool_data,
-        "glossary": glossary
+        "tools": tool_sections(challenge_dir, glossary),
+        "glossary": glossary,
+        "findings": findings,
+        "summary_findings": summarise_findings(findings),
+        "nmap_to_table": _nmap_table_loader(challenge_dir, findings)
     }
 
-    # Render the HTML report
-    report_html = report_template.render(context)
+
+def write_report_html(challenge_name, audited_by, challenge_dir, report_template=None):
+    """
+    Render a challenge's HTML report.
+
+    Args:
+        challenge_name (str): The name of the challenge.
+        audited_by (str): The name of the auditor.
+        challenge_dir (str): The directory for the challenge.
+        report_template (Template, optional): The Jinja2 template for rendering
+            the report. Defaults to the precompiled report template.
+
+    Returns:
+        str: The path of the HTML report.
+    """
+    context = build_report_context(challenge_name, audited_by, challenge_dir)
+
+    # Render the HTML report and link the glossary terms it mentions
+    from scripts.report_engine import render_report
+    if report_template is None:
+        report_html = render_report(context)
+    else:
+        report_html = report_template.render(context)
+    linked = set()
+    report_html = context["glossary"].link_terms(report_html, linked=linked)
+
+    # Append the entries of the linked terms, which the links point at
+    if linked:
+        appendix = render_report({"glossary_terms": context["glossary"].linked_entries(linked)}, GLOSSARY_TEMPLATE)
+        if GLOSSARY_MARKER in report_html:
+            report_html = report_html.replace(GLOSSARY_MARKER, appendix, 1)
+        else:
+            head, body_end, tail = report_html.rpartition("</body>")
+            report_html = head + appendix + body_end + tail if body_end else report_html + appendix
 
     # Save the HTML report
     report_path = os.path.join(challenge_dir, f"{challenge_name}_report.html")
     with open(report_path, "w") as f:
         f.write(report_html)
+    return report_path
 
-    # Convert to PDF
-    pdf_path = os.path.join(challenge_dir, f"{challenge_name}_report.pdf")
-    pdfkit.from_file(report_path, pdf_path)
 
-    print(f"Report generated: {pdf_path}")
+def generate_report(challenge_name, audited_by, challenge_dir, report_template=None, renderer=None):
+    """
+    Generate an HTML and PDF report based on the provided template.
+
+    The PDF is only rendered again when the HTML report has changed.
+
+    Args:
+        challenge_name (str): The name of the challenge.
+        audited_by (str): The name of the auditor.
+        challenge_dir (str): The directory for the challenge.
+        report_template (Template, optional): The Jinja2 template for rendering
+            the report. Defaults to the precompiled report template.
+        renderer (str, optional): The PDF renderer ('pdfkit' or 'stub').
+            Defaults to `pdf.renderer` in config/base.json.
+
+    Returns:
+        dict: The PDF rendering result (see `scripts.pdf_renderer.render_pdf`),
+            or None if no PDF renderer is available.
+    """
+    from scripts.pdf_renderer import get_renderer, render_pdf
+
+    report_path = write_report_html(challenge_name, audited_by, challenge_dir, report_template)
+
+    # Convert to PDF; pdfkit is optional and only loaded when a report is generated
+    pdf_renderer = get_renderer(renderer)
+    if pdf_renderer is None:
+        print(f"pdfkit is not installed, skipping the PDF. HTML report generated: {report_path}")
+        return None
+
+    result = render_pdf(report_path, os.path.join(challenge_dir, f"{challenge_name}_report.pdf"), pdf_renderer)
+    _print_render_result(result)
+    return result
+
+
+def generate_reports(challenge_names, audited_by, base_directory=None, renderer=None, workers=None):
+    """
+    Generate the reports of many challenges, rendering their PDFs in parallel.
+
+    The HTML reports are rendered in turn with the shared template
+    environment; the PDFs are then rendered by a bounded worker pool, and
+    those whose HTML is unchanged are skipped.
+
+    Args:
+        challenge_names (list): The challenges, or None for every challenge in the base directory.
+        audited_by (str): The name of the auditor.
+        base_directory (str, optional): The challenges directory. Defaults to the configured one.
+        renderer (str, optional): The PDF renderer ('pdfkit' or 'stub').
+        workers (int, optional): The number of PDFs rendered at once. Defaults
+            to `pdf.workers` in config/base.json.
+
+    Returns:
+        list: The PDF rendering results (see `scripts.pdf_renderer.render_pdf`).
+    """
+    from scripts.pdf_renderer import get_renderer, render_pdfs, pdf_settings
+
+    base_directory = os.path.expanduser(base_directory or load_config("base"))
+    if challenge_names is None:
+        challenge_names = sorted(
+            name for name in os.listdir(base_directory)
+            if not name.startswith(".") and os.path.isdir(os.path.join(base_directory, name))
+        )
+
+    documents = []
+    for challenge_name in challenge_names:
+        challenge_dir = os.path.join(base_directory, challenge_name)
+        if not os.path.isdir(challenge_dir):
+            print(f"Skipping '{challenge_name}': no challenge directory at {challenge_dir}.")
+            continue
+        report_path = write_report_html(challenge_name, audited_by, challenge_dir)
+        documents.append((report_path, os.path.join(challenge_dir, f"{challenge_name}_report.pdf")))
+
+    pdf_renderer = get_renderer(renderer)
+    if pdf_renderer is None:
+        print(f"pdfkit is not installed, skipping the PDFs. {len(documents)} HTML reports generated.")
+        return []
+
+    started = time.perf_counter()
+    results = render_pdfs(documents, pdf_renderer, workers or pdf_settings()[1])
+    for result in results:
+        _print_render_result(result)
+    rendered = sum(result["status"] == "rendered" for result in results)
+    print(f"{rendered} PDFs rendered, {len(results) - rendered} skipped or failed in {time.perf_counter() - started:.1f}s.")
+    return results
+
+
+def _print_render_result(result):
+    if result["status"] == "rendered":
+        print(f"Report generated: {result['pdf']} ({result['seconds']:.1f}s)")
+    elif result["status"] == "skipped":
+        print(f"Report unchanged, PDF kept: {result['pdf']}")
+    else:
+        print(f"Failed to render {result['pdf']}: {result['error']}")
+
+
+def _nmap_table_loader(challenge_dir, findings=None):
+    """Returns the template's nmap table function, preferring stored findings, then the XML report."""
+    if findings and findings["ports"]:
+        table = ports_to_table(findings["ports"])
+        return lambda output: table
+    xml_path = os.path.join(challenge_dir, "nmap.xml")
+    if os.path.exists(xml_path):
+        return lambda output: nmap_xml_to_table(xml_path)
+    output_path = os.path.join(challenge_dir, "nmap.txt")
+    if os.path.exists(output_path):
+        # The section only holds an excerpt, so the table is read from the whole file
+        return lambda output: nmap_file_to_table(output_path)
+    return nmap_to_table
 
 
 def generate_htb_report():
@@ -166,10 +463,5 @@ def generate_htb_report():
         os.makedirs(challenge_dir)
         print(f"Created challenge directory: {challenge_dir}")
 
-    # Jinja2 setup
-    templates_dir = 'templates'
-    env = Environment(loader=FileSystemLoader(templates_dir))
-    report_template = env.get_template('reports/hack-the-box-challenge.html')
-
-    # Generate the report
-    generate_report(challenge_name, audited_by, challenge_dir, report_template)
\ No newline at end of file
+    # Generate the report with the long-lived, bytecode-cached template environment
+    generate_report(challenge_name, audited_by, challenge_dir)
\ No newline at end of file
@@ -0,0 +1,121 @@
+import os
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, TemplateSyntaxError, select_autoescape
+from scripts.utils import load_config
+
+TEMPLATES_DIRECTORY = os.path.join("reports", "templates")
+REPORT_TEMPLATE = "base.html"
+TEMPLATE_EXTENSIONS = (".html",)
+DEFAULT_BYTECODE_CACHE = "~/.cache/ethical-hacking-scripts/templates"
+# Compiled code depends on autoescaping, which jinja2 leaves out of its cache
+# key; the name keeps bytecode compiled without it from being loaded
+BYTECODE_PATTERN = "__jinja2_escaped_%s.cache"
+
+_environments = {}
+
+def bytecode_cache_directory():
+    """
+    Returns the template bytecode cache directory from config/base.json.
+
+    Returns:
+        str: The directory, with '~' expanded.
+    """
+    return os.path.expanduser(load_config("base").get("templates", {}).get("bytecode_cache", DEFAULT_BYTECODE_CACHE))
+
+def create_environment(templates_directory=TEMPLATES_DIRECTORY, cache_directory=None):
+    """
+    Creates a Jinja2 environment for a template directory.
+
+    Values are HTML-escaped, so tool output, banners and paths taken from a
+    target cannot inject markup into the report; trusted fragments are
+    marked `|safe` in the templates.
+
+    Args:
+        templates_directory (str, optional): The report template directory.
+        cache_directory (str, optional): The bytecode cache directory.
+            Defaults to `templates.bytecode_cache` in config/base.json.
+
+    Returns:
+        Environment: The environment.
+    """
+    cache_directory = cache_directory or bytecode_cache_directory()
+    os.makedirs(cache_directory, exist_ok=True)
+    return Environment(
+        loader=FileSystemLoader(templates_directory),
+        bytecode_cache=FileSystemBytecodeCache(cache_directory, BYTECODE_PATTERN),
+        autoescape=select_autoescape(TEMPLATE_EXTENSIONS),
+        cache_size=-1,
+        auto_reload=True
+    )
+
+def get_environment(templates_directory=TEMPLATES_DIRECTORY, cache_directory=None):
+    """
+    Returns the process-wide Jinja2 environment of a template directory.
+
+    Compiled templates are kept in memory for the life of the process and
+    their bytecode is stored on disk, so only the first render after a
+    template changes pays for parsing and compiling it. Templates are
+    reloaded when their files change.
+
+    Args:
+        templates_directory (str, optional): The report template directory.
+        cache_directory (str, optional): The bytecode cache directory.
+            Defaults to `templates.bytecode_cache` in config/base.json.
+
+    Returns:
+        Environment: The environment.
+    """
+    cache_directory = cache_directory or bytecode_cache_directory()
+    key = (os.path.abspath(templates_directory), cache_directory)
+    if key not in _environments:
+        _environments[key] = create_environment(templates_directory, cache_directory)
+    return _environments[key]
+
+def precompile_templates(environment=None):
+    """
+    Compiles every report template into the environment and its bytecode cache.
+
+    Args:
+        environment (Environment, optional): The environment. Defaults to the
+            report environment.
+
+    Returns:
+        tuple: The number of templates compiled and a dict of template name ->
+            error message for those that failed.
+    """
+    environment = environment or get_environment()
+    compiled, errors = 0, {}
+    for name in environment.list_templates(extensions=[extension.lstrip(".") for extension in TEMPLATE_EXTENSIONS]):
+        try:
+            environment.get_template(name)
+            compiled += 1
+        except TemplateSyntaxError as e:
+            errors[name] = f"line {e.lineno}: {e.message}"
+    return compiled, errors
+
+def render_report(context, template_name=REPORT_TEMPLATE, environment=None):
+    """
+    Renders a report template.
+
+    Args:
+        context (dict): The template context.
+        template_name (str, optional): The template, relative to the template directory.
+        environment (Environment, optional): The environment. Defaults to the
+            report environment.
+
+    Returns:
+        str: The rendered HTML.
+    """
+    return (environment or get_environment()).get_template(template_name).render(context)
+
+def precompile_templates_command():
+    """
+    Precompiles the report templates and prints the result (run at install time).
+
+    Returns:
+        bool: True if every template compiled.
+    """
+    compiled, errors = precompile_templates()
+    print(f"Precompiled {compiled} report templates into {bytecode_cache_directory()}.")
+    for name, error in errors.items():
+        print(f"[ERROR] {name}: {error}")
+    return not errors
@@ -0,0 +1,176 @@
+import os
+import json
+import mmap
+from html import escape
+from contextlib import contextmanager
+
+EXCERPT_LINES = 200
+EXCERPT_BYTES = 64 * 1024
+APPENDIX_DIRECTORY = "report_appendix"
+APPENDIX_PAGE_LINES = 5000
+APPENDIX_PAGE_BYTES = 1024 * 1024
+MAX_TABLE_ROWS = 1000
+
+@contextmanager
+def map_file(path):
+    """
+    Memory-maps a file for reading.
+
+    The operating system pages the file in and out as it is read, so even
+    very large outputs do not occupy process memory.
+
+    Args:
+        path (str): The file.
+
+    Yields:
+        mmap.mmap or bytes: The mapped file (empty bytes for an empty file).
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+def chunk_end(mapped, start, max_lines, max_bytes):
+    """
+    Returns where a chunk of at most `max_lines` lines and about `max_bytes`
+    bytes starting at `start` ends. Chunks end after a newline unless a
+    single line is longer than `max_bytes`.
+
+    Args:
+        mapped (mmap.mmap or bytes): The mapped file.
+        start (int): The chunk's first byte.
+        max_lines (int): The maximum number of lines.
+        max_bytes (int): The byte size after which the chunk ends at the next line end.
+
+    Returns:
+        tuple: The end offset and the number of lines in the chunk.
+    """
+    size = len(mapped)
+    limit = min(size, start + max_bytes)
+    position, lines = start, 0
+    while lines < max_lines and position < size:
+        newline = mapped.find(b"\n", position, limit)
+        if newline == -1:
+            if limit == size:
+                # The last line of the file has no newline
+                return size, lines + 1
+            if position == start:
+                # A line longer than max_bytes is split; its end is counted with the next chunk
+                return limit, 0
+            break
+        position, lines = newline + 1, lines + 1
+    return position, lines
+
+def read_excerpt(mapped):
+    """
+    Returns the beginning of a mapped output.
+
+    Args:
+        mapped (mmap.mmap or bytes): The mapped file.
+
+    Returns:
+        tuple: The excerpt text and whether the output continues past it.
+    """
+    end, _ = chunk_end(mapped, 0, EXCERPT_LINES, EXCERPT_BYTES)
+    return mapped[:end].decode("utf-8", "replace"), end < len(mapped)
+
+def write_appendix(name, path, challenge_dir, title=None):
+    """
+    Splits a tool's full output into paginated HTML appendix pages.
+
+    Pages are written one at a time from the mapped file, so memory use is
+    bounded by the page size. Pages are reused while the output is unchanged.
+
+    Args:
+        name (str): The tool name.
+        path (str): The output file.
+        challenge_dir (str): The challenge directory; pages go into its
+            `report_appendix/` directory.
+        title (str, optional): The heading of the pages.
+
+    Returns:
+        dict: The appendix 'pages' (paths relative to the challenge directory) and the output's 'lines'.
+    """
+    directory = os.path.join(challenge_dir, APPENDIX_DIRECTORY)
+    os.makedirs(directory, exist_ok=True)
+    stat = os.stat(path)
+    stamp_path = os.path.join(directory, f"{name}.json")
+    try:
+        with open(stamp_path, "r") as f:
+            stamp = json.load(f)
+        if stamp["size"] == stat.st_size and stamp["mtime_ns"] == stat.st_mtime_ns and all(
+            os.path.exists(os.path.join(challenge_dir, page)) for page in stamp["pages"]
+        ):
+            return {"pages": stamp["pages"], "lines": stamp["lines"]}
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+
+    pages, total_lines, start = [], 0, 0
+    with map_file(path) as mapped:
+        while start < len(mapped):
+            end, lines = chunk_end(mapped, start, APPENDIX_PAGE_LINES, APPENDIX_PAGE_BYTES)
+            pages.append((start, end, total_lines + 1))
+            total_lines += lines
+            start = end
+
+        names = [os.path.join(APPENDIX_DIRECTORY, f"{name}-{index + 1:03d}.html") for index in range(len(pages))]
+        for index, (start, end, first_line) in enumerate(pages):
+            previous_link = f'<a href="{os.path.basename(names[index - 1])}">Previous</a>' if index else ""
+            next_link = f'<a href="{os.path.basename(names[index + 1])}">Next</a>' if index + 1 < len(pages) else ""
+            with open(os.path.join(challenge_dir, names[index]), "w") as f:
+                f.write(
+                    f"<!DOCTYPE html>\n<html lang=\"en\"><head><meta charset=\"UTF-8\"><title>{escape(title or name)} "
+                    f"output, page {index + 1} of {len(pages)}</title></head><body>\n"
+                    f"<h1>{escape(title or name)} output</h1>\n<p>Page {index + 1} of {len(pages)}, "
+                    f"from line {first_line}. {previous_link} {next_link}</p>\n<pre>"
+                )
+                f.write(escape(mapped[start:end].decode("utf-8", "replace"), quote=False))
+                f.write(f"</pre>\n<p>{previous_link} {next_link}</p>\n</body></html>\n")
+
+    # Remove pages left over from a longer earlier output
+    for file in os.listdir(directory):
+        if file.startswith(f"{name}-") and file.endswith(".html") and os.path.join(APPENDIX_DIRECTORY, file) not in names:
+            os.remove(os.path.join(directory, file))
+    with open(stamp_path, "w") as f:
+        json.dump({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "pages": names, "lines": total_lines}, f, indent=4)
+    return {"pages": names, "lines": total_lines}
+
+def output_section(name, path, challenge_dir, title=None):
+    """
+    Builds the bounded report section of a tool output file.
+
+    Args:
+        name (str): The tool name.
+        path (str): The output file.
+        challenge_dir (str): The challenge directory.
+        title (str, optional): The section title.
+
+    Returns:
+        dict: The 'output' excerpt, the output's 'path' and 'size', whether it
+            is 'truncated', and for truncated outputs the 'appendix' pages and
+            total 'lines'.
+    """
+    with map_file(path) as mapped:
+        excerpt, truncated = read_excerpt(mapped)
+        size = len(mapped)
+    section = {"output": excerpt, "path": path, "size": size, "truncated": truncated, "appendix": [], "lines": None}
+    if truncated:
+        appendix = write_appendix(name, path, challenge_dir, title)
+        section.update(appendix=appendix["pages"], lines=appendix["lines"])
+    return section
+
+def iter_lines(path):
+    """
+    Streams the lines of a text output file.
+
+    Args:
+        path (str): The file.
+
+    Yields:
+        str: Each line, without its line ending.
+    """
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            yield line.rstrip("\r\n")
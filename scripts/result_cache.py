@@ -0,0 +1,281 @@
+import os
+import json
+import shlex
+import time
+import shutil
+import sqlite3
+import hashlib
+from scripts.utils import load_config
+
+DEFAULT_CACHE_DIRECTORY = "~/.cache/ethical-hacking-scripts/results"
+DEFAULT_MAX_SIZE_MB = 512
+DEFAULT_TTL = 24 * 60 * 60
+NO_CACHE_ENV = "EHS_NO_CACHE"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def cache_enabled():
+    """
+    Returns whether cached tool results may be used (disabled by --no-cache).
+
+    Returns:
+        bool: True unless caching was disabled for this process tree.
+    """
+    return os.environ.get(NO_CACHE_ENV, "") not in ("1", "true", "yes")
+
+def disable_cache():
+    """
+    Disables the result cache for this process and the workers it starts.
+    """
+    os.environ[NO_CACHE_ENV] = "1"
+
+def referenced_files(tokens):
+    """
+    Returns the existing files (e.g., wordlists) a command refers to.
+
+    Args:
+        tokens (list): The command tokens.
+
+    Returns:
+        list: The absolute paths of the referenced files, sorted.
+    """
+    files = set()
+    for token in tokens:
+        if token.startswith(("/", "~", ".")):
+            path = os.path.abspath(os.path.expanduser(token))
+            if os.path.isfile(path):
+                files.add(path)
+    return sorted(files)
+
+class ResultCache:
+    """
+    A content-addressed, size-bounded store of tool outputs on disk.
+
+    Entries are keyed by a hash of the tool, the command, the target and the
+    contents of the files the command reads. They expire after their TTL and
+    the least recently used entries are evicted once the store grows past
+    `max_bytes`.
+    """
+    def __init__(self, directory, max_bytes):
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(self.directory, "objects"), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(self.directory, "index.db"), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL,
+                expires REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+            CREATE TABLE IF NOT EXISTS file_digests (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL
+            );
+        """)
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def _object_path(self, key):
+        return os.path.join(self.directory, "objects", key[:2], key)
+
+    def file_digest(self, path):
+        """
+        Returns the SHA-256 of a file, reusing the stored digest while the
+        file's size and modification time are unchanged.
+
+        Args:
+            path (str): The file to hash.
+
+        Returns:
+            str: The hex digest.
+        """
+        stat = os.stat(path)
+        row = self.db.execute(
+            "SELECT digest FROM file_digests WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, stat.st_size, stat.st_mtime_ns)
+        ).fetchone()
+        if row:
+            return row[0]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        self.db.execute(
+            "INSERT OR REPLACE INTO file_digests (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+        )
+        self.db.commit()
+        return digest.hexdigest()
+
+    def make_key(self, tool_name, command, target):
+        """
+        Builds the cache key for a tool run.
+
+        Args:
+            tool_name (str): The name of the tool.
+            command (str): The rendered preset command.
+            target (str): The challenge target.
+
+        Returns:
+            str: The hex cache key.
+        """
+        files = referenced_files(shlex.split(command))
+        material = {
+            "tool": tool_name,
+            "command": command,
+            "target": target,
+            "files": {path: self.file_digest(path) for path in files}
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+    def derived_key(self, key, name):
+        """
+        Returns the key of an additional output (e.g., an XML report) stored
+        alongside the entry `key`.
+
+        Args:
+            key (str): The cache key.
+            name (str): The name of the additional output.
+
+        Returns:
+            str: The hex cache key.
+        """
+        return hashlib.sha256(f"{key}:{name}".encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Looks up a cached output and marks it as recently used.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            str: The path of the cached output, or None on a miss.
+        """
+        now = time.time()
+        row = self.db.execute("SELECT expires FROM entries WHERE key = ?", (key,)).fetchone()
+        path = self._object_path(key)
+        if row is None:
+            return None
+        if row[0] < now or not os.path.exists(path):
+            self._remove(key)
+            self.db.commit()
+            return None
+
+        self.db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        self.db.commit()
+        return path
+
+    def put(self, key, source, ttl, offset=0):
+        """
+        Stores an output and evicts least recently used entries if needed.
+
+        Args:
+            key (str): The cache key.
+            source (str): The file holding the output.
+            ttl (int): The number of seconds the entry stays valid.
+            offset (int, optional): The byte offset the output starts at in `source`.
+        """
+        path = self._object_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(source, "rb") as src, open(temporary, "wb") as dst:
+            src.seek(offset)
+            shutil.copyfileobj(src, dst)
+        os.replace(temporary, path)
+
+        now = time.time()
+        self.db.execute(
+            "INSERT OR REPLACE INTO entries (key, size, created, last_access, expires) VALUES (?, ?, ?, ?, ?)",
+            (key, os.path.getsize(path), now, now, now + ttl)
+        )
+        self.evict()
+
+    def evict(self):
+        """
+        Removes expired entries, then the least recently used ones until the
+        store fits within `max_bytes`.
+        """
+        for (key,) in self.db.execute("SELECT key FROM entries WHERE expires < ?", (time.time(),)).fetchall():
+            self._remove(key)
+
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total > self.max_bytes:
+            for key, size in self.db.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+                if total <= self.max_bytes:
+                    break
+                self._remove(key)
+                total -= size
+        self.db.commit()
+
+    def _remove(self, key):
+        self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        try:
+            os.remove(self._object_path(key))
+        except FileNotFoundError:
+            pass
+
+    def size(self):
+        """
+        Returns the total size of the cached outputs in bytes.
+        """
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+def open_result_cache():
+    """
+    Opens the result cache configured in config/base.json.
+
+    Returns:
+        ResultCache: The cache.
+    """
+    settings = load_config("base").get("cache", {})
+    return ResultCache(
+        settings.get("directory", DEFAULT_CACHE_DIRECTORY),
+        int(settings.get("max_size_mb", DEFAULT_MAX_SIZE_MB)) * 1024 * 1024
+    )
+
+def preset_ttl(preset_config, tool_config=None):
+    """
+    Returns the cache TTL of a preset in seconds (0 disables caching).
+
+    The preset's own `cache_ttl` wins, then the tool's, then the default.
+    Tools whose runs change state or depend on more than the target (brute
+    forcing, cracking, exploitation) set `"cache_ttl": 0` in their config.
+
+    Args:
+        preset_config (dict): The preset.
+        tool_config (ToolConfig, optional): The preset's tool.
+
+    Returns:
+        int: The TTL in seconds.
+    """
+    if "cache_ttl" in preset_config:
+        return int(preset_config["cache_ttl"])
+    if tool_config is not None and tool_config.get("cache_ttl") is not None:
+        return int(tool_config.get("cache_ttl"))
+    return int(load_config("base").get("cache", {}).get("default_ttl", DEFAULT_TTL))
+
+def copy_output(source, destination, append=True):
+    """
+    Copies a cached output to a challenge output file.
+
+    Args:
+        source (str): The cached output.
+        destination (str): The challenge output file.
+        append (bool, optional): Append to the file, as a streamed run does.
+            Tools that write their own output file replace it on every run,
+            so their cached output replaces it too.
+    """
+    if not append:
+        shutil.copyfile(source, destination)
+        return
+    with open(source, "rb") as src, open(destination, "ab") as dst:
+        shutil.copyfileobj(src, dst)
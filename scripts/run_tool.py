@@ -1,60 +1,259 @@
 
 import os
+import shlex
+import shutil
 import subprocess
-from scripts.utils import load_config, prompt_user_input
+from scripts.async_runner import run_streaming
+from scripts.checkpoint import CheckpointJournal
+from scripts.result_cache import cache_enabled, open_result_cache, preset_ttl, copy_output
+from scripts.output_parsers import get_line_parser
+from scripts.findings import FindingsStore, HostTracker, ingest_output
+from scripts.exploit_correlation import open_correlator
+from scripts.rate_limiter import open_rate_limiter, apply_rate_control
+from scripts.sharding import parse_targets, run_sharded_nmap, run_sharded_wordlist
+from scripts.preset_registry import get_registry, placeholder_values
+from scripts.utils import load_config, prompt_user_input, load_challenge_metadata
 from scripts.log_manager import log_action
-from exceptions import ConfigFileNotFoundError, InvalidPresetError, ToolExecutionError
+from exceptions import ToolError, ToolExecutionError
 
-def run_tool(tool_name, preset, challenge_path):
+def run_tool(tool_name, preset, challenge_path, use_cache=None, resume=False):
     """
     Executes a tool with a specified preset for a given challenge.
 
+    Results are served from the result cache when the tool, command, target
+    and referenced wordlists are unchanged since a previous run. Tools with
+    `rate_control` settings are paced by the target host's shared rate limiter.
+    Parsed results are added to the challenge's findings store as they arrive,
+    and scanned services are matched against the exploit database meanwhile.
+
     Args:
         tool_name (str): The name of the tool to run (e.g., 'nmap').
         preset (str): The name of the preset to use (e.g., 'stealth').
         challenge_path (str): The path to the challenge directory.
+        use_cache (bool, optional): Whether to use the result cache. Defaults
+            to enabled unless --no-cache was given.
+        resume (bool, optional): Continue an interrupted run of this preset from
+            the tool's restore file or the recorded wordlist shard offsets.
 
     Raises:
-        FileNotFoundError: If the tool's config file or output file is missing.
-        ValueError: If the preset is invalid.
+        ToolExecutionError: If the tool could not be run or failed. The error
+            is logged first; raising it lets the scheduler mark the task as
+            failed and skip its dependents.
     """
+    store, correlator = None, None
     try:
-        # Load tool configuration
-        config = load_config(tool_name)
-        if not config:
-            raise ConfigFileNotFoundError(tool_name)
-            
-        output_file = config.get("output_file", f"{tool_name}.txt")
-
-        # Validate the preset
-        preset_config = next((p for p in config.get("presets", []) if p["name"] == preset), None)
-        if not preset_config:
-            raise InvalidPresetError(preset, tool_name)
-
-        # Construct the command
-        command = preset_config["command"]
-        output_path = os.path.join(challenge_path, output_file)
-        full_command = f"{tool_name} {command} -o {output_path}"
-
-        # Log the tool execution
-        log_action(challenge_path, f"Running tool '{tool_name}' with preset '{preset}': {full_command}")
-
-        # Execute the tool
-        print(f"Executing: {full_command}")
-        subprocess.run(full_command.split(), check=True)
-
-        # Log success
-        log_action(challenge_path, f"Tool '{tool_name}' completed successfully. Output saved to {output_path}.")
-        print(f"Output saved to: {output_path}")
+        # Look up the compiled preset; configs are only re-read when they change
+        config = get_registry().tool(tool_name)
+        template = config.preset(preset)
+        preset_config = template.config
+        output_path = os.path.join(challenge_path, config.output_file)
+
+        # Fill the argv template from the challenge metadata. Tools given an
+        # {output_file} write it themselves, otherwise their console output is
+        # streamed into the output file. {xml_output_file} asks for an XML report.
+        values = placeholder_values(_challenge_metadata(challenge_path), output_path)
+        xml_path = None
+        if "xml_output_file" in template.placeholders and config.get("xml_output_file"):
+            xml_path = os.path.join(challenge_path, config.get("xml_output_file"))
+            values["xml_output_file"] = xml_path
+        argv = [tool_name, *template.render(values)]
+        writes_own_output = "output_file" in template.placeholders
+
+        # Report parsed results as they arrive and store them as findings
+        source = os.path.basename(tool_name)
+        parser = get_line_parser(source)
+        target = values.get("ip")
+        store = FindingsStore(challenge_path)
+        correlator = open_correlator(store)
+        on_record = correlator.submit if correlator else None
+        found = {"results": 0}
+        hosts = HostTracker(target)
+
+        def report_result(stream, line):
+            # Scans of several hosts attribute each record to its own host
+            host = hosts.host(line)
+            record = parser(line)
+            if record:
+                found["results"] += 1
+                store.add(record, source, host)
+                if on_record:
+                    on_record(record, host)
+                print(f"[+] {tool_name}: {line.strip()}")
+
+        # Tools with restore support continue from their restore file
+        journal = CheckpointJournal(challenge_path)
+        restore = config.get("resume")
+        cwd = challenge_path if restore else None
+        restoring = resume and restore and os.path.exists(os.path.join(challenge_path, restore["restore_file"]))
+        if restoring:
+            argv = [tool_name, *shlex.split(restore["command"])]
+            use_cache = False
+
+        # Serve unchanged runs from the result cache
+        cache, cache_key, ttl = None, None, preset_ttl(preset_config, config)
+        if (cache_enabled() if use_cache is None else use_cache) and not resume and target and ttl > 0:
+            cache = open_result_cache()
+            key_argv = [tool_name, *template.render({
+                **values, "output_file": "{output_file}", "xml_output_file": "{xml_output_file}"
+            })]
+            cache_key = cache.make_key(tool_name, shlex.join(key_argv), target)
+            cached_path = cache.get(cache_key)
+            cached_xml = cache.get(cache.derived_key(cache_key, "xml")) if xml_path else None
+            if cached_path and (cached_xml or not xml_path):
+                copy_output(cached_path, output_path, append=not writes_own_output)
+                if cached_xml:
+                    shutil.copyfile(cached_xml, xml_path)
+                cache.close()
+                ingest_output(store, source, output_path, parser, xml_path, target, on_record)
+                log_action(challenge_path, f"Tool '{tool_name}' with preset '{preset}' served from cache. Output saved to {output_path}.")
+                print(f"Using cached result. Output saved to: {output_path}")
+                return
+        offset = 0 if writes_own_output or not os.path.exists(output_path) else os.path.getsize(output_path)
+
+        # Share the target host's request budget and adapt it to the errors seen
+        rate_control = config.get("rate_control")
+        limiter = open_rate_limiter(target) if rate_control and target else None
+        handlers = [report_result] if parser else []
+        if limiter:
+            handlers.append(limiter.error_handler())
+
+        if preset_config.get("shard"):
+            # Sharded runs rewrite the output file with the merged result
+            run_sharded_tool(
+                tool_name, preset_config, challenge_path, output_path, handlers,
+                resume_offsets=journal.wordlist_offsets(tool_name, preset) if resume else None,
+                on_progress=lambda shard, byte_range, fed: journal.record_progress(tool_name, preset, shard, byte_range, fed),
+                limiter=limiter, rate_control=rate_control, xml_output_path=xml_path
+            )
+            journal.record("tool_complete", tool=tool_name, preset=preset)
+            offset = 0
+        else:
+            if limiter and not restoring:
+                argv = apply_rate_control(argv, rate_control, limiter.rate)
+
+            # Log the tool execution
+            full_command = shlex.join(argv)
+            log_action(challenge_path, f"Running tool '{tool_name}' with preset '{preset}': {full_command}")
+
+            # Execute the tool
+            print(f"Executing: {full_command}")
+            result = run_streaming(argv, None if writes_own_output else output_path, handlers, cwd=cwd)
+            if not result.succeeded:
+                raise subprocess.CalledProcessError(result.returncode, result.argv, "\n".join(result.tail))
+
+            # Log success
+            log_action(
+                challenge_path,
+                f"Tool '{tool_name}' completed successfully in {result.duration:.1f}s "
+                f"({result.lines['stdout']} lines, {found['results']} results). Output saved to {output_path}."
+            )
+            print(f"Output saved to: {output_path}")
+
+        if limiter:
+            limiter.flush()
+        if xml_path:
+            ingest_output(store, source, xml_path=xml_path, host=target, on_record=on_record)
+        if cache:
+            cache.put(cache_key, output_path, ttl, offset)
+            if xml_path and os.path.exists(xml_path):
+                cache.put(cache.derived_key(cache_key, "xml"), xml_path, ttl)
+            cache.close()
 
     except FileNotFoundError as e:
         log_action(challenge_path, f"Error: {e}")
         print(f"Error: {e}")
+        raise ToolExecutionError(tool_name, str(e)) from e
     except subprocess.CalledProcessError as e:
-        raise ToolExecutionError(tool_name, str(e))
+        log_action(challenge_path, f"Error: tool '{tool_name}' failed: {e}")
+        raise ToolExecutionError(tool_name, str(e)) from e
+    except ToolExecutionError:
+        raise
     except Exception as e:
         log_action(challenge_path, f"Unexpected error while running tool '{tool_name}': {e}")
         print(f"Unexpected error: {e}")
+        raise ToolExecutionError(tool_name, str(e)) from e
+    finally:
+        if correlator:
+            stats = correlator.close()
+            if stats["exploits"]:
+                print(f"[+] {stats['exploits']} exploit matches for {stats['lookups']} services added to the findings.")
+        if store:
+            store.close()
+
+def _challenge_metadata(challenge_path):
+    """Returns the challenge's metadata.json, or an empty dict if there is none."""
+    try:
+        return load_challenge_metadata(challenge_path)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def run_sharded_tool(tool_name, preset_config, challenge_path, output_path, handlers=None,
+                     resume_offsets=None, on_progress=None, limiter=None, rate_control=None,
+                     xml_output_path=None):
+    """
+    Runs a sharded preset and merges the shards into the output file.
+
+    Presets shard either the nmap port space or host list ('by': 'ports' or
+    'hosts') or the preset's wordlist ('by': 'wordlist').
+
+    Args:
+        tool_name (str): The name of the tool to run.
+        preset_config (dict): The preset, including its 'shard' settings.
+        challenge_path (str): The path to the challenge directory.
+        output_path (str): The merged output file.
+        handlers (list, optional): Line handlers passed to every shard.
+        resume_offsets (dict, optional): Wordlist shard offsets of an interrupted run.
+        on_progress (callable, optional): Called as wordlist shards are fed.
+        limiter (HostRateLimiter, optional): The target host's rate limiter.
+        rate_control (dict, optional): The tool's rate control settings.
+        xml_output_path (str, optional): The merged XML report of a sharded nmap scan.
+
+    Raises:
+        ValueError: If the challenge metadata has no target.
+        subprocess.CalledProcessError: If any shard fails.
+    """
+    metadata = load_challenge_metadata(challenge_path)
+    targets = parse_targets(metadata.get("ip"))
+    if not targets:
+        raise ValueError("No target IP found in the challenge metadata.")
+
+    shard_config = preset_config["shard"]
+    mode = shard_config.get("by", "ports")
+    log_action(
+        challenge_path,
+        f"Running tool '{tool_name}' with preset '{preset_config['name']}' sharded by {mode} "
+        f"({shard_config.get('count', 'one per CPU')} shards) against {len(targets)} target(s)"
+    )
+    print(f"Executing {tool_name} '{preset_config['name']}' sharded by {mode}...")
+
+    if mode == "wordlist":
+        values = placeholder_values({**metadata, "ip": targets[0]})
+        lines, results = run_sharded_wordlist(
+            tool_name, preset_config["command"], values, shard_config, output_path, handlers,
+            resume_offsets, on_progress, limiter, rate_control
+        )
+        if resume_offsets:
+            print(f"Resumed {len(resume_offsets)} wordlist shard(s) from their last recorded offsets.")
+        summary = f"{lines} distinct output lines"
+    else:
+        merged, results = run_sharded_nmap(
+            tool_name, preset_config["command"], targets, shard_config, output_path, handlers, xml_output_path
+        )
+        ports = sum(len(host["ports"]) for host in merged.values())
+        summary = f"{ports} ports on {len(merged)} hosts"
+
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+        if not result.succeeded:
+            raise subprocess.CalledProcessError(result.returncode, result.argv, "\n".join(result.tail))
+
+    log_action(
+        challenge_path,
+        f"Tool '{tool_name}' completed successfully in {max((r.duration for r in results), default=0.0):.1f}s "
+        f"across {len(results)} shards ({summary}). Output saved to {output_path}."
+    )
+    print(f"Output saved to: {output_path}")
 
 def run_tools_menu():
     """
@@ -63,15 +262,15 @@ def run_tools_menu():
     try:
         # Prompt user for tool and preset selection
         tool_name = prompt_user_input("Enter the tool name (e.g., nmap, gobuster)").lower()
-        config = load_config(tool_name)
+        presets = list(get_registry().tool(tool_name).presets.values())
 
         print("\nAvailable Presets:")
-        for idx, preset in enumerate(config.get("presets", []), start=1):
-            print(f"{idx}. {preset['name']} - {preset['description']}")
+        for idx, preset in enumerate(presets, start=1):
+            print(f"{idx}. {preset.name} - {preset.description}")
 
         preset_choice = input("\nSelect a preset (number): ")
         try:
-            preset = config["presets"][int(preset_choice) - 1]["name"]
+            preset = presets[int(preset_choice) - 1].name
         except (IndexError, ValueError):
             print("Invalid choice. Returning to menu.")
             return
@@ -83,7 +282,7 @@ def run_tools_menu():
 
         # Run the selected tool with the preset
         run_tool(tool_name, preset, challenge_path)
-    except FileNotFoundError:
-        print(f"Error: Configuration for tool '{tool_name}' not found.")
+    except (FileNotFoundError, ToolError) as e:
+        print(f"Error: {e}")
     except Exception as e:
         print(f"Unexpected error: {e}")
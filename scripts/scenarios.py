@@ -1,9 +1,13 @@
 import os
 import json
-from scripts.log_manager import log_action
+from scripts.log_manager import log_action, buffered_logging
+from scripts.checkpoint import CheckpointJournal, file_digest
 from scripts.run_tool import run_tool
-from scripts.utils import validate_command
-from exceptions import InvalidScenarioStructureError, ScenarioExecutionError
+from scripts.scheduler import build_task_graph, run_task_graph, validate_limits
+from scripts.preset_registry import get_registry
+from scripts.vpn_session import wait_for_vpn, vpn_settings
+from scripts.utils import load_config, prompt_user_input
+from exceptions import InvalidScenarioStructureError, ScenarioExecutionError, ScenarioDependencyError, ToolError
 
 def list_scenarios():
     """Lists all available scenarios."""
@@ -48,9 +52,23 @@ def validate_scenarios():
                         issues.append(f"Task missing required keys: {task}")
                     else:
                         # Validate command
-                        tool, preset = task["command"].split()
-                        if not validate_command(tool, preset):
+                        try:
+                            tool, preset = task["command"].split()
+                            get_registry().preset(tool, preset)
+                        except ValueError:
                             issues.append(f"Invalid command: {task['command']}")
+                        except ToolError as e:
+                            issues.append(f"Invalid command '{task['command']}': {e}")
+
+                # Check task dependencies
+                try:
+                    build_task_graph([task for task in data.get("tasks", []) if "name" in task])
+                except ScenarioDependencyError as e:
+                    issues.append(str(e))
+                try:
+                    validate_limits(data.get("max_workers"), data.get("concurrency"))
+                except ValueError as e:
+                    issues.append(str(e))
 
             except json.JSONDecodeError:
                 issues.append("Invalid JSON format.")
@@ -75,8 +93,28 @@ def load_scenario(scenario_name):
     with open(scenario_file, "r") as f:
         return json.load(f)
 
-def run_scenario(scenario_name, challenge_path):
-    """Executes all tasks in the given scenario."""
+def _task_output_path(task, challenge_path):
+    """Returns the output file a scenario task's tool writes to."""
+    tool = task["command"].split()[0]
+    try:
+        return os.path.join(challenge_path, get_registry().tool(tool).output_file)
+    except ToolError:
+        return os.path.join(challenge_path, f"{tool}.txt")
+
+def run_scenario(scenario_name, challenge_path, resume=False):
+    """
+    Executes all tasks in the given scenario.
+
+    Independent tasks run in parallel worker processes. Tasks wait for the
+    tasks named in their optional `depends_on` list, and the scenario's
+    optional `concurrency` mapping caps how many tasks of each tool run at once.
+
+    Task starts and completions are recorded in the challenge's checkpoint
+    journal. With `resume`, tasks completed by the previous run are skipped
+    and interrupted tasks continue where their tools allow it. If a VPN
+    session was started for the challenge, no task runs before its tunnel is up.
+    """
+    task = {"name": scenario_name}
     try:
         scenario = load_scenario(scenario_name)
         
@@ -88,18 +126,95 @@ def run_scenario(scenario_name, challenge_path):
             
         print(f"\nRunning Scenario: {scenario['name']}")
         print(scenario["description"])
-        
-        """Executes all tasks in the given scenario."""
-        for task in scenario["tasks"]:
-            try:
-                print(f"\nExecuting Task: {task['name']}")
-                tool, preset = task["command"].split()
-                run_tool(tool, preset, challenge_path)
+
+        # Wait for the challenge's VPN tunnel instead of racing it
+        time_to_ready = wait_for_vpn(challenge_path, vpn_settings()[1])
+        if time_to_ready is not None:
+            print(f"VPN tunnel is up (ready after {time_to_ready:.1f}s).")
+
+        journal = CheckpointJournal(challenge_path)
+        state = journal.state(scenario["name"]) if resume else {"completed": {}, "interrupted": []}
+        if resume:
+            journal.record("scenario_resume", scenario=scenario["name"])
+            print(f"Resuming: {len(state['completed'])} task(s) already completed, "
+                  f"{len(state['interrupted'])} interrupted.")
+        else:
+            journal.record("scenario_start", scenario=scenario["name"])
+
+        def on_start(task):
+            journal.record("task_start", scenario=scenario["name"], task=task["name"])
+
+        def on_complete(task, result):
+            # Only tasks run in this session get here; completed tasks from the previous run are not re-run
+            if result["status"] == "completed":
+                journal.record(
+                    "task_complete", scenario=scenario["name"], task=task["name"], duration=result["duration"],
+                    output=file_digest(_task_output_path(task, challenge_path))
+                )
+                print(f"Task '{task['name']}' completed in {result['duration']:.1f}s")
                 log_action(challenge_path, f"Task '{task['name']}' executed successfully.")
-            except Exception as e:
-                print(f"Error executing task '{task['name']}': {e}")
-                log_action(challenge_path, f"Task '{task['name']}' failed with error: {e}")
+            elif result["status"] == "skipped":
+                print(f"Skipping task '{task['name']}': {result['error']}")
+                log_action(challenge_path, f"Task '{task['name']}' skipped: {result['error']}")
+            else:
+                journal.record("task_failed", scenario=scenario["name"], task=task["name"], error=result["error"])
+                print(f"Error executing task '{task['name']}': {result['error']}")
+                log_action(challenge_path, f"Task '{task['name']}' failed with error: {result['error']}")
+
+        with buffered_logging():
+            summary = run_task_graph(
+                scenario["tasks"],
+                run_tool,
+                lambda task: (*task["command"].split(), challenge_path, None, task["name"] in state["interrupted"]),
+                max_workers=scenario.get("max_workers"),
+                tool_limits=scenario.get("concurrency"),
+                on_complete=on_complete,
+                on_start=on_start,
+                completed=state["completed"]
+            )
+
         print("\n")
+        print(f"Wall-clock time: {summary['wall_time']:.1f}s")
+        print(f"Critical path ({summary['critical_path_time']:.1f}s): {' -> '.join(summary['critical_path'])}")
+        log_action(
+            challenge_path,
+            f"Scenario '{scenario['name']}' finished in {summary['wall_time']:.1f}s "
+            f"(critical path {summary['critical_path_time']:.1f}s: {' -> '.join(summary['critical_path'])})"
+        )
         print("\nScenario completed successfully.")
+        return summary
     except Exception as e:
         raise ScenarioExecutionError(task["name"], str(e))
+
+def run_scenario_menu():
+    """
+    Prompts for a scenario and a challenge and runs the scenario, offering to
+    resume if the previous run of the scenario was interrupted.
+    """
+    scenarios = list_scenarios()
+    print("\nAvailable Scenarios:")
+    for idx, scenario in enumerate(scenarios, start=1):
+        print(f"{idx}. {scenario['name']} - {scenario['description']}")
+
+    choice = input("\nSelect a scenario (number): ")
+    try:
+        scenario_name = os.path.splitext(scenarios[int(choice) - 1]["file"])[0]
+    except (IndexError, ValueError):
+        print("Invalid choice. Returning to menu.")
+        return
+
+    challenge_name = prompt_user_input("Enter the challenge name")
+    base_path = load_config("base")["base_directory"]
+    challenge_path = os.path.join(os.path.expanduser(base_path), challenge_name)
+
+    resume = False
+    scenario = load_scenario(scenario_name)
+    state = CheckpointJournal(challenge_path).state(scenario["name"])
+    if state["interrupted"] or 0 < len(state["completed"]) < len(scenario["tasks"]):
+        answer = prompt_user_input(
+            f"A previous run completed {len(state['completed'])} task(s) and left "
+            f"{len(state['interrupted'])} unfinished. Resume it? (y/N)"
+        )
+        resume = (answer or "").lower() == "y"
+
+    run_scenario(scenario_name, challenge_path, resume=resume)
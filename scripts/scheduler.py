@@ -0,0 +1,262 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from scripts.log_manager import flush_logs
+from exceptions import ScenarioDependencyError
+
+def task_tool(task):
+    """
+    Returns the tool name a scenario task runs (the first word of its command).
+
+    Args:
+        task (dict): The scenario task.
+
+    Returns:
+        str: The tool name.
+    """
+    return task["command"].split()[0]
+
+def build_task_graph(tasks):
+    """
+    Builds the dependency graph for a list of scenario tasks.
+
+    Tasks may declare an optional `depends_on` list of task names that must
+    complete before they are started.
+
+    Args:
+        tasks (list): The scenario tasks.
+
+    Returns:
+        dict: A mapping of task name to the list of task names it depends on.
+
+    Raises:
+        ScenarioDependencyError: If a task name is duplicated, a dependency is
+            unknown or the dependencies form a cycle.
+    """
+    graph = {}
+    for task in tasks:
+        if task["name"] in graph:
+            raise ScenarioDependencyError(task["name"], "duplicate task name")
+        depends_on = task.get("depends_on", [])
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        graph[task["name"]] = list(depends_on)
+
+    for name, depends_on in graph.items():
+        for dependency in depends_on:
+            if dependency not in graph:
+                raise ScenarioDependencyError(name, f"unknown dependency '{dependency}'")
+
+    topological_order(graph)
+    return graph
+
+def topological_order(graph):
+    """
+    Orders the tasks of a dependency graph so every task follows its dependencies.
+
+    Args:
+        graph (dict): A mapping of task name to the task names it depends on.
+
+    Returns:
+        list: The task names in dependency order.
+
+    Raises:
+        ScenarioDependencyError: If the dependencies form a cycle.
+    """
+    remaining = {name: len(depends_on) for name, depends_on in graph.items()}
+    dependents = {name: [] for name in graph}
+    for name, depends_on in graph.items():
+        for dependency in depends_on:
+            dependents[dependency].append(name)
+
+    ready = [name for name, count in remaining.items() if count == 0]
+    order = []
+    while ready:
+        name = ready.pop(0)
+        order.append(name)
+        for dependent in dependents[name]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+
+    if len(order) != len(graph):
+        cyclic = sorted(name for name, count in remaining.items() if count > 0)
+        raise ScenarioDependencyError(cyclic[0], f"dependency cycle between {cyclic}")
+    return order
+
+def critical_path(graph, durations):
+    """
+    Finds the longest chain of dependent tasks, weighted by their run time.
+
+    Args:
+        graph (dict): A mapping of task name to the task names it depends on.
+        durations (dict): A mapping of task name to its run time in seconds.
+
+    Returns:
+        tuple: The critical path time in seconds and the task names on the path.
+    """
+    finish = {}
+    previous = {}
+    for name in topological_order(graph):
+        start = 0.0
+        previous[name] = None
+        for dependency in graph[name]:
+            if finish[dependency] > start:
+                start = finish[dependency]
+                previous[name] = dependency
+        finish[name] = start + durations.get(name, 0.0)
+
+    if not finish:
+        return 0.0, []
+
+    name = max(finish, key=finish.get)
+    total = finish[name]
+    path = []
+    while name is not None:
+        path.append(name)
+        name = previous[name]
+    return total, list(reversed(path))
+
+def validate_limits(max_workers=None, tool_limits=None, target_limit=None):
+    """
+    Checks that every concurrency limit lets at least one task run.
+
+    Args:
+        max_workers (int, optional): The number of worker processes.
+        tool_limits (dict, optional): The maximum number of concurrent tasks per tool.
+        target_limit (int, optional): The maximum number of concurrent tasks per target.
+
+    Raises:
+        ValueError: If a limit is not an integer of at least 1.
+    """
+    limits = {"max_workers": max_workers, "target_limit": target_limit}
+    limits.update({f"concurrency of '{tool}'": limit for tool, limit in (tool_limits or {}).items()})
+    for name, limit in limits.items():
+        if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit < 1):
+            raise ValueError(f"Invalid {name}: {limit!r}. Concurrency limits must be at least 1.")
+
+def _execute_task(runner, args):
+    """
+    Runs a task in a worker process and times it.
+
+    Args:
+        runner (callable): The function that executes the task.
+        args (tuple): The arguments passed to the runner.
+
+    Returns:
+        float: The task's run time in seconds.
+    """
+    started = time.perf_counter()
+    try:
+        runner(*args)
+    finally:
+        # Write the task's queued log events before it is reported as done
+        flush_logs()
+    return time.perf_counter() - started
+
+def run_task_graph(tasks, runner, task_args, max_workers=None, tool_limits=None,
+                   executor_factory=ProcessPoolExecutor, on_complete=None, on_start=None,
+                   completed=None, target_limit=None):
+    """
+    Runs scenario tasks in parallel worker processes while honouring their
+    dependencies and per-tool concurrency caps.
+
+    A task is started once all of its dependencies completed successfully,
+    fewer than `tool_limits[tool]` tasks of the same tool are running and,
+    for tasks with a 'target' key, fewer than `target_limit` tasks of the same
+    target are running. Tasks whose dependencies failed are skipped.
+
+    Args:
+        tasks (list): The scenario tasks.
+        runner (callable): A picklable function called in the worker process.
+        task_args (callable): Returns the runner's argument tuple for a task.
+        max_workers (int, optional): The number of worker processes.
+        tool_limits (dict, optional): The maximum number of concurrent tasks per tool.
+        executor_factory (callable, optional): Creates the executor used to run tasks.
+        on_complete (callable, optional): Called with the task and its result
+            as each task finishes.
+        on_start (callable, optional): Called with each task as it is submitted.
+        completed (dict, optional): Task name -> duration of tasks already
+            completed by an earlier run; they are not run again.
+        target_limit (int, optional): The maximum number of concurrent tasks per target.
+
+    Returns:
+        dict: The per-task results, the wall-clock time, the critical path and
+            the critical path time.
+
+    Raises:
+        ScenarioDependencyError: If the task dependencies are invalid.
+        ValueError: If a worker, tool or target limit is below 1, so tasks
+            could never start.
+    """
+    graph = build_task_graph(tasks)
+    tasks_by_name = {task["name"]: task for task in tasks}
+    tool_limits = tool_limits or {}
+    max_workers = max_workers or min(len(tasks), os.cpu_count() or 1) or 1
+    validate_limits(max_workers, tool_limits, target_limit)
+
+    results = {
+        name: {"status": "completed", "duration": duration, "error": None, "resumed": True}
+        for name, duration in (completed or {}).items() if name in graph
+    }
+    pending = [name for name in topological_order(graph) if name not in results]
+    running = {}
+    running_per_tool = {}
+    running_per_target = {}
+    started = time.perf_counter()
+
+    def finish(name, result):
+        results[name] = result
+        if on_complete:
+            on_complete(tasks_by_name[name], result)
+
+    with executor_factory(max_workers=max_workers) as executor:
+        while pending or running:
+            for name in list(pending):
+                dependencies = [results.get(dep) for dep in graph[name]]
+                if any(r is not None and r["status"] != "completed" for r in dependencies):
+                    pending.remove(name)
+                    failed = [dep for dep in graph[name] if results[dep]["status"] != "completed"]
+                    finish(name, {"status": "skipped", "duration": 0.0,
+                                  "error": f"Dependency failed: {', '.join(failed)}"})
+                    continue
+                if any(r is None for r in dependencies) or len(running) >= max_workers:
+                    continue
+
+                tool = task_tool(tasks_by_name[name])
+                limit = tool_limits.get(tool)
+                if limit is not None and running_per_tool.get(tool, 0) >= limit:
+                    continue
+                target = tasks_by_name[name].get("target")
+                if target_limit is not None and running_per_target.get(target, 0) >= target_limit:
+                    continue
+
+                pending.remove(name)
+                if on_start:
+                    on_start(tasks_by_name[name])
+                future = executor.submit(_execute_task, runner, task_args(tasks_by_name[name]))
+                running[future] = name
+                running_per_tool[tool] = running_per_tool.get(tool, 0) + 1
+                running_per_target[target] = running_per_target.get(target, 0) + 1
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                running_per_tool[task_tool(tasks_by_name[name])] -= 1
+                running_per_target[tasks_by_name[name].get("target")] -= 1
+                try:
+                    finish(name, {"status": "completed", "duration": future.result(), "error": None})
+                except Exception as e:
+                    finish(name, {"status": "failed", "duration": 0.0, "error": str(e)})
+
+    durations = {name: result["duration"] for name, result in results.items()}
+    path_time, path = critical_path(graph, durations)
+    return {
+        "results": results,
+        "wall_time": time.perf_counter() - started,
+        "critical_path": path,
+        "critical_path_time": path_time
+    }
@@ -0,0 +1,244 @@
+import os
+import time
+import sqlite3
+from scripts.utils import load_config
+
+DEFAULT_INDEX_PATH = "~/.cache/ethical-hacking-scripts/search.db"
+DEFAULT_LIMIT = 50
+INDEXED_EXTENSIONS = (".txt", ".log")
+INDEXED_FILES = ("metadata.json",)
+APPEND_ONLY_EXTENSIONS = (".log",)
+MAX_LINE_LENGTH = 2000
+LINE_BITS = 32
+OPERATORS = ("AND", "OR", "NOT")
+
+def build_match_query(query):
+    """
+    Turns a search into an FTS5 query.
+
+    Every word is matched as a phrase, so versions and paths such as
+    '2.4.41' or '/backup' match as written. Words are combined with AND
+    unless OR or NOT is given; a trailing '*' matches a prefix.
+
+    Args:
+        query (str): The search, e.g. 'apache 2.4.41 OR /backup'.
+
+    Returns:
+        str: The FTS5 MATCH expression, or an empty string if there is nothing to search for.
+    """
+    terms = []
+    for word in query.split():
+        if word in OPERATORS:
+            if terms and terms[-1] not in OPERATORS:
+                terms.append(word)
+            continue
+        prefix = word.endswith("*")
+        phrase = word.rstrip("*").replace('"', '""')
+        if any(character.isalnum() for character in phrase):
+            terms.append(f'"{phrase}"' + ("*" if prefix else ""))
+    while terms and terms[-1] in OPERATORS:
+        terms.pop()
+    return " ".join(terms)
+
+def _is_indexed(name):
+    return name in INDEXED_FILES or name.endswith(INDEXED_EXTENSIONS)
+
+class SearchIndex:
+    """
+    An inverted index of every challenge's tool outputs, logs and metadata.
+
+    Lines are stored in an SQLite FTS5 table whose row ids encode the file
+    and the line number, so a file's lines can be replaced with one range
+    delete. `update` only re-reads files whose size or modification time
+    changed, and appends to logs are indexed from where the previous update
+    stopped.
+    """
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL UNIQUE,
+                challenge TEXT NOT NULL,
+                name TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                indexed_bytes INTEGER NOT NULL,
+                line_count INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS files_challenge ON files (challenge);
+            CREATE VIRTUAL TABLE IF NOT EXISTS lines USING fts5 (text);
+        """)
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def update(self, base_directory):
+        """
+        Brings the index up to date with the challenges in a directory.
+
+        Args:
+            base_directory (str): The directory containing the challenge directories.
+
+        Returns:
+            dict: The number of files 'indexed' from scratch, 'appended' to,
+                'removed' and 'unchanged'.
+        """
+        base_directory = os.path.abspath(os.path.expanduser(base_directory))
+        known = {
+            row[1]: row for row in self.db.execute(
+                "SELECT id, path, size, mtime_ns, indexed_bytes, line_count FROM files WHERE path LIKE ? ESCAPE '\\'",
+                (base_directory.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + os.sep + "%",)
+            )
+        }
+        stats = {"indexed": 0, "appended": 0, "removed": 0, "unchanged": 0}
+
+        for challenge in _scandir(base_directory):
+            if challenge.name.startswith(".") or not challenge.is_dir():
+                continue
+            for entry in _scandir(challenge.path):
+                if not _is_indexed(entry.name) or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                row = known.pop(entry.path, None)
+                if row and row[2] == stat.st_size and row[3] == stat.st_mtime_ns:
+                    stats["unchanged"] += 1
+                elif row and entry.name.endswith(APPEND_ONLY_EXTENSIONS) and stat.st_size >= row[4]:
+                    self._index_file(row[0], entry.path, stat, offset=row[4], first_line=row[5] + 1)
+                    stats["appended"] += 1
+                else:
+                    file_id = row[0] if row else self.db.execute(
+                        "INSERT INTO files (path, challenge, name, size, mtime_ns, indexed_bytes, line_count) VALUES (?, ?, ?, 0, 0, 0, 0)",
+                        (entry.path, challenge.name, entry.name)
+                    ).lastrowid
+                    self._delete_lines(file_id)
+                    self._index_file(file_id, entry.path, stat)
+                    stats["indexed"] += 1
+
+        for file_id, *_ in known.values():
+            self._delete_lines(file_id)
+            self.db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            stats["removed"] += 1
+        self.db.commit()
+        return stats
+
+    def _delete_lines(self, file_id):
+        self.db.execute(
+            "DELETE FROM lines WHERE rowid BETWEEN ? AND ?",
+            (file_id << LINE_BITS, ((file_id + 1) << LINE_BITS) - 1)
+        )
+
+    def _index_file(self, file_id, path, stat, offset=0, first_line=1):
+        # Append-only files are indexed up to their last complete line, so a
+        # line being written is picked up whole by the next update
+        append_only = path.endswith(APPEND_ONLY_EXTENSIONS)
+        state = {"bytes": offset, "line": first_line - 1}
+
+        def rows(f):
+            for line in f:
+                if append_only and not line.endswith(b"\n"):
+                    break
+                state["bytes"] += len(line)
+                state["line"] += 1
+                text = line.decode("utf-8", "replace").rstrip()
+                if text:
+                    yield (file_id << LINE_BITS) | state["line"], text[:MAX_LINE_LENGTH]
+
+        with open(path, "rb") as f:
+            f.seek(offset)
+            self.db.executemany("INSERT INTO lines (rowid, text) VALUES (?, ?)", rows(f))
+        self.db.execute(
+            "UPDATE files SET size = ?, mtime_ns = ?, indexed_bytes = ?, line_count = ? WHERE id = ?",
+            (stat.st_size, stat.st_mtime_ns, state["bytes"], state["line"], file_id)
+        )
+
+    def search(self, query, limit=DEFAULT_LIMIT, challenge=None):
+        """
+        Finds the indexed lines matching a search.
+
+        Args:
+            query (str): The search (see `build_match_query`).
+            limit (int, optional): The maximum number of results.
+            challenge (str, optional): Only search this challenge.
+
+        Returns:
+            list: Dicts with the 'challenge', 'file', 'line' and 'text' of
+                every match, best matches first.
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+        rows = self.db.execute(
+            f"""
+            SELECT files.challenge, files.name, lines.rowid, lines.text
+            FROM lines JOIN files ON files.id = lines.rowid >> {LINE_BITS}
+            WHERE lines MATCH ? {"AND files.challenge = ?" if challenge else ""}
+            ORDER BY rank LIMIT ?
+            """,
+            (match, challenge, limit) if challenge else (match, limit)
+        )
+        return [
+            {"challenge": name, "file": file, "line": rowid & ((1 << LINE_BITS) - 1), "text": text}
+            for name, file, rowid, text in rows
+        ]
+
+def _scandir(path):
+    try:
+        with os.scandir(path) as entries:
+            return sorted(entries, key=lambda entry: entry.name)
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+def open_search_index():
+    """
+    Opens the search index configured in config/base.json.
+
+    Returns:
+        SearchIndex: The index.
+    """
+    return SearchIndex(load_config("base").get("search", {}).get("index", DEFAULT_INDEX_PATH))
+
+def run_search(query, challenge=None, limit=DEFAULT_LIMIT, update=True, base_directory=None):
+    """
+    Updates the search index and prints the lines matching a search across all challenges.
+
+    Args:
+        query (str): The search, e.g. 'apache 2.4.41 OR /backup'.
+        challenge (str, optional): Only search this challenge.
+        limit (int, optional): The maximum number of results.
+        update (bool, optional): Index changed files before searching.
+        base_directory (str, optional): The challenges directory. Defaults to
+            the configured base directory.
+
+    Returns:
+        list: The matches (see `SearchIndex.search`).
+    """
+    with open_search_index() as index:
+        if update:
+            started = time.perf_counter()
+            stats = index.update(base_directory or load_config("base")["base_directory"])
+            if stats["indexed"] or stats["appended"] or stats["removed"]:
+                print(
+                    f"Indexed {stats['indexed']} new or changed files, {stats['appended']} appended logs, "
+                    f"removed {stats['removed']} ({time.perf_counter() - started:.2f}s)."
+                )
+
+        started = time.perf_counter()
+        results = index.search(query, limit, challenge)
+        elapsed = time.perf_counter() - started
+
+    for result in results:
+        print(f"{result['challenge']}/{result['file']}:{result['line']}: {result['text']}")
+    print(f"{len(results)} matches in {elapsed * 1000:.1f} ms.")
+    return results
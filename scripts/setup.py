@@ -25,27 +25,43 @@ def create_challenge():
         if not challenge_name:
             raise ValueError("Challenge name cannot be empty.")
 
-        # Define the challenge directory path
-        challenge_path = os.path.join(base_path, challenge_name)
-
-        # Create the directory structure
-        check_and_create_directory(challenge_path)
-
-        # Create metadata file
-        metadata = {"name": challenge_name, "ip": "", "flags": []}
-        metadata_file = os.path.join(challenge_path, "metadata.json")
-        with open(metadata_file, "w") as f:
-            json.dump(metadata, f, indent=4)
+        challenge_path = create_challenge_directory(base_path, challenge_name)
 
         # Notify the user
         print(f"Challenge '{challenge_name}' created successfully at {challenge_path}.")
-        log_action(challenge_path, f"Challenge created: {metadata}")
 
         return [challenge_name, challenge_path]
     
     except Exception as e:
         print(f"Error creating challenge: {e}")
 
+def create_challenge_directory(base_path, challenge_name, ip=""):
+    """
+    Creates a challenge directory and its metadata file without prompting.
+
+    Args:
+        base_path (str): The directory challenges are stored in.
+        challenge_name (str): The name of the challenge.
+        ip (str, optional): The target IP address.
+
+    Returns:
+        str: The path to the challenge directory.
+    """
+    # Define the challenge directory path
+    challenge_path = os.path.join(base_path, challenge_name)
+
+    # Create the directory structure
+    check_and_create_directory(challenge_path)
+
+    # Create metadata file
+    metadata = {"name": challenge_name, "ip": ip, "flags": []}
+    metadata_file = os.path.join(challenge_path, "metadata.json")
+    with open(metadata_file, "w") as f:
+        json.dump(metadata, f, indent=4)
+
+    log_action(challenge_path, f"Challenge created: {metadata}")
+    return challenge_path
+
 def validate_challenge_directory(challenge_name):
     """
     Validates the existence of a challenge directory and its metadata.
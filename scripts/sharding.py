@@ -0,0 +1,631 @@
+import os
+import re
+import mmap
+import shlex
+import asyncio
+import hashlib
+from scripts.async_runner import stream_process
+from scripts.nmap_xml import iter_nmap_records, write_nmap_xml
+from scripts.rate_limiter import apply_rate_control
+from scripts.output_parsers import NMAP_PORT_LINE
+
+PORT_RANGE_FLAGS = ("-p-", "-p", "--top-ports", "-F")
+OUTPUT_OPTIONS = ("-oN", "-oX", "-oG", "-oA", "-oS")
+NMAP_HOST_LINE = re.compile(r"^Nmap scan report for (?P<host>.+)$")
+FEED_CHUNK_SIZE = 1024 * 1024
+RESUME_MARGIN = 1024 * 1024
+STATE_PRIORITY = {"open": 0, "open|filtered": 1, "filtered": 2, "unfiltered": 3, "closed|filtered": 4, "closed": 5}
+
+def split_port_range(shards, first=1, last=65535):
+    """
+    Splits a port range into contiguous, near-equal ranges.
+
+    Args:
+        shards (int): The number of ranges to produce.
+        first (int, optional): The first port of the range.
+        last (int, optional): The last port of the range.
+
+    Returns:
+        list: The port ranges as nmap '-p' values (e.g., '1-8192').
+    """
+    total = last - first + 1
+    shards = max(1, min(shards, total))
+    size, extra = divmod(total, shards)
+    ranges = []
+    start = first
+    for index in range(shards):
+        end = start + size - 1 + (1 if index < extra else 0)
+        ranges.append(f"{start}-{end}")
+        start = end + 1
+    return ranges
+
+def split_hosts(hosts, shards):
+    """
+    Splits a host list into near-equal groups.
+
+    Args:
+        hosts (list): The hosts to split.
+        shards (int): The number of groups to produce.
+
+    Returns:
+        list: The non-empty host groups.
+    """
+    shards = max(1, min(shards, len(hosts)))
+    return [hosts[index::shards] for index in range(shards)]
+
+def parse_targets(ip):
+    """
+    Splits a metadata 'ip' value into individual targets.
+
+    Args:
+        ip (str | list): One or more targets separated by whitespace or commas.
+
+    Returns:
+        list: The targets.
+    """
+    if isinstance(ip, list):
+        return [str(target) for target in ip if target]
+    return [target for target in re.split(r"[\s,]+", ip or "") if target]
+
+def _without_port_selection(tokens):
+    """Removes any port selection options from an nmap argument list."""
+    cleaned = []
+    skip = False
+    for token in tokens:
+        if skip:
+            skip = False
+            continue
+        if token in ("-p", "--top-ports"):
+            skip = True
+            continue
+        if token in PORT_RANGE_FLAGS or (token.startswith("-p") and not token.startswith("-P")):
+            continue
+        cleaned.append(token)
+    return cleaned
+
+def build_nmap_shards(tool_name, command, targets, shard_config, shard_dir, xml=False):
+    """
+    Builds one nmap command per shard of the port space or the host list.
+
+    Output options and placeholders in the preset command are replaced by the
+    shard's own '-oN' (and, with `xml`, '-oX') file in `shard_dir` and the
+    shard's targets.
+
+    Args:
+        tool_name (str): The tool executable (e.g., 'nmap').
+        command (str): The preset command.
+        targets (list): The targets of the scan.
+        shard_config (dict): The preset's shard settings.
+        shard_dir (str): The directory the shard outputs are written to.
+        xml (bool, optional): Also write an XML report per shard.
+
+    Returns:
+        list: Job dicts with the shard's target, concurrency key, argv, output
+        path and XML path. Host shards share one key, so `max_concurrency`
+        caps the whole scan rather than each host group.
+    """
+    count = int(shard_config.get("count", os.cpu_count() or 1))
+    tokens = _shard_base_tokens(command)
+
+    def job(target, key, name, selection, hosts):
+        path = os.path.join(shard_dir, f"{name}.txt")
+        xml_path = os.path.join(shard_dir, f"{name}.xml") if xml else None
+        outputs = ["-oN", path, *(["-oX", xml_path] if xml else [])]
+        return {
+            "target": target,
+            "limit_key": key,
+            "argv": [tool_name, *selection, *outputs, *hosts],
+            "output_path": path,
+            "xml_path": xml_path
+        }
+
+    tool = os.path.basename(tool_name)
+    if shard_config.get("by", "ports") == "hosts":
+        return [
+            job(" ".join(group), tool, f"{tool}.shard-{index}", tokens, group)
+            for index, group in enumerate(split_hosts(targets, count))
+        ]
+
+    tokens = _without_port_selection(tokens)
+    return [
+        job(target, target, f"{tool}.{target}.shard-{index}", [*tokens, "-p", ports], [target])
+        for target in targets
+        for index, ports in enumerate(split_port_range(count))
+    ]
+
+def _shard_base_tokens(command):
+    """Returns the preset's options without output files or placeholder targets."""
+    cleaned = []
+    skip = False
+    for token in shlex.split(command):
+        if skip:
+            skip = False
+            continue
+        if token in OUTPUT_OPTIONS:
+            skip = True
+            continue
+        if "{" in token:
+            continue
+        cleaned.append(token)
+    return cleaned
+
+async def run_shard_jobs(jobs, per_target_limit, handlers=None):
+    """
+    Runs shard commands concurrently, capping the shards running per target.
+
+    Args:
+        jobs (list): Job dicts with 'target', 'argv' and optional 'limit_key'
+            (the concurrency key, defaulting to 'target') and 'options' (extra
+            keyword arguments for `stream_process`).
+        per_target_limit (int): The maximum number of concurrent shards per target.
+        handlers (list, optional): Line handlers passed to every shard.
+
+    Returns:
+        list: The StreamResult (or raised exception) of each job, in order.
+    """
+    semaphores = {}
+
+    async def run(job):
+        semaphore = semaphores.setdefault(job.get("limit_key", job["target"]), asyncio.Semaphore(per_target_limit))
+        async with semaphore:
+            return await stream_process(job["argv"], handlers=handlers, **job.get("options", {}))
+
+    return await asyncio.gather(*(run(job) for job in jobs), return_exceptions=True)
+
+def merge_nmap_outputs(paths):
+    """
+    Merges nmap normal-output files into one deduplicated result per host.
+
+    When shards report the same port, the most informative state wins
+    (open over filtered over closed).
+
+    Args:
+        paths (list): The nmap output files to merge.
+
+    Returns:
+        dict: A mapping of host to a dict with its sorted 'ports' lines and
+            its deduplicated 'notes' (e.g., 'Service Info' lines).
+    """
+    hosts = {}
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        host = None
+        with open(path, "r", errors="replace") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                host_match = NMAP_HOST_LINE.match(line)
+                if host_match:
+                    host = hosts.setdefault(host_match["host"].strip(), {"ports": {}, "notes": []})
+                    continue
+                if host is None:
+                    continue
+                port_match = NMAP_PORT_LINE.match(line)
+                if port_match:
+                    key = (int(port_match["port"]), port_match["protocol"])
+                    current = host["ports"].get(key)
+                    if current is None or _state_rank(port_match["state"]) < _state_rank(current[0]):
+                        host["ports"][key] = (port_match["state"], line)
+                elif line.startswith(("Service Info:", "OS details:", "MAC Address:")) and line not in host["notes"]:
+                    host["notes"].append(line)
+
+    return {
+        name: {
+            "ports": [line for _, (_, line) in sorted(data["ports"].items())],
+            "notes": data["notes"]
+        }
+        for name, data in hosts.items()
+    }
+
+def _state_rank(state):
+    return STATE_PRIORITY.get(state, len(STATE_PRIORITY))
+
+def merge_nmap_xml_outputs(paths):
+    """
+    Merges nmap XML reports into one record per host and port.
+
+    The reports are streamed; only the merged records are kept in memory.
+    When shards report the same port, the most informative state wins.
+
+    Args:
+        paths (list): The XML reports to merge.
+
+    Returns:
+        list: Port records, grouped by host and sorted by port.
+    """
+    hosts = {}
+    for path in paths:
+        if not path or not os.path.exists(path):
+            continue
+        for record in iter_nmap_records(path):
+            ports = hosts.setdefault(record["host"], {})
+            key = (record["port"], record["protocol"])
+            current = ports.get(key)
+            if current is None or _state_rank(record["state"]) < _state_rank(current["state"]):
+                ports[key] = record
+    return [record for ports in hosts.values() for _, record in sorted(ports.items())]
+
+def write_merged_nmap_output(merged, output_path, shard_count):
+    """
+    Writes merged nmap results in nmap's normal output layout.
+
+    Args:
+        merged (dict): The result of `merge_nmap_outputs`.
+        output_path (str): The file to write.
+        shard_count (int): The number of shards that were merged.
+    """
+    with open(output_path, "w") as f:
+        f.write(f"# Merged nmap results from {shard_count} shards\n")
+        for host, data in merged.items():
+            f.write(f"\nNmap scan report for {host}\n")
+            if data["ports"]:
+                f.write("PORT      STATE SERVICE VERSION\n")
+                for line in data["ports"]:
+                    f.write(f"{line}\n")
+            for note in data["notes"]:
+                f.write(f"{note}\n")
+
+def run_sharded_nmap(tool_name, command, targets, shard_config, output_path, handlers=None, xml_output_path=None):
+    """
+    Runs a sharded nmap scan and merges the shards into `output_path` (and
+    their XML reports into `xml_output_path`).
+
+    Args:
+        tool_name (str): The tool executable (e.g., 'nmap').
+        command (str): The preset command.
+        targets (list): The targets of the scan.
+        shard_config (dict): The preset's shard settings ('by', 'count', 'max_concurrency').
+        output_path (str): The merged output file.
+        handlers (list, optional): Line handlers passed to every shard.
+        xml_output_path (str, optional): The merged XML report.
+
+    Returns:
+        tuple: The merged results and the list of shard results.
+    """
+    shard_dir = os.path.join(os.path.dirname(output_path), "shards")
+    os.makedirs(shard_dir, exist_ok=True)
+    jobs = build_nmap_shards(tool_name, command, targets, shard_config, shard_dir, xml=bool(xml_output_path))
+
+    per_target_limit = int(shard_config.get("max_concurrency", len(jobs)))
+    results = asyncio.run(run_shard_jobs(jobs, per_target_limit, handlers))
+
+    merged = merge_nmap_outputs([job["output_path"] for job in jobs])
+    write_merged_nmap_output(merged, output_path, len(jobs))
+    if xml_output_path:
+        write_nmap_xml(merge_nmap_xml_outputs([job["xml_path"] for job in jobs]), xml_output_path, command)
+    return merged, results
+
+def wordlist_byte_ranges(path, shards):
+    """
+    Splits a wordlist into byte ranges that start and end on line boundaries.
+
+    The file is memory-mapped to find the boundaries; nothing is copied.
+
+    Args:
+        path (str): The wordlist file.
+        shards (int): The number of ranges to produce.
+
+    Returns:
+        list: (start, end) byte offsets, end exclusive.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return [(0, 0)]
+
+    bounds = [0]
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as wordlist:
+        for index in range(1, max(1, shards)):
+            nominal = size * index // shards
+            if nominal <= bounds[-1]:
+                continue
+            newline = wordlist.find(b"\n", nominal - 1)
+            end = size if newline == -1 else newline + 1
+            if bounds[-1] < end < size:
+                bounds.append(end)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+def byte_range_feeder(path, start, end, chunk_size=FEED_CHUNK_SIZE, on_progress=None, limiter=None):
+    """
+    Creates a stdin feeder that streams one byte range of a file into a process.
+
+    With a rate limiter, lines are fed in small batches paced by the target
+    host's token bucket, so tools that read their wordlist from stdin as they
+    go send requests at the limiter's rate.
+
+    Args:
+        path (str): The wordlist file.
+        start (int): The first byte to send.
+        end (int): The byte offset to stop at (exclusive).
+        chunk_size (int, optional): The number of bytes written per chunk.
+        on_progress (callable, optional): Called with the offset fed so far
+            after each chunk is accepted by the process.
+        limiter (HostRateLimiter, optional): Paces the lines fed, one request per line.
+
+    Returns:
+        callable: A coroutine function for `stream_process(stdin_feeder=...)`.
+    """
+    async def feed(stdin):
+        if start >= end:
+            return
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as wordlist:
+            if limiter:
+                await _paced_feed(stdin, wordlist, start, end, on_progress, limiter)
+                return
+            for offset in range(start, end, chunk_size):
+                stdin.write(wordlist[offset:min(offset + chunk_size, end)])
+                await stdin.drain()
+                if on_progress:
+                    on_progress(min(offset + chunk_size, end))
+    return feed
+
+async def _paced_feed(stdin, wordlist, start, end, on_progress, limiter):
+    """Feeds a byte range in line batches sized to the limiter's rate."""
+    position = start
+    while position < end:
+        stop, count = position, 0
+        batch = limiter.batch_size()
+        while count < batch and stop < end:
+            newline = wordlist.find(b"\n", stop, end)
+            stop = end if newline == -1 else newline + 1
+            count += 1
+        await limiter.acquire_async(count)
+        stdin.write(wordlist[position:stop])
+        await stdin.drain()
+        position = stop
+        if on_progress:
+            on_progress(position)
+
+def write_byte_range(path, start, end, destination, chunk_size=FEED_CHUNK_SIZE):
+    """
+    Copies one byte range of a wordlist to its own file, for tools that read
+    their wordlist more than once and so cannot take it from a pipe.
+
+    Args:
+        path (str): The wordlist file.
+        start (int): The first byte to copy.
+        end (int): The byte offset to stop at (exclusive).
+        destination (str): The file the range is written to.
+        chunk_size (int, optional): The number of bytes copied at a time.
+    """
+    with open(path, "rb") as source, open(destination, "wb") as target:
+        source.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = source.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            target.write(chunk)
+            remaining -= len(chunk)
+
+def resume_offset(path, start, offset, margin):
+    """
+    Returns a safe line-aligned offset to resume a wordlist shard from.
+
+    Data fed to a tool may still have been buffered and unprocessed when it
+    stopped, so the resume point backs off by `margin` bytes.
+
+    Args:
+        path (str): The wordlist file.
+        start (int): The start of the shard's byte range.
+        offset (int): The last recorded feed offset.
+        margin (int): The number of bytes to back off.
+
+    Returns:
+        int: The offset of the first line to feed again.
+    """
+    position = max(start, offset - margin)
+    if position == start:
+        return start
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as wordlist:
+        newline = wordlist.find(b"\n", position - 1)
+    return offset if newline == -1 else min(newline + 1, offset)
+
+def fill_placeholders(tokens, values):
+    """
+    Substitutes '{name}' placeholders in command tokens.
+
+    Args:
+        tokens (list): The command tokens.
+        values (dict): The placeholder values.
+
+    Returns:
+        list: The tokens with known placeholders replaced.
+    """
+    filled = []
+    for token in tokens:
+        for name, value in values.items():
+            token = token.replace(f"{{{name}}}", str(value))
+        filled.append(token)
+    return filled
+
+def build_wordlist_shards(tool_name, command, values, shard_config, shard_dir, resume_offsets=None,
+                          on_progress=None, resume_margin=RESUME_MARGIN, limiter=None, rate_control=None):
+    """
+    Builds one command per byte range of the preset's wordlist.
+
+    The wordlist argument (`wordlist_flag`, '-w' by default) is replaced with
+    `stdin_path` and each worker is fed its byte range on stdin. With
+    `"wordlist_mode": "file"` (hydra, which counts its wordlist before reading
+    it again) each range is copied to a file in `shard_dir` instead. Workers
+    write their output to their own file in `shard_dir` and run in their own
+    directory there, so state files such as `hydra.restore` do not collide.
+
+    Args:
+        tool_name (str): The tool executable (e.g., 'gobuster').
+        command (str): The preset command.
+        values (dict): Placeholder values such as 'ip' and 'domain'.
+        shard_config (dict): The preset's shard settings.
+        shard_dir (str): The directory the shard outputs are written to.
+        resume_offsets (dict, optional): Shard index -> ((start, end), offset)
+            recorded by an interrupted run; matching shards continue from there.
+        on_progress (callable, optional): Called with the shard index, its byte
+            range and the offset fed so far.
+        resume_margin (int, optional): The bytes re-fed before a resume offset.
+        limiter (HostRateLimiter, optional): The target host's rate limiter.
+        rate_control (dict, optional): The tool's rate control settings. Tools
+            with 'stdin_streaming' are paced by feeding stdin at the limiter's
+            rate; other tools get their rate flag set to an equal share of it.
+
+    Returns:
+        list: Job dicts with the shard's target, argv, output path, wordlist
+            copy (in file mode) and stdin feeder.
+
+    Raises:
+        ValueError: If the command has no wordlist argument.
+    """
+    tokens = shlex.split(command)
+    flag = shard_config.get("wordlist_flag", "-w")
+    if flag not in tokens[:-1]:
+        raise ValueError(f"Preset command has no '{flag}' wordlist argument to shard.")
+    wordlist_index = tokens.index(flag) + 1
+    wordlist = os.path.expanduser(tokens[wordlist_index])
+    by_file = shard_config.get("wordlist_mode", "stdin") == "file"
+    tokens[wordlist_index] = shard_config.get("stdin_path", "/dev/stdin")
+    shard_dir = os.path.abspath(shard_dir)
+    name = os.path.basename(tool_name)
+
+    count = int(shard_config.get("count", os.cpu_count() or 1))
+    writes_own_output = any("{output_file}" in token for token in tokens)
+
+    ranges = wordlist_byte_ranges(wordlist, count)
+    paced = limiter if limiter and rate_control and rate_control.get("stdin_streaming") and not by_file else None
+    if limiter and rate_control and not paced:
+        concurrency = int(shard_config.get("max_concurrency", len(ranges)))
+        tokens = apply_rate_control(tokens, rate_control, limiter.rate / max(1, min(concurrency, len(ranges))))
+
+    resume_offsets = resume_offsets or {}
+    jobs = []
+    for index, (start, end) in enumerate(ranges):
+        feed_from = start
+        path = os.path.join(shard_dir, f"{name}.shard-{index}.txt")
+        if index in resume_offsets and resume_offsets[index][0] == (start, end):
+            feed_from = resume_offset(wordlist, start, resume_offsets[index][1], resume_margin)
+            path = _next_part_path(shard_dir, tool_name, index)
+        if feed_from >= end:
+            continue
+
+        shard_tokens = list(tokens)
+        working_directory = os.path.join(shard_dir, f"{name}.shard-{index}")
+        os.makedirs(working_directory, exist_ok=True)
+        options = {"cwd": working_directory}
+        if by_file:
+            shard_tokens[wordlist_index] = os.path.join(shard_dir, f"{name}.shard-{index}.wordlist")
+            write_byte_range(wordlist, feed_from, end, shard_tokens[wordlist_index])
+        else:
+            progress = (lambda offset, i=index, r=(start, end): on_progress(i, r, offset)) if on_progress else None
+            options["stdin_feeder"] = byte_range_feeder(wordlist, feed_from, end, on_progress=progress, limiter=paced)
+        argv = [tool_name, *fill_placeholders(shard_tokens, {**values, "output_file": path})]
+        if not writes_own_output:
+            options["output_path"] = path
+        jobs.append({
+            "target": values.get("ip", ""),
+            "argv": argv,
+            "output_path": path,
+            "wordlist_range": (start, end),
+            "wordlist_path": shard_tokens[wordlist_index] if by_file else None,
+            "resumed_from": feed_from if feed_from != start else None,
+            "options": options
+        })
+    return jobs
+
+def _next_part_path(shard_dir, tool_name, index):
+    """Returns an unused output path for a resumed shard, keeping earlier parts."""
+    name = os.path.basename(tool_name)
+    part = 1
+    while os.path.exists(os.path.join(shard_dir, f"{name}.shard-{index}.part-{part}.txt")):
+        part += 1
+    return os.path.join(shard_dir, f"{name}.shard-{index}.part-{part}.txt")
+
+def shard_output_paths(shard_dir, tool_name):
+    """
+    Returns every output file written by a tool's wordlist shards, in shard order.
+
+    Args:
+        shard_dir (str): The shard directory.
+        tool_name (str): The tool executable.
+
+    Returns:
+        list: The shard output files.
+    """
+    prefix = f"{os.path.basename(tool_name)}.shard-"
+    names = [name for name in os.listdir(shard_dir) if name.startswith(prefix) and name.endswith(".txt")]
+
+    def order(name):
+        index, _, part = name[len(prefix):-len(".txt")].partition(".part-")
+        return int(index) if index.isdigit() else 0, int(part) if part.isdigit() else 0
+
+    return [os.path.join(shard_dir, name) for name in sorted(names, key=order)]
+
+def merge_line_outputs(paths, output_path):
+    """
+    Concatenates shard output files, dropping blank and duplicate lines.
+
+    Only a short digest of each distinct line is kept in memory.
+
+    Args:
+        paths (list): The shard output files, in order.
+        output_path (str): The merged output file.
+
+    Returns:
+        int: The number of distinct lines written.
+    """
+    seen = set()
+    with open(output_path, "w") as merged:
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", errors="replace") as f:
+                for line in f:
+                    line = line.rstrip("\r\n")
+                    if not line.strip():
+                        continue
+                    digest = hashlib.blake2b(line.encode(), digest_size=8).digest()
+                    if digest in seen:
+                        continue
+                    seen.add(digest)
+                    merged.write(line + "\n")
+    return len(seen)
+
+def run_sharded_wordlist(tool_name, command, values, shard_config, output_path, handlers=None,
+                         resume_offsets=None, on_progress=None, limiter=None, rate_control=None):
+    """
+    Runs a preset as parallel workers over shards of its wordlist and merges
+    their outputs into `output_path`.
+
+    Args:
+        tool_name (str): The tool executable (e.g., 'gobuster').
+        command (str): The preset command.
+        values (dict): Placeholder values such as 'ip' and 'domain'.
+        shard_config (dict): The preset's shard settings ('count', 'max_concurrency',
+            'wordlist_flag', 'stdin_path').
+        output_path (str): The merged output file.
+        handlers (list, optional): Line handlers passed to every worker.
+        resume_offsets (dict, optional): Offsets of an interrupted run to resume
+            from; see `build_wordlist_shards`.
+        on_progress (callable, optional): Called with the shard index, its byte
+            range and the offset fed so far.
+        limiter (HostRateLimiter, optional): The target host's rate limiter.
+        rate_control (dict, optional): The tool's rate control settings.
+
+    Returns:
+        tuple: The number of distinct merged lines and the list of shard results.
+    """
+    shard_dir = os.path.join(os.path.dirname(output_path), "shards")
+    os.makedirs(shard_dir, exist_ok=True)
+    if not resume_offsets:
+        for path in shard_output_paths(shard_dir, tool_name):
+            os.remove(path)
+    jobs = build_wordlist_shards(
+        tool_name, command, values, shard_config, shard_dir, resume_offsets, on_progress,
+        limiter=limiter, rate_control=rate_control
+    )
+
+    per_target_limit = int(shard_config.get("max_concurrency", len(jobs) or 1))
+    results = asyncio.run(run_shard_jobs(jobs, per_target_limit, handlers))
+
+    lines = merge_line_outputs(shard_output_paths(shard_dir, tool_name), output_path)
+    for job in jobs:
+        if job["wordlist_path"]:
+            os.remove(job["wordlist_path"])
+    return lines, results
@@ -1,6 +1,7 @@
 import os
 import json
 import subprocess
+from scripts.metadata_store import get_metadata_store
 
 def load_config(config_name):
     config_path = os.path.join('config', f'{config_name}.json')
@@ -10,10 +11,12 @@ def load_config(config_name):
     except FileNotFoundError:
         config = {}
 
+    if isinstance(config, dict):
+        return config
+
     default_challenges_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 'challenges'))
     os.makedirs(default_challenges_path, exist_ok=True)
-
-    return config if isinstance(config, dict) else {"base_directory": default_challenges_path}
+    return {"base_directory": default_challenges_path}
 
 def check_and_create_directory(directory_path):
     """
@@ -40,6 +43,9 @@ def load_challenge_metadata(challenge_path):
     """
     Loads the metadata file for a specific challenge.
 
+    The metadata includes updates still waiting in the challenge's metadata
+    journal (see scripts/metadata_store.py).
+
     Args:
         challenge_path (str): The path to the challenge directory.
 
@@ -49,16 +55,14 @@ def load_challenge_metadata(challenge_path):
     Raises:
         FileNotFoundError: If the metadata file does not exist.
     """
-    metadata_file = os.path.join(challenge_path, "metadata.json")
-    if not os.path.exists(metadata_file):
-        raise FileNotFoundError("Metadata file not found in challenge directory.")
-    with open(metadata_file, "r") as f:
-        return json.load(f)
+    return get_metadata_store(challenge_path).load()
 
 def save_challenge_metadata(challenge_path, metadata):
     """
     Saves the metadata file for a specific challenge.
 
+    The file is replaced atomically, and pending journal updates are discarded.
+
     Args:
         challenge_path (str): The path to the challenge directory.
         metadata (dict): The metadata to save.
@@ -69,36 +73,35 @@ def save_challenge_metadata(challenge_path, metadata):
     Raises:
         Exception: If the metadata file cannot be written.
     """
-    metadata_file = os.path.join(challenge_path, "metadata.json")
-    with open(metadata_file, "w") as f:
-        json.dump(metadata, f, indent=4)
+    get_metadata_store(challenge_path).replace(metadata)
 
 def update_challenge_metadata(challenge_path, updates):
     """
     Updates the metadata file for a specific challenge with provided changes.
 
+    Lists are extended, dicts are updated and other values are replaced. The
+    update is appended to the challenge's metadata journal under a file lock,
+    so parallel tasks can record flags, ports or credentials without losing
+    each other's updates.
+
     Args:
         challenge_path (str): The path to the challenge directory.
         updates (dict): Key-value pairs to update in the metadata.
 
     Returns:
         None
-    """
-    metadata = load_challenge_metadata(challenge_path)
 
-    for key, value in updates.items():
-        if isinstance(value, list) and key in metadata:
-            metadata[key].extend(value)
-        elif isinstance(value, dict) and key in metadata:
-            metadata[key].update(value)
-        else:
-            metadata[key] = value
-
-    save_challenge_metadata(challenge_path, metadata)
+    Raises:
+        FileNotFoundError: If the metadata file does not exist.
+    """
+    get_metadata_store(challenge_path).update(updates)
 
 def search_vulnerabilities(service, version):
     """
-    Searches for vulnerabilities using the local vulnerability database (searchsploit).
+    Searches for vulnerabilities using the local vulnerability database.
+
+    Lookups use the indexed copy of exploit-db's CSV (see scripts/exploit_db.py)
+    and fall back to running searchsploit when it has not been imported.
 
     Args:
         service (str): The name of the service (e.g., 'http').
@@ -111,6 +114,21 @@ def search_vulnerabilities(service, version):
         Exception: If the search fails or no vulnerabilities are found.
     """
     try:
+        from scripts.exploit_db import get_exploit_db
+        database = get_exploit_db()
+        if database is not None:
+            vulnerabilities = [
+                {
+                    "name": exploit["description"],
+                    "summary": f"{exploit['type']} exploit for {exploit['platform']} ({exploit['date_published']}).",
+                    "link": exploit["link"]
+                }
+                for exploit in database.search(service, version)
+            ]
+            if not vulnerabilities:
+                raise Exception("No vulnerabilities found for the given query.")
+            return vulnerabilities
+
         query = f"{service} {version}"
         result = subprocess.run(
             ["searchsploit", query, "--json"],
@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import shlex
+import subprocess
+from scripts.utils import load_config
+from exceptions import VPNConnectionError, VPNTimeoutError
+
+DEFAULT_COMMAND = "sudo openvpn --config"
+DEFAULT_READY_TIMEOUT = 60
+READY_LINE = "Initialization Sequence Completed"
+FAILURE_LINES = ("AUTH_FAILED", "Exiting due to fatal error", "Options error", "Cannot open TUN/TAP")
+LOG_FILE = "openvpn.log"
+STATE_FILE = "vpn_session.json"
+POLL_INTERVAL = 0.05
+
+_sessions = {}
+
+class VPNSession:
+    """
+    A running openvpn process for one challenge.
+
+    openvpn writes its output straight to `openvpn.log`, so it never depends
+    on this process to drain a pipe and keeps running after the menu exits.
+    Readiness and fatal errors are detected by following the log from where
+    this session's output starts. The session's state is also written to
+    `vpn_session.json` so other processes (e.g., batch runs) can see whether
+    the tunnel is up.
+    """
+    def __init__(self, ovpn_file, challenge_path, command=DEFAULT_COMMAND):
+        self.ovpn_file = ovpn_file
+        self.challenge_path = challenge_path
+        self.argv = [*shlex.split(command), ovpn_file]
+        self.log_path = os.path.join(challenge_path, LOG_FILE)
+        self.state_path = os.path.join(challenge_path, STATE_FILE)
+        self.process = None
+        self.started = None
+        self.time_to_ready = None
+        self.failure = None
+        self._log_offset = 0
+        self._partial = b""
+
+    def start(self):
+        """
+        Starts openvpn with its output appended to the challenge's log file.
+
+        Returns:
+            VPNSession: The session.
+        """
+        with open(self.log_path, "ab") as log:
+            self._log_offset = log.tell()
+            self.started = time.perf_counter()
+            self.process = subprocess.Popen(
+                self.argv,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL
+            )
+        self._write_state()
+        return self
+
+    def _follow_log(self):
+        """Reads the log written since the last call and looks for the ready and failure lines."""
+        with open(self.log_path, "rb") as log:
+            log.seek(self._log_offset)
+            data = self._partial + log.read()
+            self._log_offset = log.tell()
+        *lines, self._partial = data.split(b"\n")
+        for line in lines:
+            line = line.decode(errors="replace").rstrip("\r")
+            if self.time_to_ready is None and READY_LINE in line:
+                self.time_to_ready = time.perf_counter() - self.started
+                self._write_state()
+            elif self.failure is None and any(marker in line for marker in FAILURE_LINES):
+                self.failure = line
+
+    def _write_state(self):
+        state = {
+            "pid": self.process.pid,
+            "config": self.ovpn_file,
+            "ready": self.is_ready,
+            "time_to_ready": self.time_to_ready,
+            "returncode": self.process.returncode,
+            "log": self.log_path
+        }
+        temporary = f"{self.state_path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(state, f, indent=4)
+        os.replace(temporary, self.state_path)
+
+    @property
+    def is_ready(self):
+        """Whether the tunnel is up and openvpn is still running."""
+        return self.time_to_ready is not None and self.process.poll() is None
+
+    def wait_ready(self, timeout=DEFAULT_READY_TIMEOUT):
+        """
+        Waits until openvpn reports that the tunnel is up.
+
+        Args:
+            timeout (float, optional): The number of seconds to wait.
+
+        Returns:
+            float: The time from starting openvpn to the tunnel being ready.
+
+        Raises:
+            VPNConnectionError: If openvpn reports a fatal error or exits first.
+            VPNTimeoutError: If the tunnel is not ready within `timeout`.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            exited = self.process.poll() is not None
+            self._follow_log()
+            if self.failure or exited:
+                self.stop()
+                reason = self.failure or f"openvpn exited with code {self.process.returncode}"
+                raise VPNConnectionError(f"{reason} (see {self.log_path})")
+            if self.time_to_ready is not None:
+                return self.time_to_ready
+            if time.monotonic() >= deadline:
+                self.stop()
+                raise VPNTimeoutError(timeout)
+            time.sleep(POLL_INTERVAL)
+
+    def stop(self, timeout=5):
+        """
+        Stops openvpn.
+
+        Args:
+            timeout (float, optional): The number of seconds to wait before killing it.
+        """
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self.process:
+            self._write_state()
+
+def start_session(ovpn_file, challenge_path, command=DEFAULT_COMMAND):
+    """
+    Starts a VPN session for a challenge, replacing any earlier one.
+
+    Args:
+        ovpn_file (str): The openvpn configuration.
+        challenge_path (str): The path to the challenge directory.
+        command (str, optional): The openvpn command the config path is appended to.
+
+    Returns:
+        VPNSession: The running session.
+    """
+    previous = _sessions.pop(challenge_path, None)
+    if previous:
+        previous.stop()
+    session = VPNSession(ovpn_file, challenge_path, command).start()
+    _sessions[challenge_path] = session
+    return session
+
+def _session_alive(state):
+    """Whether the openvpn process recorded in a state file is still running."""
+    if state.get("returncode") is not None or not state.get("pid"):
+        return False
+    try:
+        os.kill(state["pid"], 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    # After a reboot the pid may belong to an unrelated process
+    try:
+        with open(f"/proc/{state['pid']}/cmdline", "rb") as f:
+            return state.get("config", "").encode() in f.read()
+    except OSError:
+        return True
+
+def wait_for_vpn(challenge_path, timeout=DEFAULT_READY_TIMEOUT):
+    """
+    Waits for the challenge's VPN session to be ready.
+
+    The session started by this process is waited on directly. Otherwise the
+    state file written by the process that owns the session is polled. A state
+    file left behind by an openvpn that is no longer running (e.g., after a
+    reboot) is treated as no session, with a warning.
+
+    Args:
+        challenge_path (str): The path to the challenge directory.
+        timeout (float, optional): The number of seconds to wait.
+
+    Returns:
+        float: The session's time-to-ready, or None if no running session was
+            started for the challenge.
+
+    Raises:
+        VPNConnectionError: If the session started by this process failed or exited.
+        VPNTimeoutError: If the tunnel is not ready within `timeout`.
+    """
+    session = _sessions.get(challenge_path)
+    if session:
+        return session.wait_ready(timeout)
+
+    state_path = os.path.join(challenge_path, STATE_FILE)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with open(state_path, "r") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except json.JSONDecodeError:
+            state = {}
+
+        if state and not _session_alive(state):
+            print(f"[WARNING] The VPN session in {state_path} is no longer running; continuing without waiting for it.")
+            return None
+        if state.get("ready"):
+            return state.get("time_to_ready")
+        if time.monotonic() >= deadline:
+            raise VPNTimeoutError(timeout)
+        time.sleep(0.1)
+
+def vpn_settings():
+    """
+    Returns the VPN command and readiness timeout from config/base.json.
+
+    Returns:
+        tuple: The openvpn command and the timeout in seconds.
+    """
+    settings = load_config("base").get("vpn", {})
+    return settings.get("command", DEFAULT_COMMAND), float(settings.get("ready_timeout", DEFAULT_READY_TIMEOUT))
@@ -0,0 +1,78 @@
+import sys
+import time
+import asyncio
+import pytest
+from scripts.async_runner import run_streaming, stream_process, supervise
+from scripts.output_parsers import parse_gobuster_line, parse_hydra_line
+
+def python_command(code):
+    """Builds an argv that runs a snippet of Python code."""
+    return [sys.executable, "-c", code]
+
+def test_run_streaming_writes_output_and_calls_handlers(tmp_path):
+    """Tests that every line reaches the output file and the handlers."""
+    output_file = tmp_path / "gobuster.txt"
+    seen = []
+    code = "import sys\nprint('/admin (Status: 301) [Size: 10]')\nprint('oops', file=sys.stderr)"
+
+    result = run_streaming(python_command(code), str(output_file), [lambda stream, line: seen.append((stream, line))])
+
+    assert result.succeeded
+    assert result.lines == {"stdout": 1, "stderr": 1}
+    assert ("stdout", "/admin (Status: 301) [Size: 10]") in seen
+    assert ("stderr", "oops") in seen
+    assert "/admin (Status: 301)" in output_file.read_text()
+
+def test_run_streaming_keeps_bounded_tail(tmp_path):
+    """Tests that only the configured number of lines is kept in memory."""
+    code = "for i in range(5000): print(i)"
+    result = run_streaming(python_command(code), str(tmp_path / "out.txt"), tail_lines=10)
+
+    assert result.lines["stdout"] == 5000
+    assert list(result.tail) == [str(i) for i in range(4990, 5000)]
+    assert len((tmp_path / "out.txt").read_text().splitlines()) == 5000
+
+def test_run_streaming_truncates_long_lines(tmp_path):
+    """Tests that a single huge line is truncated instead of buffered."""
+    code = "print('x' * 500000)\nprint('after')"
+    result = run_streaming(python_command(code), None, max_line_length=1000)
+
+    assert list(result.tail) == ["x" * 1000, "after"]
+
+def test_handlers_receive_lines_before_exit():
+    """Tests that output is dispatched while the process is still running."""
+    code = "import time\nprint('first', flush=True)\ntime.sleep(1)\nprint('second')"
+    seen = []
+
+    def handler(stream, line):
+        seen.append((line, time.perf_counter()))
+
+    started = time.perf_counter()
+    run_streaming(python_command(code), None, [handler])
+
+    assert seen[0][0] == "first"
+    assert seen[0][1] - started < 0.9
+
+def test_supervise_runs_processes_concurrently():
+    """Tests that one event loop supervises many processes at once."""
+    jobs = [{"argv": python_command("import time; time.sleep(0.5)")} for _ in range(10)]
+
+    started = time.perf_counter()
+    results = asyncio.run(supervise(jobs, limit=10))
+
+    assert all(r.succeeded for r in results)
+    assert time.perf_counter() - started < 3
+
+def test_stream_process_missing_executable():
+    """Tests that a missing tool raises FileNotFoundError."""
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(stream_process(["definitely-not-a-real-tool"]))
+
+def test_line_parsers():
+    """Tests the gobuster and hydra result parsers."""
+    assert parse_gobuster_line("/backup               (Status: 200) [Size: 1234]")["path"] == "/backup"
+    assert parse_gobuster_line("Progress: 100 / 2000") is None
+
+    record = parse_hydra_line("[22][ssh] host: 10.10.10.5   login: admin   password: hunter2")
+    assert record["login"] == "admin"
+    assert record["password"] == "hunter2"
@@ -0,0 +1,73 @@
+import json
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from scripts.batch import expand_targets, build_batch_tasks, run_batch
+
+@pytest.fixture
+def scenario_dir(tmp_path, monkeypatch):
+    """Creates a scenario with a dependency in a temporary working directory."""
+    (tmp_path / "scenarios").mkdir()
+    scenario = {
+        "name": "Mini Recon",
+        "description": "Two dependent tasks.",
+        "tasks": [
+            {"name": "Scan", "command": "nmap quick-scan"},
+            {"name": "Exploits", "command": "searchsploit exploit-search", "depends_on": ["Scan"]}
+        ]
+    }
+    (tmp_path / "scenarios" / "mini.json").write_text(json.dumps(scenario))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def test_expand_targets_from_cidr_and_file(tmp_path):
+    """Tests that CIDR ranges, files and duplicates are expanded correctly."""
+    assert expand_targets("10.0.0.0/30,10.0.0.1,example.com") == ["10.0.0.1", "10.0.0.2", "example.com"]
+
+    target_file = tmp_path / "targets.txt"
+    target_file.write_text("# lab hosts\n192.168.1.5\n\n192.168.1.8/32  # gateway\n")
+    assert expand_targets(str(target_file)) == ["192.168.1.5", "192.168.1.8"]
+
+def test_build_batch_tasks_scopes_dependencies_per_target():
+    """Tests that dependencies refer to tasks of the same target."""
+    scenario = {"tasks": [{"name": "Scan", "command": "nmap quick-scan"},
+                          {"name": "Exploits", "command": "searchsploit x", "depends_on": "Scan"}]}
+    tasks = build_batch_tasks(scenario, {"10.0.0.1": "/c/1", "10.0.0.2": "/c/2"})
+
+    assert len(tasks) == 4
+    assert tasks[3]["depends_on"] == ["10.0.0.2 :: Scan"]
+    assert tasks[3]["challenge_path"] == "/c/2"
+
+def test_run_batch_enforces_limits_and_writes_summary(scenario_dir):
+    """Tests a batch over a CIDR range with global and per-target limits."""
+    lock = threading.Lock()
+    running = {"all": 0, "peak": 0, "targets": {}, "target_peak": 0}
+
+    def runner(tool, preset, challenge_path):
+        with lock:
+            running["all"] += 1
+            running["peak"] = max(running["peak"], running["all"])
+            count = running["targets"].get(challenge_path, 0) + 1
+            running["targets"][challenge_path] = count
+            running["target_peak"] = max(running["target_peak"], count)
+        time.sleep(0.02)
+        with lock:
+            running["all"] -= 1
+            running["targets"][challenge_path] -= 1
+
+    base_path = scenario_dir / "challenges"
+    report = run_batch(
+        "mini", "10.0.0.0/29", prefix="lab", max_workers=3, per_target_limit=1,
+        base_path=str(base_path), runner=runner, executor_factory=ThreadPoolExecutor
+    )
+
+    assert report["targets"] == 6
+    assert report["statuses"] == {"completed": 12}
+    assert running["peak"] <= 3
+    assert running["target_peak"] == 1
+    metadata = json.loads((base_path / "lab-10-0-0-1" / "metadata.json").read_text())
+    assert metadata["ip"] == "10.0.0.1"
+    summaries = list(base_path.glob("lab-summary-*.json"))
+    assert len(summaries) == 1
+    assert json.loads(summaries[0].read_text())["tasks_per_minute"] > 0
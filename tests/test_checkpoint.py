@@ -0,0 +1,131 @@
+import sys
+import json
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from scripts.checkpoint import CheckpointJournal
+from scripts.scheduler import run_task_graph
+from scripts.sharding import build_wordlist_shards
+
+@pytest.fixture
+def journal(tmp_path):
+    """Creates a checkpoint journal in a temporary challenge directory."""
+    return CheckpointJournal(str(tmp_path / "Challenge"))
+
+def test_state_tracks_completed_and_interrupted_tasks(journal):
+    """Tests that replaying the journal finds finished and unfinished tasks."""
+    journal.record("scenario_start", scenario="Recon")
+    journal.record("task_start", scenario="Recon", task="Nmap")
+    journal.record("task_start", scenario="Recon", task="Gobuster")
+    journal.record("task_complete", scenario="Recon", task="Nmap", duration=3.5, output="abc")
+    journal.record("task_start", scenario="Other", task="Hydra")
+
+    state = journal.state("Recon")
+
+    assert state["completed"] == {"Nmap": 3.5}
+    assert state["interrupted"] == ["Gobuster"]
+
+def test_state_resets_on_fresh_scenario_start(journal):
+    """Tests that a fresh run forgets the tasks of the previous run."""
+    journal.record("scenario_start", scenario="Recon")
+    journal.record("task_start", scenario="Recon", task="Nmap")
+    journal.record("task_complete", scenario="Recon", task="Nmap", duration=1.0)
+    journal.record("scenario_start", scenario="Recon")
+
+    assert journal.state("Recon") == {"completed": {}, "interrupted": []}
+
+def test_events_skip_torn_lines(journal):
+    """Tests that a partially written final record is ignored."""
+    journal.record("scenario_start", scenario="Recon")
+    with open(journal.path, "a") as f:
+        f.write('{"event": "task_st')
+
+    assert [event["event"] for event in journal.events()] == ["scenario_start"]
+
+def test_wordlist_offsets_are_cleared_by_completion(journal):
+    """Tests that recorded shard offsets only survive an unfinished run."""
+    journal.record_progress("gobuster", "directory-enum", 0, (0, 100), 60, force=True)
+    assert journal.wordlist_offsets("gobuster", "directory-enum") == {0: ((0, 100), 60)}
+
+    journal.record("tool_complete", tool="gobuster", preset="directory-enum")
+    assert journal.wordlist_offsets("gobuster", "directory-enum") == {}
+
+def test_run_task_graph_skips_completed_tasks():
+    """Tests that tasks completed by an earlier run are not executed again."""
+    tasks = [
+        {"name": "Nmap", "command": "nmap quick-scan"},
+        {"name": "Exploits", "command": "searchsploit exploit-search", "depends_on": ["Nmap"]}
+    ]
+    executed = []
+
+    summary = run_task_graph(
+        tasks, lambda tool, preset: executed.append(tool), lambda task: tuple(task["command"].split()),
+        executor_factory=ThreadPoolExecutor, completed={"Nmap": 2.0}
+    )
+
+    assert executed == ["searchsploit"]
+    assert summary["critical_path"] == ["Nmap", "Exploits"]
+
+def test_wordlist_shards_resume_from_recorded_offset(tmp_path):
+    """Tests that a resumed shard starts at the first line after its offset."""
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("".join(f"word{i:03}\n" for i in range(100)))
+    ranges = {0: ((0, 400), 200)}
+
+    jobs = build_wordlist_shards(
+        "gobuster", f"dir -w {wordlist} -o {{output_file}}", {}, {"count": 2}, str(tmp_path),
+        resume_offsets=ranges, resume_margin=15
+    )
+
+    assert jobs[0]["resumed_from"] == 192
+    assert jobs[0]["output_path"].endswith("gobuster.shard-0.part-1.txt")
+    assert jobs[1]["resumed_from"] is None
+
+def test_run_tool_resumes_from_restore_file(tmp_path, monkeypatch):
+    """Tests that tools with restore support are restarted from their restore file."""
+    from scripts.run_tool import run_tool
+    from scripts.preset_registry import PresetRegistry
+
+    stub = tmp_path / "hydra"
+    stub.write_text(f"#!{sys.executable}\nimport sys, os\nprint(' '.join(sys.argv[1:]), os.path.exists('hydra.restore'))\n")
+    stub.chmod(0o755)
+    challenge_path = tmp_path / "Challenge"
+    challenge_path.mkdir()
+    (challenge_path / "hydra.restore").write_text("state")
+    config = {
+        "output_file": "hydra.txt",
+        "resume": {"restore_file": "hydra.restore", "command": "-R"},
+        "presets": [{"name": "ssh", "description": "SSH brute force.", "command": "-l admin -P words.txt ssh://host"}]
+    }
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "hydra.json").write_text(json.dumps(config))
+    monkeypatch.setattr("scripts.run_tool.get_registry", lambda: PresetRegistry(str(tmp_path / "config")))
+
+    run_tool(str(stub), "ssh", str(challenge_path), use_cache=False, resume=True)
+
+    assert (challenge_path / "hydra.txt").read_text() == "-R True\n"
+
+def test_failed_tool_runs_are_not_journaled_as_complete(tmp_path, monkeypatch):
+    """Tests that a task whose tool fails is run again on resume instead of being skipped for good."""
+    from scripts import scenarios
+
+    scenario = {
+        "name": "Recon",
+        "description": "A task whose tool does not exist.",
+        "tasks": [
+            {"name": "Broken", "command": "no-such-tool quick"},
+            {"name": "After", "command": "no-such-tool quick", "depends_on": ["Broken"]}
+        ]
+    }
+    monkeypatch.setattr(scenarios, "load_scenario", lambda name: scenario)
+    challenge_path = str(tmp_path / "Challenge")
+
+    summary = scenarios.run_scenario("recon", challenge_path)
+    assert summary["results"]["Broken"]["status"] == "failed"
+    assert summary["results"]["After"]["status"] == "skipped"
+
+    journal = CheckpointJournal(challenge_path)
+    assert journal.state("Recon")["completed"] == {}
+    assert [event["event"] for event in journal.events() if event.get("task") == "Broken"] == ["task_start", "task_failed"]
+
+    summary = scenarios.run_scenario("recon", challenge_path, resume=True)
+    assert summary["results"]["Broken"]["status"] == "failed"
@@ -0,0 +1,223 @@
+import sys
+import json
+import time
+import threading
+import pytest
+import scripts.exploit_db as exploit_db
+from scripts.exploit_db import ExploitDatabase
+from scripts.exploit_correlation import ExploitCorrelator, lookup_exploits, normalise_service, EXPLOIT_SOURCE
+from scripts.findings import FindingsStore, ingest_output
+from scripts.output_parsers import parse_nmap_line, split_service_version
+
+def port(host, number, product, version, state="open"):
+    return {"type": "port", "host": host, "port": number, "protocol": "tcp", "state": state,
+            "service": None, "product": product, "version": version, "extrainfo": None}
+
+class SlowLookup:
+    """A batch lookup that takes `delay` seconds and records its batches."""
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, services, workers=None):
+        with self.lock:
+            self.calls.append(list(services))
+        time.sleep(self.delay)
+        return {
+            (product, version): [{"title": f"{product} {version} - Remote Code Execution", "path": f"exploits/{product.lower()}.py"}]
+            for product, version in services
+        }
+
+@pytest.fixture
+def store(tmp_path):
+    findings = FindingsStore(str(tmp_path))
+    yield findings
+    findings.close()
+
+def test_normalise_service():
+    """Tests that nmap's product and version become exploit title terms."""
+    assert normalise_service(port(None, 80, "Apache httpd", "2.4.41")) == ("Apache", "2.4.41")
+    assert normalise_service(port(None, 22, "OpenSSH", "7.2p2 Ubuntu 4ubuntu2.10")) == ("OpenSSH", "7.2p2")
+    assert normalise_service(port(None, 139, "Samba smbd", "3.0.20-Debian")) == ("Samba", "3.0.20")
+    assert normalise_service(port(None, 3306, "MySQL", "5.7.33-0ubuntu0.18.04.1")) == ("MySQL", "5.7.33")
+    assert normalise_service(port(None, 139, "Samba smbd", "3.X - 4.X")) is None
+    assert normalise_service(port(None, 80, None, "1.0")) is None
+
+def test_nmap_line_parser():
+    """Tests that ports stream out of nmap's normal output with XML-like fields."""
+    assert parse_nmap_line("22/tcp open  ssh     OpenSSH 7.2p2 Ubuntu 4ubuntu2.10 (Ubuntu Linux; protocol 2.0)") == {
+        "type": "port", "port": 22, "protocol": "tcp", "state": "open", "service": "ssh",
+        "product": "OpenSSH", "version": "7.2p2 Ubuntu 4ubuntu2.10", "extrainfo": "Ubuntu Linux; protocol 2.0"
+    }
+    assert split_service_version("Apache httpd 2.4.41 ((Ubuntu))") == ("Apache httpd", "2.4.41", "(Ubuntu)")
+    assert split_service_version("") == (None, None, None)
+    assert parse_nmap_line("445/tcp filtered microsoft-ds")["product"] is None
+    assert parse_nmap_line("Nmap scan report for 10.0.0.1") is None
+
+def test_lookups_are_deduplicated_across_hosts(store):
+    """Tests that a service running on many hosts is looked up once and linked to every port."""
+    lookup = SlowLookup()
+    correlator = ExploitCorrelator(store, lookup)
+    for host in ("10.0.0.1", "10.0.0.2", "10.0.0.3"):
+        correlator.submit(port(host, 21, "vsftpd", "2.3.4"))
+        correlator.submit(port(host, 21, "vsftpd", "2.3.4"))
+    correlator.submit(port("10.0.0.1", 22, "OpenSSH", "7.2p2 Ubuntu"))
+    correlator.submit(port("10.0.0.1", 23, "OpenSSH", "7.2p2 Debian"))
+    correlator.submit(port("10.0.0.1", 80, "Apache httpd", "2.4.41", state="filtered"))
+    correlator.submit({"type": "web_path", "path": "/admin"}, "10.0.0.1")
+    stats = correlator.close()
+
+    assert sorted(sum(lookup.calls, [])) == [("OpenSSH", "7.2p2"), ("vsftpd", "2.3.4")]
+    assert stats["services"] == 5
+    assert stats["lookups"] == 2
+    assert stats["exploits"] == 5
+    assert stats["errors"] == 0
+    exploits = store.exploits()
+    assert sorted((exploit["host"], exploit["port"]) for exploit in exploits) == [
+        ("10.0.0.1", 21), ("10.0.0.1", 22), ("10.0.0.1", 23), ("10.0.0.2", 21), ("10.0.0.3", 21)
+    ]
+    assert {exploit["source"] for exploit in exploits} == {EXPLOIT_SOURCE}
+
+def test_lookups_are_batched_while_records_stream(store):
+    """Tests that services found during a slow lookup are resolved together by the next batch."""
+    lookup = SlowLookup(delay=0.2)
+    correlator = ExploitCorrelator(store, lookup, workers=4)
+    started = time.perf_counter()
+    for number, product in enumerate(("vsftpd", "OpenSSH", "ProFTPD", "nginx")):
+        correlator.submit(port("10.0.0.1", 20 + number, product, "1.2.3"))
+    submitted = time.perf_counter() - started
+    stats = correlator.close()
+    elapsed = time.perf_counter() - started
+
+    assert submitted < 0.1
+    assert elapsed < 4 * 0.2 * 0.75
+    assert lookup.calls == [[("vsftpd", "1.2.3")], [("OpenSSH", "1.2.3"), ("ProFTPD", "1.2.3"), ("nginx", "1.2.3")]]
+    assert stats["batches"] == 2
+    assert store.counts()["exploits"] == 4
+
+def test_failed_lookups_are_counted(store):
+    """Tests that a failing lookup does not stop the others."""
+    def lookup(services, workers=None):
+        if ("nginx", "1.18.0") in services:
+            raise OSError("searchsploit crashed")
+        return {service: [{"title": "vsftpd 2.3.4 - Backdoor", "path": "exploits/unix/remote/49757.py"}] for service in services}
+
+    correlator = ExploitCorrelator(store, lookup)
+    correlator.submit(port("10.0.0.1", 80, "nginx", "1.18.0"))
+    correlator.submit(port("10.0.0.1", 21, "vsftpd", "2.3.4"))
+    assert correlator.close()["errors"] == 1
+    assert [exploit["port"] for exploit in store.exploits()] == [21]
+
+def test_batches_are_one_database_query(tmp_path, monkeypatch):
+    """Tests that a batch of services is resolved with a single search of the exploit database."""
+    exploits_csv = tmp_path / "files_exploits.csv"
+    exploits_csv.write_text(
+        "id,file,description,date_published,author,type,platform,port\n"
+        "49757,exploits/unix/remote/49757.py,vsftpd 2.3.4 - Backdoor Command Execution,2021-04-12,HerculesRD,remote,unix,21\n"
+        "40136,exploits/linux/remote/40136.py,OpenSSH 7.2p2 - Username Enumeration,2016-07-18,Eddie Harari,remote,linux,22\n"
+    )
+    database = ExploitDatabase(str(tmp_path / "exploits.db"))
+    database.import_csv(str(exploits_csv))
+    monkeypatch.setattr(exploit_db, "_database", database)
+    queries = []
+    search_many = database.search_many
+    monkeypatch.setattr(database, "search_many", lambda services: queries.append(services) or search_many(services))
+
+    found = lookup_exploits([("vsftpd", "2.3.4"), ("OpenSSH", "7.2p2"), ("nginx", "1.18.0")])
+    database.close()
+
+    assert len(queries) == 1
+    assert found == {
+        ("vsftpd", "2.3.4"): [{"title": "vsftpd 2.3.4 - Backdoor Command Execution", "path": "exploits/unix/remote/49757.py"}],
+        ("OpenSSH", "7.2p2"): [{"title": "OpenSSH 7.2p2 - Username Enumeration", "path": "exploits/linux/remote/40136.py"}],
+        ("nginx", "1.18.0"): []
+    }
+
+def test_ingested_xml_is_correlated(store, tmp_path):
+    """Tests that records from an nmap XML report are correlated as they are stored."""
+    xml = tmp_path / "nmap.xml"
+    xml.write_text('<nmaprun><host><address addr="10.0.0.9" addrtype="ipv4"/><ports>'
+                   '<port protocol="tcp" portid="21"><state state="open"/>'
+                   '<service name="ftp" product="vsftpd" version="2.3.4"/></port>'
+                   '</ports></host></nmaprun>')
+    correlator = ExploitCorrelator(store, SlowLookup())
+    assert ingest_output(store, "nmap", xml_path=str(xml), on_record=correlator.submit) == 1
+    correlator.close()
+    assert [(exploit["host"], exploit["port"]) for exploit in store.exploits()] == [("10.0.0.9", 21)]
+    assert store.db.execute("SELECT source FROM ports").fetchall()[0][0] == "nmap"
+
+def test_run_tool_builds_the_shortlist_during_the_scan(tmp_path, monkeypatch):
+    """Tests that an nmap run leaves the matched exploits in the challenge's findings."""
+    from scripts.run_tool import run_tool
+    from scripts.preset_registry import PresetRegistry
+
+    exploits_csv = tmp_path / "files_exploits.csv"
+    exploits_csv.write_text(
+        "id,file,description,date_published,author,type,platform,port\n"
+        "49757,exploits/unix/remote/49757.py,vsftpd 2.3.4 - Backdoor Command Execution,2021-04-12,HerculesRD,remote,unix,21\n"
+        "40136,exploits/linux/remote/40136.py,OpenSSH 7.2p2 - Username Enumeration,2016-07-18,Eddie Harari,remote,linux,22\n"
+    )
+    database = ExploitDatabase(str(tmp_path / "exploits.db"))
+    database.import_csv(str(exploits_csv))
+    monkeypatch.setattr(exploit_db, "_database", database)
+
+    stub = tmp_path / "nmap"
+    stub.write_text(f"""#!{sys.executable}
+import time
+print("Nmap scan report for 10.0.0.1", flush=True)
+print("21/tcp open  ftp     vsftpd 2.3.4", flush=True)
+print("22/tcp open  ssh     OpenSSH 7.2p2 Ubuntu 4ubuntu2.10 (Ubuntu Linux; protocol 2.0)", flush=True)
+time.sleep(0.3)
+print("80/tcp open  http    Apache httpd 2.4.41 ((Ubuntu))", flush=True)
+""")
+    stub.chmod(0o755)
+    challenge_path = tmp_path / "Challenge"
+    challenge_path.mkdir()
+    (challenge_path / "metadata.json").write_text(json.dumps({"name": "Challenge", "ip": "10.0.0.1"}))
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "nmap.json").write_text(json.dumps({
+        "output_file": "nmap.txt",
+        "presets": [{"name": "versions", "description": "Service versions.", "command": "-sV {ip}"}]
+    }))
+    monkeypatch.setattr("scripts.run_tool.get_registry", lambda: PresetRegistry(str(tmp_path / "config")))
+
+    run_tool(str(stub), "versions", str(challenge_path), use_cache=False)
+    database.close()
+
+    with FindingsStore(str(challenge_path)) as findings:
+        assert [(exploit["port"], exploit["title"]) for exploit in findings.exploits()] == [
+            (21, "vsftpd 2.3.4 - Backdoor Command Execution"), (22, "OpenSSH 7.2p2 - Username Enumeration")
+        ]
+        assert [port["product"] for port in findings.ports()] == ["vsftpd", "OpenSSH", "Apache httpd"]
+
+def test_multi_host_scans_attribute_records_to_each_host(tmp_path, monkeypatch):
+    """Tests that a scan of a range stores each port and its exploits under the host nmap reported it for."""
+    from scripts.run_tool import run_tool
+    from scripts.preset_registry import PresetRegistry
+
+    monkeypatch.setattr("scripts.run_tool.open_correlator", lambda store: ExploitCorrelator(store, lookup=SlowLookup()))
+    stub = tmp_path / "nmap"
+    stub.write_text(f"""#!{sys.executable}
+print("Nmap scan report for 10.0.0.1")
+print("22/tcp open  ssh     OpenSSH 7.2p2")
+print("Nmap scan report for ftp.lab (10.0.0.2)")
+print("21/tcp open  ftp     vsftpd 2.3.4")
+""")
+    stub.chmod(0o755)
+    challenge_path = tmp_path / "Challenge"
+    challenge_path.mkdir()
+    (challenge_path / "metadata.json").write_text(json.dumps({"name": "Challenge", "ip": "10.0.0.0/30"}))
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "nmap.json").write_text(json.dumps({
+        "output_file": "nmap.txt",
+        "presets": [{"name": "versions", "description": "Service versions.", "command": "-sV {ip}"}]
+    }))
+    monkeypatch.setattr("scripts.run_tool.get_registry", lambda: PresetRegistry(str(tmp_path / "config")))
+
+    run_tool(str(stub), "versions", str(challenge_path), use_cache=False)
+
+    with FindingsStore(str(challenge_path)) as findings:
+        assert [(port["host"], port["port"]) for port in findings.ports()] == [("10.0.0.1", 22), ("10.0.0.2", 21)]
+        assert sorted((exploit["host"], exploit["port"]) for exploit in findings.exploits()) == [("10.0.0.1", 22), ("10.0.0.2", 21)]
+        assert [host["address"] for host in findings.hosts()] == ["10.0.0.1", "10.0.0.2"]
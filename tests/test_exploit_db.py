@@ -0,0 +1,133 @@
+import os
+import csv
+import sys
+import time
+import pytest
+import scripts.exploit_db as exploit_db
+from scripts.exploit_db import ExploitDatabase, service_query
+from scripts.utils import search_vulnerabilities
+
+HEADER = ["id", "file", "description", "date_published", "author", "type", "platform", "port",
+          "date_added", "date_updated", "verified", "codes", "tags", "aliases", "screenshot_url",
+          "application_url", "source_url"]
+KNOWN = [
+    (49757, "exploits/unix/remote/49757.py", "vsftpd 2.3.4 - Backdoor Command Execution", "remote", "unix", "21"),
+    (50383, "exploits/multiple/webapps/50383.sh", "Apache HTTP Server 2.4.49 - Path Traversal & Remote Code Execution (RCE)", "webapps", "multiple", "80"),
+    (40136, "exploits/linux/remote/40136.py", "OpenSSH 7.2p2 - Username Enumeration", "remote", "linux", "22"),
+    (16320, "exploits/unix/remote/16320.rb", "Samba 3.0.20 < 3.0.25rc3 - 'Username' map script' Command Execution (Metasploit)", "remote", "unix", "139"),
+]
+SERVICES = [("vsftpd", "2.3.4"), ("OpenSSH", "7.2p2"), ("Apache HTTP Server", "2.4.49"), ("Samba", "3.0.20")] + [
+    (f"Acme{index:04d}", f"{index % 7}.0") for index in range(26)
+]
+
+def write_csv(path, rows=20_000):
+    """Writes a synthetic files_exploits.csv with `rows` filler exploits and the known ones."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for index in range(rows):
+            writer.writerow([100_000 + index, f"exploits/php/webapps/{100_000 + index}.txt",
+                             f"Acme{index % 5000:04d} {index % 7}.{index % 3} - SQL Injection", "2020-01-01",
+                             "Author", "webapps", "php", "", "", "", "1", "", "", "", "", "", ""])
+        for exploit_id, file, description, kind, platform, port in KNOWN:
+            writer.writerow([exploit_id, file, description, "2021-05-10", "Author", kind, platform, port,
+                             "", "", "1", "", "", "", "", "", ""])
+
+@pytest.fixture
+def exploits_csv(tmp_path):
+    path = tmp_path / "files_exploits.csv"
+    write_csv(path)
+    return path
+
+@pytest.fixture
+def database(tmp_path, exploits_csv):
+    with ExploitDatabase(str(tmp_path / "exploits.db")) as database:
+        database.import_csv(str(exploits_csv))
+        yield database
+
+def test_import_is_incremental(tmp_path, exploits_csv):
+    """Tests that the CSV is imported once and again only when it changes."""
+    with ExploitDatabase(str(tmp_path / "exploits.db")) as database:
+        assert database.import_csv(str(exploits_csv)) == 20_000 + len(KNOWN)
+        assert database.import_csv(str(exploits_csv)) is None
+
+        write_csv(exploits_csv, rows=10)
+        assert database.import_csv(str(exploits_csv)) == 10 + len(KNOWN)
+        assert database.search("Acme0019", "5.1") == []
+
+def test_search_matches_versions_as_written(database):
+    """Tests that service and version terms must all appear in the title."""
+    [exploit] = database.search("vsftpd", "2.3.4")
+    assert exploit["id"] == 49757 and exploit["link"] == "https://www.exploit-db.com/exploits/49757"
+    assert database.search("vsftpd", "2.3.5") == []
+    assert [exploit["id"] for exploit in database.search("Samba", "3.0.20")] == [16320]
+    assert service_query("Apache/2.4.41", None) == '"Apache/2.4.41"'
+    assert database.search("", None) == []
+
+def test_search_many_is_one_memoized_query(database, monkeypatch):
+    """Tests that many services are resolved with one query and repeated lookups are not queried again."""
+    statements = []
+    # FTS5's own statements are traced with a leading '--'
+    database.db.set_trace_callback(lambda statement: statement.startswith("--") or statements.append(statement))
+
+    found = database.search_many(SERVICES)
+    assert [exploit["id"] for exploit in found[("OpenSSH", "7.2p2")]] == [40136]
+    assert [exploit["id"] for exploit in found[("Apache HTTP Server", "2.4.49")]] == [50383]
+    assert found[("Acme0025", "4.0")] == []
+    assert len(statements) == 1
+
+    assert database.search("OpenSSH", "7.2p2") == found[("OpenSSH", "7.2p2")]
+    assert all(len(exploits) <= 1 for exploits in database.search_many(SERVICES, limit=1).values())
+    assert len(statements) == 2
+
+def test_search_vulnerabilities_uses_the_index(database, monkeypatch):
+    """Tests that search_vulnerabilities keeps its result format on the local index."""
+    monkeypatch.setattr(exploit_db, "_database", database)
+    [vulnerability] = search_vulnerabilities("vsftpd", "2.3.4")
+    assert vulnerability["name"] == "vsftpd 2.3.4 - Backdoor Command Execution"
+    assert vulnerability["link"].endswith("/49757")
+    with pytest.raises(Exception, match="No vulnerabilities found"):
+        search_vulnerabilities("vsftpd", "9.9.9")
+
+def test_benchmark_against_searchsploit(tmp_path, exploits_csv, monkeypatch):
+    """Compares resolving a host's services with one searchsploit scan per service and with the index."""
+    searchsploit = tmp_path / "bin" / "searchsploit"
+    searchsploit.parent.mkdir()
+    searchsploit.write_text(f"""#!{sys.executable}
+import csv, json, sys
+terms = sys.argv[1].lower().split()
+with open({str(exploits_csv)!r}, newline="") as f:
+    found = [{{"Title": row["description"], "EDB-ID": row["id"]}} for row in csv.DictReader(f)
+             if all(term in row["description"].lower() for term in terms)]
+print(json.dumps({{"RESULTS_EXPLOIT": found}}))
+""")
+    os.chmod(searchsploit, 0o755)
+    monkeypatch.setenv("PATH", f"{searchsploit.parent}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(exploit_db, "_database", None)
+    monkeypatch.setattr(exploit_db, "exploit_db_settings", lambda: (str(tmp_path / "missing.csv"), str(tmp_path / "missing.db")))
+
+    def lookup_each():
+        found = {}
+        for service in SERVICES:
+            try:
+                found[service] = [vulnerability["link"] for vulnerability in search_vulnerabilities(*service)]
+            except Exception:
+                found[service] = []
+        return found
+
+    started = time.perf_counter()
+    scanned = lookup_each()
+    scan_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ExploitDatabase(str(tmp_path / "exploits.db")) as database:
+        database.import_csv(str(exploits_csv))
+        import_time = time.perf_counter() - started
+        started = time.perf_counter()
+        indexed = {service: [exploit["link"] for exploit in exploits] for service, exploits in database.search_many(SERVICES).items()}
+        query_time = time.perf_counter() - started
+
+    print(f"\n{len(SERVICES)} services: searchsploit per service {scan_time * 1000:.0f} ms; "
+          f"one-off import {import_time * 1000:.0f} ms, batched query {query_time * 1000:.1f} ms")
+    assert {service: links for service, links in indexed.items() if links} == {service: links for service, links in scanned.items() if links}
+    assert query_time * 10 < scan_time
@@ -0,0 +1,181 @@
+import sys
+import asyncio
+import multiprocessing
+import json
+import pytest
+from scripts.findings import FindingsStore, HostTracker, ingest_output, open_findings, DATABASE_FILE
+from scripts.output_parsers import parse_gobuster_line, parse_nmap_line
+from scripts.report import load_findings, summarise_findings, _nmap_table_loader
+
+def port(host, number, state="open", service=None, product=None, version=None, protocol="tcp"):
+    return {"type": "port", "host": host, "hostname": None, "port": number, "protocol": protocol,
+            "state": state, "service": service, "product": product, "version": version, "extrainfo": None}
+
+@pytest.fixture
+def store(tmp_path):
+    findings = FindingsStore(str(tmp_path), batch_size=2)
+    yield findings
+    findings.close()
+
+def test_ports_and_services(store):
+    """Tests that rescans update port states and keep known service details."""
+    store.add_many([
+        port("10.0.0.1", 80, service="http", product="Apache httpd", version="2.4.41"),
+        port("10.0.0.1", 22, service="ssh"),
+        port("10.0.0.1", 161, state="open|filtered", protocol="udp"),
+        port("10.0.0.2", 443, state="filtered")
+    ], source="nmap")
+    store.add(port("10.0.0.2", 443, state="open"), source="nmap")
+    store.add(port("10.0.0.1", 80, service="http"), source="nmap")
+
+    assert [(r["host"], r["port"], r["protocol"]) for r in store.ports(state="open")] == [
+        ("10.0.0.1", 22, "tcp"), ("10.0.0.1", 80, "tcp"), ("10.0.0.2", 443, "tcp")
+    ]
+    http = store.ports(service="http")
+    assert len(http) == 1 and http[0]["product"] == "Apache httpd" and http[0]["version"] == "2.4.41"
+    assert [r["port"] for r in store.ports(host="10.0.0.1")] == [22, 80, 161]
+    assert store.hosts() == [{"address": "10.0.0.1", "hostname": None}, {"address": "10.0.0.2", "hostname": None}]
+
+def test_web_paths_credentials_and_exploits(store):
+    """Tests that other record types are stored once and filtered by their indexed columns."""
+    for _ in range(2):
+        store.add_many([
+            {"type": "web_path", "path": "/admin", "status": 301, "size": 10},
+            {"type": "web_path", "path": "/index.php", "status": 200, "size": 512}
+        ], source="gobuster", host="10.0.0.1")
+        store.add_many([{"type": "credential", "host": "10.0.0.1", "port": 22, "service": "ssh",
+                         "login": "admin", "password": "hunter2"}], source="hydra")
+        store.add_many([{"type": "exploit", "title": "Apache 2.4.49 - Path Traversal", "path": "multiple/webapps/50383.sh"}],
+                       source="searchsploit")
+    assert not store.add({"type": "note", "text": "ignored"})
+
+    assert [r["path"] for r in store.web_paths(status=200)] == ["/index.php"]
+    assert store.web_paths()[0]["host"] == "10.0.0.1"
+    assert [r["login"] for r in store.credentials(service="ssh")] == ["admin"]
+    assert store.credentials(service="ftp") == []
+    assert store.exploits() == [{"host": None, "port": None, "title": "Apache 2.4.49 - Path Traversal",
+                                 "path": "multiple/webapps/50383.sh", "source": "searchsploit"}]
+    assert store.counts() == {"hosts": 1, "open_ports": 0, "web_paths": 2, "credentials": 1, "exploits": 1}
+
+def test_records_are_visible_to_other_connections(tmp_path):
+    """Tests that an added record is committed straight away and a batch once it is added."""
+    writer = FindingsStore(str(tmp_path), batch_size=3)
+    reader = FindingsStore(str(tmp_path))
+    writer.add(port("10.0.0.1", 21))
+    assert reader.counts()["open_ports"] == 1
+    assert writer.add_many(port("10.0.0.1", number) for number in range(22, 29)) == 7
+    assert reader.counts()["open_ports"] == 8
+    assert not writer.db.in_transaction
+    writer.close()
+    reader.close()
+
+def write_ports(challenge_path, host, barrier):
+    """Streams ports into a store in step with another process doing the same."""
+    with FindingsStore(challenge_path) as store:
+        for number in range(1, 101):
+            store.add(port(host, number))
+            if number % 10 == 0:
+                barrier.wait(timeout=10)
+
+def test_concurrent_writers(tmp_path):
+    """Tests that two processes streaming into one store do not lock each other out."""
+    context = multiprocessing.get_context("fork")
+    barrier = context.Barrier(2)
+    writers = [context.Process(target=write_ports, args=(str(tmp_path), host, barrier)) for host in ("10.0.0.1", "10.0.0.2")]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join(30)
+
+    assert [writer.exitcode for writer in writers] == [0, 0]
+    with FindingsStore(str(tmp_path)) as store:
+        assert store.counts()["open_ports"] == 200
+
+def test_ingest_output(store, tmp_path):
+    """Tests that finished text and XML outputs are added to the store."""
+    text = tmp_path / "gobuster.txt"
+    text.write_text("===============\n/admin (Status: 301) [Size: 10]\nProgress: 100\n/login (Status: 200) [Size: 5]\n")
+    xml = tmp_path / "nmap.xml"
+    xml.write_text('<nmaprun><host><address addr="10.0.0.1" addrtype="ipv4"/><ports>'
+                   '<port protocol="tcp" portid="80"><state state="open"/><service name="http"/></port>'
+                   '</ports></host></nmaprun>')
+
+    assert ingest_output(store, "gobuster", str(text), parse_gobuster_line, host="10.0.0.1") == 2
+    assert ingest_output(store, "nmap", xml_path=str(xml)) == 1
+    assert ingest_output(store, "nmap", xml_path=str(tmp_path / "missing.xml")) == 0
+    assert [r["path"] for r in store.web_paths(host="10.0.0.1")] == ["/admin", "/login"]
+    assert store.ports(service="http")[0]["host"] == "10.0.0.1"
+
+def test_host_tracker():
+    """Tests that multi-host runs follow nmap's report lines and single-host runs keep their target."""
+    lines = ["Starting Nmap", "Nmap scan report for 10.0.0.1", "22/tcp open ssh", "Nmap scan report for web.lab (10.0.0.2)", "80/tcp open http"]
+    for target in ("10.0.0.0/24", "10.0.0.1,10.0.0.2", "10.0.0.1 10.0.0.2", "10.0.0.1-2", None):
+        hosts = HostTracker(target)
+        assert [hosts.host(line) for line in lines] == [None, "10.0.0.1", "10.0.0.1", "10.0.0.2", "10.0.0.2"]
+    for target in ("10.0.0.1", "dc-01.lab"):
+        hosts = HostTracker(target)
+        assert [hosts.host(line) for line in lines] == [target] * 5
+
+def test_host_tracker_keeps_concurrent_streams_apart():
+    """Tests that the interleaved lines of concurrently streamed shards are attributed to their own hosts."""
+    hosts, seen = HostTracker("10.0.0.1,10.0.0.2"), []
+
+    async def shard(address):
+        for line in (f"Nmap scan report for {address}", "22/tcp open ssh", "80/tcp open http"):
+            seen.append((address, hosts.host(line)))
+            await asyncio.sleep(0)
+
+    async def main():
+        await asyncio.gather(shard("10.0.0.1"), shard("10.0.0.2"))
+
+    asyncio.run(main())
+    assert len(seen) == 6 and all(address == host for address, host in seen)
+
+def test_ingest_output_attributes_multi_host_text(store, tmp_path):
+    """Tests that text output of a range scan is stored per host instead of under the range."""
+    text = tmp_path / "nmap.txt"
+    text.write_text("Nmap scan report for 10.0.0.1\n22/tcp open ssh\n\nNmap scan report for 10.0.0.2\n80/tcp open http\n")
+    observed = []
+
+    assert ingest_output(store, "nmap", str(text), parse_nmap_line, host="10.0.0.0/30",
+                         on_record=lambda record, host: observed.append((record["port"], host))) == 2
+    assert [(r["host"], r["port"]) for r in store.ports()] == [("10.0.0.1", 22), ("10.0.0.2", 80)]
+    assert observed == [(22, "10.0.0.1"), (80, "10.0.0.2")]
+
+def test_run_tool_stores_parsed_results(tmp_path, monkeypatch):
+    """Tests that results streamed by a tool are stored as findings."""
+    from scripts.run_tool import run_tool
+    from scripts.preset_registry import PresetRegistry
+
+    stub = tmp_path / "gobuster"
+    stub.write_text(f"#!{sys.executable}\nprint('/admin (Status: 301) [Size: 10]')\nprint('/backup (Status: 403) [Size: 7]')\n")
+    stub.chmod(0o755)
+    challenge_path = tmp_path / "Challenge"
+    challenge_path.mkdir()
+    (challenge_path / "metadata.json").write_text(json.dumps({"name": "Challenge", "ip": "10.0.0.1"}))
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "gobuster.json").write_text(json.dumps({
+        "output_file": "gobuster.txt",
+        "presets": [{"name": "dir", "description": "Directories.", "command": "dir -u http://{ip}/"}]
+    }))
+    monkeypatch.setattr("scripts.run_tool.get_registry", lambda: PresetRegistry(str(tmp_path / "config")))
+
+    assert open_findings(str(challenge_path), create=False) is None
+    run_tool(str(stub), "dir", str(challenge_path), use_cache=False)
+
+    assert (challenge_path / DATABASE_FILE).exists()
+    findings = load_findings(str(challenge_path))
+    assert [(r["host"], r["path"], r["status"], r["source"]) for r in findings["web_paths"]] == [
+        ("10.0.0.1", "/admin", 301, "gobuster"), ("10.0.0.1", "/backup", 403, "gobuster")
+    ]
+    assert summarise_findings(findings) == [{"title": "Web Paths: 2", "description": "/admin (301), /backup (403)"}]
+
+def test_report_reads_ports_from_store(tmp_path):
+    """Tests that the report's port table comes from the store instead of the output file."""
+    with FindingsStore(str(tmp_path)) as store:
+        store.add_many([port("10.0.0.1", 22, service="ssh", product="OpenSSH", version="8.2p1")], source="nmap")
+    (tmp_path / "nmap.txt").write_text("80/tcp open http\n")
+
+    table = _nmap_table_loader(str(tmp_path), load_findings(str(tmp_path)))
+    assert table("80/tcp open http\n") == [["22/tcp", "ssh", "OpenSSH 8.2p1", "open"]]
+    assert load_findings(str(tmp_path / "missing")) is None
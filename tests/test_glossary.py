@@ -0,0 +1,115 @@
+import os
+import json
+import time
+import pytest
+from scripts.glossary import Glossary, load_glossary, edit_distance, DEFINITIONS_PATH
+from scripts.report import search_glossary
+
+DEFINITIONS = {
+    "terms": {
+        "Access Control": {"summary": "Who may use what.", "description": "..."},
+        "Broken Access Control": {"summary": "Access checks that can be bypassed.", "description": "..."},
+        "Authentication": {"summary": "Verifying identity.", "description": "..."},
+        "Authorization": {"summary": "Deciding what is allowed.", "description": "..."},
+        "Cross-Site Scripting (XSS)": {"summary": "Injected scripts.", "description": "..."},
+        "Denial of Service (DoS)": {"summary": "Exhausting a service.", "description": "..."}
+    },
+    "tools": {
+        "nmap": {"name": "Nmap", "purpose": "Network scanning", "description": "..."},
+        "john_the_ripper": {"name": "John the Ripper", "purpose": "Password cracking", "description": "..."}
+    }
+}
+
+@pytest.fixture
+def glossary():
+    return Glossary(DEFINITIONS)
+
+def names(results):
+    return [entry["name"] for entry, _ in results]
+
+def test_edit_distance():
+    """Tests that transpositions count as one edit and the limit stops early."""
+    assert edit_distance("authentication", "authnetication", 3) == 1
+    assert edit_distance("nmap", "nmpa", 3) == 1
+    assert edit_distance("kitten", "sitting", 3) == 3
+    assert edit_distance("short", "a much longer word", 2) == 3
+
+def test_lookup_ranking(glossary):
+    """Tests that exact names rank before prefixes and prefixes before fuzzy matches."""
+    assert names(glossary.lookup("access control"))[:2] == ["Access Control", "Broken Access Control"]
+    assert names(glossary.lookup("auth"))[:2] == ["Authorization", "Authentication"]
+    assert names(glossary.lookup("NMAP")) == ["Nmap"]
+    assert names(glossary.lookup("john")) == ["John the Ripper"]
+    assert names(glossary.lookup("xss")) == ["Cross-Site Scripting (XSS)"]
+    assert names(glossary.lookup("ripper", kind="terms")) == []
+    assert glossary.lookup("   ") == []
+
+def test_typo_tolerant_lookup(glossary):
+    """Tests that misspelt queries still find their entry first."""
+    assert names(glossary.lookup("authentcation"))[0] == "Authentication"
+    assert names(glossary.lookup("autorization"))[0] == "Authorization"
+    assert names(glossary.lookup("cross site scripting"))[0] == "Cross-Site Scripting (XSS)"
+    assert names(glossary.lookup("acess controll"))[0] == "Access Control"
+    assert glossary.lookup("zzzzqqq") == []
+
+def test_link_terms(glossary):
+    """Tests that terms are linked once, longest first, outside tags and headings."""
+    html = (
+        "<html><head><title>Nmap report</title></head><body><h2>Access Control</h2>"
+        "<p class=\"nmap\">We ran   nmap. Broken access control and\nAccess Control, then nmap again.</p>"
+        "<p><a href=\"#x\">Authentication</a>, authentication, DoS and Cross-Site Scripting.</p></body></html>"
+    )
+    linked = glossary.link_terms(html)
+
+    assert '<title>Nmap report</title>' in linked and '<h2>Access Control</h2>' in linked
+    assert '<p class="nmap">We ran   <a class="glossary-term" href="#glossary-nmap" title="Network scanning">nmap</a>.' in linked
+    assert '>Broken access control</a>' in linked
+    assert '>Access Control</a>' in linked
+    assert linked.count("#glossary-nmap") == 1
+    assert '<a href="#x">Authentication</a>, <a class="glossary-term" href="#glossary-authentication"' in linked
+    assert "DoS and" in linked and "glossary-denial" not in linked
+    assert '>Cross-Site Scripting</a>' in linked
+    assert glossary.link_terms("<p>nmap, nmap</p>", first_only=False).count("glossary-term") == 2
+
+def test_linked_entries(glossary):
+    """Tests that the entries of linked terms carry the slugs their links point at."""
+    linked = set()
+    glossary.link_terms("<p>John the Ripper cracked it after nmap found Broken Access Control.</p>", linked=linked)
+
+    assert [(entry["slug"], entry["name"]) for entry in glossary.linked_entries(linked)] == [
+        ("broken-access-control", "Broken Access Control"), ("john-the-ripper", "John the Ripper"), ("nmap", "Nmap")
+    ]
+    assert glossary.linked_entries(linked)[-1]["summary"] == "Network scanning"
+
+def test_load_glossary_is_cached_until_the_file_changes(tmp_path):
+    """Tests that the definitions are indexed once per file version."""
+    path = tmp_path / "definitions.json"
+    path.write_text(json.dumps(DEFINITIONS))
+    first = load_glossary(str(path))
+    assert load_glossary(str(path)) is first
+
+    path.write_text(json.dumps({"terms": {"Backdoor": {"summary": "Hidden access."}}}))
+    os.utime(path, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+    assert names(load_glossary(str(path)).lookup("backdoor")) == ["Backdoor"]
+    assert load_glossary(str(tmp_path / "missing.json")).lookup("backdoor") == []
+
+def test_search_glossary():
+    """Tests the report's glossary search against the shipped definitions and a plain dict."""
+    assert os.path.exists(DEFINITIONS_PATH)
+    assert "nmap" in search_glossary("nmpa")["tools"]
+    assert list(search_glossary("authentication", DEFINITIONS)["terms"])[0] == "Authentication"
+
+def test_link_terms_single_pass_speed():
+    """Benchmarks linking the shipped glossary into a large report."""
+    glossary = load_glossary()
+    paragraph = ("<p>The nmap scan showed a firewall, weak authentication and a buffer overflow; "
+                 "hydra tried default credentials while the blue team watched the audit trail.</p>\n")
+    html = "<html><body>" + paragraph * 5000 + "</body></html>"
+
+    started = time.perf_counter()
+    linked = glossary.link_terms(html, first_only=False)
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(html) / 1e6:.1f} MB, {linked.count('glossary-term')} links in {elapsed:.2f}s")
+    assert linked.count('href="#glossary-hydra"') == 5000
+    assert elapsed < 5
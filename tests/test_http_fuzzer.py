@@ -0,0 +1,233 @@
+import json
+import asyncio
+import threading
+from urllib.parse import quote, urlsplit, parse_qs
+import pytest
+from scripts.http_fuzzer import RequestTemplate, read_response, classify, fuzz, run_fuzz
+
+class StandInServer:
+    """
+    A local HTTP/1.1 keep-alive server standing in for a search form with
+    reflected XSS and SQL injection.
+
+    `q` is echoed unescaped, a lone quote gives a 500 SQL error, 'or 1=1' dumps
+    every row, 'slow' never answers and /chunked answers with a chunked body.
+    Connections are closed after `close_after` responses without warning, like
+    a server's keep-alive timeout.
+    """
+    def __init__(self, close_after=None):
+        self.close_after = close_after
+        self.connections = 0
+        self.requests = 0
+        self.loop = asyncio.new_event_loop()
+        self.server = None
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        self.server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self.handle, "127.0.0.1", 0), self.loop
+        ).result()
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+
+    async def shutdown(self):
+        self.server.close()
+        handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        handled = 0
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.requests += 1
+                handled += 1
+
+                target = urlsplit(request_line.split()[1].decode())
+                q = (parse_qs(target.query) or parse_qs(body.decode())).get("q", [""])[0]
+                close = headers.get("connection") == "close"
+                if q == "slow":
+                    await asyncio.sleep(5)
+                    break
+                status, content = 200, f"<html><p>Results for {q}</p></html>"
+                if "or 1=1" in q:
+                    content = "<html>" + "<tr><td>row</td></tr>" * 100 + "</html>"
+                elif "'" in q:
+                    status, content = 500, "<html>SQL syntax error</html>"
+                content = content.encode()
+                if target.path == "/chunked":
+                    framing = b"Transfer-Encoding: chunked\r\n"
+                    content = b"".join(b"%x\r\n%s\r\n" % (len(part), part) for part in (content[:10], content[10:]) if part) + b"0\r\n\r\n"
+                else:
+                    framing = b"Content-Length: %d\r\n" % len(content)
+                writer.write(
+                    b"HTTP/1.1 %d X\r\n" % status + framing + (b"Connection: close\r\n" if close else b"") + b"\r\n" + content
+                )
+                await writer.drain()
+                if close or handled == self.close_after:
+                    break
+        finally:
+            writer.close()
+
+@pytest.fixture
+def server():
+    server = StandInServer().start()
+    yield server
+    server.stop()
+
+def probe(server, payloads, path="/search?q=FUZZ", **kwargs):
+    """Fuzzes the stand-in server and returns the stats and results by payload."""
+    results = {}
+    template = RequestTemplate(f"http://127.0.0.1:{server.port}{path}", keep_alive=kwargs.pop("keep_alive", True))
+    stats = asyncio.run(fuzz(template, payloads, on_result=lambda result: results.update({result["payload"]: result}), **kwargs))
+    return stats, results
+
+def test_request_template_renders_injection_points():
+    """Tests that payloads fill the query, header and body injection points, with a matching Content-Length."""
+    template = RequestTemplate("http://10.10.10.5:8080/login?next=FUZZ", "post", {"X-Forwarded-For": "FUZZ"}, "user=FUZZ&pass=x")
+    request = template.render("é'")
+    head, body = request.split(b"\r\n\r\n")
+    assert head.startswith(b"POST /login?next=\xc3\xa9' HTTP/1.1\r\nHost: 10.10.10.5:8080\r\n")
+    assert b"X-Forwarded-For: \xc3\xa9'" in head and b"Content-Length: 15" in head and b"Connection: keep-alive" in head
+    assert body == "user=é'&pass=x".encode()
+    assert (template.host, template.port, template.use_ssl) == ("10.10.10.5", 8080, False)
+    assert RequestTemplate("https://target/?q=FUZZ").port == 443
+
+    with pytest.raises(ValueError, match="No FUZZ injection point"):
+        RequestTemplate("http://target/")
+    with pytest.raises(ValueError, match="host"):
+        RequestTemplate("http://FUZZ.target/")
+    with pytest.raises(ValueError, match="Unsupported URL"):
+        RequestTemplate("ftp://target/FUZZ")
+
+def test_read_response_framings():
+    """Tests Content-Length, chunked and read-until-close response bodies."""
+    async def read(data, method="GET"):
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await read_response(reader, method)
+
+    async def main():
+        sized = await read(b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nhelloNEXT")
+        chunked = await read(b"HTTP/1.1 404 Not Found\r\nTransfer-Encoding: chunked\r\n\r\n3;x=1\r\nabc\r\n2\r\nde\r\n0\r\nTrailer: 1\r\n\r\n")
+        unframed = await read(b"HTTP/1.0 200 OK\r\n\r\nuntil close")
+        head = await read(b"HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\n", "HEAD")
+        return sized, chunked, unframed, head
+
+    sized, chunked, unframed, head = asyncio.run(main())
+    assert (sized.status, sized.body, sized.keep_alive) == (200, b"hello", True)
+    assert (chunked.status, chunked.reason, chunked.body) == (404, "Not Found", b"abcde")
+    assert (unframed.body, unframed.keep_alive) == (b"until close", False)
+    assert head.body == b""
+    with pytest.raises(ConnectionError):
+        asyncio.run(read(b""))
+
+def test_responses_are_classified(server):
+    """Tests that status changes, length changes and reflections are reported, and plain echoes are not."""
+    stats, results = probe(server, ["hello", "<svg/onload=alert(1)>", "'", quote("' or 1=1--"), "x" * 40])
+
+    assert stats["baseline"] == {"status": 200, "length": len("<html><p>Results for baseline</p></html>")}
+    assert results["hello"]["reasons"] == ["reflected"]
+    assert results["x" * 40]["reasons"] == ["reflected"]
+    assert results["<svg/onload=alert(1)>"]["reasons"] == ["reflected"]
+    assert results["'"]["status"] == 500 and results["'"]["reasons"] == ["status"]
+    assert results[quote("' or 1=1--")]["reasons"] == ["length"]
+    assert stats["requests"] == 5 and stats["interesting"] == 5 and stats["errors"] == 0
+
+def test_classify_ignores_small_length_changes():
+    """Tests the length tolerance."""
+    class Response:
+        def __init__(self, status, body):
+            self.status, self.body = status, body
+
+    baseline = Response(200, b"x" * 1000 + b"baseline")
+    assert classify(Response(200, b"x" * 1040), "id", baseline) == []
+    assert classify(Response(200, b"x" * 1060), "id", baseline) == ["length"]
+    assert classify(Response(302, b"x" * 1000 + b"a%20b"), "a%20b", baseline) == ["status", "reflected"]
+
+def test_connections_are_kept_alive(server):
+    """Tests that requests share a bounded pool of persistent connections, including chunked responses."""
+    stats, results = probe(server, (f"word{number}" for number in range(500)), "/chunked?q=FUZZ", concurrency=8)
+
+    assert stats["requests"] == 500 and stats["errors"] == 0
+    assert stats["connections"] == server.connections <= 8
+    assert server.requests == 501
+    assert all(result["status"] == 200 for result in results.values())
+
+def test_closed_keep_alive_connections_are_replaced():
+    """Tests that a request on a connection the server dropped is sent again on a new one."""
+    server = StandInServer(close_after=3).start()
+    try:
+        stats, results = probe(server, [f"word{number}" for number in range(30)], concurrency=1)
+    finally:
+        server.stop()
+    assert stats["errors"] == 0 and len(results) == 30
+    assert server.connections >= 10
+
+def test_timeouts_are_errors_and_reach_the_limiter(server):
+    """Tests that timed-out requests are reported as errors and observed by the rate limiter."""
+    class Limiter:
+        def __init__(self):
+            self.acquired = self.requests = self.errors = self.flushed = 0
+
+        async def acquire_async(self, count=1):
+            self.acquired += count
+
+        def observe(self, requests=0, errors=0):
+            self.requests += requests
+            self.errors += errors
+
+        def flush(self):
+            self.flushed += 1
+
+    limiter = Limiter()
+    stats, results = probe(server, ["a", "slow", "'", "b"], concurrency=2, timeout=0.5, limiter=limiter)
+
+    assert results["slow"]["reasons"] == ["error"] and results["slow"]["status"] is None
+    assert stats["errors"] == 1
+    assert (limiter.acquired, limiter.requests, limiter.errors, limiter.flushed) == (4, 4, 1, 1)
+
+def test_run_fuzz_prints_and_saves_hits(server, tmp_path, capsys):
+    """Tests the fuzz subcommand with payloads from the corpus."""
+    output = tmp_path / "hits.jsonl"
+    stats = run_fuzz(f"http://127.0.0.1:{server.port}/search?q=FUZZ", category="xss", encodings=["url"], limit=20,
+                     concurrency=4, output_path=str(output), rate_limit=False)
+
+    hits = [json.loads(line) for line in output.read_text().splitlines()]
+    assert stats["requests"] == 20 and len(hits) == stats["interesting"] > 0
+    assert any("reflected" in hit["reasons"] for hit in hits)
+    printed = capsys.readouterr().out
+    assert "20 requests in" in printed and "reflected" in printed
+
+    assert run_fuzz("http://127.0.0.1:1/?q=FUZZ", limit=1, rate_limit=False) is None
+    assert "[ERROR] Baseline request" in capsys.readouterr().out
+
+def test_benchmark_requests_per_second(server):
+    """Prints the request rate over kept-alive connections and with a connection per request."""
+    payloads = [f"word{number}" for number in range(2000)]
+    kept_alive, _ = probe(server, payloads, concurrency=16)
+    closed, _ = probe(server, payloads, concurrency=16, keep_alive=False)
+
+    print(f"\n2000 requests, 16 in flight: keep-alive {kept_alive['rps']:.0f} req/s over "
+          f"{kept_alive['connections']} connections; connection per request {closed['rps']:.0f} req/s")
+    assert kept_alive["connections"] <= 16
+    assert closed["connections"] == 2001
+    assert kept_alive["errors"] == closed["errors"] == 0
@@ -1,5 +1,12 @@
 import os
-from scripts.log_manager import log_action
+import json
+import gzip
+import threading
+import multiprocessing
+import pytest
+import scripts.log_manager as log_manager
+from scripts.log_manager import log_action, buffered_logging, read_log, write_events, log_event
+from scripts.scheduler import run_task_graph
 
 def test_log_action(tmp_path):
     challenge_path = tmp_path / "TestChallenge"
@@ -12,3 +19,122 @@ def test_log_action(tmp_path):
     with open(log_file, "r") as f:
         content = f.read()
     assert "Test log entry" in content
+
+@pytest.fixture
+def settings(monkeypatch):
+    values = {"max_bytes": 0, "backups": 2, "flush_interval": 0.05, "batch_size": 100}
+    monkeypatch.setattr("scripts.log_manager.log_settings", lambda: dict(values))
+    return values
+
+def events(path):
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f]
+
+def test_log_action_writes_json_lines(tmp_path, settings):
+    """Tests the structured event written for a message."""
+    log_action(tmp_path, "Challenge created", {"ip": "10.10.10.5"})
+    log_action(tmp_path, "Error: nmap not found")
+
+    first, second = events(tmp_path / "challenge.log")
+    assert first["message"] == "Challenge created" and first["context"] == {"ip": "10.10.10.5"}
+    assert first["level"] == "info" and second["level"] == "error"
+    assert first["ts"] <= second["ts"] and "T" in first["time"]
+
+def test_buffered_logging_batches_writes(tmp_path, settings, monkeypatch):
+    """Tests that events from many threads reach the log in a few batched, whole-line writes."""
+    # Batches are only written once full, so the number of writes does not depend on timing
+    settings["flush_interval"] = 60
+    writes = {}
+    original = log_manager.write_events
+    monkeypatch.setattr(
+        "scripts.log_manager.write_events",
+        lambda path, batch, *args: (writes.setdefault(path, []).append(len(batch)), original(path, batch, *args))
+    )
+
+    def worker(index):
+        for line in range(250):
+            log_action(tmp_path / f"Target-{index % 2}", f"Task {index}-{line} executed successfully.")
+
+    with buffered_logging():
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert "executed successfully" in read_log(tmp_path / "Target-0")
+
+    logged = events(tmp_path / "Target-0" / "challenge.log") + events(tmp_path / "Target-1" / "challenge.log")
+    assert sorted(event["message"] for event in logged) == sorted(
+        f"Task {index}-{line} executed successfully." for index in range(8) for line in range(250)
+    )
+    # At most one write per log file for each full batch, not one per event
+    assert sorted(writes) == [str(tmp_path / "Target-0" / "challenge.log"), str(tmp_path / "Target-1" / "challenge.log")]
+    for sizes in writes.values():
+        assert sum(sizes) == 1000 and len(sizes) <= 2000 / settings["batch_size"]
+    assert log_manager._writer is None
+
+def _write_from_process(path, index):
+    for line in range(300):
+        write_events(path, [log_event(f"process {index} line {line} " + "x" * 200)])
+
+def test_processes_never_interleave(tmp_path):
+    """Tests that lines appended by concurrent processes stay whole."""
+    path = str(tmp_path / "challenge.log")
+    processes = [multiprocessing.Process(target=_write_from_process, args=(path, index)) for index in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert len(events(path)) == 1200
+
+def _log_task(challenge_path, count):
+    for line in range(count):
+        log_action(challenge_path, f"worker line {line}")
+
+def test_worker_processes_batch_their_writes(tmp_path, settings, monkeypatch):
+    """Tests that scheduler workers forked inside buffered_logging() batch their events and write them before each task completes."""
+    settings["flush_interval"] = 60
+    record = tmp_path / "writes"
+    original = log_manager.write_events
+
+    def recording(path, batch, *args):
+        with open(record, "a") as f:
+            f.write(f"{os.getpid()} {len(batch)}\n")
+        original(path, batch, *args)
+
+    monkeypatch.setattr("scripts.log_manager.write_events", recording)
+    tasks = [{"name": f"Task {index}", "command": f"tool{index} scan"} for index in range(4)]
+    with buffered_logging():
+        results = run_task_graph(tasks, _log_task, lambda task: (str(tmp_path / "Target"), 250), max_workers=2)
+        assert {result["status"] for result in results["results"].values()} == {"completed"}
+        assert len(events(tmp_path / "Target" / "challenge.log")) == 1000
+
+    writes = [tuple(map(int, line.split())) for line in record.read_text().splitlines()]
+    assert os.getpid() not in {pid for pid, _ in writes}
+    # Two full batches and the rest of each task, flushed when it ends
+    assert sorted(size for _, size in writes) == sorted([100, 100, 50] * 4)
+
+def test_log_settings_are_read_once(monkeypatch):
+    """Tests that config/base.json is not parsed again for every message."""
+    reads = []
+    monkeypatch.setattr(log_manager, "_settings", None)
+    monkeypatch.setattr("scripts.log_manager.load_config", lambda name: reads.append(name) or {"logging": {"backups": 3}})
+    assert log_manager.log_settings()["backups"] == 3
+    assert log_manager.log_settings()["backups"] == 3
+    assert reads == ["base"]
+
+def test_rotation_compresses_backups(tmp_path, settings):
+    """Tests that the log is rotated into compressed backups by size, keeping `backups` of them."""
+    settings["max_bytes"] = 2000
+    for line in range(100):
+        log_action(tmp_path, f"line {line:03d} " + "x" * 50)
+
+    log = tmp_path / "challenge.log"
+    assert log.stat().st_size <= 2000
+    assert (tmp_path / "challenge.log.1.gz").exists() and (tmp_path / "challenge.log.2.gz").exists()
+    assert not (tmp_path / "challenge.log.3.gz").exists()
+
+    with gzip.open(tmp_path / "challenge.log.2.gz", "rt") as older, gzip.open(tmp_path / "challenge.log.1.gz", "rt") as newer:
+        kept = [json.loads(line)["message"][:8] for line in older.read().splitlines() + newer.read().splitlines()]
+    kept += [event["message"][:8] for event in events(log)]
+    assert kept == [f"line {line:03d}" for line in range(100 - len(kept), 100)]
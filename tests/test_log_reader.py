@@ -0,0 +1,99 @@
+import json
+import threading
+import pytest
+from scripts.log_manager import write_events, log_event
+from scripts.log_reader import LogIndex, query_log, follow_log, parse_line, parse_time
+
+START = 1_700_000_000.0
+
+def event(ts, message, level="info"):
+    entry = log_event(message, level=level)
+    entry["ts"] = ts
+    return entry
+
+@pytest.fixture
+def challenge(tmp_path):
+    """A challenge log of 20,000 events, one per second, with an error every 1,000."""
+    write_events(str(tmp_path / "challenge.log"), [
+        event(START + second, f"Task {second} executed successfully.", "error" if second % 1000 == 999 else "info")
+        for second in range(20_000)
+    ], max_bytes=0)
+    return tmp_path
+
+def test_time_range_reads_only_matching_blocks(challenge):
+    """Tests that a time-range query returns exactly the range and seeks past the rest of the log."""
+    found = list(query_log(challenge, START + 10_000, START + 10_099))
+    assert [entry["message"] for entry in found] == [f"Task {second} executed successfully." for second in range(10_000, 10_100)]
+
+    index = LogIndex(str(challenge / "challenge.log"))
+    read = sum(end - start for start, end in index.ranges(START + 10_000, START + 10_099))
+    assert len(index.blocks) > 20 and read <= 2 * index.block_bytes
+    assert list(query_log(challenge, START + 30_000)) == []
+
+def test_level_and_text_filters(challenge):
+    """Tests level and message filters."""
+    errors = list(query_log(challenge, level="error"))
+    assert [entry["ts"] - START for entry in errors] == [second for second in range(999, 20_000, 1000)]
+    assert [entry["message"] for entry in query_log(challenge, contains="TASK 1234 ")] == ["Task 1234 executed successfully."]
+
+def test_out_of_order_events_are_found(tmp_path):
+    """Tests that events written out of time order by parallel workers are still matched."""
+    log = str(tmp_path / "challenge.log")
+    write_events(log, [event(START + second, f"late {second}") for second in range(5000)], max_bytes=0)
+    write_events(log, [event(START + 10, "delayed worker event")], max_bytes=0)
+    assert [entry["message"] for entry in query_log(tmp_path, START + 10, START + 10)] == ["late 10", "delayed worker event"]
+
+def test_index_is_incremental_and_survives_rotation(challenge):
+    """Tests that refreshes only read appended lines and that a rotated log is re-indexed."""
+    log = str(challenge / "challenge.log")
+    index = LogIndex(log)
+    index.refresh()
+    assert LogIndex(log).refresh() == 0
+
+    with open(log, "ab") as f:
+        f.write(json.dumps(event(START + 20_000, "appended")).encode() + b"\n" + b'{"ts": 1, "partial')
+    appended = LogIndex(log).refresh()
+    assert appended <= index.block_bytes + 200
+    assert [entry["message"] for entry in query_log(challenge, START + 20_000)] == ["appended"]
+
+    write_events(log, [event(START + 50_000, "after rotation")], max_bytes=100, backups=1)
+    assert [entry["message"] for entry in query_log(challenge)] == ["after rotation"]
+    assert (challenge / "challenge.log.1.gz").exists()
+
+def test_legacy_lines_and_times():
+    """Tests reading pre-structured log lines and relative query times."""
+    parsed = parse_line(b"[2024-05-01 12:30:00]  Challenge created\n")
+    assert parsed["message"] == "Challenge created" and parsed["level"] == "info"
+    assert parse_line("not a log line") is None and parse_line('{"broken') is None
+    assert abs(parse_time("2h") - (parse_time("120m"))) < 1
+    assert parse_time("2024-05-01T12:30:00") == parsed["ts"]
+
+def test_follow_streams_new_events(tmp_path):
+    """Tests that following a log yields complete new lines as they are written, across rotation."""
+    log = str(tmp_path / "challenge.log")
+    write_events(log, [event(START, "before following")], max_bytes=0)
+    stop = threading.Event()
+    received = []
+
+    def follow():
+        for entry in follow_log(tmp_path, poll_interval=0.01, stop=stop):
+            received.append(entry["message"])
+            if len(received) == 3:
+                stop.set()
+
+    follower = threading.Thread(target=follow)
+    follower.start()
+    stop.wait(0.1)
+    with open(log, "ab") as f:
+        line = json.dumps(event(START + 1, "first")).encode() + b"\n"
+        f.write(line[:20])
+        f.flush()
+        stop.wait(0.1)
+        f.write(line[20:])
+    stop.wait(0.1)
+    write_events(log, [event(START + 2, "second")], max_bytes=0)
+    stop.wait(0.1)
+    write_events(log, [event(START + 3, "after rotation")], max_bytes=10, backups=0)
+    follower.join(5)
+    stop.set()
+    assert received == ["first", "second", "after rotation"]
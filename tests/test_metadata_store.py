@@ -0,0 +1,90 @@
+import json
+import multiprocessing
+import pytest
+from scripts.metadata_store import MetadataStore, JOURNAL_SUFFIX
+from scripts.utils import load_challenge_metadata, save_challenge_metadata, update_challenge_metadata
+
+@pytest.fixture
+def challenge(tmp_path):
+    (tmp_path / "metadata.json").write_text(json.dumps({"name": "Lame", "ip": "10.10.10.3", "flags": [], "ports": {}}))
+    return tmp_path
+
+def test_updates_are_journaled(challenge):
+    """Tests that updates are appended to the journal and merged into reads without rewriting metadata.json."""
+    metadata_file = challenge / "metadata.json"
+    before = metadata_file.stat()
+    update_challenge_metadata(challenge, {"flags": ["user.txt"], "ports": {"22": "ssh"}, "os": "Linux"})
+    update_challenge_metadata(challenge, {"flags": ["root.txt"], "ports": {"445": "smb"}})
+
+    assert load_challenge_metadata(challenge) == {
+        "name": "Lame", "ip": "10.10.10.3", "flags": ["user.txt", "root.txt"], "ports": {"22": "ssh", "445": "smb"}, "os": "Linux"
+    }
+    assert metadata_file.stat().st_mtime_ns == before.st_mtime_ns
+    assert len((challenge / f"metadata.json{JOURNAL_SUFFIX}").read_text().splitlines()) == 3
+
+    # Reads return copies of the in-memory view
+    load_challenge_metadata(challenge)["flags"].append("changed")
+    assert load_challenge_metadata(challenge)["flags"] == ["user.txt", "root.txt"]
+
+def test_journal_is_compacted(challenge):
+    """Tests that a journal past its size limit is folded into metadata.json atomically."""
+    store = MetadataStore(str(challenge), compact_bytes=2000)
+    for index in range(100):
+        store.update({"flags": [f"flag-{index:03d}"]})
+
+    on_disk = json.loads((challenge / "metadata.json").read_text())
+    assert on_disk["flags"] == [f"flag-{index:03d}" for index in range(len(on_disk["flags"]))]
+    assert len(on_disk["flags"]) > 50
+    assert (challenge / f"metadata.json{JOURNAL_SUFFIX}").stat().st_size <= 2000
+    assert MetadataStore(str(challenge)).load()["flags"] == [f"flag-{index:03d}" for index in range(100)]
+    assert not (challenge / "metadata.json.tmp").exists()
+
+    store.compact()
+    assert json.loads((challenge / "metadata.json").read_text())["flags"] == [f"flag-{index:03d}" for index in range(100)]
+
+def test_interrupted_compaction_does_not_apply_updates_twice(challenge):
+    """Tests that a journal left behind by an interrupted compaction is ignored."""
+    store = MetadataStore(str(challenge))
+    store.update({"flags": ["user.txt"]})
+    journal = (challenge / f"metadata.json{JOURNAL_SUFFIX}").read_bytes()
+
+    # metadata.json was replaced, but the process died before resetting the journal
+    store.compact()
+    (challenge / f"metadata.json{JOURNAL_SUFFIX}").write_bytes(journal)
+
+    assert MetadataStore(str(challenge)).load()["flags"] == ["user.txt"]
+    store.update({"flags": ["root.txt"]})
+    assert MetadataStore(str(challenge)).load()["flags"] == ["user.txt", "root.txt"]
+
+def test_save_replaces_metadata(challenge):
+    """Tests that saving the whole metadata discards pending updates and sees external rewrites."""
+    update_challenge_metadata(challenge, {"flags": ["user.txt"]})
+    save_challenge_metadata(challenge, {"name": "Lame", "ip": "10.10.10.4"})
+    assert load_challenge_metadata(challenge) == {"name": "Lame", "ip": "10.10.10.4"}
+
+    (challenge / "metadata.json").write_text(json.dumps({"name": "Edited", "ip": "10.10.10.5", "padding": "x"}))
+    assert load_challenge_metadata(challenge)["name"] == "Edited"
+
+    with pytest.raises(FileNotFoundError):
+        load_challenge_metadata(challenge / "missing")
+    with pytest.raises(FileNotFoundError):
+        update_challenge_metadata(challenge / "missing", {"flags": []})
+
+def _record_flags(challenge_path, worker):
+    store = MetadataStore(challenge_path, compact_bytes=4096)
+    for index in range(100):
+        store.update({"flags": [f"{worker}-{index}"], "ports": {f"{worker}-{index}": "open"}})
+
+def test_parallel_processes_lose_no_updates(challenge):
+    """Tests that updates from concurrent processes, interleaved with compactions, are all kept."""
+    processes = [multiprocessing.Process(target=_record_flags, args=(str(challenge), worker)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    metadata = MetadataStore(str(challenge)).load()
+    expected = {f"{worker}-{index}" for worker in range(4) for index in range(100)}
+    assert len(metadata["flags"]) == 400 and set(metadata["flags"]) == expected
+    assert set(metadata["ports"]) == expected
+    json.loads((challenge / "metadata.json").read_text())
@@ -0,0 +1,119 @@
+import time
+import tracemalloc
+import pytest
+from scripts.nmap_xml import iter_nmap_records, write_nmap_xml, describe_version
+from scripts.sharding import merge_nmap_xml_outputs
+from scripts.report import nmap_to_table, nmap_xml_to_table
+
+SAMPLE_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<nmaprun scanner="nmap" args="nmap -sV -oX - 10.0.0.0/30">
+<host><status state="up"/>
+<address addr="10.0.0.1" addrtype="ipv4"/><address addr="00:11:22:33:44:55" addrtype="mac"/>
+<hostnames><hostname name="box.htb" type="PTR"/></hostnames>
+<ports><extraports state="closed" count="997"/>
+<port protocol="tcp" portid="22"><state state="open" reason="syn-ack"/><service name="ssh" product="OpenSSH" version="8.2p1" extrainfo="Ubuntu 4ubuntu0.5"/></port>
+<port protocol="tcp" portid="80"><state state="open" reason="syn-ack"/><service name="http" product="Apache httpd" version="2.4.41"/></port>
+<port protocol="udp" portid="161"><state state="open|filtered" reason="no-response"/></port>
+</ports></host>
+<host><status state="up"/><address addr="10.0.0.2" addrtype="ipv4"/>
+<ports><port protocol="tcp" portid="443"><state state="filtered" reason="no-response"/><service name="https"/></port></ports>
+</host>
+<runstats><finished time="1"/></runstats>
+</nmaprun>
+"""
+
+@pytest.fixture
+def sample(tmp_path):
+    path = tmp_path / "nmap.xml"
+    path.write_text(SAMPLE_XML)
+    return path
+
+def synthetic_report(path, hosts, ports_per_host):
+    """Writes a synthetic nmap XML report and returns its size in bytes."""
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0"?>\n<nmaprun scanner="nmap">\n')
+        for host in range(hosts):
+            f.write(f'<host><status state="up"/><address addr="10.{host // 65536}.{host // 256 % 256}.{host % 256}" addrtype="ipv4"/><ports>\n')
+            for port in range(1, ports_per_host + 1):
+                f.write(
+                    f'<port protocol="tcp" portid="{port}"><state state="open" reason="syn-ack" reason_ttl="64"/>'
+                    f'<service name="svc{port}" product="Example Daemon" version="1.{port}" method="probed" conf="10"/></port>\n'
+                )
+            f.write("</ports></host>\n")
+        f.write("</nmaprun>\n")
+    return path.stat().st_size
+
+def test_records(sample):
+    """Tests that hosts, hostnames, states and services are extracted."""
+    records = list(iter_nmap_records(str(sample)))
+
+    assert [(r["host"], r["port"], r["protocol"], r["state"]) for r in records] == [
+        ("10.0.0.1", 22, "tcp", "open"), ("10.0.0.1", 80, "tcp", "open"),
+        ("10.0.0.1", 161, "udp", "open|filtered"), ("10.0.0.2", 443, "tcp", "filtered")
+    ]
+    assert records[0]["hostname"] == "box.htb"
+    assert describe_version(records[0]) == "OpenSSH 8.2p1 (Ubuntu 4ubuntu0.5)"
+    assert records[2]["service"] is None
+
+def test_truncated_report_yields_complete_hosts(tmp_path):
+    """Tests that an interrupted scan's report still yields its finished hosts."""
+    path = tmp_path / "partial.xml"
+    path.write_text(SAMPLE_XML[:SAMPLE_XML.index("<host><status state=\"up\"/><address addr=\"10.0.0.2\"") + 40])
+
+    assert {r["host"] for r in iter_nmap_records(str(path))} == {"10.0.0.1"}
+
+def test_merge_and_write_round_trip(tmp_path, sample):
+    """Tests that shard reports merge to the most informative state and can be written back."""
+    other = tmp_path / "shard.xml"
+    write_nmap_xml([
+        {"host": "10.0.0.2", "hostname": None, "port": 443, "protocol": "tcp", "state": "open",
+         "service": "https", "product": "nginx", "version": None, "extrainfo": None},
+        {"host": "10.0.0.2", "hostname": None, "port": 8080, "protocol": "tcp", "state": "closed",
+         "service": None, "product": None, "version": None, "extrainfo": None}
+    ], str(other))
+
+    merged = merge_nmap_xml_outputs([str(sample), str(other), str(tmp_path / "missing.xml")])
+    assert [(r["host"], r["port"], r["state"]) for r in merged] == [
+        ("10.0.0.1", 22, "open"), ("10.0.0.1", 80, "open"), ("10.0.0.1", 161, "open|filtered"),
+        ("10.0.0.2", 443, "open"), ("10.0.0.2", 8080, "closed")
+    ]
+
+    output = tmp_path / "merged.xml"
+    write_nmap_xml(merged, str(output))
+    assert list(iter_nmap_records(str(output))) == merged
+
+def test_report_tables(sample):
+    """Tests the report's port tables from XML and from normal output."""
+    assert nmap_xml_to_table(str(sample))[0] == ["22/tcp", "ssh", "OpenSSH 8.2p1 (Ubuntu 4ubuntu0.5)", "open"]
+    text = "Not shown: 998 closed tcp ports (reset)\n22/tcp open  ssh     OpenSSH 8.2p1\n80/tcp closed http\n"
+    assert nmap_to_table(text) == [["22/tcp", "ssh", "OpenSSH 8.2p1", "open"], ["80/tcp", "http", "", "closed"]]
+
+def test_memory_does_not_grow_with_scan_size(tmp_path):
+    """Tests that parsing a four times larger scan does not use more memory."""
+    def peak(hosts):
+        path = tmp_path / f"scan-{hosts}.xml"
+        synthetic_report(path, hosts, 20)
+        tracemalloc.start()
+        count = sum(1 for _ in iter_nmap_records(str(path)))
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert count == hosts * 20
+        return peak_bytes
+
+    small, large = peak(250), peak(1000)
+    assert large < small * 1.5 + 64 * 1024
+
+def test_parser_throughput(tmp_path):
+    """Benchmarks the parser on a multi-megabyte synthetic many-host scan."""
+    path = tmp_path / "large.xml"
+    size = synthetic_report(path, 2000, 25)
+
+    started = time.perf_counter()
+    count = sum(1 for _ in iter_nmap_records(str(path)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{size / 1e6:.1f} MB, {count} records in {elapsed:.2f}s: "
+          f"{count / elapsed:,.0f} records/s, {size / 1e6 / elapsed:.1f} MB/s")
+    assert count == 50000
+    assert size > 5 * 1024 * 1024
+    assert count / elapsed > 20000
@@ -0,0 +1,97 @@
+import html
+import tracemalloc
+from urllib.parse import unquote
+import pytest
+from scripts.payload_corpus import PayloadCorpus, variants, run_payloads
+
+@pytest.fixture
+def corpus_directory(tmp_path):
+    """A corpus with a duplicate inside a file, one shared across files and CRLF line endings."""
+    (tmp_path / "sql-injection").mkdir()
+    (tmp_path / "sql-injection" / "auth_bypass.txt").write_bytes(
+        b"' or 1=1--\r\nadmin' #\r\n\r\n' or 1=1--\r\n<script>alert(1)</script>\r\n"
+    )
+    (tmp_path / "xss.txt").write_text("<script>alert(1)</script>\n<img src=x onerror=alert(1)>\n\" onfocus=alert(1) autofocus x=\"")
+    (tmp_path / "notes.md").write_text("not a payload file\n")
+    return tmp_path
+
+def test_entries_are_deduplicated_and_tagged(corpus_directory):
+    """Tests that duplicates are kept once with every file's category, and context tags are assigned."""
+    with PayloadCorpus(str(corpus_directory)) as corpus:
+        assert corpus.categories == ["xss", "sql-injection/auth_bypass"]
+        assert len(corpus) == 5
+        assert list(corpus.entries("sql-injection/auth_bypass")) == ["<script>alert(1)</script>", "' or 1=1--", "admin' #"]
+        assert list(corpus.entries("xss")) == [
+            "<script>alert(1)</script>", "<img src=x onerror=alert(1)>", "\" onfocus=alert(1) autofocus x=\""
+        ]
+        assert set(corpus.entry_tags("<script>alert(1)</script>")) >= {"html", "script", "xss", "sql-injection/auth_bypass"}
+        assert set(corpus.entry_tags("' or 1=1--")) >= {"sql", "sql-string", "sql-comment"}
+        assert list(corpus.entries("xss", ["attribute"])) == ["<img src=x onerror=alert(1)>", "\" onfocus=alert(1) autofocus x=\""]
+        assert list(corpus.entries(tags=["sql-comment"])) == ["' or 1=1--", "admin' #"]
+        assert corpus.entry_tags("missing") is None
+
+def test_repository_corpus_deduplicates():
+    """Tests that the shipped auth bypass list, which repeats payloads, is deduplicated."""
+    with PayloadCorpus() as corpus:
+        payloads = list(corpus.entries("sql-injection/auth_bypass"))
+        assert payloads and len(payloads) == len(set(payloads))
+        assert len(corpus) == len(set(corpus.entries()))
+
+def test_encodings_round_trip():
+    """Tests that the URL and HTML encodings decode back to the payload."""
+    payload = "<a href=\"x\" onclick='alert(1)'>é & 100%</a>"
+    url, double_url, escaped, decimal, hexadecimal = variants(
+        [payload], ["url", "double-url", "html", "html-decimal", "html-hex"]
+    )
+    assert unquote(url) == payload and unquote(unquote(double_url)) == payload
+    assert "<" not in escaped and "'" not in escaped
+    assert html.unescape(escaped) == html.unescape(decimal) == html.unescape(hexadecimal) == payload
+    assert list(variants(["<"], ["unicode", "url-unicode"])) == ["\\u003c", "%u003c"]
+
+def test_mutations_and_duplicate_variants():
+    """Tests the mutations, and that variants that come out the same are yielded once."""
+    assert list(variants(["' OR 1=1 --"], mutations=["none", "lower", "alternate-case", "comment-spaces", "plus-spaces"])) == [
+        "' OR 1=1 --", "' or 1=1 --", "' oR 1=1 --", "'/**/OR/**/1=1/**/--", "'+OR+1=1+--"
+    ]
+    assert list(variants(["1=1"], mutations=["none", "upper", "lower"])) == ["1=1"]
+
+def test_unknown_names_fail_before_iterating(corpus_directory):
+    """Tests that unknown encodings, mutations, categories and tags raise when the generator is created."""
+    with pytest.raises(ValueError, match="encoding 'base65'"):
+        variants(["x"], ["base65"])
+    with pytest.raises(ValueError, match="mutation"):
+        variants(["x"], mutations=["reverse"])
+    with PayloadCorpus(str(corpus_directory)) as corpus:
+        with pytest.raises(ValueError, match="'ldap'"):
+            corpus.entries("ldap")
+        with pytest.raises(ValueError, match="'xml'"):
+            corpus.variants(tags=["xml"])
+
+def test_variants_are_generated_lazily(tmp_path):
+    """Tests that variants are streamed without being held in memory."""
+    (tmp_path / "generated.txt").write_text("".join(f"' or {number}={number} -- {number}\n" for number in range(2_000)))
+    with PayloadCorpus(str(tmp_path)) as corpus:
+        generated = corpus.variants(
+            encodings=["raw", "url", "double-url", "html", "html-hex"],
+            mutations=["none", "upper", "lower", "alternate-case", "comment-spaces", "tab-spaces", "plus-spaces"]
+        )
+        tracemalloc.start()
+        count = sum(1 for _ in generated)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    assert count == 60_000
+    assert peak < 256 * 1024
+
+def test_run_payloads_writes_one_variant_per_line(corpus_directory, capsys):
+    """Tests the payloads subcommand's output file, limit and line-break escaping."""
+    (corpus_directory / "crlf.txt").write_bytes(b"header\rInjected: 1\n")
+    output = corpus_directory / "wordlist.out"
+    assert run_payloads("xss", encodings=["raw", "url"], limit=3, output_path=str(output), directory=str(corpus_directory)) == 3
+    assert output.read_text().splitlines() == [
+        "<script>alert(1)</script>", "%3Cscript%3Ealert%281%29%3C%2Fscript%3E", "<img src=x onerror=alert(1)>"
+    ]
+    capsys.readouterr()
+    assert run_payloads("crlf", directory=str(corpus_directory)) == 1
+    assert capsys.readouterr().out == "header%0dInjected: 1\n"
+    assert run_payloads("missing", directory=str(corpus_directory)) == 0
+    assert "Unknown category or tag 'missing'" in capsys.readouterr().err
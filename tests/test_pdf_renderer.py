@@ -0,0 +1,103 @@
+import json
+import time
+import threading
+import importlib.util
+import pytest
+from scripts.pdf_renderer import StubRenderer, render_pdf, render_pdfs, get_renderer, RECORD_SUFFIX
+from scripts.report import generate_reports
+
+@pytest.fixture
+def html(tmp_path):
+    path = tmp_path / "report.html"
+    path.write_text("<html><body>nmap</body></html>")
+    return path
+
+class CountingRenderer(StubRenderer):
+    """A stub renderer that records how many documents render at once."""
+    def __init__(self, delay):
+        super().__init__(delay)
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.calls = 0
+
+    def __call__(self, html_path, pdf_path):
+        with self.lock:
+            self.running += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            super().__call__(html_path, pdf_path)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+def test_render_skips_unchanged_html(html, tmp_path):
+    """Tests that a PDF is only rendered again when its HTML changes."""
+    pdf = tmp_path / "report.pdf"
+    renderer = CountingRenderer(0.01)
+
+    first = render_pdf(str(html), str(pdf), renderer)
+    assert first["status"] == "rendered" and first["seconds"] >= 0.01
+    assert pdf.read_text().startswith("%PDF-1.4")
+    record = json.loads((tmp_path / f"report.pdf{RECORD_SUFFIX}").read_text())
+    assert record["render_seconds"] == first["seconds"]
+
+    assert render_pdf(str(html), str(pdf), renderer)["status"] == "skipped"
+    html.write_text("<html><body>nmap and hydra</body></html>")
+    assert render_pdf(str(html), str(pdf), renderer)["status"] == "rendered"
+    pdf.unlink()
+    assert render_pdf(str(html), str(pdf), renderer)["status"] == "rendered"
+    assert renderer.calls == 3
+
+def test_render_failure_is_reported(html, tmp_path):
+    """Tests that a failing renderer is reported and not recorded as rendered."""
+    def broken(html_path, pdf_path):
+        raise OSError("wkhtmltopdf exited with code 1")
+
+    result = render_pdf(str(html), str(tmp_path / "report.pdf"), broken)
+    assert result["status"] == "failed" and "code 1" in result["error"]
+    assert not (tmp_path / f"report.pdf{RECORD_SUFFIX}").exists()
+
+def test_worker_pool_is_bounded_and_parallel(tmp_path):
+    """Tests that documents render concurrently but never more than `workers` at once."""
+    documents = []
+    for index in range(8):
+        source = tmp_path / f"{index}.html"
+        source.write_text(f"<p>{index}</p>")
+        documents.append((str(source), str(tmp_path / f"{index}.pdf")))
+    renderer = CountingRenderer(0.2)
+
+    started = time.perf_counter()
+    results = render_pdfs(documents, renderer, workers=4)
+    elapsed = time.perf_counter() - started
+
+    assert [result["pdf"] for result in results] == [pdf for _, pdf in documents]
+    assert all(result["status"] == "rendered" for result in results)
+    assert renderer.peak == 4
+    assert elapsed < 8 * 0.2 * 0.75
+    assert render_pdfs([], renderer) == []
+
+def test_generate_reports(tmp_path, monkeypatch, capsys):
+    """Tests batch report generation with the stub renderer."""
+    monkeypatch.setattr("scripts.report_engine.bytecode_cache_directory", lambda: str(tmp_path / "bytecode"))
+    base = tmp_path / "htb"
+    for name in ("Alpha", "Beta", "Gamma"):
+        (base / name).mkdir(parents=True)
+        (base / name / "nmap.txt").write_text("22/tcp open  ssh     OpenSSH 8.2p1\n")
+
+    results = generate_reports(None, "Alice", str(base), renderer="stub", workers=2)
+    assert [result["status"] for result in results] == ["rendered"] * 3
+    assert (base / "Beta" / "Beta_report.pdf").exists()
+
+    results = generate_reports(["Alpha", "Missing"], "Alice", str(base), renderer="stub")
+    assert [result["status"] for result in results] == ["skipped"]
+    assert "Skipping 'Missing'" in capsys.readouterr().out
+
+def test_get_renderer():
+    """Tests renderer selection."""
+    assert isinstance(get_renderer("stub"), StubRenderer)
+    with pytest.raises(ValueError):
+        get_renderer("prince")
+    if importlib.util.find_spec("pdfkit") is None:
+        assert get_renderer("pdfkit") is None
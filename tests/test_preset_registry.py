@@ -0,0 +1,97 @@
+import os
+import json
+import pytest
+from scripts.preset_registry import PresetRegistry, PresetTemplate, placeholder_values
+from exceptions import ConfigFileNotFoundError, InvalidPresetError, InvalidConfigError
+
+@pytest.fixture
+def config_dir(tmp_path):
+    """Creates a configuration directory with a hydra config."""
+    directory = tmp_path / "config"
+    directory.mkdir()
+    (directory / "base.json").write_text(json.dumps({"base_directory": "~/htb/"}))
+    (directory / "hydra.json").write_text(json.dumps({
+        "output_file": "hydra.txt",
+        "presets": [{
+            "name": "login-bruteforce",
+            "description": "Web login brute force.",
+            "command": "-l admin -P /w.txt -o {output_file} {ip} http-post-form '/login:user=^USER^&pass=^PASS^:F=Invalid'"
+        }]
+    }))
+    return directory
+
+def test_template_renders_placeholders_and_keeps_quoted_arguments():
+    """Tests that quoted arguments stay one token and placeholders are filled."""
+    template = PresetTemplate({"name": "dir", "command": "dir -u http://{domain}:{port}/ -w '/lists/my words.txt'"})
+
+    assert template.placeholders == {"domain", "port"}
+    assert template.render({"domain": "box.htb", "port": 8080}) == [
+        "dir", "-u", "http://box.htb:8080/", "-w", "/lists/my words.txt"
+    ]
+    with pytest.raises(ValueError, match="port"):
+        template.render({"domain": "box.htb"})
+
+def test_registry_compiles_once_and_reloads_on_change(config_dir):
+    """Tests that a config is served from memory until its file changes."""
+    registry = PresetRegistry(str(config_dir))
+    first = registry.tool("hydra")
+    assert registry.tool("/usr/bin/hydra") is first
+
+    argv = first.preset("login-bruteforce").render(placeholder_values({"ip": "10.0.0.1"}, "/c/hydra.txt"))
+    assert argv[-2:] == ["http-post-form", "/login:user=^USER^&pass=^PASS^:F=Invalid"]
+    assert "/c/hydra.txt" in argv
+
+    path = config_dir / "hydra.json"
+    data = json.loads(path.read_text())
+    data["output_file"] = "creds.txt"
+    path.write_text(json.dumps(data))
+    os.utime(path, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+    assert registry.tool("hydra").output_file == "creds.txt"
+
+def test_registry_errors(config_dir):
+    """Tests missing tools, unknown presets and schema violations."""
+    registry = PresetRegistry(str(config_dir))
+    with pytest.raises(ConfigFileNotFoundError):
+        registry.tool("nikto")
+    with pytest.raises(InvalidPresetError):
+        registry.preset("hydra", "missing")
+
+    (config_dir / "ffuf.json").write_text(json.dumps({"presets": [
+        {"name": "a", "command": "-u http://{ip}/"}, {"name": "a", "command": "-w x"}
+    ]}))
+    (config_dir / "nmap.json").write_text('{"presets": [{"name": "quick", "command": "-F \\"{ip}"}]}')
+    (config_dir / "wpscan.json").write_text('{"presets": [')
+
+    errors = registry.validate_all()
+    assert set(errors) == {"ffuf", "nmap", "wpscan"}
+    assert "duplicate preset name 'a'" in errors["ffuf"]
+    assert "tokenize" in errors["nmap"]
+    with pytest.raises(InvalidConfigError, match="invalid JSON"):
+        registry.tool("wpscan")
+
+def test_shipped_configs_are_valid():
+    """Tests that every bundled tool configuration passes validation."""
+    config_dir = os.path.join(os.path.dirname(__file__), "..", "config")
+    assert PresetRegistry(config_dir).validate_all() == {}
+
+def test_run_tool_renders_argv_from_metadata(tmp_path, config_dir, monkeypatch):
+    """Tests that run_tool substitutes placeholders and lets the tool write its own output file."""
+    import sys
+    from scripts.run_tool import run_tool
+
+    stub = tmp_path / "hydra"
+    stub.write_text(
+        f"#!{sys.executable}\nimport sys\nargs = sys.argv[1:]\n"
+        "open(args[args.index('-o') + 1], 'w').write(repr(args))\nprint('progress line')\n"
+    )
+    stub.chmod(0o755)
+    challenge_path = tmp_path / "Challenge"
+    challenge_path.mkdir()
+    (challenge_path / "metadata.json").write_text(json.dumps({"name": "Challenge", "ip": "10.0.0.7"}))
+    monkeypatch.setattr("scripts.run_tool.get_registry", lambda: PresetRegistry(str(config_dir)))
+
+    run_tool(str(stub), "login-bruteforce", str(challenge_path), use_cache=False)
+
+    args = eval((challenge_path / "hydra.txt").read_text())
+    assert "10.0.0.7" in args
+    assert args[-1] == "/login:user=^USER^&pass=^PASS^:F=Invalid"
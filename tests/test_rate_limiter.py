@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+from scripts.rate_limiter import HostRateLimiter, is_error_line, apply_rate_control, rate_flag_value
+from scripts.sharding import byte_range_feeder, build_wordlist_shards
+
+class Clock:
+    """A manually advanced clock."""
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class RecordingStdin:
+    """Collects the bytes a feeder writes."""
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+@pytest.fixture
+def limiter(tmp_path, clock):
+    """Creates a limiter with a small burst and a one-second window."""
+    return HostRateLimiter("10.0.0.1", str(tmp_path / "rates"), clock=clock,
+                           initial_rate=10, min_rate=1, max_rate=40, burst=5, window=1, increase=5)
+
+def test_bucket_allows_burst_then_paces(limiter, clock):
+    """Tests that requests beyond the burst wait for the bucket to refill."""
+    assert limiter.reserve(5) == 0.0
+    assert limiter.reserve(2) == pytest.approx(0.2)
+
+    clock.now += 0.7
+    assert limiter.reserve(1) == pytest.approx(0.0)
+
+def test_limiters_of_one_host_share_the_bucket(limiter, tmp_path, clock):
+    """Tests that separate limiter instances (e.g., in worker processes) share state."""
+    other = HostRateLimiter("10.0.0.1", str(tmp_path / "rates"), clock=clock, initial_rate=10, burst=5)
+    elsewhere = HostRateLimiter("10.0.0.2", str(tmp_path / "rates"), clock=clock, initial_rate=10, burst=5)
+
+    limiter.reserve(5)
+    assert other.reserve(1) == pytest.approx(0.1)
+    assert elsewhere.reserve(1) == 0.0
+
+def test_rate_backs_off_on_errors_and_recovers(limiter, clock):
+    """Tests additive increase after clean windows and multiplicative decrease after errors."""
+    limiter.reserve(10)
+    clock.now += 1.0
+    assert limiter.rate == 15
+
+    limiter.reserve(10)
+    limiter.observe(errors=3)
+    clock.now += 1.0
+    limiter.flush()
+    assert limiter.rate == 7.5
+
+    for _ in range(10):
+        limiter.reserve(1)
+        limiter.observe(errors=1)
+        clock.now += 1.0
+        limiter.flush()
+    assert limiter.rate == 1
+
+    for _ in range(20):
+        limiter.reserve(1)
+        clock.now += 1.0
+        limiter.flush()
+    assert limiter.rate == 40
+
+def test_idle_windows_keep_the_rate(limiter, clock):
+    """Tests that the rate does not grow while nothing is sent."""
+    clock.now += 10
+    assert limiter.rate == 10
+
+def test_clean_runs_of_flag_paced_tools_raise_the_rate(limiter, clock):
+    """Tests that a tool paced by its own flags gains rate on clean windows and loses it on errors."""
+    handle = limiter.error_handler()
+    for _ in range(3):
+        for line in range(20):
+            handle("stdout", f"word{line} [Status: 404, Size: 10]")
+        clock.now += 1.0
+        limiter.flush()
+    assert limiter.rate == 25
+
+    for line in range(20):
+        handle("stdout", "[ERROR] could not connect - Connection refused" if line < 5 else "word [Status: 200]")
+    clock.now += 1.0
+    limiter.flush()
+    assert limiter.rate == 12.5
+
+def test_error_lines():
+    """Tests the detection of rate-related errors in tool output."""
+    assert is_error_line("[ERROR] Get \"http://10.0.0.1/x\": context deadline exceeded (Client.Timeout exceeded)")
+    assert is_error_line("[ERROR] could not connect to ssh://10.0.0.1:22 - Connection refused")
+    assert is_error_line("admin [Status: 429, Size: 0, Words: 1, Lines: 1]")
+    assert not is_error_line("/admin (Status: 200) [Size: 1234]")
+
+def test_apply_rate_control_replaces_flags():
+    """Tests the conversion of a rate into ffuf, gobuster and hydra flags."""
+    assert apply_rate_control(["-u", "x", "-rate", "999"], {"flag": "-rate", "value": "rate"}, 42.7) == ["-u", "x", "-rate", "42"]
+    assert rate_flag_value({"value": "delay", "threads": 10}, 50) == "200ms"
+    assert rate_flag_value({"value": "tasks", "per_task_rate": 4, "max_tasks": 16}, 200) == "16"
+    assert rate_flag_value({"value": "tasks", "per_task_rate": 4}, 2) == "1"
+
+def test_paced_feeder_acquires_one_token_per_line(tmp_path, limiter):
+    """Tests that a limited feeder sends every line and acquires a token for each."""
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_bytes(b"".join(f"word{i}\n".encode() for i in range(23)))
+    acquired = []
+
+    async def acquire_async(count):
+        acquired.append(count)
+    limiter.acquire_async = acquire_async
+
+    stdin = RecordingStdin()
+    asyncio.run(byte_range_feeder(str(wordlist), 0, wordlist.stat().st_size, limiter=limiter)(stdin))
+
+    assert stdin.data == wordlist.read_bytes()
+    assert sum(acquired) == 23
+    assert max(acquired) <= 5
+
+def test_shards_split_the_rate_for_flag_controlled_tools(tmp_path, limiter):
+    """Tests that shards of tools without stdin pacing get an equal share of the rate."""
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("".join(f"word{i}\n" for i in range(100)))
+    shard_config = {"count": 4, "max_concurrency": 2, "wordlist_flag": "-w"}
+
+    jobs = build_wordlist_shards(
+        "ffuf", f"-u http://{{ip}}/FUZZ -w {wordlist}", {"ip": "10.0.0.1"}, shard_config,
+        str(tmp_path), limiter=limiter, rate_control={"flag": "-rate", "value": "rate"}
+    )
+
+    assert len(jobs) == 4
+    assert all(job["argv"][-2:] == ["-rate", "5"] for job in jobs)
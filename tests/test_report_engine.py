@@ -0,0 +1,84 @@
+import re
+import time
+import pytest
+from jinja2 import Environment, FileSystemLoader
+from scripts.report_engine import get_environment, create_environment, precompile_templates, render_report, TEMPLATES_DIRECTORY
+from scripts.report import generate_report, build_report_context
+
+NMAP_OUTPUT = "PORT   STATE SERVICE VERSION\n22/tcp open  ssh     OpenSSH 8.2p1\n80/tcp open  http    Apache httpd 2.4.41\n"
+
+@pytest.fixture
+def challenge_dir(tmp_path):
+    path = tmp_path / "Lame"
+    path.mkdir()
+    (path / "nmap.txt").write_text(NMAP_OUTPUT)
+    (path / "gobuster.txt").write_text("/admin (Status: 301) [Size: 10]\n")
+    return path
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    path = tmp_path / "bytecode"
+    monkeypatch.setattr("scripts.report_engine.bytecode_cache_directory", lambda: str(path))
+    return path
+
+def test_precompile_shipped_templates(tmp_path):
+    """Tests that every shipped template compiles and is written to the bytecode cache."""
+    environment = get_environment(cache_directory=str(tmp_path / "bytecode"))
+    compiled, errors = precompile_templates(environment)
+
+    assert errors == {}
+    assert compiled >= 20
+    assert len(list((tmp_path / "bytecode").iterdir())) == compiled
+    assert get_environment(cache_directory=str(tmp_path / "bytecode")) is environment
+
+def test_new_process_loads_bytecode_without_compiling(tmp_path, monkeypatch):
+    """Tests that a fresh environment on the same cache does not parse the templates again."""
+    precompile_templates(get_environment(cache_directory=str(tmp_path / "bytecode")))
+
+    fresh = create_environment(cache_directory=str(tmp_path / "bytecode"))
+    monkeypatch.setattr(fresh, "compile", lambda *args, **kwargs: pytest.fail("template was recompiled"))
+    assert "Table of Contents" in fresh.get_template("base.html").render({"tools": []})
+
+def test_generate_report(challenge_dir, cache_dir, capsys):
+    """Tests that the shipped report renders tool sections, the nmap table and glossary links."""
+    generate_report("Lame", "Alice", str(challenge_dir), renderer="stub")
+
+    html = (challenge_dir / "Lame_report.html").read_text()
+    assert "<title>Lame Report</title>" in html
+    assert '<section id="nmap"' in html and '<section id="gobuster"' in html
+    assert "OpenSSH 8.2p1" in html
+    assert "/admin (Status: 301)" in html
+    anchors = set(re.findall(r'href="#(glossary-[^"]+)"', html))
+    assert anchors and anchors == set(re.findall(r'<dt id="(glossary-[^"]+)"', html))
+    assert html.index('<section id="glossary"') < html.index("<footer")
+    assert cache_dir.exists()
+    assert (challenge_dir / "Lame_report.pdf").exists()
+
+def test_tool_output_is_escaped(challenge_dir, cache_dir):
+    """Tests that markup in output taken from a target cannot break out of the report."""
+    (challenge_dir / "gobuster.txt").write_text("/<script>alert(1)</script> (Status: 200) [Size: 10]\n</pre><img src=x>\n")
+    generate_report("Lame", "Alice", str(challenge_dir), renderer="stub")
+
+    html = (challenge_dir / "Lame_report.html").read_text()
+    assert "<script>alert(1)" not in html and "<img src=x>" not in html
+    assert "&lt;script&gt;alert(1)&lt;/script&gt;" in html and "&lt;/pre&gt;&lt;img src=x&gt;" in html
+
+def test_render_benchmark(challenge_dir, cache_dir):
+    """Benchmarks per-report render latency with a fresh and a long-lived environment."""
+    context = build_report_context("Lame", "Alice", str(challenge_dir))
+    reports = 20
+
+    def timed(render):
+        timings = []
+        for _ in range(reports):
+            started = time.perf_counter()
+            render()
+            timings.append(time.perf_counter() - started)
+        return sum(timings) / reports
+
+    cold = timed(lambda: Environment(loader=FileSystemLoader(TEMPLATES_DIRECTORY)).get_template("base.html").render(context))
+    render_report(context)
+    warm = timed(lambda: render_report(context))
+
+    print(f"per report: {cold * 1000:.2f} ms compiling every run, {warm * 1000:.2f} ms with the cached environment")
+    assert warm < cold
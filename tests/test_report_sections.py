@@ -0,0 +1,108 @@
+import os
+import html
+import re
+import tracemalloc
+from scripts.report_sections import chunk_end, output_section, map_file, EXCERPT_BYTES, APPENDIX_DIRECTORY
+from scripts.report import nmap_file_to_table, write_report_html
+
+def gobuster_output(path, lines):
+    """Writes a gobuster-like output file of `lines` lines."""
+    with open(path, "w") as f:
+        for index in range(lines):
+            f.write(f"/directory-{index:08d}/with/a/longer/path (Status: 403) [Size: {index % 997}]\n")
+
+def appendix_text(challenge_dir, pages):
+    """Returns the raw output contained in a section's appendix pages."""
+    text = ""
+    for page in pages:
+        content = (challenge_dir / page).read_text()
+        text += html.unescape(re.search(r"<pre>(.*)</pre>", content, re.DOTALL).group(1))
+    return text
+
+def test_chunk_end():
+    """Tests chunk boundaries at line limits, byte limits, long lines and the final line."""
+    data = b"one\ntwo\nthree\nfour"
+    assert chunk_end(data, 0, 2, 100) == (8, 2)
+    assert chunk_end(data, 8, 5, 100) == (len(data), 2)
+    assert chunk_end(data, 0, 10, 9) == (8, 2)
+    assert chunk_end(b"x" * 50 + b"\n", 0, 10, 20) == (20, 0)
+    assert chunk_end(b"x" * 50 + b"\n", 40, 10, 20) == (51, 1)
+    assert chunk_end(b"", 0, 10, 20) == (0, 0)
+
+def test_small_output_is_inline(tmp_path):
+    """Tests that short outputs are embedded whole without an appendix."""
+    path = tmp_path / "nikto.txt"
+    path.write_text("+ Server: Apache\n+ /admin found\n")
+
+    section = output_section("nikto", str(path), str(tmp_path))
+    assert section["output"] == "+ Server: Apache\n+ /admin found\n"
+    assert not section["truncated"] and section["appendix"] == []
+    assert not (tmp_path / APPENDIX_DIRECTORY).exists()
+
+    (tmp_path / "empty.txt").write_text("")
+    with map_file(str(tmp_path / "empty.txt")) as mapped:
+        assert len(mapped) == 0
+
+def test_large_output_is_excerpted_and_paginated(tmp_path, monkeypatch):
+    """Tests that long outputs keep a bounded excerpt and paginate the rest losslessly."""
+    monkeypatch.setattr("scripts.report_sections.APPENDIX_PAGE_LINES", 1000)
+    path = tmp_path / "gobuster.txt"
+    gobuster_output(path, 4500)
+    with open(path, "a") as f:
+        f.write("<script>alert(1)</script> & no trailing newline")
+
+    section = output_section("gobuster", str(path), str(tmp_path), "Gobuster")
+    assert section["truncated"]
+    assert len(section["output"].encode()) <= EXCERPT_BYTES and section["output"].endswith("\n")
+    assert section["lines"] == 4501
+    assert section["appendix"] == [os.path.join(APPENDIX_DIRECTORY, f"gobuster-{page:03d}.html") for page in range(1, 6)]
+    assert appendix_text(tmp_path, section["appendix"]) == path.read_text()
+    assert "&lt;script&gt;" in (tmp_path / section["appendix"][-1]).read_text()
+
+    # Unchanged outputs reuse their pages; shorter outputs remove the extra ones
+    first_page = tmp_path / section["appendix"][0]
+    written = first_page.stat().st_mtime_ns
+    assert output_section("gobuster", str(path), str(tmp_path))["appendix"] == section["appendix"]
+    assert first_page.stat().st_mtime_ns == written
+
+    gobuster_output(path, 1500)
+    section = output_section("gobuster", str(path), str(tmp_path))
+    assert len(section["appendix"]) == 2
+    assert sorted(file for file in os.listdir(tmp_path / APPENDIX_DIRECTORY) if file.endswith(".html")) == [
+        "gobuster-001.html", "gobuster-002.html"
+    ]
+
+def test_nmap_table_from_file_is_capped(tmp_path):
+    """Tests that the nmap table streams the whole output file and stops at the row cap."""
+    path = tmp_path / "nmap.txt"
+    path.write_text("Nmap scan report\n" + "".join(f"{port}/tcp open  svc{port}\n" for port in range(1, 3001)))
+
+    assert len(nmap_file_to_table(str(path))) == 1000
+    assert nmap_file_to_table(str(path), max_rows=5)[-1] == ["5/tcp", "svc5", "", "open"]
+
+def test_report_memory_is_flat(tmp_path, monkeypatch):
+    """Tests that report generation memory does not grow with the size of the tool outputs."""
+    monkeypatch.setattr("scripts.report_engine.bytecode_cache_directory", lambda: str(tmp_path / "bytecode"))
+
+    def peak(lines):
+        challenge_dir = tmp_path / f"Challenge-{lines}"
+        challenge_dir.mkdir()
+        gobuster_output(challenge_dir / "gobuster.txt", lines)
+        (challenge_dir / "nmap.txt").write_text("".join(f"{port}/tcp open  svc{port}\n" for port in range(1, 201)))
+        write_report_html("Warmup", "Alice", str(challenge_dir))
+
+        os.remove(challenge_dir / "Warmup_report.html")
+        for file in os.listdir(challenge_dir / APPENDIX_DIRECTORY):
+            os.remove(challenge_dir / APPENDIX_DIRECTORY / file)
+        tracemalloc.start()
+        report_path = write_report_html("Challenge", "Alice", str(challenge_dir))
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert os.path.getsize(report_path) < 1024 * 1024
+        return peak_bytes, os.path.getsize(challenge_dir / "gobuster.txt")
+
+    small, small_size = peak(50_000)
+    large, large_size = peak(400_000)
+    print(f"{small_size / 1e6:.0f} MB output: {small / 1e6:.1f} MB peak; {large_size / 1e6:.0f} MB output: {large / 1e6:.1f} MB peak")
+    assert large_size > 7 * small_size
+    assert large < small * 1.5 + 1024 * 1024
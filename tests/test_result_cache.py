@@ -0,0 +1,155 @@
+import os
+import time
+import pytest
+from scripts.result_cache import ResultCache, cache_enabled, disable_cache, referenced_files, preset_ttl, NO_CACHE_ENV
+
+@pytest.fixture
+def cache(tmp_path):
+    """Creates a result cache in a temporary directory."""
+    result_cache = ResultCache(str(tmp_path / "cache"), max_bytes=100)
+    yield result_cache
+    result_cache.close()
+
+@pytest.fixture
+def output_file(tmp_path):
+    """Creates a tool output file."""
+    path = tmp_path / "nmap.txt"
+    path.write_text("22/tcp open ssh\n")
+    return path
+
+def test_make_key_tracks_wordlist_contents(cache, tmp_path):
+    """Tests that editing a referenced wordlist changes the cache key."""
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("admin\n")
+    command = f"dir -u http://10.0.0.1/ -w {wordlist}"
+
+    first = cache.make_key("gobuster", command, "10.0.0.1")
+    assert cache.make_key("gobuster", command, "10.0.0.1") == first
+    assert cache.make_key("gobuster", command, "10.0.0.2") != first
+
+    wordlist.write_text("admin\nbackup\n")
+    os.utime(wordlist, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+    assert cache.make_key("gobuster", command, "10.0.0.1") != first
+
+def test_put_and_get(cache, output_file):
+    """Tests that stored outputs are served back."""
+    cache.put("a" * 64, str(output_file), ttl=60)
+
+    cached = cache.get("a" * 64)
+    assert cached is not None
+    with open(cached) as f:
+        assert f.read() == "22/tcp open ssh\n"
+    assert cache.get("b" * 64) is None
+
+def test_put_from_offset(cache, output_file):
+    """Tests that only the output after the offset is cached."""
+    cache.put("a" * 64, str(output_file), ttl=60, offset=7)
+    with open(cache.get("a" * 64)) as f:
+        assert f.read() == "open ssh\n"
+
+def test_expired_entries_are_misses(cache, output_file):
+    """Tests that entries past their TTL are removed."""
+    cache.put("a" * 64, str(output_file), ttl=-1)
+    assert cache.get("a" * 64) is None
+    assert cache.size() == 0
+
+def test_lru_eviction(cache, tmp_path):
+    """Tests that the least recently used entries are evicted first."""
+    source = tmp_path / "out.txt"
+    source.write_text("x" * 40)
+
+    cache.put("1" * 64, str(source), ttl=60)
+    cache.put("2" * 64, str(source), ttl=60)
+    time.sleep(0.01)
+    assert cache.get("1" * 64)
+    cache.put("3" * 64, str(source), ttl=60)
+
+    assert cache.size() <= 100
+    assert cache.get("2" * 64) is None
+    assert cache.get("1" * 64) and cache.get("3" * 64)
+
+def test_disable_cache(monkeypatch):
+    """Tests the --no-cache switch."""
+    monkeypatch.setenv(NO_CACHE_ENV, "")
+    assert cache_enabled()
+    disable_cache()
+    assert not cache_enabled()
+
+def test_referenced_files(tmp_path):
+    """Tests that only existing file paths are treated as inputs."""
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("admin\n")
+    assert referenced_files(["-w", str(wordlist), "-u", "http://x/", "/missing.txt"]) == [str(wordlist)]
+
+def test_run_tool_serves_repeated_runs_from_cache(tmp_path, monkeypatch):
+    """Tests that an unchanged second run is served from the cache."""
+    import sys
+    import json
+    from scripts.run_tool import run_tool
+    from scripts.preset_registry import PresetRegistry
+
+    counter = tmp_path / "runs.txt"
+    stub = tmp_path / "scanner"
+    stub.write_text(f"#!{sys.executable}\nopen({str(counter)!r}, 'a').write('x')\nprint('22/tcp open ssh')\n")
+    stub.chmod(0o755)
+    challenge_path = tmp_path / "Challenge"
+    challenge_path.mkdir()
+    (challenge_path / "metadata.json").write_text(json.dumps({"name": "Challenge", "ip": "10.0.0.1"}))
+    config = {
+        "output_file": "scanner.txt",
+        "presets": [{"name": "quick", "description": "Quick scan.", "command": "-F {ip}"}]
+    }
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "scanner.json").write_text(json.dumps(config))
+    monkeypatch.setattr("scripts.run_tool.get_registry", lambda: PresetRegistry(str(tmp_path / "config")))
+    monkeypatch.setattr("scripts.result_cache.load_config", lambda name: {"cache": {"directory": str(tmp_path / "cache"), "max_size_mb": 1}})
+
+    run_tool(str(stub), "quick", str(challenge_path), use_cache=True)
+    run_tool(str(stub), "quick", str(challenge_path), use_cache=True)
+    run_tool(str(stub), "quick", str(challenge_path), use_cache=False)
+
+    assert counter.read_text() == "xx"
+    assert (challenge_path / "scanner.txt").read_text() == "22/tcp open ssh\n" * 3
+
+def test_cached_runs_replace_files_tools_write_themselves(tmp_path, monkeypatch):
+    """Tests that a cache hit for a tool writing its own output file leaves one copy of the output."""
+    import sys
+    import json
+    from scripts.run_tool import run_tool
+    from scripts.preset_registry import PresetRegistry
+
+    counter = tmp_path / "runs.txt"
+    stub = tmp_path / "scanner"
+    stub.write_text(f"#!{sys.executable}\nimport sys\nopen({str(counter)!r}, 'a').write('x')\nopen(sys.argv[2], 'w').write('22/tcp open ssh\\n')\n")
+    stub.chmod(0o755)
+    challenge_path = tmp_path / "Challenge"
+    challenge_path.mkdir()
+    (challenge_path / "metadata.json").write_text(json.dumps({"name": "Challenge", "ip": "10.0.0.1"}))
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "scanner.json").write_text(json.dumps({
+        "output_file": "scanner.txt",
+        "presets": [{"name": "quick", "description": "Quick scan.", "command": "-oN {output_file} {ip}"}]
+    }))
+    monkeypatch.setattr("scripts.run_tool.get_registry", lambda: PresetRegistry(str(tmp_path / "config")))
+    monkeypatch.setattr("scripts.result_cache.load_config", lambda name: {"cache": {"directory": str(tmp_path / "cache"), "max_size_mb": 1}})
+
+    for _ in range(3):
+        run_tool(str(stub), "quick", str(challenge_path), use_cache=True)
+        assert (challenge_path / "scanner.txt").read_text() == "22/tcp open ssh\n"
+    assert counter.read_text() == "x"
+
+def test_stateful_tools_are_not_cached_by_default(monkeypatch):
+    """Tests that tools with a zero tool-level TTL are only cached by presets that opt in."""
+    from scripts.preset_registry import PresetRegistry
+
+    monkeypatch.setattr("scripts.result_cache.load_config", lambda name: {"cache": {"default_ttl": 86400}})
+    registry = PresetRegistry()
+    hydra = registry.tool("hydra")
+    nmap = registry.tool("nmap")
+
+    assert all(preset_ttl(preset.config, hydra) == 0 for preset in hydra.presets.values())
+    for tool in ("johntheripper", "metasploit", "netcat", "sqlmap"):
+        config = registry.tool(tool)
+        assert all(preset_ttl(preset.config, config) == 0 for preset in config.presets.values())
+    assert preset_ttl({"name": "opt-in", "cache_ttl": 60}, hydra) == 60
+    assert preset_ttl({"name": "plain"}, nmap) == 86400
@@ -0,0 +1,115 @@
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from scripts.scheduler import build_task_graph, critical_path, run_task_graph
+from exceptions import ScenarioDependencyError
+
+@pytest.fixture
+def recon_tasks():
+    """Creates a small recon scenario with one dependency."""
+    return [
+        {"name": "Nmap", "command": "nmap quick-scan"},
+        {"name": "Dirs", "command": "gobuster directory-enum"},
+        {"name": "Vhosts", "command": "gobuster vhosts-enum"},
+        {"name": "Exploits", "command": "searchsploit exploit-search", "depends_on": ["Nmap"]}
+    ]
+
+def test_build_task_graph_rejects_cycles():
+    """Tests that cyclic dependencies are reported."""
+    tasks = [
+        {"name": "A", "command": "nmap quick-scan", "depends_on": ["B"]},
+        {"name": "B", "command": "nmap quick-scan", "depends_on": ["A"]}
+    ]
+    with pytest.raises(ScenarioDependencyError, match="cycle"):
+        build_task_graph(tasks)
+
+def test_build_task_graph_rejects_unknown_dependency():
+    """Tests that dependencies on missing tasks are reported."""
+    tasks = [{"name": "A", "command": "nmap quick-scan", "depends_on": ["Missing"]}]
+    with pytest.raises(ScenarioDependencyError, match="unknown dependency 'Missing'"):
+        build_task_graph(tasks)
+
+def test_critical_path():
+    """Tests that the critical path follows the longest dependency chain."""
+    graph = {"A": [], "B": ["A"], "C": [], "D": ["B", "C"]}
+    total, path = critical_path(graph, {"A": 1.0, "B": 2.0, "C": 5.0, "D": 1.0})
+    assert total == 6.0
+    assert path == ["C", "D"]
+
+def test_run_task_graph_respects_dependencies_and_tool_limits(recon_tasks):
+    """Tests that dependencies run first and tool caps are never exceeded."""
+    events = []
+    running = {"gobuster": 0, "peak": 0}
+
+    def runner(tool, preset):
+        if tool == "gobuster":
+            running["gobuster"] += 1
+            running["peak"] = max(running["peak"], running["gobuster"])
+        time.sleep(0.05)
+        if tool == "gobuster":
+            running["gobuster"] -= 1
+        events.append(tool)
+
+    summary = run_task_graph(
+        recon_tasks,
+        runner,
+        lambda task: tuple(task["command"].split()),
+        max_workers=4,
+        tool_limits={"gobuster": 1},
+        executor_factory=ThreadPoolExecutor
+    )
+
+    assert all(r["status"] == "completed" for r in summary["results"].values())
+    assert events.index("nmap") < events.index("searchsploit")
+    assert running["peak"] == 1
+    assert summary["critical_path"] in (["Nmap", "Exploits"], ["Dirs"], ["Vhosts"])
+
+def test_run_task_graph_skips_dependents_of_failed_tasks(recon_tasks):
+    """Tests that a failed task causes its dependents to be skipped."""
+    def runner(tool, preset):
+        if tool == "nmap":
+            raise RuntimeError("Nmap failed")
+
+    summary = run_task_graph(
+        recon_tasks,
+        runner,
+        lambda task: tuple(task["command"].split()),
+        executor_factory=ThreadPoolExecutor
+    )
+
+    results = summary["results"]
+    assert results["Nmap"] == {"status": "failed", "duration": 0.0, "error": "Nmap failed"}
+    assert results["Exploits"]["status"] == "skipped"
+    assert results["Dirs"]["status"] == "completed"
+
+def test_run_task_graph_runs_in_parallel_processes():
+    """Tests that independent tasks overlap in worker processes."""
+    tasks = [{"name": f"Sleep {i}", "command": "sleep 0.3"} for i in range(4)]
+
+    summary = run_task_graph(tasks, time.sleep, lambda task: (0.3,), max_workers=4)
+
+    assert summary["wall_time"] < 1.0
+    assert summary["critical_path_time"] == pytest.approx(0.3, abs=0.1)
+
+def test_failed_tool_runs_fail_their_task(tmp_path):
+    """Tests that a tool run failing in a worker process fails its task and skips its dependents."""
+    from scripts.run_tool import run_tool
+
+    tasks = [
+        {"name": "Scan", "command": "no-such-tool quick"},
+        {"name": "Exploits", "command": "searchsploit exploit-search", "depends_on": ["Scan"]}
+    ]
+    summary = run_task_graph(tasks, run_tool, lambda task: (*task["command"].split(), str(tmp_path)), max_workers=1)
+
+    results = summary["results"]
+    assert results["Scan"]["status"] == "failed" and "no-such-tool" in results["Scan"]["error"]
+    assert results["Exploits"]["status"] == "skipped"
+
+@pytest.mark.parametrize("limits", [
+    {"max_workers": -1}, {"tool_limits": {"gobuster": 0}}, {"target_limit": 0}, {"tool_limits": {"nmap": "2"}}
+])
+def test_run_task_graph_rejects_limits_below_one(recon_tasks, limits):
+    """Tests that limits that would stop tasks from ever starting are rejected up front."""
+    with pytest.raises(ValueError, match="at least 1"):
+        run_task_graph(recon_tasks, lambda tool, preset: None, lambda task: tuple(task["command"].split()),
+                       executor_factory=ThreadPoolExecutor, **limits)
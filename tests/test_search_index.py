@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import pytest
+from scripts.search_index import SearchIndex, build_match_query, run_search
+
+@pytest.fixture
+def base(tmp_path):
+    """Creates a challenges directory with two challenges."""
+    base = tmp_path / "htb"
+    for name, ip, version in (("Alpha", "10.0.0.1", "2.4.41"), ("Beta", "10.0.0.2", "2.4.49")):
+        challenge = base / name
+        challenge.mkdir(parents=True)
+        (challenge / "metadata.json").write_text(json.dumps({"name": name, "ip": ip}, indent=4))
+        (challenge / "nmap.txt").write_text(f"22/tcp open  ssh     OpenSSH 8.2p1\n80/tcp open  http    Apache httpd {version}\n")
+        (challenge / "challenge.log").write_text(f"[2024-01-01 10:00:00]  Running tool 'nmap' against {ip}\n")
+    (base / "Alpha" / "gobuster.txt").write_text("/backup (Status: 403) [Size: 7]\n")
+    (base / "Alpha" / "findings.db").write_bytes(b"not indexed")
+    return base
+
+@pytest.fixture
+def index(tmp_path):
+    search_index = SearchIndex(str(tmp_path / "index" / "search.db"))
+    yield search_index
+    search_index.close()
+
+def test_build_match_query():
+    """Tests that words become phrases and operators are kept."""
+    assert build_match_query("apache 2.4.41 OR /backup") == '"apache" "2.4.41" OR "/backup"'
+    assert build_match_query('OR say "hi" NOT') == '"say" """hi"""'
+    assert build_match_query("admin* / --") == '"admin"*'
+
+def test_search_across_challenges(base, index):
+    """Tests that versions, paths and metadata are found in every challenge."""
+    assert index.update(str(base)) == {"indexed": 7, "appended": 0, "removed": 0, "unchanged": 0}
+
+    assert [(r["challenge"], r["file"], r["line"]) for r in index.search("apache 2.4.41")] == [("Alpha", "nmap.txt", 2)]
+    assert {r["challenge"] for r in index.search("2.4.41 OR /backup")} == {"Alpha"}
+    assert {r["challenge"] for r in index.search("apache")} == {"Alpha", "Beta"}
+    assert [r["challenge"] for r in index.search("apache", challenge="Beta")] == ["Beta"]
+    assert index.search('"10.0.0.2"')[0]["file"] in ("metadata.json", "challenge.log")
+    assert index.search("--") == []
+
+def test_incremental_update(base, index):
+    """Tests that only changed files are re-read and appended logs keep their line numbers."""
+    index.update(str(base))
+    assert index.update(str(base)) == {"indexed": 0, "appended": 0, "removed": 0, "unchanged": 7}
+
+    with open(base / "Beta" / "challenge.log", "a") as f:
+        f.write("[2024-01-01 10:05:00]  Found credentials for tomcat\n[2024-01-01 10:05:01]  partial")
+    (base / "Alpha" / "nmap.txt").write_text("8080/tcp open http-proxy\n")
+    os.remove(base / "Alpha" / "gobuster.txt")
+
+    assert index.update(str(base)) == {"indexed": 1, "appended": 1, "removed": 1, "unchanged": 4}
+    assert [(r["file"], r["line"]) for r in index.search("tomcat")] == [("challenge.log", 2)]
+    assert index.search("partial") == []
+    assert index.search("/backup") == []
+    assert [r["challenge"] for r in index.search("apache")] == ["Beta"]
+    assert index.search("http-proxy")[0]["line"] == 1
+
+    with open(base / "Beta" / "challenge.log", "a") as f:
+        f.write(" write finished\n")
+    index.update(str(base))
+    assert [r["line"] for r in index.search("partial write")] == [3]
+
+def test_run_search(base, tmp_path, monkeypatch, capsys):
+    """Tests the search command's output."""
+    monkeypatch.setattr("scripts.search_index.load_config", lambda name: {
+        "base_directory": str(base), "search": {"index": str(tmp_path / "search.db")}
+    })
+
+    results = run_search("/backup")
+    output = capsys.readouterr().out
+    assert len(results) == 1
+    assert "Alpha/gobuster.txt:1: /backup (Status: 403) [Size: 7]" in output
+    assert "1 matches in" in output
+
+def test_search_latency_across_many_challenges(tmp_path, index):
+    """Benchmarks searching and re-checking an index of a thousand challenges."""
+    base = tmp_path / "many"
+    for number in range(1000):
+        challenge = base / f"Challenge-{number:04d}"
+        challenge.mkdir(parents=True)
+        (challenge / "metadata.json").write_text(json.dumps({"name": challenge.name, "ip": f"10.1.{number // 256}.{number % 256}"}))
+        (challenge / "nmap.txt").write_text("".join(
+            f"{port}/tcp open  svc{port}  Example Daemon 1.{number % 50}.{port}\n" for port in range(1, 21)
+        ))
+        (challenge / "challenge.log").write_text("".join(f"[2024-01-01 10:00:{line:02d}]  Step {line} of challenge {number}\n" for line in range(20)))
+
+    started = time.perf_counter()
+    index.update(str(base))
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    assert index.update(str(base))["unchanged"] == 3000
+    recheck = time.perf_counter() - started
+
+    timings = []
+    for query in ("daemon 1.42.7", "svc13", "10.1.3.7", "step 19 OR svc20", "missing"):
+        started = time.perf_counter()
+        index.search(query)
+        timings.append(time.perf_counter() - started)
+
+    print(f"build {build:.2f}s, unchanged re-check {recheck * 1000:.0f} ms, "
+          f"searches {', '.join(f'{timing * 1000:.1f}' for timing in timings)} ms")
+    assert len(index.search("daemon 1.42.7")) == 20
+    assert max(timings) < 0.05
+    assert recheck < 1
@@ -0,0 +1,232 @@
+import sys
+import pytest
+from scripts.sharding import (
+    split_port_range, split_hosts, build_nmap_shards, merge_nmap_outputs, run_sharded_nmap,
+    wordlist_byte_ranges, merge_line_outputs, run_sharded_wordlist
+)
+
+STUB_NMAP = """#!{python}
+import sys
+args = sys.argv[1:]
+start, end = map(int, args[args.index("-p") + 1].split("-"))
+output = args[args.index("-oN") + 1]
+target = args[-1]
+with open(output, "w") as f:
+    f.write(f"Nmap scan report for {{target}}\\n")
+    f.write("PORT     STATE SERVICE VERSION\\n")
+    for port, line in ((22, "22/tcp open ssh OpenSSH 8.2p1"), (80, "80/tcp open http Apache httpd 2.4.41"), (40000, "40000/tcp open unknown")):
+        if start <= port <= end:
+            f.write(line + "\\n")
+    f.write("Service Info: OS: Linux\\n")
+"""
+
+STUB_GOBUSTER = """#!{python}
+import sys
+args = sys.argv[1:]
+assert args[args.index("-w") + 1] == "-"
+with open(args[args.index("-o") + 1], "w") as f:
+    for word in sys.stdin.read().split():
+        if word in ("admin", "backup"):
+            f.write(f"/{{word}} (Status: 301)\\n")
+    f.write("/robots.txt (Status: 200)\\n")
+"""
+
+@pytest.fixture
+def stub_nmap(tmp_path):
+    """Creates a stub nmap executable that reports ports within its '-p' range."""
+    path = tmp_path / "nmap"
+    path.write_text(STUB_NMAP.format(python=sys.executable))
+    path.chmod(0o755)
+    return str(path)
+
+def test_split_port_range_covers_all_ports():
+    """Tests that port shards are contiguous and cover 1-65535 exactly once."""
+    ranges = [tuple(map(int, r.split("-"))) for r in split_port_range(7)]
+    assert ranges[0][0] == 1
+    assert ranges[-1][1] == 65535
+    assert all(a[1] + 1 == b[0] for a, b in zip(ranges, ranges[1:]))
+
+def test_split_hosts():
+    """Tests that hosts are spread across groups without empty groups."""
+    assert split_hosts(["a", "b", "c"], 5) == [["a"], ["b"], ["c"]]
+    assert sorted(sum(split_hosts(list("abcdefg"), 3), [])) == list("abcdefg")
+
+def test_build_nmap_shards_replaces_port_and_output_options(tmp_path):
+    """Tests that shard commands carry their own port range and output file."""
+    jobs = build_nmap_shards("nmap", "-sS -sV -p- -oN {output_file}", ["10.0.0.1"], {"count": 2}, str(tmp_path))
+
+    assert len(jobs) == 2
+    assert jobs[0]["argv"] == ["nmap", "-sS", "-sV", "-p", "1-32768", "-oN", jobs[0]["output_path"], "10.0.0.1"]
+    assert "{output_file}" not in " ".join(jobs[1]["argv"])
+
+def test_merge_nmap_outputs_deduplicates(tmp_path):
+    """Tests that duplicate ports keep the most informative state."""
+    first = tmp_path / "a.txt"
+    second = tmp_path / "b.txt"
+    first.write_text("Nmap scan report for host\n80/tcp filtered http\nService Info: OS: Linux\n")
+    second.write_text("Nmap scan report for host\n80/tcp open http Apache\n22/tcp open ssh\nService Info: OS: Linux\n")
+
+    merged = merge_nmap_outputs([str(first), str(second)])
+
+    assert merged["host"]["ports"] == ["22/tcp open ssh", "80/tcp open http Apache"]
+    assert merged["host"]["notes"] == ["Service Info: OS: Linux"]
+
+def test_run_sharded_nmap_merges_per_target(tmp_path, stub_nmap):
+    """Tests a sharded scan end-to-end against a stub nmap."""
+    output_path = tmp_path / "nmap.txt"
+    shard_config = {"by": "ports", "count": 4, "max_concurrency": 2}
+
+    merged, results = run_sharded_nmap(
+        stub_nmap, "-sS -sV -p- -oN {output_file}", ["10.0.0.1", "10.0.0.2"], shard_config, str(output_path)
+    )
+
+    assert len(results) == 8
+    assert all(r.succeeded for r in results)
+    assert merged["10.0.0.1"]["ports"] == [
+        "22/tcp open ssh OpenSSH 8.2p1", "80/tcp open http Apache httpd 2.4.41", "40000/tcp open unknown"
+    ]
+    content = output_path.read_text()
+    assert content.count("Nmap scan report for") == 2
+    assert content.count("Service Info: OS: Linux") == 2
+
+STUB_NMAP_CONCURRENCY = """#!{python}
+import os, sys, time
+args = sys.argv[1:]
+running = os.path.join(os.path.dirname(args[args.index("-oN") + 1]), "running")
+os.makedirs(running, exist_ok=True)
+marker = os.path.join(running, str(os.getpid()))
+open(marker, "w").close()
+time.sleep(0.2)
+with open(args[args.index("-oN") + 1], "w") as f:
+    f.write(f"Nmap scan report for {{args[-1]}}\\n")
+    f.write(f"running {{len(os.listdir(running))}}\\n")
+os.remove(marker)
+"""
+
+def test_host_shards_share_the_concurrency_limit(tmp_path):
+    """Tests that max_concurrency caps host shards across the whole scan."""
+    stub = tmp_path / "nmap"
+    stub.write_text(STUB_NMAP_CONCURRENCY.format(python=sys.executable))
+    stub.chmod(0o755)
+    shard_config = {"by": "hosts", "count": 4, "max_concurrency": 2}
+
+    run_sharded_nmap(str(stub), "-sn -oN {output_file}", ["a", "b", "c", "d"], shard_config, str(tmp_path / "nmap.txt"))
+
+    counts = [
+        int(line.split()[1])
+        for path in (tmp_path / "shards").glob("nmap.shard-*.txt")
+        for line in path.read_text().splitlines() if line.startswith("running")
+    ]
+    assert len(counts) == 4
+    assert max(counts) <= 2
+
+@pytest.fixture
+def wordlist(tmp_path):
+    """Creates a wordlist with uneven line lengths."""
+    path = tmp_path / "words.txt"
+    path.write_text("".join(f"{'w' * (i % 13)}{i}\n" for i in range(1000)) + "admin\nbackup\nlast")
+    return path
+
+def test_wordlist_byte_ranges_split_on_line_boundaries(wordlist):
+    """Tests that every line falls into exactly one byte range."""
+    data = wordlist.read_bytes()
+    ranges = wordlist_byte_ranges(str(wordlist), 6)
+
+    assert len(ranges) == 6
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(data[start - 1:start] == b"\n" for start, _ in ranges[1:])
+    assert b"".join(data[start:end] for start, end in ranges) == data
+
+def test_merge_line_outputs_deduplicates(tmp_path):
+    """Tests that merged output keeps the first copy of each line."""
+    (tmp_path / "a.txt").write_text("/a\n/b\n\n")
+    (tmp_path / "b.txt").write_text("/b\n/c\n")
+
+    count = merge_line_outputs([str(tmp_path / "a.txt"), str(tmp_path / "b.txt")], str(tmp_path / "out.txt"))
+
+    assert count == 3
+    assert (tmp_path / "out.txt").read_text() == "/a\n/b\n/c\n"
+
+def test_run_sharded_wordlist(tmp_path, wordlist):
+    """Tests that workers receive disjoint wordlist ranges and outputs are merged."""
+    stub = tmp_path / "gobuster"
+    stub.write_text(STUB_GOBUSTER.format(python=sys.executable))
+    stub.chmod(0o755)
+    output_path = tmp_path / "gobuster.txt"
+    shard_config = {"by": "wordlist", "count": 3, "wordlist_flag": "-w", "stdin_path": "-"}
+
+    lines, results = run_sharded_wordlist(
+        str(stub), f"dir -u http://{{ip}}/ -w {wordlist} -o {{output_file}}", {"ip": "10.0.0.1"},
+        shard_config, str(output_path)
+    )
+
+    assert len(results) == 3
+    assert all(r.succeeded for r in results)
+    assert "http://10.0.0.1/" in results[0].argv
+    assert output_path.read_text().splitlines() == ["/robots.txt (Status: 200)", "/admin (Status: 301)", "/backup (Status: 301)"]
+    assert lines == 3
+
+STUB_HYDRA = """#!{python}
+import sys
+args = sys.argv[1:]
+path = args[args.index("-P") + 1]
+# Like hydra: count the passwords, then read them again from the start
+total = sum(1 for _ in open(path))
+open("hydra.restore", "w").write(path)
+for password in open(path):
+    if password.strip() in ("admin", "last"):
+        print(f"[22][ssh] host: 10.0.0.1   login: root   password: {{password.strip()}}")
+print(f"{{total}} passwords tried")
+"""
+
+def test_file_mode_shards_read_their_range_twice(tmp_path, wordlist):
+    """Tests that hydra-style shards get their range as a file and keep their state files apart."""
+    stub = tmp_path / "hydra"
+    stub.write_text(STUB_HYDRA.format(python=sys.executable))
+    stub.chmod(0o755)
+    output_path = tmp_path / "hydra.txt"
+    shard_config = {"by": "wordlist", "count": 4, "wordlist_flag": "-P", "wordlist_mode": "file"}
+
+    lines, results = run_sharded_wordlist(
+        str(stub), f"-l root -P {wordlist} ssh://{{ip}}", {"ip": "10.0.0.1"}, shard_config, str(output_path)
+    )
+
+    assert all(r.succeeded for r in results)
+    merged = output_path.read_text().splitlines()
+    assert [line for line in merged if "password:" in line] == [
+        "[22][ssh] host: 10.0.0.1   login: root   password: admin",
+        "[22][ssh] host: 10.0.0.1   login: root   password: last"
+    ]
+    assert sum(int(result.tail[-1].split()[0]) for result in results) == 1003
+    shards = tmp_path / "shards"
+    assert len(list(shards.glob("hydra.shard-*/hydra.restore"))) == 4
+    assert not list(shards.glob("*.wordlist")) and not (tmp_path / "hydra.restore").exists()
+
+def test_run_tool_dispatches_wordlist_shards(tmp_path, wordlist, monkeypatch):
+    """Tests that run_tool runs a wordlist-sharded preset through its workers."""
+    import json
+    from scripts.run_tool import run_tool
+    from scripts.preset_registry import PresetRegistry
+
+    stub = tmp_path / "gobuster"
+    stub.write_text(STUB_GOBUSTER.format(python=sys.executable))
+    stub.chmod(0o755)
+    challenge_path = tmp_path / "Challenge"
+    challenge_path.mkdir()
+    (challenge_path / "metadata.json").write_text(json.dumps({"name": "Challenge", "ip": "10.0.0.1"}))
+    config = {
+        "output_file": "gobuster.txt",
+        "presets": [{
+            "name": "directory-enum",
+            "description": "Sharded directory enumeration.",
+            "command": f"dir -u http://{{ip}}/ -w {wordlist} -o {{output_file}}",
+            "shard": {"by": "wordlist", "count": 2, "stdin_path": "-"}
+        }]
+    }
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "gobuster.json").write_text(json.dumps(config))
+    monkeypatch.setattr("scripts.run_tool.get_registry", lambda: PresetRegistry(str(tmp_path / "config")))
+
+    run_tool(str(stub), "directory-enum", str(challenge_path), use_cache=False)
+
+    assert (challenge_path / "gobuster.txt").read_text().count("(Status: ") == 3
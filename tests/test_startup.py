@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import subprocess
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("jinja2", "pdfkit", "asyncio", "sqlite3", "scripts.report", "scripts.connect_vpn", "scripts.run_tool")
+RUNS = 5
+
+# Cold-start budgets in milliseconds on top of a bare interpreter start, with
+# text each invocation must print; scale them with STARTUP_BUDGET_SCALE on slow
+# machines. Subcommands run against an empty home directory so they exit early
+# without touching real challenges, caches or the network.
+BUDGETS = {
+    "menu": (["main.py"], "Q\n", "Exiting...", 100),
+    "help": (["main.py", "--help"], "", "usage:", 100),
+    "batch": (["main.py", "batch", "--targets", "", "--scenario", "recon"], "", "No targets found", 250),
+    "search": (["main.py", "search", "apache", "--no-update"], "", "0 matches", 150),
+    "reports": (["main.py", "reports", "Missing", "--audited-by", "tester", "--renderer", "stub"], "", "0 PDFs rendered", 200),
+    "precompile-templates": (["main.py", "precompile-templates"], "", "Precompiled", 250),
+    "logs": (["main.py", "logs", "{home}"], "", "Log file not found", 100),
+    "exploits": (["main.py", "exploits", "vsftpd", "2.3.4"], "", "No exploit database", 100),
+    "payloads": (["main.py", "payloads", "--list"], "", "Encodings:", 100),
+    "fuzz": (["main.py", "fuzz", "http://127.0.0.1:1/"], "", "No FUZZ injection point", 200)
+}
+
+def cold_start(args, stdin="", expected="", home=None):
+    """Returns the fastest of several wall-clock times of a fresh interpreter running `args`."""
+    env = dict(os.environ, HOME=home) if home else None
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, *args], cwd=ROOT, input=stdin, capture_output=True, text=True, env=env)
+        timings.append(time.perf_counter() - started)
+        assert expected in result.stdout + result.stderr
+    return min(timings)
+
+def loaded_modules(statement):
+    """Returns the heavy modules loaded after running `statement` in a fresh interpreter."""
+    check = f"import sys; {statement}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", check], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.strip().split(",") if result.stdout.strip() else []
+
+def test_menu_does_not_import_subsystems():
+    """Tests that showing the menu loads no report, PDF, VPN or tool runner code."""
+    assert loaded_modules("import main") == []
+
+def test_batch_skips_report_and_vpn():
+    """Tests that the batch subcommand does not pay for the report and VPN subsystems."""
+    loaded = loaded_modules("import main, scripts.batch")
+    assert "scripts.run_tool" in loaded
+    assert not {"jinja2", "pdfkit", "scripts.report", "scripts.connect_vpn"} & set(loaded)
+
+@pytest.mark.parametrize("name", sorted(BUDGETS))
+def test_cold_start_within_budget(name, tmp_path):
+    """Tests the cold-start time of the menu and each subcommand against its budget."""
+    args, stdin, expected, budget = BUDGETS[name]
+    budget *= float(os.environ.get("STARTUP_BUDGET_SCALE", "1"))
+    args = [arg.format(home=tmp_path) for arg in args]
+
+    baseline = cold_start(["-c", "pass"])
+    elapsed = (cold_start(args, stdin, expected, str(tmp_path)) - baseline) * 1000
+    print(f"{name}: {elapsed:.1f} ms over interpreter start (budget {budget:.0f} ms)")
+    assert elapsed <= budget
@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import time
+import pytest
+from scripts.vpn_session import VPNSession, start_session, wait_for_vpn, STATE_FILE, LOG_FILE
+from exceptions import VPNConnectionError, VPNTimeoutError
+
+STUB_OPENVPN = """#!{python}
+import sys, time
+# Write more than a pipe buffer before the tunnel comes up
+for index in range(4000):
+    print(f"{{index}} TLS handshake detail " + "x" * 64, flush=False)
+sys.stdout.flush()
+time.sleep({delay})
+print("{final}", flush=True)
+time.sleep(60)
+"""
+
+def make_stub(tmp_path, final="Initialization Sequence Completed", delay=0.1, name="openvpn"):
+    """Writes a stub openvpn executable and returns its command prefix."""
+    stub = tmp_path / name
+    stub.write_text(STUB_OPENVPN.format(python=sys.executable, final=final, delay=delay))
+    stub.chmod(0o755)
+    return str(stub)
+
+@pytest.fixture
+def challenge_path(tmp_path):
+    path = tmp_path / "Challenge"
+    path.mkdir()
+    (path / "lab.ovpn").write_text("client\n")
+    return path
+
+def test_session_logs_output_and_detects_readiness(tmp_path, challenge_path):
+    """Tests that a chatty openvpn does not block and readiness is timed."""
+    session = VPNSession(str(challenge_path / "lab.ovpn"), str(challenge_path), make_stub(tmp_path)).start()
+    try:
+        time_to_ready = session.wait_ready(timeout=10)
+        assert 0.1 <= time_to_ready < 10
+        assert session.is_ready
+
+        state = json.loads((challenge_path / STATE_FILE).read_text())
+        assert state["ready"] and state["time_to_ready"] == time_to_ready
+    finally:
+        session.stop()
+
+    assert (challenge_path / LOG_FILE).read_text().count("TLS handshake detail") == 4000
+    assert json.loads((challenge_path / STATE_FILE).read_text())["returncode"] is not None
+
+def test_session_reports_fatal_errors(tmp_path, challenge_path):
+    """Tests that an authentication failure is raised instead of waiting for the timeout."""
+    session = VPNSession(str(challenge_path / "lab.ovpn"), str(challenge_path),
+                         make_stub(tmp_path, final="AUTH: Received control message: AUTH_FAILED")).start()
+
+    with pytest.raises(VPNConnectionError, match="AUTH_FAILED"):
+        session.wait_ready(timeout=10)
+    assert session.process.poll() is not None
+
+def test_session_times_out(tmp_path, challenge_path):
+    """Tests that a tunnel that never comes up times out."""
+    session = VPNSession(str(challenge_path / "lab.ovpn"), str(challenge_path),
+                         make_stub(tmp_path, final="still negotiating", delay=0)).start()
+
+    with pytest.raises(VPNTimeoutError):
+        session.wait_ready(timeout=0.5)
+    assert session.process.poll() is not None
+
+def test_wait_for_vpn(tmp_path, challenge_path):
+    """Tests waiting on the session of this process and on another process's state file."""
+    assert wait_for_vpn(str(tmp_path)) is None
+
+    session = start_session(str(challenge_path / "lab.ovpn"), str(challenge_path), make_stub(tmp_path, delay=0.3))
+    try:
+        assert wait_for_vpn(str(challenge_path), timeout=10) > 0.3
+    finally:
+        session.stop()
+
+    with pytest.raises(VPNConnectionError, match="exited"):
+        wait_for_vpn(str(challenge_path), timeout=1)
+
+def test_stale_state_files_are_ignored(tmp_path, challenge_path, capsys):
+    """Tests that a session left behind by an exited or rebooted openvpn does not block later runs."""
+    states = [
+        {"pid": 2 ** 22 + 1, "config": "lab.ovpn", "ready": True, "returncode": None, "log": "x"},
+        {"pid": os.getpid(), "config": "lab.ovpn", "ready": True, "returncode": 1, "log": "x"},
+        {"pid": os.getpid(), "config": str(challenge_path / "lab.ovpn"), "ready": True, "returncode": None, "log": "x"}
+    ]
+    for state in states:
+        (challenge_path / STATE_FILE).write_text(json.dumps(state))
+        assert wait_for_vpn(str(challenge_path), timeout=1) is None
+        assert "no longer running" in capsys.readouterr().out
+
+def test_output_is_logged_without_a_reader(tmp_path, challenge_path):
+    """Tests that openvpn writes to the log file itself, so it does not depend on this process reading it."""
+    session = VPNSession(str(challenge_path / "lab.ovpn"), str(challenge_path), make_stub(tmp_path, delay=0)).start()
+    log = challenge_path / LOG_FILE
+    try:
+        deadline = time.monotonic() + 10
+        while "Initialization Sequence Completed" not in log.read_text() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert log.read_text().count("TLS handshake detail") == 4000
+        assert session.process.poll() is None
+    finally:
+        session.stop()